@@ -0,0 +1,58 @@
+# benchmarks/baseline.py
+"""
+Сохранённые результаты бенчмарков и сравнение с ними. Базовая линия своя у каждой
+машины: сохраните её (--save-baseline) до изменения и сравнивайте после.
+"""
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+
+def default_path(bench_name: str) -> Path:
+    return BASELINE_DIR / f"{bench_name}-{platform.node() or 'local'}.json"
+
+
+def save(path: Path, metrics: dict, params: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    record = {"saved": time.strftime("%Y-%m-%d %H:%M:%S"), "python": sys.version.split()[0],
+              "params": params, "metrics": metrics}
+    path.write_text(json.dumps(record, indent=2), encoding="utf-8")
+
+
+def load(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def compare(metrics: dict, baseline: dict, directions: dict, tolerance: float) -> list[str]:
+    """
+    Печатает таблицу «было/стало» и возвращает метрики, ухудшившиеся больше чем
+    на tolerance (доля). directions: метрика → 'lower' или 'higher' (что лучше)
+    """
+    old = baseline.get("metrics", {})
+    regressions = []
+    print(f"\ncompared with baseline of {baseline.get('saved', '?')} (tolerance {tolerance:.0%}):")
+    for name, better in directions.items():
+        if name not in metrics or not old.get(name):
+            continue
+        change = metrics[name] / old[name] - 1
+        worse = change > tolerance if better == "lower" else change < -tolerance
+        mark = "REGRESSION" if worse else ""
+        print(f"  {name:28}{old[name]:14.4g}{metrics[name]:14.4g}{change:+9.1%}  {mark}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def check_params(params: dict, baseline: dict) -> bool:
+    """Сравнивать имеет смысл только замеры с теми же параметрами"""
+    if baseline.get("params") != params:
+        print(f"\nbaseline was measured with different parameters: {baseline.get('params')}")
+        return False
+    return True
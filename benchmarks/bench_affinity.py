@@ -0,0 +1,143 @@
+# benchmarks/bench_affinity.py
+"""
+Пропускная способность одновременно идущих заданий с привязкой к ядрам
+(cpu_topology) и без неё.
+
+Каждое «задание» — группа процессов-рангов, как у ORCA с %pal nprocs N. По умолчанию
+ранги — синтетическая нагрузка (вычисления + копирование больших буферов, чтобы
+задания делили пропускную способность памяти). С --orca и --inp запускаются
+настоящие копии входа, каждая в своей временной папке.
+
+    python benchmarks/bench_affinity.py --jobs 4 --ranks 4 --runs 3
+    python benchmarks/bench_affinity.py --orca /opt/orca/orca --inp bench.inp --jobs 2
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+import cpu_topology  # noqa: E402
+
+# Один ранг синтетического задания: арифметика и проходы по буферу больше L3-кэша
+RANK_SCRIPT = r"""
+import sys
+size_mb, rounds = int(sys.argv[1]), int(sys.argv[2])
+buf = bytearray(size_mb * 1024 * 1024)
+acc = 0
+for i in range(rounds):
+    buf[::4096] = bytes([i & 0xFF]) * len(buf[::4096])
+    copy = bytes(buf)
+    acc += sum(range(200000)) + copy[-1]
+print(acc)
+"""
+
+
+def launch_synthetic(ranks: int, cpus, size_mb: int, rounds: int) -> list[subprocess.Popen]:
+    procs = [subprocess.Popen([sys.executable, "-c", RANK_SCRIPT, str(size_mb), str(rounds)],
+                              stdout=subprocess.DEVNULL)
+             for _ in range(ranks)]
+    for proc in procs if cpus else ():
+        cpu_topology.pin_process(proc.pid, cpus)
+    return procs
+
+
+def launch_orca(orca: Path, inp: Path, cpus, workdir: Path) -> list[subprocess.Popen]:
+    env = dict(os.environ)
+    if cpus:
+        env.update(cpu_topology.pinning_environment(cpus))
+    shutil.copy2(inp, workdir / inp.name)
+    with open(workdir / (inp.stem + ".out"), 'w') as out:
+        proc = subprocess.Popen([str(orca), inp.name], cwd=workdir, stdout=out,
+                                stderr=subprocess.STDOUT, env=env)
+    if cpus:
+        cpu_topology.pin_process(proc.pid, cpus)
+    return [proc]
+
+
+def run_batch(args, pinned: bool) -> dict:
+    """Все задания стартуют одновременно; время задания — до выхода последнего ранга"""
+    with tempfile.TemporaryDirectory() as tmp:
+        allocator = cpu_topology.CpuAllocator(Path(tmp) / "cpus.json")
+        jobs = []
+        t0 = time.perf_counter()
+        for n in range(args.jobs):
+            cpus = None
+            allocation = allocator.allocate(args.ranks) if pinned else None
+            if allocation:
+                cpus = allocation[1]
+            workdir = Path(tmp) / f"job{n}"
+            workdir.mkdir()
+            if args.orca:
+                procs = launch_orca(args.orca, args.inp, cpus, workdir)
+            else:
+                procs = launch_synthetic(args.ranks, cpus, args.buffer_mb, args.rounds)
+            jobs.append(procs)
+        # Опрос, а не wait() по порядку: время каждого задания — момент выхода его последнего ранга
+        finished = {}
+        while len(finished) < len(jobs):
+            for n, procs in enumerate(jobs):
+                if n not in finished and all(proc.poll() is not None for proc in procs):
+                    finished[n] = time.perf_counter() - t0
+            time.sleep(0.01)
+        durations = list(finished.values())
+        wall = max(durations)
+    return {"wall": wall, "mean_job": statistics.mean(durations),
+            "spread": max(durations) - min(durations), "jobs_per_hour": args.jobs * 3600 / wall}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    topology = cpu_topology.Topology.detect()
+    default_ranks = max(1, topology.cpu_count // 4)
+    parser.add_argument("--jobs", type=int, default=4, help="concurrent jobs")
+    parser.add_argument("--ranks", type=int, default=default_ranks, help="processes per job (%%pal nprocs)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--buffer-mb", type=int, default=64, help="synthetic: buffer per rank")
+    parser.add_argument("--rounds", type=int, default=20, help="synthetic: passes over the buffer")
+    parser.add_argument("--orca", type=Path, help="run real ORCA instead of the synthetic load")
+    parser.add_argument("--inp", type=Path, help="input for --orca (nprocs should match --ranks)")
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args()
+    if not cpu_topology.PINNING_SUPPORTED:
+        parser.error("CPU pinning is not supported on this platform")
+    if bool(args.orca) != bool(args.inp):
+        parser.error("--orca and --inp go together")
+    if args.inp:
+        args.inp = args.inp.resolve()
+
+    samples = {"unpinned": [], "pinned": []}
+    # Чередуем режимы, чтобы дрейф частоты/температуры не достался одному из них
+    for _ in range(args.runs):
+        for mode in samples:
+            samples[mode].append(run_batch(args, pinned=(mode == "pinned")))
+    summary = {mode: {key: statistics.median(s[key] for s in runs) for key in runs[0]}
+               for mode, runs in samples.items()}
+
+    if args.json:
+        print(json.dumps({"topology": topology.nodes, "samples": samples, "median": summary}, indent=2))
+        return
+    nodes = ", ".join(f"node{node}: {cpu_topology.format_cpulist(cpus)}" for node, cpus in topology.nodes.items())
+    print(f"CPUs: {topology.cpu_count} ({nodes})")
+    print(f"jobs: {args.jobs} x {args.ranks} ranks, runs: {args.runs}, "
+          f"load: {'ORCA ' + args.inp.name if args.orca else 'synthetic'}")
+    if args.jobs * args.ranks > topology.cpu_count:
+        print(f"  note: {args.jobs * args.ranks} ranks > {topology.cpu_count} CPUs; "
+              f"jobs that do not fit run unpinned")
+    print(f"  {'':10}{'wall, s':>10}{'job, s':>10}{'spread, s':>11}{'jobs/h':>10}")
+    for mode, s in summary.items():
+        print(f"  {mode:10}{s['wall']:10.2f}{s['mean_job']:10.2f}{s['spread']:11.2f}{s['jobs_per_hour']:10.0f}")
+    gain = summary["unpinned"]["wall"] / summary["pinned"]["wall"] - 1
+    print(f"  pinned throughput: {gain:+.1%}")
+
+
+if __name__ == "__main__":
+    main()
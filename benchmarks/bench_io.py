@@ -0,0 +1,209 @@
+# benchmarks/bench_io.py
+"""
+Скорость разбора и ввода-вывода на синтетических выводах ORCA (synth_output):
+оптимизация, частоты, DLPNO — от 1 МБ до 5 ГБ.
+
+    parse    OrcaParser.parse (как после каждого задания очереди)
+    copy     цикл OrcaJob: stdout процесса → .out и проверка завершения
+    find     FindDialog.find_all по открытому файлу
+    open     FileLoader + setPlainText (открытие файла в окне)
+    reload   повторное чтение и setPlainText открытого файла (как reload_current_file)
+
+Каждый замер — отдельный процесс, поэтому пиковая память (RSS) своя у каждого случая.
+Сгенерированные файлы кэшируются в --data-dir.
+
+    python benchmarks/bench_io.py --sizes 1 16 128 --save-baseline
+    python benchmarks/bench_io.py --sizes 1 16 128            # сравнение с базовой линией
+    python benchmarks/bench_io.py --sizes 5120 --cases parse copy
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(REPO_DIR))
+
+import baseline  # noqa: E402
+import synth_output  # noqa: E402
+
+CASES = ("parse", "copy", "find", "open", "reload")
+# Случаи с редактором: текст целиком в QPlainTextEdit
+GUI_CASES = {"find", "open", "reload"}
+# Меняется при изменении генератора — старые файлы в кэше не используются
+DATA_VERSION = 1
+
+
+# === Замеры (в дочернем процессе) ===
+def _case_parse(path: Path, work: Path) -> float:
+    from orca_parser import OrcaParser
+    parser = OrcaParser()
+    t0 = time.perf_counter()
+    parser.parse(path, work)
+    return time.perf_counter() - t0
+
+
+def _case_copy(path: Path, work: Path) -> float:
+    from orca_job import OrcaJob
+    exe = work / "cat_orca"
+    exe.write_text(f'#!/bin/sh\nexec cat "{path}"\n')
+    exe.chmod(0o755)
+    inp = work / "job.inp"
+    inp.write_text("! PBE\n")
+    job = OrcaJob(exe, inp, work / "Results" / "job.out")
+    results = []
+    job.finished.connect(lambda name, success, out: results.append(success))
+    job.error_occurred.connect(lambda name, error: results.append(error))
+    t0 = time.perf_counter()
+    job.run()
+    elapsed = time.perf_counter() - t0
+    if results != [True]:
+        raise RuntimeError(f"copy loop failed: {results}")
+    return elapsed
+
+
+def _editor():
+    from PySide6.QtWidgets import QApplication, QPlainTextEdit
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    editor = QPlainTextEdit()
+    editor.setReadOnly(False)
+    return app, editor
+
+
+def _case_find(path: Path, work: Path) -> float:
+    from find_dialog import FindDialog
+    app, editor = _editor()
+    editor.setPlainText(path.read_text(encoding='utf-8', errors='replace'))
+    dialog = FindDialog(editor)
+    dialog.search_input.setText("FINAL SINGLE POINT ENERGY")
+    t0 = time.perf_counter()
+    dialog.find_all()
+    return time.perf_counter() - t0
+
+
+def _load_into(editor, path: Path):
+    from file_loader import FileLoader
+    loader = FileLoader(path)
+    texts = []
+    loader.loaded.connect(lambda p, text: texts.append(text))
+    loader.run()
+    editor.setPlainText(texts[0])
+
+
+def _case_open(path: Path, work: Path) -> float:
+    app, editor = _editor()
+    t0 = time.perf_counter()
+    _load_into(editor, path)
+    return time.perf_counter() - t0
+
+
+def _case_reload(path: Path, work: Path) -> float:
+    app, editor = _editor()
+    _load_into(editor, path)
+    t0 = time.perf_counter()
+    with open(path, 'r', encoding='utf-8') as f:
+        editor.setPlainText(f.read())
+    return time.perf_counter() - t0
+
+
+def run_child(case: str, path: Path):
+    with tempfile.TemporaryDirectory() as tmp:
+        seconds = globals()[f"_case_{case}"](path, Path(tmp))
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"seconds": seconds, "rss_mb": rss_mb}))
+
+
+# === Управление ===
+def data_file(data_dir: Path, kind: str, size_mb: int) -> Path:
+    # Раскладка проекта: parse.json попадает в data_dir, имя расчёта — <kind>-<size>
+    path = data_dir / f"{kind}-{size_mb}MB" / "Results" / f"{kind}-{size_mb}MB-v{DATA_VERSION}.out"
+    if not path.is_file():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        t0 = time.perf_counter()
+        tmp = path.with_suffix(".part")
+        synth_output.write_output(tmp, kind, size_mb * 1024 * 1024)
+        os.replace(tmp, path)
+        print(f"  generated {path.name} in {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+    return path
+
+
+def measure(case: str, path: Path) -> dict:
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    proc = subprocess.run([sys.executable, __file__, "--child", case, str(path)],
+                          capture_output=True, text=True, env=env)
+    for line in proc.stdout.splitlines():
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(f"{case} on {path.name} failed:\n{proc.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 16, 128], help="output sizes, MB")
+    parser.add_argument("--kinds", nargs="+", choices=synth_output.KINDS, default=list(synth_output.KINDS))
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--gui-max-mb", type=int, default=512,
+                        help="skip editor cases (find/open/reload) for larger files")
+    parser.add_argument("--data-dir", type=Path, default=Path(tempfile.gettempdir()) / "orcaui-bench-data")
+    parser.add_argument("--baseline", type=Path, help="baseline file (default: per-host file in baselines/)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs baseline")
+    parser.add_argument("--json", action="store_true", help="print metrics as JSON")
+    parser.add_argument("--child", nargs=2, metavar=("CASE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args.child[0], Path(args.child[1]))
+        return
+
+    metrics, directions = {}, {}
+    if not args.json:
+        print(f"{'case':8}{'kind':7}{'size':>8}{'MB/s':>10}{'time, s':>10}{'RSS, MB':>10}")
+    for size_mb in args.sizes:
+        for kind in args.kinds:
+            path = data_file(args.data_dir, kind, size_mb)
+            size = path.stat().st_size / 2 ** 20
+            for case in args.cases:
+                if case in GUI_CASES and size_mb > args.gui_max_mb:
+                    continue
+                samples = [measure(case, path) for _ in range(args.runs)]
+                seconds = statistics.median(s["seconds"] for s in samples)
+                rss = max(s["rss_mb"] for s in samples)
+                key = f"{case}/{kind}/{size_mb}MB"
+                metrics[f"{key}/mbps"] = size / seconds
+                metrics[f"{key}/rss_mb"] = rss
+                directions[f"{key}/mbps"] = "higher"
+                directions[f"{key}/rss_mb"] = "lower"
+                if not args.json:
+                    print(f"{case:8}{kind:7}{size_mb:>6}MB{size / seconds:10.1f}{seconds:10.3f}{rss:10.1f}",
+                          flush=True)
+    if args.json:
+        print(json.dumps(metrics, indent=2))
+
+    params = {"runs": args.runs}
+    path = args.baseline or baseline.default_path("bench_io")
+    if args.save_baseline:
+        # Новые замеры дополняют сохранённые (разные размеры можно мерить по очереди)
+        saved = baseline.load(path)
+        merged = dict(saved["metrics"]) if saved and saved.get("params") == params else {}
+        merged.update(metrics)
+        baseline.save(path, merged, params)
+        print(f"\nbaseline saved to {path}")
+        return
+    saved = baseline.load(path)
+    if saved and baseline.check_params(params, saved):
+        if baseline.compare(metrics, saved, directions, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
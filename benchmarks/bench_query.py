@@ -0,0 +1,119 @@
+# benchmarks/bench_query.py
+"""
+Запрос результатов многих проектов: индекс results_query против чтения и слияния
+всех parse.json (как делали блокноты анализа).
+
+Синтетические проекты — parse.json с N расчётами и метками как у OrcaParser
+(энергии, термохимия, Timings, Input). Замеры: слияние всех parse.json в таблицу,
+первое построение индекса, запрос без изменений, запрос после изменения одного
+проекта, экспорт результата в CSV и .npz.
+
+    python benchmarks/bench_query.py --projects 200 --calcs 100
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+import numpy as np  # noqa: E402
+
+from results_query import ResultsIndex  # noqa: E402
+from results_store import PARSE_FILE_NAME, ResultsTable  # noqa: E402
+
+LABELS = ("Energy", "ZPE", "Temperature", "Electronic energy", "Thermal correction", "Enthalpy",
+          "Entropy term", "Gibbs", "G-E(el)")
+
+
+def make_projects(root: Path, projects: int, calcs: int) -> list[Path]:
+    rng = np.random.default_rng(0)
+    roots = []
+    for p in range(projects):
+        project = root / f"project_{p:04d}"
+        project.mkdir(parents=True)
+        data = {}
+        for c in range(calcs):
+            values = {label: float(v) for label, v in zip(LABELS, rng.normal(-500, 50, len(LABELS)))}
+            values["Timings"] = {"SCF iterations": 12.5, "TOTAL RUN TIME": 80.0}
+            values["Input"] = {"nprocs": 8, "maxcore": 2000, "method": "r2SCAN-3c", "atoms": 40}
+            data[f"conf_{c:04d}_{'ts' if c % 10 == 0 else 'min'}"] = values
+        with open(project / PARSE_FILE_NAME, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        roots.append(project)
+    return roots
+
+
+def merge_parse_files(roots: list[Path]) -> int:
+    """Как блокнот: открыть каждый parse.json и слить в одну таблицу"""
+    rows = 0
+    for project in roots:
+        rows += len(ResultsTable.load(project))
+    return rows
+
+
+def timed(func, runs: int) -> tuple[float, object]:
+    times, result = [], None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times), result
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--calcs", type=int, default=100, help="calculations per project")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="orcaui-bench-query-") as tmp:
+        tmp = Path(tmp)
+        roots = make_projects(tmp / "projects", args.projects, args.calcs)
+        total = args.projects * args.calcs
+        print(f"{args.projects} projects × {args.calcs} calculations = {total} rows")
+
+        merge_s, rows = timed(lambda: merge_parse_files(roots), args.runs)
+        index = ResultsIndex(tmp / "index.sqlite")
+        for project in roots:
+            index.add_project(project)
+        t0 = time.perf_counter()
+        index.update()
+        build_s = time.perf_counter() - t0
+
+        all_s, result = timed(lambda: index.query(labels=["Energy", "Gibbs"]), args.runs)
+        assert len(result) == rows
+        ts_s, ts = timed(lambda: index.query(name="*_ts", labels=["Gibbs"]), args.runs)
+
+        def touch_one():
+            # Один проект получил новое задание — перечитывается только он
+            with open(roots[0] / PARSE_FILE_NAME, 'r+', encoding='utf-8') as f:
+                data = json.load(f)
+                data[f"new_{time.perf_counter_ns()}"] = {"Energy": -1.0}
+                f.seek(0)
+                json.dump(data, f, indent=2)
+                f.truncate()
+            return index.query(name="*_ts", labels=["Gibbs"])
+
+        touched_s, _ = timed(touch_one, args.runs)
+        csv_s, _ = timed(lambda: result.to_csv(tmp / "out.csv"), args.runs)
+        npz_s, _ = timed(lambda: result.to_npz(tmp / "out.npz"), args.runs)
+        index.close()
+
+    print(f"  {'merge all parse.json':<34}{merge_s * 1000:10.1f} ms")
+    print(f"  {'index: first build':<34}{build_s * 1000:10.1f} ms")
+    print(f"  {'index: query all, 2 labels':<34}{all_s * 1000:10.1f} ms")
+    print(f"  {'index: query *_ts':<34}{ts_s * 1000:10.1f} ms  ({len(ts)} rows)")
+    print(f"  {'index: query after 1 project changed':<34}{touched_s * 1000:10.1f} ms")
+    print(f"  {'export CSV':<34}{csv_s * 1000:10.1f} ms")
+    print(f"  {'export npz':<34}{npz_s * 1000:10.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+# benchmarks/bench_queue.py
+"""
+Нагрузочный тест очереди: тысячи заданий через OrcaQueue/OrcaJob с фальшивым orca
+(fake_orca.py) и модель списка очереди, как в окне.
+
+Проверяет, что каждое задание закончилось ожидаемым статусом (успех, ошибка,
+падение процесса, зависание → сторож) и что энергии успешных попали в parse.json.
+Измеряет накладные расходы очереди между заданиями, время задания, процессорное
+время и память управляющего процесса, накладные расходы на задание (job_trace),
+поток сигналов статусов и объём журнала.
+
+    python benchmarks/bench_queue.py --jobs 2000
+    python benchmarks/bench_queue.py --jobs 2000 --save-baseline    # до изменения
+    python benchmarks/bench_queue.py --jobs 2000                    # после: сравнение
+
+Код выхода: 0 — всё верно, 1 — регрессия относительно базовой линии,
+2 — неверные результаты заданий.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QThread, QTimer  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+import baseline  # noqa: E402
+import orca_queue  # noqa: E402
+import synth_output  # noqa: E402
+from queue_model import QueueListModel  # noqa: E402
+
+FAKE_ORCA = BENCH_DIR / "fake_orca.py"
+
+# Что лучше для каждой метрики — для сравнения с базовой линией
+DIRECTIONS = {
+    "gap_p50_ms": "lower",
+    "gap_p95_ms": "lower",
+    "job_p50_ms": "lower",
+    "overhead_p50_ms": "lower",
+    "overhead_p95_ms": "lower",
+    "driver_cpu_per_job_ms": "lower",
+    "jobs_per_s": "higher",
+    "peak_rss_mb": "lower",
+    "log_kb_per_job": "lower",
+}
+
+EXPECTED = {
+    "ok": orca_queue.SUCCESS,
+    "fail": orca_queue.FAILED,
+    "crash": orca_queue.FAILED,
+    "hang": orca_queue.STALLED,
+}
+
+DIRECTIVES = {
+    "ok": "",
+    "fail": "fail=error exit=1",
+    "crash": "fail=crash",
+    "hang": "fail=hang",
+}
+
+INPUT = """! PBE def2-SVP
+# fake: cycles={cycles} filler={filler} delay={delay} {directive}
+* xyz 0 1
+O   0.000000   0.000000   0.000000
+H   0.000000   0.000000   0.960000
+H   0.930000   0.000000  -0.240000
+*
+"""
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def make_jobs(root: Path, args) -> tuple[list[tuple], dict[str, str]]:
+    """Входы в раскладке проекта (<project>/<calc>/Inputs/<calc>.inp) и ожидаемый вид каждого"""
+    rng = random.Random(0)
+    jobs, kinds = [], {}
+    for n in range(args.jobs):
+        draw = rng.random()
+        kind = "ok"
+        for candidate, share in (("fail", args.fail), ("crash", args.crash), ("hang", args.hang)):
+            if draw < share:
+                kind = candidate
+                break
+            draw -= share
+        name = f"job{n:05d}"
+        inputs = root / f"project{n % args.projects}" / name / "Inputs"
+        inputs.mkdir(parents=True)
+        inp = inputs / f"{name}.inp"
+        inp.write_text(INPUT.format(cycles=args.cycles, filler=args.filler, delay=args.delay,
+                                    directive=DIRECTIVES[kind]))
+        jobs.append((inp, inputs.parent / "Results" / f"{name}.out"))
+        kinds[f"{name}.inp"] = kind
+    return jobs, kinds
+
+
+class Recorder:
+    """Время сигналов очереди в порядке получения главным потоком"""
+
+    def __init__(self, queue, model):
+        self.events = []
+        self.status_signals = 0
+        self.model_updates = 0
+        queue.job_started.connect(lambda name: self.events.append(("start", name, time.perf_counter())))
+        for signal in (queue.job_finished, queue.error_occurred, queue.job_timed_out):
+            signal.connect(lambda name, *_: self.events.append(("end", name, time.perf_counter())))
+        queue.job_status_changed.connect(self._on_status)
+        if model is not None:
+            model.dataChanged.connect(self._on_model_update)
+
+    def _on_status(self, *_):
+        self.status_signals += 1
+
+    def _on_model_update(self, *_):
+        self.model_updates += 1
+
+    def timings(self) -> tuple[list[float], list[float]]:
+        """Длительности заданий и промежутки «конец задания → старт следующего»"""
+        started, durations, gaps = {}, [], []
+        last_end = None
+        for kind, name, t in self.events:
+            if kind == "start":
+                started[name] = t
+                if last_end is not None:
+                    gaps.append(t - last_end)
+            elif name in started:
+                durations.append(t - started.pop(name))
+                last_end = t
+        return durations, gaps
+
+
+def check_results(queue, kinds: dict, root: Path) -> list[str]:
+    problems = []
+    for job in queue.jobs:
+        expected = EXPECTED[kinds[job['inp'].name]]
+        if job['status'] != expected:
+            problems.append(f"{job['inp'].name}: {job['status']} (expected {expected})")
+    energies = {}
+    for parse_file in root.glob("project*/parse.json"):
+        energies.update(json.loads(parse_file.read_text()))
+    for name, kind in kinds.items():
+        calc = Path(name).stem
+        if kind == "ok":
+            found = energies.get(calc, {}).get("Energy")
+            if found is None or abs(found - synth_output.reference_energy(calc)) > 1e-9:
+                problems.append(f"{calc}: energy in parse.json is {found}")
+    return problems
+
+
+def run(args) -> tuple[dict, list[str], dict]:
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    orca_queue.WATCHDOG_INTERVAL_MS = 100
+    os.environ["FAKE_ORCA"] = ""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        jobs, kinds = make_jobs(root, args)
+        log_dir = root / "logs"
+        queue = orca_queue.OrcaQueue(FAKE_ORCA, log_dir=log_dir)
+        # Зависшие задания снимает сторож: ~0.6 с без вывода
+        queue.stall_limit = 0.01
+        model = None if args.no_model else QueueListModel(queue)
+        queue.add_jobs(jobs)
+        recorder = Recorder(queue, model)
+
+        queue.queue_finished.connect(app.quit)
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        t0 = time.perf_counter()
+        QTimer.singleShot(0, queue.start)
+        app.exec()
+        wall = time.perf_counter() - t0
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        for thread in app.findChildren(QThread):
+            thread.quit()
+            thread.wait()
+
+        problems = check_results(queue, kinds, root)
+        durations, gaps = recorder.timings()
+        log_bytes = sum(f.stat().st_size for f in log_dir.glob("*.log"))
+        # Накладные расходы менеджера на задание по его же хронологии (job_trace)
+        overheads = [trace.overhead() for trace in queue.trace.jobs() if trace.outcome]
+        cpu = (usage.ru_utime - usage_before.ru_utime) + (usage.ru_stime - usage_before.ru_stime)
+        metrics = {
+            "wall_s": wall,
+            "jobs_per_s": args.jobs / wall,
+            "job_p50_ms": statistics.median(durations) * 1000,
+            "job_p95_ms": percentile(durations, 0.95) * 1000,
+            "gap_p50_ms": statistics.median(gaps) * 1000 if gaps else 0.0,
+            "gap_p95_ms": percentile(gaps, 0.95) * 1000,
+            "gap_max_ms": max(gaps, default=0.0) * 1000,
+            "overhead_p50_ms": statistics.median(overheads) * 1000,
+            "overhead_p95_ms": percentile(overheads, 0.95) * 1000,
+            "driver_cpu_per_job_ms": cpu / args.jobs * 1000,
+            "status_signals_per_s": recorder.status_signals / wall,
+            "model_updates": recorder.model_updates,
+            "peak_rss_mb": usage.ru_maxrss / 1024,
+            "log_kb_per_job": log_bytes / 1024 / args.jobs,
+        }
+        counts = {kind: list(kinds.values()).count(kind) for kind in EXPECTED}
+    return metrics, problems, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--projects", type=int, default=10, help="project roots (parse.json files)")
+    parser.add_argument("--fail", type=float, default=0.02, help="share of jobs ending with an ORCA error")
+    parser.add_argument("--crash", type=float, default=0.01, help="share of jobs killed by a signal")
+    parser.add_argument("--hang", type=float, default=0.002, help="share of hanging jobs (stall watchdog)")
+    parser.add_argument("--cycles", type=int, default=3, help="optimisation cycles per job")
+    parser.add_argument("--filler", type=int, default=200, help="extra output lines per cycle")
+    parser.add_argument("--delay", type=float, default=0.0, help="pause between cycles, s")
+    parser.add_argument("--no-model", action="store_true", help="do not attach the queue list model")
+    parser.add_argument("--baseline", type=Path, help="baseline file (default: per-host file in baselines/)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed slowdown vs baseline")
+    parser.add_argument("--json", action="store_true", help="print metrics as JSON")
+    args = parser.parse_args()
+
+    params = {key: getattr(args, key) for key in
+              ("jobs", "projects", "fail", "crash", "hang", "cycles", "filler", "delay", "no_model")}
+    metrics, problems, counts = run(args)
+
+    if args.json:
+        print(json.dumps({"params": params, "metrics": metrics, "problems": problems}, indent=2))
+    else:
+        print(f"jobs: {args.jobs} ({', '.join(f'{k}: {v}' for k, v in counts.items())}), "
+              f"projects: {args.projects}, cycles: {args.cycles}, filler: {args.filler}")
+        for name, value in metrics.items():
+            print(f"  {name:28}{value:12.3f}")
+    if problems:
+        print(f"\n{len(problems)} job(s) ended wrong:", file=sys.stderr)
+        for problem in problems[:20]:
+            print(f"  {problem}", file=sys.stderr)
+        sys.exit(2)
+
+    path = args.baseline or baseline.default_path("bench_queue")
+    if args.save_baseline:
+        baseline.save(path, metrics, params)
+        print(f"\nbaseline saved to {path}")
+        return
+    saved = baseline.load(path)
+    if saved and baseline.check_params(params, saved):
+        if baseline.compare(metrics, saved, DIRECTIONS, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/bench_startup.py
+"""
+Время холодного старта OrcaGUI: от запуска интерпретатора до первой отрисовки
+окна (time-to-first-paint) и до восстановления последнего открытого файла.
+
+Каждый замер — отдельный процесс с временной папкой приложения, в state.json
+которой записан большой .out, как у пользователя после вчерашнего расчёта.
+
+    python benchmarks/bench_startup.py --runs 5 --out-mb 200
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# Выполняется в дочернем процессе. Время отсчитывается от момента запуска процесса,
+# переданного родителем, поэтому в замер входит и старт интерпретатора
+CHILD_SCRIPT = r"""
+import sys, time, json
+t_spawn = float(sys.argv[1])
+app_dir = sys.argv[2]
+sys.path.insert(0, sys.argv[3])
+from pathlib import Path
+t0 = time.time()
+import main
+t_import = time.time()
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QObject, QEvent, QTimer
+
+app = QApplication(sys.argv[:1])
+main.OrcaGUI.get_app_dir = lambda self: Path(app_dir)
+marks = {"import_main": t_import - t0}
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and "first_paint" not in marks:
+            marks["first_paint"] = time.time() - t_spawn
+        return False
+
+window = main.OrcaGUI()
+watcher = FirstPaint()
+window.installEventFilter(watcher)
+window.show()
+
+def poll():
+    if window.current_file is not None and "file_restored" not in marks:
+        marks["file_restored"] = time.time() - t_spawn
+    if "first_paint" in marks and "file_restored" in marks:
+        print(json.dumps(marks))
+        app.quit()
+    else:
+        QTimer.singleShot(5, poll)
+
+QTimer.singleShot(0, poll)
+QTimer.singleShot(120000, app.quit)
+app.exec()
+"""
+
+
+def make_app_dir(root: Path, out_mb: int) -> Path:
+    app_dir = root / "app"
+    project = root / "project"
+    results = project / "calc" / "Results"
+    results.mkdir(parents=True)
+    (app_dir / "logs").mkdir(parents=True)
+    out_path = results / "big.out"
+    block = ("  ITER       Energy         Delta-E        Max-DP      RMS-DP\n"
+             "    0   -1234.5678901234   0.000000e+00  1.23e-02  4.56e-04\n") * 1000
+    with open(out_path, 'w', encoding='utf-8') as f:
+        written = 0
+        while written < out_mb * 1024 * 1024:
+            f.write(block)
+            written += len(block)
+        f.write("****ORCA TERMINATED NORMALLY****\n")
+    state = {"root_path": str(project), "current_file": str(out_path), "queue": []}
+    (app_dir / "state.json").write_text(json.dumps(state), encoding='utf-8')
+    return app_dir
+
+
+def run_once(app_dir: Path) -> dict:
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    t_spawn = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, repr(t_spawn), str(app_dir), str(REPO_DIR)],
+        capture_output=True, text=True, env=env, timeout=180
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(f"Child failed:\n{proc.stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out-mb", type=int, default=100, help="size of the restored .out")
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app_dir = make_app_dir(Path(tmp), args.out_mb)
+        samples = [run_once(app_dir) for _ in range(args.runs)]
+
+    summary = {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+    if args.json:
+        print(json.dumps({"samples": samples, "median": summary}, indent=2))
+        return
+    print(f"runs: {args.runs}, restored file: {args.out_mb} MB")
+    print(f"  import main      {summary['import_main'] * 1000:8.1f} ms")
+    print(f"  first paint      {summary['first_paint'] * 1000:8.1f} ms")
+    print(f"  file restored    {summary['file_restored'] * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
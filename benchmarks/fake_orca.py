@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# benchmarks/fake_orca.py
+"""
+Фальшивый исполняемый файл orca для проверки и нагрузочного тестирования очереди
+без настоящих расчётов. Укажите его как ORCA path (Settings, --orca).
+
+Поведение задаётся директивами — в комментарии входа или в переменной окружения
+FAKE_ORCA (директивы входа важнее):
+
+    # fake: cycles=5 scf=12 delay=0.01
+    FAKE_ORCA="fail=error exit=1" python orca_cli.py --orca benchmarks/fake_orca.py calc/
+
+    cycles=N     циклов оптимизации (1 — одиночная точка)
+    scf=N        итераций SCF на цикл
+    filler=N     дополнительных строк на цикл (объём вывода)
+    delay=S      пауза между циклами, секунды
+    replay=PATH  воспроизвести записанный .out (путь от папки входа) вместо синтетики
+    rate=L       replay: строк в секунду (0 — без пауз)
+    fail=MODE    error — ошибка ORCA без нормального завершения; crash — SIGKILL самому
+                 себе; hang — перестать писать и ждать (проверка сторожа очереди)
+    at=F         доля вывода, после которой происходит fail (0..1, по умолчанию 0.5)
+    hang=S       сколько ждать при fail=hang (по умолчанию — пока не убьют)
+    exit=N       код выхода (для fail=error по умолчанию 1)
+    files=LIST   какие файлы оставить рядом со входом при успехе (по умолчанию gbw,xyz;
+                 trj — траектория <имя>_trj.xyz)
+"""
+import os
+import re
+import signal
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import synth_output  # noqa: E402
+
+_DIRECTIVE_RE = re.compile(r"^\s*#\s*fake:(.*)$", re.IGNORECASE | re.MULTILINE)
+
+DEFAULTS = {
+    "cycles": "1", "scf": "12", "filler": "0", "delay": "0", "replay": "", "rate": "0",
+    "fail": "", "at": "0.5", "hang": "", "exit": "", "files": "gbw,xyz",
+}
+
+# Если во входе нет декартовых координат (xyzfile, int)
+FALLBACK_ATOMS = [("H", 0.0, 0.0, 0.0), ("H", 0.0, 0.0, 0.74)]
+
+
+def parse_directives(text: str) -> dict:
+    options = {}
+    for token in text.split():
+        key, _, value = token.partition("=")
+        options[key.strip().lower()] = value.strip()
+    return options
+
+
+def read_options(inp_text: str) -> dict:
+    options = dict(DEFAULTS)
+    options.update(parse_directives(os.environ.get("FAKE_ORCA", "")))
+    for match in _DIRECTIVE_RE.finditer(inp_text):
+        options.update(parse_directives(match.group(1)))
+    return options
+
+
+def read_atoms(inp_path: Path) -> list[tuple]:
+    from orca_input import parse_input
+    try:
+        inp = parse_input(inp_path)
+    except Exception:
+        return FALLBACK_ATOMS
+    if inp.atoms:
+        return [(a.symbol, a.x, a.y, a.z) for a in inp.atoms]
+    if inp.coord_file:
+        xyz = inp.resolve(inp.coord_file)
+        try:
+            lines = xyz.read_text().splitlines()
+            atoms = []
+            for line in lines[2:2 + int(lines[0])]:
+                symbol, x, y, z = line.split()[:4]
+                atoms.append((symbol, float(x), float(y), float(z)))
+            return atoms
+        except (OSError, ValueError, IndexError):
+            pass
+    return FALLBACK_ATOMS
+
+
+def fail(options: dict, out):
+    """Сбой посреди вывода; для error — возвращает код выхода"""
+    mode = options["fail"]
+    out.flush()
+    if mode == "crash":
+        os.kill(os.getpid(), signal.SIGKILL)
+    if mode == "hang":
+        deadline = time.monotonic() + float(options["hang"] or "inf")
+        while time.monotonic() < deadline:
+            time.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+        return int(options["exit"] or 0)
+    out.write("\nORCA finished by error termination in SCF\n"
+              "Calling Command: mpirun -np 1 orca_scf_mpi fake.gbw b fake\n"
+              "[file orca_tools/qcmsg.cpp, line 394]:\n  .... aborting the run\n\n")
+    out.flush()
+    return int(options["exit"] or 1)
+
+
+def stream_replay(path: Path, rate: float, fail_at: float | None, options: dict, out) -> int | None:
+    lines = path.read_text(encoding="utf-8", errors="replace").splitlines(keepends=True)
+    cut = int(len(lines) * fail_at) if fail_at is not None else None
+    pause = 1.0 / rate if rate > 0 else 0.0
+    for i, line in enumerate(lines):
+        if cut is not None and i == cut:
+            return fail(options, out)
+        out.write(line)
+        if pause:
+            out.flush()
+            time.sleep(pause)
+    return None
+
+
+def stream_synthetic(name: str, atoms, options: dict, fail_at: float | None, out) -> int | None:
+    cycles = max(1, int(options["cycles"]))
+    delay = float(options["delay"])
+    chunks = list(synth_output.optimisation(name, atoms, cycles, int(options["scf"]), int(options["filler"])))
+    cut = int(len(chunks) * fail_at) if fail_at is not None else None
+    for i, chunk in enumerate(chunks):
+        if cut is not None and i == max(1, cut):
+            return fail(options, out)
+        out.writelines(chunk)
+        out.flush()
+        if delay and i:
+            time.sleep(delay)
+    return None
+
+
+def module_timings(seconds: float, cycles: int) -> dict[str, float]:
+    """Правдоподобная разбивка времени по модулям ORCA (для отчёта о времени счёта)"""
+    shares = {"GTO integral calculation": 0.05, "SCF iterations": 0.7}
+    if cycles > 1:
+        shares.update({"SCF Gradient evaluation": 0.2, "Geometry relaxation": 0.05})
+    return {name: seconds * share for name, share in shares.items()}
+
+
+def write_files(inp_path: Path, atoms, options: dict):
+    stem = inp_path.with_suffix("")
+    frame = f"{len(atoms)}\nfake_orca\n" + "".join(f"{s} {x:.6f} {y:.6f} {z:.6f}\n" for s, x, y, z in atoms)
+    for kind in filter(None, options["files"].split(",")):
+        if kind == "xyz":
+            Path(f"{stem}.xyz").write_text(frame)
+        elif kind == "trj":
+            Path(f"{stem}_trj.xyz").write_text(frame)
+        else:
+            Path(f"{stem}.{kind}").write_bytes(b"FAKE" + bytes(60))
+
+
+def main(argv: list[str]) -> int:
+    if len(argv) < 2:
+        print("usage: fake_orca.py input.inp", file=sys.stderr)
+        return 2
+    inp_path = Path(argv[1]).resolve()
+    try:
+        inp_text = inp_path.read_text(encoding="utf-8", errors="replace")
+    except OSError as e:
+        print(f"ERROR: cannot open input {inp_path}: {e}")
+        return 1
+    options = read_options(inp_text)
+    fail_at = float(options["at"]) if options["fail"] else None
+    out = sys.stdout
+    started = time.monotonic()
+    atoms = read_atoms(inp_path)
+    if options["replay"]:
+        replay = Path(options["replay"])
+        if not replay.is_absolute():
+            replay = inp_path.parent / replay
+        # Записанный вывод уже заканчивается так, как закончился настоящий расчёт
+        code = stream_replay(replay, float(options["rate"]), fail_at, options, out)
+    else:
+        code = stream_synthetic(inp_path.stem, atoms, options, fail_at, out)
+        if code is None:
+            elapsed = time.monotonic() - started
+            out.write(synth_output.terminated(elapsed, module_timings(elapsed, int(options["cycles"]))))
+    out.flush()
+    if code is not None:
+        return code
+    write_files(inp_path, atoms, options)
+    return int(options["exit"] or 0)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
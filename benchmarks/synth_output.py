@@ -0,0 +1,304 @@
+# benchmarks/synth_output.py
+"""
+Детерминированный генератор текста, похожего на вывод ORCA: те же заголовки
+разделов, что ищут OrcaParser, output_index и geometry. Используется фальшивым
+orca (fake_orca.py) и бенчмарками.
+"""
+import random
+import zlib
+
+HEADER = """
+                                 *****************
+                                 * O   R   C   A *
+                                 *****************
+
+           #####################################################
+           #                        -***-                      #
+           #          Department of theory and spectroscopy    #
+           #    Directorship and core code : Frank Neese       #
+           #        Max Planck Institute fuer Kohlenforschung  #
+           #####################################################
+
+                         Program Version 6.1.1  -   RELEASE  -
+
+"""
+
+TERMINATED = "\n                             ****ORCA TERMINATED NORMALLY****\nTOTAL RUN TIME: 0 days 0 hours 0 minutes 1 seconds 0 msec\n"
+
+# Строки «многословных» разделов ORCA — для наращивания объёма вывода
+FILLER = (
+    "  {0:4d}   {1:4d}  {2:3s}  {3:3s}   {4: .8f}   {5: .8f}   {6: .8f}   {7: .6e}\n"
+)
+
+
+def terminated(seconds: float, modules: dict[str, float]) -> str:
+    """Таблица времени модулей, маркер завершения и TOTAL RUN TIME, как в конце вывода ORCA"""
+    total = sum(modules.values())
+    lines = ["\nTimings for individual modules:\n\n",
+             f"{'Sum of individual times':<32s}...  {total:11.3f} sec (= {total / 60:7.3f} min)\n"]
+    for name, value in modules.items():
+        share = 100 * value / total if total else 0.0
+        lines.append(f"{name:<32s}...  {value:11.3f} sec (= {value / 60:7.3f} min) {share:5.1f} %\n")
+    msec = int(round(seconds * 1000))
+    minutes, rest = divmod(msec, 60000)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    lines.append("                             ****ORCA TERMINATED NORMALLY****\n"
+                 f"TOTAL RUN TIME: {days} days {hours} hours {minutes} minutes {rest // 1000} seconds "
+                 f"{rest % 1000} msec\n")
+    return "".join(lines)
+
+
+def seed_for(name: str) -> int:
+    return zlib.crc32(name.encode("utf-8"))
+
+
+def reference_energy(name: str) -> float:
+    """Энергия, которую «посчитал» фальшивый ORCA для входа name (детерминированно)"""
+    return -100.0 - (seed_for(name) % 100000) / 1000.0
+
+
+def coordinates_block(atoms) -> list[str]:
+    lines = ["---------------------------------\n",
+             "CARTESIAN COORDINATES (ANGSTROEM)\n",
+             "---------------------------------\n"]
+    lines += [f"  {symbol:<2s}  {x:14.6f}  {y:14.6f}  {z:14.6f}\n" for symbol, x, y, z in atoms]
+    lines.append("\n")
+    return lines
+
+
+def scf_block(rng: random.Random, energy: float, iterations: int) -> list[str]:
+    lines = ["\n--------------\n", "SCF ITERATIONS\n", "--------------\n",
+             "ITER       Energy         Delta-E        Max-DP      RMS-DP      [F,P]     Damp\n"]
+    delta = 0.5
+    for it in range(iterations):
+        delta *= 0.3 + 0.2 * rng.random()
+        lines.append(f"  {it:2d}   {energy + delta:16.10f}   {-delta:.6e}  {delta / 10:.2e}  "
+                     f"{delta / 100:.2e}  {delta / 5:.6f}  0.700\n")
+    lines.append("\n               *****************************************************\n"
+                 "               *                     SUCCESS                       *\n"
+                 f"               *           SCF CONVERGED AFTER {iterations:3d} CYCLES          *\n"
+                 "               *****************************************************\n\n")
+    return lines
+
+
+def filler_lines(rng: random.Random, count: int) -> list[str]:
+    return [FILLER.format(i, rng.randrange(1000), "C", "H", rng.uniform(-1, 1), rng.uniform(-1, 1),
+                          rng.uniform(-1, 1), rng.random())
+            for i in range(count)]
+
+
+def optimisation(name: str, atoms, cycles: int = 1, scf_iterations: int = 12, filler: int = 0):
+    """
+    Вывод оптимизации (cycles=1 — одиночная точка) по циклам: каждый элемент —
+    список строк одного цикла, последний заканчивается FINAL SINGLE POINT ENERGY
+    и (для оптимизации) блоком финальной геометрии. Атомы: (symbol, x, y, z).
+    """
+    rng = random.Random(seed_for(name))
+    final_energy = reference_energy(name)
+    atoms = [tuple(atom) for atom in atoms]
+    # Начальная геометрия чуть искажена и сходится к входной
+    start = [(s, x + rng.uniform(-0.05, 0.05), y + rng.uniform(-0.05, 0.05), z + rng.uniform(-0.05, 0.05))
+             for s, x, y, z in atoms]
+    yield [HEADER]
+    for cycle in range(1, cycles + 1):
+        weight = (cycles - cycle) / max(1, cycles - 1) if cycles > 1 else 0.0
+        geometry = [(s, x0 * weight + x1 * (1 - weight), y0 * weight + y1 * (1 - weight),
+                     z0 * weight + z1 * (1 - weight))
+                    for (s, x0, y0, z0), (_, x1, y1, z1) in zip(start, atoms)]
+        energy = final_energy + 0.01 * weight * weight
+        lines = []
+        if cycles > 1:
+            lines += ["\n        *************************************************************\n",
+                      f"        *                GEOMETRY OPTIMIZATION CYCLE {cycle:3d}            *\n",
+                      "        *************************************************************\n"]
+        lines += coordinates_block(geometry)
+        lines += scf_block(rng, energy, scf_iterations)
+        lines += filler_lines(rng, filler)
+        lines += ["-------------------------   --------------------\n",
+                  f"FINAL SINGLE POINT ENERGY      {energy:.12f}\n",
+                  "-------------------------   --------------------\n"]
+        if cycles > 1 and cycle == cycles:
+            lines += ["\n                    ***********************HURRAY********************\n",
+                      "                    ***        THE OPTIMIZATION HAS CONVERGED     ***\n",
+                      "                    *************************************************\n",
+                      "\n          *** FINAL ENERGY EVALUATION AT THE STATIONARY POINT ***\n"]
+            lines += coordinates_block(geometry)
+        yield lines
+
+
+# === Большие выводы заданного размера (бенчмарки разбора и ввода-вывода) ===
+KINDS = ("opt", "freq", "dlpno")
+
+_ELEMENTS = ("C", "C", "C", "H", "H", "H", "H", "N", "O")
+
+
+def molecule(atom_count: int, seed: int = 0) -> list[tuple]:
+    rng = random.Random(seed)
+    return [(rng.choice(_ELEMENTS), rng.uniform(-6, 6), rng.uniform(-6, 6), rng.uniform(-6, 6))
+            for _ in range(atom_count)]
+
+
+def _orbital_block(rng: random.Random, count: int) -> list[str]:
+    lines = ["\n----------------\n", "ORBITAL ENERGIES\n", "----------------\n\n",
+             "  NO   OCC          E(Eh)            E(eV) \n"]
+    energy = -20.0
+    for n in range(count):
+        energy += rng.uniform(0.0, 40.0 / count)
+        lines.append(f"{n:4d}   {2.0 if n < count // 2 else 0.0:6.4f}    {energy:14.6f}   {energy * 27.2114:14.4f} \n")
+    return lines
+
+
+def _population_block(rng: random.Random, atoms) -> list[str]:
+    lines = ["\n-----------------------\n", "MULLIKEN ATOMIC CHARGES\n", "-----------------------\n"]
+    lines += [f"{i:4d} {s:<2s}:  {rng.uniform(-0.6, 0.6):10.6f}\n" for i, (s, *_) in enumerate(atoms)]
+    lines.append(f"Sum of atomic charges:   {0.0:10.7f}\n")
+    return lines
+
+
+def _gradient_block(rng: random.Random, atoms, scale: float) -> list[str]:
+    lines = ["\n------------------\n", "CARTESIAN GRADIENT\n", "------------------\n\n"]
+    lines += [f"{i:4d}   {s:<2s}  :  {rng.uniform(-scale, scale):13.9f}  {rng.uniform(-scale, scale):13.9f}"
+              f"  {rng.uniform(-scale, scale):13.9f}\n" for i, (s, *_) in enumerate(atoms)]
+    return lines
+
+
+def _convergence_block(cycle: int) -> list[str]:
+    value = 0.05 / (cycle + 1)
+    return ["                       .--------------------.\n",
+            "  ----------------------|Geometry convergence|-------------------------\n",
+            "  Item                value                   Tolerance       Converged\n",
+            "  ---------------------------------------------------------------------\n",
+            f"  Energy change      {-value / 50:14.10f}            0.0000050000      NO\n",
+            f"  RMS gradient       {value / 10:14.10f}            0.0001000000      NO\n",
+            f"  MAX gradient       {value / 4:14.10f}            0.0003000000      NO\n",
+            f"  RMS step           {value:14.10f}            0.0020000000      NO\n",
+            f"  MAX step           {value * 3:14.10f}            0.0040000000      NO\n",
+            "  ........................................................\n"]
+
+
+def _frequency_blocks(rng: random.Random, atoms, energy: float, temperature: float = 298.15) -> list[str]:
+    modes = 3 * len(atoms)
+    freqs = sorted(rng.uniform(30, 3500) for _ in range(modes - 6))
+    lines = ["\n-----------------------\n", "VIBRATIONAL FREQUENCIES\n", "-----------------------\n\n",
+             "Scaling factor for frequencies =  1.000000000  (already applied!)\n\n"]
+    lines += [f"  {i:4d}:       0.00 cm**-1\n" for i in range(6)]
+    lines += [f"  {i + 6:4d}:    {f:8.2f} cm**-1\n" for i, f in enumerate(freqs)]
+    lines += ["\n------------\n", "NORMAL MODES\n", "------------\n\n"]
+    for first in range(0, modes, 6):
+        columns = range(first, min(first + 6, modes))
+        lines.append("      " + "".join(f"{c:11d}   " for c in columns) + "\n")
+        for row in range(modes):
+            lines.append(f"{row:6d}" + "".join(f"{rng.uniform(-0.3, 0.3):14.6f}" for _ in columns) + "\n")
+    lines += ["\n-----------\n", "IR SPECTRUM\n", "-----------\n\n"]
+    lines += [f"  {i + 6:4d}:   {f:8.2f}   {rng.random():.6f}   {rng.uniform(0, 200):8.2f}\n"
+              for i, f in enumerate(freqs)]
+    zpe = sum(freqs) * 0.5 / 219474.63
+    thermal = zpe * 0.08
+    lines += ["\n--------------------------\n", f"THERMOCHEMISTRY AT {temperature:.2f}K\n",
+              "--------------------------\n\n",
+              f"Temperature         ...   {temperature:.2f} K\n",
+              "Pressure            ...   1.00 atm\n\n",
+              "Summary of contributions to the inner energy U:\n",
+              f"Electronic energy                ...  {energy:16.8f} Eh\n",
+              f"Zero point energy                ...  {zpe:16.8f} Eh  {zpe * 627.509:8.2f} kcal/mol\n",
+              f"Thermal vibrational correction   ...  {thermal:16.8f} Eh\n",
+              f"Total thermal energy                  {energy + zpe + thermal:16.8f} Eh\n\n",
+              f"Non-thermal (ZPE) correction              {zpe:16.8f} Eh\n",
+              f"Total enthalpy                    ...  {energy + zpe + thermal + 0.00094:16.8f} Eh\n",
+              f"Final entropy term                ...  {0.035:16.8f} Eh\n",
+              f"Final Gibbs free energy         ...  {energy + zpe + thermal - 0.034:16.8f} Eh\n"]
+    return lines
+
+
+def _dlpno_header() -> list[str]:
+    return ["\n                        ****************************\n",
+            "                        * DLPNO-CCSD(T) CALCULATION *\n",
+            "                        ****************************\n\n",
+            "Pair prescreening: TCutPre = 1.000e-06\n",
+            "PNO generation: TCutPNO = 3.330e-07\n\n",
+            "      i    j      PNOs     E(pair)          Dist\n"]
+
+
+def _dlpno_pairs(rng: random.Random, occupied: int, count: int) -> str:
+    return "".join(f"  {rng.randrange(occupied):5d} {rng.randrange(occupied):5d}  {rng.randrange(5, 60):6d}   "
+                   f"{-rng.random() * 1e-3:14.10f}  {rng.uniform(1, 20):8.3f}\n" for _ in range(count))
+
+
+def _dlpno_tail(atoms, energy: float) -> list[str]:
+    correlation = -0.002 * len(atoms)
+    lines = ["\n  Iter       E(tot)           E(Corr)          Delta-E          Residual\n"]
+    for it in range(12):
+        delta = 10 ** (-it)
+        lines.append(f"    {it:2d}   {energy + correlation * (1 - delta / 10):16.10f}   {correlation:14.10f}"
+                     f"   {-delta * 1e-3:.3e}   {delta * 1e-2:.3e}\n")
+    triples = correlation * 0.03
+    lines += [f"\nTriples Correction (T)                     ...   {triples:16.12f}\n",
+              f"Final correlation energy                   ...   {correlation + triples:16.12f}\n",
+              f"E(CCSD)                                    ...   {energy + correlation:16.12f}\n",
+              f"E(CCSD(T))                                 ...   {energy + correlation + triples:16.12f}\n",
+              "-------------------------   --------------------\n",
+              f"FINAL SINGLE POINT ENERGY      {energy + correlation + triples:.12f}\n",
+              "-------------------------   --------------------\n"]
+    return lines
+
+
+# Тела циклов повторяются по кругу: генерация случайных чисел — узкое место при 5 ГБ
+_CYCLE_VARIANTS = 8
+
+
+def write_output(path, kind: str, size_bytes: int, atom_count: int = 60, seed: int = 0) -> int:
+    """
+    Пишет вывод вида kind ('opt', 'freq', 'dlpno') размером не меньше size_bytes
+    (одинаковые аргументы — одинаковый файл). Объём набирается циклами оптимизации
+    (для dlpno — списком пар). Возвращает размер файла.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"unknown output kind: {kind}")
+    rng = random.Random(seed)
+    atoms = molecule(atom_count, seed)
+    energy = -40.0 * atom_count
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        def emit(text: str):
+            nonlocal written
+            f.write(text)
+            written += len(text)
+
+        emit(HEADER)
+        if kind == "dlpno":
+            emit("".join(coordinates_block(atoms) + scf_block(rng, energy, 14) + _orbital_block(rng, 4 * atom_count)))
+            emit("".join(_dlpno_header()))
+            pairs = _dlpno_pairs(rng, max(2, atom_count), 1000)
+            tail = "".join(_dlpno_tail(atoms, energy))
+            while written + len(tail) + len(TERMINATED) < size_bytes:
+                emit(pairs)
+            emit(tail)
+        else:
+            # До и после строки энергии; координаты одинаковы — важен объём и разметка
+            variants = []
+            for v in range(_CYCLE_VARIANTS):
+                before = coordinates_block(atoms) + scf_block(rng, energy, 10)
+                before += _orbital_block(rng, 4 * atom_count) + _population_block(rng, atoms)
+                after = _gradient_block(rng, atoms, 0.01 / (v + 1)) + _convergence_block(v + 1)
+                variants.append(("".join(before), "".join(after)))
+            tail = "".join(_frequency_blocks(rng, atoms, energy)) if kind == "freq" else ""
+            end = ("\n          *** FINAL ENERGY EVALUATION AT THE STATIONARY POINT ***\n"
+                   + "".join(coordinates_block(atoms)) + tail)
+            cycle = 0
+            # Хотя бы один цикл; дальше — пока не наберём размер
+            while cycle == 0 or written + len(end) + len(TERMINATED) < size_bytes:
+                cycle += 1
+                energy -= 1e-4 / cycle
+                before, after = variants[(cycle - 1) % _CYCLE_VARIANTS]
+                emit("\n        *************************************************************\n"
+                     f"        *                GEOMETRY OPTIMIZATION CYCLE {cycle:3d}            *\n"
+                     "        *************************************************************\n"
+                     + before
+                     + "-------------------------   --------------------\n"
+                     f"FINAL SINGLE POINT ENERGY      {energy:.12f}\n"
+                     "-------------------------   --------------------\n"
+                     + after)
+            emit(end)
+        emit(TERMINATED)
+    return written
@@ -0,0 +1,335 @@
+# compressed_io.py
+"""
+Сжатые выводы (x.out.gz / x.out.zst, x_trj.xyz.gz / .zst): сжатие после задания и
+прозрачное чтение.
+
+Файл пишется независимыми кадрами (FRAME_SIZE байт исходного текста) с таблицей кадров
+в конце, поэтому хвост или любое место файла читается распаковкой только нужных кадров:
+    zstd — seekable format zstd: таблица в skippable frame (zstd -d её пропускает);
+    gzip — каждый кадр — отдельный gzip member, таблица — в поле FEXTRA пустого
+           последнего member (gzip -d и zcat её не замечают).
+Файлы без таблицы (сжатые вручную) читаются последовательно.
+zstd — необязательная зависимость (pip install zstandard).
+"""
+import bisect
+import collections
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import struct
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP = "gzip"
+ZSTD = "zstd"
+SUFFIXES = {GZIP: ".gz", ZSTD: ".zst"}
+COMPRESSED_SUFFIXES = tuple(SUFFIXES.values())
+DEFAULT_LEVELS = {GZIP: 6, ZSTD: 9}
+
+# Кадр — единица произвольного доступа: чтение хвоста распаковывает один-два кадра
+FRAME_SIZE = 1024 * 1024
+# FEXTRA у gzip не длиннее 65535 байт (8 байт на кадр): у огромных файлов кадры крупнее
+_MAX_FRAMES = 8000
+# Распакованные кадры, которые держит открытый файл (прокрутка назад-вперёд)
+_CACHE_FRAMES = 8
+
+_SEEKABLE_MAGIC = 0x8F92EAB1
+_SKIPPABLE_MAGIC = 0x184D2A5E
+_FOOTER = struct.Struct("<IBI")   # число кадров, дескриптор, магическое число
+_ENTRY = struct.Struct("<II")     # размер сжатого кадра, размер исходного
+_CHECKSUM_FLAG = 0x80
+# gzip: заголовок пустого member с FEXTRA (до XLEN) и его конец — пустой deflate, CRC32 и ISIZE
+_GZIP_HEADER = b"\x1f\x8b\x08\x04" + bytes(4) + b"\x00\xff"
+_GZIP_SUBFIELD = b"OI"
+_GZIP_EMPTY_TAIL = b"\x03\x00" + bytes(8)
+
+# Распакованные копии для внешних программ (Chemcraft) живут сутки
+_COPIES_DIR = "orcaui-decompressed"
+_COPY_MAX_AGE = 24 * 3600
+
+
+def available_methods() -> list[str]:
+    return [GZIP, ZSTD] if zstandard is not None else [GZIP]
+
+
+def compression_of(path: Path) -> str | None:
+    suffix = Path(path).suffix
+    for method, method_suffix in SUFFIXES.items():
+        if suffix == method_suffix:
+            return method
+    return None
+
+
+def logical_path(path: Path) -> Path:
+    """Путь без суффикса сжатия: x.out.zst → x.out"""
+    path = Path(path)
+    return path.with_suffix("") if compression_of(path) else path
+
+
+def compressed_variants(path: Path) -> list[Path]:
+    path = Path(path)
+    return [path.with_name(path.name + suffix) for suffix in COMPRESSED_SUFFIXES]
+
+
+def resolve(path: Path) -> Path:
+    """Путь как есть, если файл есть; иначе его сжатая версия (x.out → x.out.zst / .gz)"""
+    path = Path(path)
+    if compression_of(path) or path.exists():
+        return path
+    for candidate in compressed_variants(path):
+        if candidate.exists():
+            return candidate
+    return path
+
+
+# === Сжатие ===
+def _frame_compressor(method: str, level: int):
+    if method == ZSTD:
+        return zstandard.ZstdCompressor(level=level).compress
+
+    def compress(data: bytes) -> bytes:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 — формат gzip
+        return compressor.compress(data) + compressor.flush()
+    return compress
+
+
+def _seek_table(method: str, entries: list[tuple[int, int]]) -> bytes:
+    table = b"".join(_ENTRY.pack(*entry) for entry in entries) + _FOOTER.pack(len(entries), 0, _SEEKABLE_MAGIC)
+    if method == ZSTD:
+        return struct.pack("<II", _SKIPPABLE_MAGIC, len(table)) + table
+    extra = _GZIP_SUBFIELD + struct.pack("<H", len(table)) + table
+    return _GZIP_HEADER + struct.pack("<H", len(extra)) + extra + _GZIP_EMPTY_TAIL
+
+
+def compress_file(path: Path, method: str = GZIP, level: int = None) -> Path:
+    """
+    Сжимает файл рядом с ним (x.out → x.out.gz) и удаляет исходный. Время изменения
+    сохраняется; пока сжатие не закончено, читатели видят исходный файл
+    """
+    if method not in SUFFIXES:
+        raise ValueError(f"Unknown compression method: {method}")
+    if method == ZSTD and zstandard is None:
+        raise RuntimeError("zstd compression needs the 'zstandard' package")
+    path = Path(path)
+    target = path.with_name(path.name + SUFFIXES[method])
+    tmp = target.with_name(f".{target.name}.tmp")
+    stat = path.stat()
+    frame_size = max(FRAME_SIZE, -(-stat.st_size // _MAX_FRAMES))
+    compress = _frame_compressor(method, DEFAULT_LEVELS[method] if level is None else level)
+    entries = []
+    try:
+        with open(path, 'rb') as src, open(tmp, 'wb') as dst:
+            while True:
+                chunk = src.read(frame_size)
+                if not chunk:
+                    break
+                frame = compress(chunk)
+                dst.write(frame)
+                entries.append((len(frame), len(chunk)))
+            dst.write(_seek_table(method, entries))
+        os.utime(tmp, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp, target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    # Прежние сжатые версии другим методом больше не нужны
+    for stale in compressed_variants(path):
+        if stale != target:
+            stale.unlink(missing_ok=True)
+    path.unlink()
+    return target
+
+
+# === Чтение ===
+def _read_seek_table(f, method: str) -> list[tuple[int, int]] | None:
+    """Таблица кадров из конца файла или None, если её нет"""
+    end = f.seek(0, os.SEEK_END)
+    trailer = len(_GZIP_EMPTY_TAIL) if method == GZIP else 0
+    if end < _FOOTER.size + trailer:
+        return None
+    f.seek(end - trailer - _FOOTER.size)
+    tail = f.read(_FOOTER.size + trailer)
+    count, descriptor, magic = _FOOTER.unpack_from(tail)
+    if magic != _SEEKABLE_MAGIC or (trailer and tail[_FOOTER.size:] != _GZIP_EMPTY_TAIL):
+        return None
+    entry_size = _ENTRY.size + (4 if descriptor & _CHECKSUM_FLAG else 0)
+    table_start = end - trailer - _FOOTER.size - count * entry_size
+    # Перед таблицей: заголовок skippable frame (zstd) или заголовок gzip member с FEXTRA
+    frames_end = table_start - (8 if method == ZSTD else len(_GZIP_HEADER) + 2 + 4)
+    if frames_end < 0:
+        return None
+    f.seek(table_start)
+    raw = f.read(count * entry_size)
+    entries = [_ENTRY.unpack_from(raw, i * entry_size) for i in range(count)]
+    if sum(compressed for compressed, _ in entries) != frames_end:
+        return None
+    return entries
+
+
+class SeekableReader(io.RawIOBase):
+    """Произвольный доступ к сжатому файлу по таблице кадров; распаковываются только нужные кадры"""
+
+    def __init__(self, f, method: str, entries: list[tuple[int, int]]):
+        super().__init__()
+        self._file = f
+        if method == ZSTD:
+            if zstandard is None:
+                raise RuntimeError("reading .zst files needs the 'zstandard' package")
+            self._decompress = zstandard.ZstdDecompressor().decompress
+        else:
+            self._decompress = lambda data: zlib.decompress(data, 31)
+        self._frames = []   # (смещение в сжатом файле, размер сжатого кадра)
+        self._starts = []   # смещение начала кадра в распакованном тексте
+        offset = logical = 0
+        for compressed, size in entries:
+            self._frames.append((offset, compressed))
+            self._starts.append(logical)
+            offset += compressed
+            logical += size
+        self._size = logical
+        self._pos = 0
+        self._cache = collections.OrderedDict()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._size
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self._pos = offset
+        return offset
+
+    def readinto(self, buffer) -> int:
+        if self._pos >= self._size:
+            return 0
+        index = bisect.bisect_right(self._starts, self._pos) - 1
+        frame = self._frame(index)
+        start = self._pos - self._starts[index]
+        count = min(len(buffer), len(frame) - start)
+        buffer[:count] = memoryview(frame)[start:start + count]
+        self._pos += count
+        return count
+
+    def _frame(self, index: int) -> bytes:
+        frame = self._cache.get(index)
+        if frame is not None:
+            self._cache.move_to_end(index)
+            return frame
+        offset, compressed = self._frames[index]
+        self._file.seek(offset)
+        frame = self._decompress(self._file.read(compressed))
+        self._cache[index] = frame
+        if len(self._cache) > _CACHE_FRAMES:
+            self._cache.popitem(last=False)
+        return frame
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def open_binary(path: Path):
+    """Файл для чтения байтов; сжатый распаковывается на лету (x.out найдётся и как x.out.zst)"""
+    path = resolve(path)
+    method = compression_of(path)
+    if method is None:
+        return open(path, 'rb')
+    f = open(path, 'rb')
+    try:
+        entries = _read_seek_table(f, method)
+        if entries is not None:
+            return io.BufferedReader(SeekableReader(f, method, entries), FRAME_SIZE)
+        if method == GZIP:
+            f.close()
+            return gzip.open(path, 'rb')
+        if zstandard is None:
+            raise RuntimeError("reading .zst files needs the 'zstandard' package")
+        f.seek(0)
+        return zstandard.ZstdDecompressor().stream_reader(f, closefd=True)
+    except BaseException:
+        f.close()
+        raise
+
+
+def open_text(path: Path, errors: str = 'replace'):
+    path = resolve(path)
+    if compression_of(path) is None:
+        return open(path, 'r', encoding='utf-8', errors=errors)
+    return io.TextIOWrapper(open_binary(path), encoding='utf-8', errors=errors)
+
+
+def read_tail(path: Path, size: int) -> tuple[bytes, bool]:
+    """Последние size байт (распакованного) файла; второй элемент — прочитан ли файл целиком"""
+    with open_binary(path) as f:
+        try:
+            end = f.seek(0, os.SEEK_END)
+        except (OSError, ValueError):
+            # Сжат без таблицы кадров: распаковываем до конца, храня последний кусок
+            tail, total = b"", 0
+            while True:
+                chunk = f.read(max(size, FRAME_SIZE))
+                if not chunk:
+                    return tail, total <= size
+                total += len(chunk)
+                tail = (tail + chunk)[-size:]
+        start = max(0, end - size)
+        f.seek(start)
+        return f.read(end - start), start == 0
+
+
+def decompressed_copy(path: Path) -> Path:
+    """
+    Распакованная копия для внешних программ (Chemcraft) во временной папке под исходным
+    именем; для того же неизменённого файла возвращается та же копия
+    """
+    path = Path(path)
+    if compression_of(path) is None:
+        return path
+    stat = path.stat()
+    copies = Path(tempfile.gettempdir()) / _COPIES_DIR
+    _prune_copies(copies)
+    key = hashlib.sha1(f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+    target = copies / key / logical_path(path).name
+    if target.is_file():
+        return target
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.tmp")
+    with open_binary(path) as src, open(tmp, 'wb') as dst:
+        shutil.copyfileobj(src, dst, FRAME_SIZE)
+    os.replace(tmp, target)
+    return target
+
+
+def _prune_copies(copies: Path):
+    cutoff = time.time() - _COPY_MAX_AGE
+    try:
+        with os.scandir(copies) as it:
+            old = [Path(e.path) for e in it if e.is_dir() and e.stat().st_mtime < cutoff]
+    except OSError:
+        return
+    for directory in old:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,200 @@
+# cpu_topology.py
+"""
+Раздача непересекающихся наборов ядер одновременно идущим заданиям ORCA.
+
+Наборы берутся по возможности из одного NUMA-узла и сначала из разных физических
+ядер (второй поток hyper-threading — в последнюю очередь). Занятые ядра записаны
+в общем файле под flock, поэтому GUI, демон очереди и orca_cli на одной машине
+не выдают одно и то же ядро двум заданиям.
+"""
+import contextlib
+import itertools
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from scratch import pid_alive
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка только внутри процесса
+    fcntl = None
+
+# Привязка к ядрам есть только там, где её умеет ядро ОС (Linux)
+PINNING_SUPPORTED = hasattr(os, "sched_setaffinity")
+
+SYSFS_NODES = Path("/sys/devices/system/node")
+SYSFS_CPUS = Path("/sys/devices/system/cpu")
+
+_tokens = itertools.count(1)
+
+
+def parse_cpulist(text: str) -> list[int]:
+    """'0-3,8,10-11' → [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-")
+            cpus.extend(range(int(first), int(last) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def format_cpulist(cpus) -> str:
+    """[0, 1, 2, 3, 8] → '0-3,8' (формат taskset -c и OpenMPI)"""
+    ranges = []
+    for cpu in sorted(set(cpus)):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def _read_cpulist(path: Path) -> list[int] | None:
+    try:
+        return parse_cpulist(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> set[int]:
+    if PINNING_SUPPORTED:
+        return set(os.sched_getaffinity(0))
+    return set(range(os.cpu_count() or 1))
+
+
+class Topology:
+    """NUMA-узлы → ядра (только доступные процессу), в порядке предпочтения"""
+
+    def __init__(self, nodes: dict[int, list[int]]):
+        self.nodes = nodes
+
+    @classmethod
+    def detect(cls) -> "Topology":
+        allowed = available_cpus()
+        nodes = {}
+        for node_dir in sorted(SYSFS_NODES.glob("node[0-9]*")):
+            cpus = _read_cpulist(node_dir / "cpulist")
+            cpus = [cpu for cpu in cpus or [] if cpu in allowed]
+            if cpus:
+                nodes[int(node_dir.name[4:])] = cls._physical_first(cpus)
+        if not nodes:
+            nodes = {0: cls._physical_first(sorted(allowed))}
+        return cls(nodes)
+
+    @staticmethod
+    def _physical_first(cpus: list[int]) -> list[int]:
+        """Сначала по одному логическому CPU на физическое ядро, затем их соседи по HT"""
+        def rank(cpu):
+            siblings = _read_cpulist(SYSFS_CPUS / f"cpu{cpu}" / "topology" / "thread_siblings_list")
+            position = siblings.index(cpu) if siblings and cpu in siblings else 0
+            return position, cpu
+        return sorted(cpus, key=rank)
+
+    @property
+    def cpu_count(self) -> int:
+        return sum(len(cpus) for cpus in self.nodes.values())
+
+
+def default_registry_path() -> Path:
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and Path(runtime_dir).is_dir():
+        return Path(runtime_dir) / "orcaui-cpus.json"
+    return Path(tempfile.gettempdir()) / f"orcaui-cpus-{os.getuid()}.json"
+
+
+class CpuAllocator:
+    """Выдаёт и освобождает наборы ядер; состояние — в общем файле registry_path"""
+
+    def __init__(self, registry_path: Path = None, topology: Topology = None):
+        self.registry_path = Path(registry_path or default_registry_path())
+        self.topology = topology or Topology.detect()
+
+    @contextlib.contextmanager
+    def _registry(self):
+        """Содержимое файла {'pid:n': [cpus]} под эксклюзивной блокировкой; изменения записываются"""
+        self.registry_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.registry_path, "a+", encoding="utf-8") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    registry = json.loads(f.read() or "{}")
+                except ValueError:
+                    registry = {}
+                # Записи упавших процессов освобождаются
+                registry = {key: cpus for key, cpus in registry.items()
+                            if pid_alive(int(key.split(":")[0]))}
+                yield registry
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(registry))
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def allocate(self, count: int) -> tuple[str, list[int]] | None:
+        """Набор из count ядер: (ключ для release, ядра) или None, если свободных не хватает"""
+        count = max(1, count)
+        with self._registry() as registry:
+            used = {cpu for cpus in registry.values() for cpu in cpus}
+            free = {node: [cpu for cpu in cpus if cpu not in used]
+                    for node, cpus in self.topology.nodes.items()}
+            # Узлы с большим числом свободных ядер — первыми: задания расходятся
+            # по разным узлам и не делят пропускную способность памяти
+            order = sorted(free, key=lambda node: (-len(free[node]), node))
+            fitting = [node for node in order if len(free[node]) >= count]
+            if fitting:
+                cpus = free[fitting[0]][:count]
+            else:
+                cpus = [cpu for node in order for cpu in free[node]][:count]
+                if len(cpus) < count:
+                    return None
+            key = f"{os.getpid()}:{next(_tokens)}"
+            registry[key] = cpus
+        return key, cpus
+
+    def release(self, key: str):
+        with self._registry() as registry:
+            registry.pop(key, None)
+
+
+_shared_allocator = None
+
+
+def shared_allocator() -> CpuAllocator:
+    global _shared_allocator
+    if _shared_allocator is None:
+        _shared_allocator = CpuAllocator()
+    return _shared_allocator
+
+
+def pinning_environment(cpus: list[int]) -> dict[str, str]:
+    """
+    Переменные OpenMPI, с которыми mpirun внутри ORCA раскладывает ранги по выданным
+    ядрам (по одному рангу на логический CPU), а не по всей машине
+    """
+    return {
+        "OMPI_MCA_hwloc_base_cpu_list": format_cpulist(cpus),
+        "OMPI_MCA_hwloc_base_use_hwthreads_as_cpus": "1",
+        "OMPI_MCA_hwloc_base_binding_policy": "hwthread",
+        "OMPI_MCA_rmaps_base_mapping_policy": "hwthread",
+    }
+
+
+def pin_process(pid: int, cpus: list[int]):
+    """
+    Привязка уже запущенного процесса к ядрам; его будущие потомки (ранги MPI) наследуют
+    маску. Снаружи, а не через preexec_fn: тот небезопасен, когда в процессе идут потоки
+    """
+    try:
+        os.sched_setaffinity(pid, set(cpus))
+    except ProcessLookupError:
+        pass  # процесс уже завершился
@@ -0,0 +1,160 @@
+# disk_guard.py
+"""
+Место на диске для очереди и уборка временных файлов ORCA.
+
+Перед запуском задания очередь сверяет свободное место на томе, где оно считает
+(папка входа или scratch), с оценкой: пик занятого места похожими заданиями из
+job_history (поле disk_mb), пересчитанный на размер системы, с запасом, плюс резерв,
+который всегда остаётся свободным. Не хватает — очередь ждёт, пока место освободится.
+
+Временные файлы успешных заданий (retention):
+    keep     ничего не трогать
+    delete   удалить .tmp, .densities, .cis и т.п. рядом со входом
+    archive  сложить их в <имя>_artifacts.tar.gz
+Результаты (.gbw, .xyz, .hess, ...) и файлы, которые читают ещё не выполненные
+задания (%moinp, xyzfile, InHessName), не трогаются.
+"""
+import os
+import re
+import tarfile
+import time
+from pathlib import Path
+
+import resource_advisor
+from orca_input import parse_input
+
+KEEP = "keep"
+DELETE = "delete"
+ARCHIVE = "archive"
+RETENTION_POLICIES = (KEEP, DELETE, ARCHIVE)
+
+# Временные файлы ORCA рядом со входом (после имени входа); остальное — результаты.
+# Только эти формы: префиксом "opt" не должны ловиться файлы соседнего входа opt_freq.inp
+ARTIFACT_SUFFIXES = r"\.tmp(?:\.\d+)?|\.[^.]+\.tmp|_atom\d+\.tmp|_D\d+\.tmp|\.densities|\.densitiesinfo|\.cis"
+ARCHIVE_SUFFIX = "_artifacts.tar.gz"
+
+# Сколько оставлять свободным на томе задания, МБ (0 — не проверять). По умолчанию
+# выключено: после обновления очередь на маленьком томе или tmpfs не должна встать
+DEFAULT_RESERVE_MB = 0
+# Запас к наблюдаемому пику занятого места
+DISK_HEADROOM = 1.5
+# Временные файлы (интегралы, плотности) растут примерно как квадрат размера системы
+DISK_SCALING = 2.0
+# Как часто OrcaJob замеряет свободное место во время счёта, секунды
+SAMPLE_INTERVAL = 5.0
+
+
+def free_mb(path: Path) -> float:
+    """Свободное место (для непривилегированного пользователя) на томе, где лежит path"""
+    path = Path(path)
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    stat = os.statvfs(path)
+    return stat.f_bavail * stat.f_frsize / 2 ** 20
+
+
+class DiskSampler:
+    """Пик занятого места за время задания: сколько свободного места убыло от начала"""
+
+    def __init__(self, path: Path, interval: float = SAMPLE_INTERVAL):
+        self.path = Path(path)
+        self.interval = interval
+        self.start = self.lowest = free_mb(self.path)
+        self._next = time.monotonic() + interval
+
+    def sample(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now < self._next:
+            return
+        self._next = now + self.interval
+        try:
+            self.lowest = min(self.lowest, free_mb(self.path))
+        except OSError:
+            pass
+
+    @property
+    def used_mb(self) -> float:
+        return max(0.0, self.start - self.lowest)
+
+
+def estimate_need_mb(inp_path: Path, history: list[dict]) -> tuple[float, int]:
+    """Оценка места для задания (МБ) по похожим заданиям истории и число таких заданий"""
+    try:
+        inp = parse_input(inp_path)
+    except (OSError, ValueError):
+        return 0.0, 0
+    atoms = inp.atom_count()
+    need, samples = 0.0, 0
+    for record, _ in resource_advisor.similar_records(inp, history):
+        if not record.get("disk_mb"):
+            continue
+        scale = (atoms / record["atoms"]) ** DISK_SCALING if atoms and record.get("atoms") else 1.0
+        need = max(need, record["disk_mb"] * scale)
+        samples += 1
+    return need * DISK_HEADROOM, samples
+
+
+def check_space(work_dir: Path, need_mb: float, reserve_mb: float) -> str | None:
+    """Сообщение о нехватке места или None, если заданию хватит"""
+    try:
+        free = free_mb(work_dir)
+    except OSError as e:
+        return f"cannot check free space in {work_dir}: {e}"
+    if free >= need_mb + reserve_mb:
+        return None
+    return (f"{free:.0f} MB free in {work_dir}, the job needs about {need_mb:.0f} MB "
+            f"and {reserve_mb:.0f} MB must stay free")
+
+
+def artifacts(inp_path: Path) -> list[Path]:
+    """Временные файлы задания рядом со входом (x.tmp, x.scfp.tmp, x_atom6.tmp, x_D0.tmp, x.densities, ...)"""
+    inp_path = Path(inp_path)
+    pattern = re.compile(rf"{re.escape(inp_path.stem)}(?:{ARTIFACT_SUFFIXES})")
+    found = []
+    try:
+        entries = list(os.scandir(inp_path.parent))
+    except OSError:
+        return []
+    for entry in entries:
+        if pattern.fullmatch(entry.name) and entry.is_file():
+            found.append(Path(entry.path))
+    return sorted(found)
+
+
+def referenced_files(inp_paths: list[Path]) -> set[Path]:
+    """Файлы, которые читают входы (их нельзя убирать, пока задания не выполнены)"""
+    referenced = set()
+    for inp_path in inp_paths:
+        try:
+            referenced.update(path.resolve() for path in parse_input(inp_path).referenced_files())
+        except (OSError, ValueError):
+            continue
+    return referenced
+
+
+def apply_retention(inp_path: Path, policy: str, keep: set[Path] = frozenset()) -> int:
+    """Удаляет или архивирует временные файлы задания; возвращает освобождённые байты"""
+    if policy not in RETENTION_POLICIES:
+        raise ValueError(f"Unknown retention policy: {policy}")
+    if policy == KEEP:
+        return 0
+    files = [path for path in artifacts(inp_path) if path.resolve() not in keep]
+    if not files:
+        return 0
+    freed = sum(path.stat().st_size for path in files)
+    if policy == ARCHIVE:
+        inp_path = Path(inp_path)
+        archive = inp_path.with_name(inp_path.stem + ARCHIVE_SUFFIX)
+        tmp = archive.with_name(f".{archive.name}.tmp")
+        try:
+            with tarfile.open(tmp, "w:gz") as tar:
+                for path in files:
+                    tar.add(path, arcname=path.name)
+            os.replace(tmp, archive)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        freed -= archive.stat().st_size
+    for path in files:
+        path.unlink(missing_ok=True)
+    return freed
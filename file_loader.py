@@ -0,0 +1,36 @@
+# file_loader.py
+from pathlib import Path
+from PySide6.QtCore import QCoreApplication, QObject, QThread, Signal
+
+import compressed_io
+
+
+class FileLoader(QObject):
+    """Читает текстовый файл в фоновом потоке, чтобы не блокировать окно (сжатый — распаковывая)"""
+    loaded = Signal(str, str)          # path, text
+    error_occurred = Signal(str, str)  # path, error
+    completed = Signal()
+
+    def __init__(self, path: Path):
+        super().__init__()
+        self.path = Path(path)
+
+    def run(self):
+        try:
+            with compressed_io.open_text(self.path) as f:
+                text = f.read()
+            self.loaded.emit(str(self.path), text)
+        except Exception as e:
+            self.error_occurred.emit(str(self.path), str(e))
+        finally:
+            self.completed.emit()
+
+    def start_async(self):
+        # Поток принадлежит приложению: владелец может отпустить воркера сразу после
+        # completed, а сам QThread удалится через deleteLater, когда действительно завершится
+        self._thread = QThread(QCoreApplication.instance())
+        self.moveToThread(self._thread)
+        self._thread.started.connect(self.run)
+        self._thread.finished.connect(self._thread.deleteLater)
+        self.completed.connect(self._thread.quit)
+        self._thread.start()
@@ -0,0 +1,310 @@
+# file_ops.py
+import os
+import errno
+import shutil
+import fnmatch
+import itertools
+import threading
+import time
+from pathlib import Path
+from PySide6.QtCore import QCoreApplication, QObject, QThread, Signal
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl FICLONE: мгновенная копия (reflink) на btrfs/XFS/bcachefs
+FICLONE = 0x40049409
+
+# Временные файлы ORCA, которые не нужны в копии папки расчёта
+SCRATCH_PATTERNS = ["*.tmp", "*.tmp.*", "*.densities", "*.densitiesinfo", "*.cis", "*.gbw"]
+# Мелкие файлы копируем всегда — фильтр только для действительно больших
+SCRATCH_MIN_SIZE = 10 * 1024 * 1024
+
+_CHUNK = 64 * 1024 * 1024
+_PROGRESS_INTERVAL = 0.1  # сек между сигналами прогресса
+
+_op_ids = itertools.count(1)
+
+
+class OperationCancelled(Exception):
+    pass
+
+
+def is_scratch_file(path: Path, size: int) -> bool:
+    return size >= SCRATCH_MIN_SIZE and any(fnmatch.fnmatch(path.name, p) for p in SCRATCH_PATTERNS)
+
+
+def unique_path(path: Path) -> Path:
+    """Свободное имя в той же папке: file.txt → file_copy1.txt → file_copy2.txt ..."""
+    candidate = path
+    counter = 1
+    while candidate.exists() or candidate.is_symlink():
+        candidate = path.with_name(f"{path.stem}_copy{counter}{path.suffix}")
+        counter += 1
+    return candidate
+
+
+def _copy_file_data(src_fd: int, dst_fd: int, size: int, on_bytes):
+    """Копирует содержимое: reflink → copy_file_range → обычное чтение/запись"""
+    if fcntl is not None:
+        try:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+            on_bytes(size)
+            return
+        except OSError:
+            pass
+
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied < size:
+                n = os.copy_file_range(src_fd, dst_fd, min(_CHUNK, size - copied))
+                if n == 0:
+                    break
+                copied += n
+                on_bytes(n)
+            return
+        except OSError as e:
+            # Разные ФС / старое ядро — досылаем остаток обычным способом
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+
+    os.lseek(src_fd, copied, os.SEEK_SET)
+    os.lseek(dst_fd, copied, os.SEEK_SET)
+    while True:
+        buf = os.read(src_fd, 8 * 1024 * 1024)
+        if not buf:
+            break
+        view = memoryview(buf)
+        while view:
+            written = os.write(dst_fd, view)
+            view = view[written:]
+        on_bytes(len(buf))
+
+
+class _FileOperationWorker(QObject):
+    progress = Signal(int, object, object, str)   # op_id, done_bytes, total_bytes, current file
+    finished = Signal(int, bool, str)             # op_id, success, message
+    completed = Signal()
+
+    def __init__(self, op: dict):
+        super().__init__()
+        self.op = op
+        self._cancel = threading.Event()
+        self._done = 0
+        self._total = 0
+        self._last_emit = 0.0
+        self._current = ""
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        op = self.op
+        try:
+            if op['unique']:
+                # Имя выбирается при запуске, а не при постановке в очередь: две вставки
+                # подряд иначе получили бы одно и то же свободное имя
+                op['dst'] = unique_path(op['dst'])
+            if op['kind'] == 'copy':
+                self._copy_tree(op['src'], op['dst'], op['skip_scratch'])
+            elif op['kind'] == 'move':
+                self._move(op['src'], op['dst'])
+            elif op['kind'] == 'delete':
+                from send2trash import send2trash
+                send2trash(str(op['src']))
+            self.finished.emit(op['id'], True, "")
+        except OperationCancelled:
+            self.finished.emit(op['id'], False, "Cancelled")
+        except Exception as e:
+            self.finished.emit(op['id'], False, str(e))
+        finally:
+            self.completed.emit()
+
+    # === Прогресс ===
+    def _on_bytes(self, n: int):
+        self._done += n
+        now = time.monotonic()
+        if now - self._last_emit >= _PROGRESS_INTERVAL:
+            self._last_emit = now
+            self.progress.emit(self.op['id'], self._done, self._total, self._current)
+        if self._cancel.is_set():
+            raise OperationCancelled()
+
+    # === Копирование ===
+    def _plan(self, src: Path, skip_scratch: bool) -> list[tuple[Path, int]]:
+        """Список файлов для копирования с размерами (после фильтра)"""
+        if not src.is_dir():
+            return [(src, src.stat().st_size)]
+        files = []
+        for dirpath, dirnames, filenames in os.walk(src):
+            for name in filenames:
+                path = Path(dirpath) / name
+                try:
+                    size = path.lstat().st_size
+                except OSError:
+                    continue
+                if skip_scratch and is_scratch_file(path, size):
+                    continue
+                files.append((path, size))
+        return files
+
+    def _copy_tree(self, src: Path, dst: Path, skip_scratch: bool):
+        files = self._plan(src, skip_scratch)
+        self._total = sum(size for _, size in files)
+        # Корень копии создаётся только новым (mkdir, O_EXCL, symlink): в существующую
+        # папку не дописываем, а при отмене удаляем лишь созданное этой операцией
+        created = False
+        try:
+            if src.is_dir():
+                dst.mkdir()
+                created = True
+                # Каталоги создаём заранее — пустые папки (Results/) тоже нужны
+                for dirpath, _, _ in os.walk(src):
+                    (dst / Path(dirpath).relative_to(src)).mkdir(parents=True, exist_ok=True)
+                shutil.copystat(src, dst)
+                for path, _ in files:
+                    self._copy_file(path, dst / path.relative_to(src))
+            else:
+                if not src.is_symlink():
+                    os.close(os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+                    created = True
+                self._copy_file(src, dst)
+                created = True
+        except BaseException:
+            # Отмена или ошибка — не оставляем половину копии
+            if created:
+                if dst.is_dir() and not dst.is_symlink():
+                    shutil.rmtree(dst, ignore_errors=True)
+                else:
+                    dst.unlink(missing_ok=True)
+            raise
+        self.progress.emit(self.op['id'], self._done, self._total, "")
+
+    def _copy_file(self, src: Path, dst: Path):
+        self._current = src.name
+        if self._cancel.is_set():
+            raise OperationCancelled()
+        if src.is_symlink():
+            os.symlink(os.readlink(src), dst)
+            return
+        src_fd = os.open(src, os.O_RDONLY)
+        try:
+            size = os.fstat(src_fd).st_size
+            dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                _copy_file_data(src_fd, dst_fd, size, self._on_bytes)
+            finally:
+                os.close(dst_fd)
+        finally:
+            os.close(src_fd)
+        shutil.copystat(src, dst)
+
+    def _move(self, src: Path, dst: Path):
+        try:
+            os.rename(src, dst)  # та же ФС — мгновенно
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        # Другой диск: копируем с прогрессом, затем удаляем исходник
+        self._copy_tree(src, dst, skip_scratch=False)
+        if src.is_dir():
+            shutil.rmtree(src)
+        else:
+            src.unlink()
+
+    def start_async(self):
+        # Поток принадлежит приложению: владелец может отпустить воркера сразу после
+        # completed, а сам QThread удалится через deleteLater, когда действительно завершится
+        self._thread = QThread(QCoreApplication.instance())
+        self.moveToThread(self._thread)
+        self._thread.started.connect(self.run)
+        self._thread.finished.connect(self._thread.deleteLater)
+        self.completed.connect(self._thread.quit)
+        self._thread.start()
+
+
+class FileOperationQueue(QObject):
+    """
+    Очередь файловых операций вне UI-потока. Операции выполняются по одной,
+    в порядке добавления; текущую можно отменить.
+    """
+    operation_started = Signal(int, str)             # op_id, description
+    progress = Signal(int, object, object, str)      # op_id, done_bytes, total_bytes, current file
+    operation_finished = Signal(int, bool, str)      # op_id, success, message
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pending: list[dict] = []
+        self._ops: dict[int, dict] = {}
+        self._worker = None
+
+    def copy(self, src: Path, dst: Path, skip_scratch: bool = False, unique: bool = False) -> int:
+        """unique — если dst занят к началу операции, взять свободное имя рядом (unique_path)"""
+        return self._enqueue('copy', src, dst, skip_scratch=skip_scratch, unique=unique)
+
+    def move(self, src: Path, dst: Path, unique: bool = False) -> int:
+        return self._enqueue('move', src, dst, unique=unique)
+
+    def delete(self, path: Path) -> int:
+        return self._enqueue('delete', path, None)
+
+    def operation(self, op_id: int) -> dict | None:
+        return self._ops.get(op_id)
+
+    def is_busy(self) -> bool:
+        return self._worker is not None or bool(self._pending)
+
+    def cancel(self, op_id: int = None):
+        """Отменяет операцию (по умолчанию — текущую)"""
+        if self._worker is not None and op_id in (None, self._worker.op['id']):
+            self._worker.cancel()
+            return
+        for op in self._pending:
+            if op['id'] == op_id:
+                self._pending.remove(op)
+                self.operation_finished.emit(op_id, False, "Cancelled")
+                return
+
+    def _enqueue(self, kind: str, src: Path, dst: Path | None, skip_scratch: bool = False,
+                 unique: bool = False) -> int:
+        op = {
+            'id': next(_op_ids),
+            'kind': kind,
+            'src': Path(src),
+            'dst': Path(dst) if dst is not None else None,
+            'skip_scratch': skip_scratch,
+            'unique': unique,
+        }
+        self._ops[op['id']] = op
+        self._pending.append(op)
+        if self._worker is None:
+            self._run_next()
+        return op['id']
+
+    def _run_next(self):
+        if not self._pending:
+            return
+        op = self._pending.pop(0)
+        worker = _FileOperationWorker(op)
+        worker.progress.connect(self.progress)
+        worker.finished.connect(self._on_finished)
+        self._worker = worker
+        self.operation_started.emit(op['id'], describe(op))
+        worker.start_async()
+
+    def _on_finished(self, op_id: int, success: bool, message: str):
+        self._worker = None
+        self.operation_finished.emit(op_id, success, message)
+        self._ops.pop(op_id, None)
+        self._run_next()
+
+
+def describe(op: dict) -> str:
+    if op['kind'] == 'delete':
+        return f"Deleting {op['src'].name}"
+    verb = "Copying" if op['kind'] == 'copy' else "Moving"
+    return f"{verb} {op['src'].name} → {op['dst'].parent}"
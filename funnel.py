@@ -0,0 +1,213 @@
+# funnel.py
+"""
+Воронка конформеров: дешёвый расчёт всех конформеров одновременно, дорогой — только лучших.
+
+    python funnel.py confs.xyz --screen Templates/xtb.inp --refine Templates/opt.inp \
+        --window 3 --top 5 --parallel 8 -o project/
+    python orca_cli.py project/funnel.json
+
+Шаг отбора (screen) — вход по шаблону на каждый кадр .xyz (как в Parameter Sweep);
+задания идут одной параллельной группой очереди. Когда группа закончилась, конформеры
+ранжируются по энергии из parse.json; в очередь дописываются шаги уточнения (refine)
+только для тех, кто попал в окно энергий (ккал/моль от минимума) и в первые top-k.
+Первый шаг уточнения берёт геометрию из вывода отбора, следующие — из предыдущего шага.
+
+Описание воронки — <имя>.funnel.json рядом с расчётами: имена конформеров, тексты
+шаблонов уточнения, окно и top-k; после отбора в него дописывается "selected".
+Группа заданий в очереди — "funnel:<путь к файлу>", поэтому отбор делает та очередь,
+которая считает (окно, orca_cli или демон), в том числе после перезапуска.
+"""
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+from PySide6.QtCore import QObject, Signal
+
+import pipeline
+from orca_input import parse_input, parse_input_text, with_coordinates
+from results_store import HARTREE_TO_KCAL, ResultsTable
+from sweep import (INPUTS_DIR_NAME, RESULTS_DIR_NAME, SweepPoint, SweepSpec, expand_sweep, safe_name,
+                   write_sweep)
+
+FUNNEL_SUFFIX = ".funnel.json"
+GROUP_PREFIX = "funnel:"
+DEFAULT_WINDOW_KCAL = 3.0
+
+
+@dataclass
+class FunnelSpec:
+    """Шаблоны отбора и уточнения, геометрии и правило отбора (0 — без ограничения)"""
+    screen_template: Path
+    refine_templates: list[Path]
+    geometries: list[Path] = field(default_factory=list)
+    window_kcal: float = DEFAULT_WINDOW_KCAL
+    top_k: int = 0
+    parallel: int = 1
+    prefix: str = ""
+    energy: str = "Energy"
+
+
+def group_name(funnel_file: Path) -> str:
+    return GROUP_PREFIX + str(Path(funnel_file).resolve())
+
+
+def funnel_file_of(group: str) -> Path | None:
+    return Path(group[len(GROUP_PREFIX):]) if group and group.startswith(GROUP_PREFIX) else None
+
+
+def _write_json(path: Path, data: dict):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def create_funnel(spec: FunnelSpec, out_dir: Path, overwrite: bool = False) -> tuple[Path, list[tuple]]:
+    """Входы отбора и описание воронки; возвращает файл воронки и задания отбора для очереди"""
+    # Абсолютные пути: pipeline .json воронки достраивает относительные от своей папки
+    out_dir = Path(out_dir).resolve()
+    if not spec.refine_templates:
+        raise ValueError("Choose at least one refinement template")
+    prefix = safe_name(spec.prefix or "funnel")
+    refine = []
+    for template in spec.refine_templates:
+        inp = parse_input(template)
+        if inp.errors:
+            raise ValueError(f"{Path(template).name}: {inp.errors[0]}")
+        refine.append({"name": safe_name(Path(template).stem), "text": inp.text})
+
+    funnel_file = out_dir / f"{prefix}{FUNNEL_SUFFIX}"
+    if funnel_file.exists() and not overwrite:
+        raise FileExistsError(f"Funnel {funnel_file} already exists")
+    points = expand_sweep(SweepSpec(template=Path(spec.screen_template), geometries=list(spec.geometries),
+                                    prefix=prefix))
+    jobs = write_sweep(points, out_dir, overwrite)
+    _write_json(funnel_file, {
+        "screen": [point.name for point in points],
+        "refine": refine,
+        "window_kcal": spec.window_kcal,
+        "top_k": spec.top_k,
+        "energy": spec.energy,
+    })
+    options = {"group": group_name(funnel_file), "parallel": max(1, spec.parallel)}
+    return funnel_file, [(inp, out, name, dict(options)) for inp, out, name in jobs]
+
+
+def rank_conformers(energies: np.ndarray, window_kcal: float, top_k: int) -> np.ndarray:
+    """Индексы отобранных по возрастанию энергии; без энергии (NaN) — не отбираются"""
+    valid = np.nonzero(~np.isnan(energies))[0]
+    order = valid[np.argsort(energies[valid], kind='stable')]
+    if not order.size:
+        return order
+    if window_kcal > 0:
+        relative = (energies[order] - energies[order[0]]) * HARTREE_TO_KCAL
+        order = order[relative <= window_kcal]
+    if top_k > 0:
+        order = order[:top_k]
+    return order
+
+
+def select(funnel_file: Path) -> tuple[list[tuple[str, float]], int]:
+    """Отобранные конформеры (имя, ккал/моль от минимума) и число конформеров с энергией"""
+    funnel_file = Path(funnel_file)
+    with open(funnel_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    names = data["screen"]
+    # Расчёты воронки лежат в папке файла; parse.json — там же (как у Parameter Sweep)
+    table = ResultsTable.load(funnel_file.parent)
+    row = {str(name): i for i, name in enumerate(table.names)}
+    column = table.column(data.get("energy", "Energy"))
+    energies = np.array([column[row[name]] if name in row else np.nan for name in names])
+    chosen = rank_conformers(energies, float(data.get("window_kcal", 0)), int(data.get("top_k", 0)))
+    lowest = energies[chosen[0]] if chosen.size else np.nan
+    survivors = [(names[i], float((energies[i] - lowest) * HARTREE_TO_KCAL)) for i in chosen]
+    data["selected"] = [{"name": name, "relative_kcal": round(rel, 3)} for name, rel in survivors]
+    _write_json(funnel_file, data)
+    return survivors, int(np.count_nonzero(~np.isnan(energies)))
+
+
+def refine_jobs(funnel_file: Path, survivors: list[str]) -> list[tuple]:
+    """Входы уточнения для отобранных: <конформер>_<шаблон> по шаблонам по порядку"""
+    funnel_file = Path(funnel_file)
+    out_dir = funnel_file.parent
+    with open(funnel_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    templates = [(step["name"], parse_input_text(step["text"])) for step in data["refine"]]
+    points, sources = [], []
+    for name in survivors:
+        screened = parse_input(out_dir / name / INPUTS_DIR_NAME / f"{name}.inp")
+        for n, (step, template) in enumerate(templates):
+            inp = with_coordinates(template, screened.charge, screened.mult, atoms=screened.atoms)
+            points.append(SweepPoint(safe_name(f"{name}_{step}"), {"conformer": name, "step": step}, inp))
+            # Первый шаг — геометрия из вывода отбора, следующие — из предыдущего шага
+            sources.append(out_dir / name / RESULTS_DIR_NAME / f"{name}.out" if n == 0
+                           else pipeline.GEOMETRY_PREVIOUS)
+    jobs = write_sweep(points, out_dir, overwrite=True)
+    return [(inp, out, display, {"geometry_from": source, "geometry_mode": "inject"})
+            for (inp, out, display), source in zip(jobs, sources)]
+
+
+class FunnelController(QObject):
+    """Отбор после группы отбора: дописывает шаги уточнения в ту же очередь"""
+    funnel_selected = Signal(str, int, int)  # имя воронки, отобрано, всего с энергией
+
+    def __init__(self, queue, parent=None):
+        super().__init__(parent)
+        self.queue = queue
+        queue.group_finished.connect(self.on_group_finished)
+
+    def on_group_finished(self, group: str):
+        funnel_file = funnel_file_of(group)
+        if funnel_file is None:
+            return
+        name = funnel_file.name[:-len(FUNNEL_SUFFIX)]
+        try:
+            survivors, total = select(funnel_file)
+            jobs = refine_jobs(funnel_file, [survivor for survivor, _ in survivors])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARN] Funnel {name}: cannot select conformers: {e}")
+            return
+        # Повторный прогон очереди не дублирует уже добавленные шаги
+        queued = {Path(job['inp']) for job in self.queue.jobs}
+        jobs = [job for job in jobs if Path(job[0]) not in queued]
+        if jobs:
+            self.queue.add_jobs(jobs)
+        self.funnel_selected.emit(name, len(survivors), total)
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="funnel", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("geometries", nargs="+", type=Path, help=".xyz files (multi-frame = one conformer per frame)")
+    parser.add_argument("--screen", type=Path, required=True, help="cheap template (e.g. XTB2 or r2SCAN-3c SP)")
+    parser.add_argument("--refine", type=Path, action="append", required=True,
+                        help="refinement template; repeat for several steps (opt, then freq)")
+    parser.add_argument("--window", type=float, default=DEFAULT_WINDOW_KCAL, metavar="KCAL",
+                        help="keep conformers within this many kcal/mol of the lowest (0 = all)")
+    parser.add_argument("--top", type=int, default=0, metavar="K", help="keep at most K conformers (0 = all)")
+    parser.add_argument("--parallel", type=int, default=1, metavar="N", help="screening jobs at once")
+    parser.add_argument("--prefix", default="", help="name of the funnel (default: funnel)")
+    parser.add_argument("--energy", default="Energy", help="parse.json column to rank by")
+    parser.add_argument("-o", "--out-dir", type=Path, default=Path("."), help="project folder for calculations")
+    args = parser.parse_args(argv)
+    spec = FunnelSpec(args.screen, args.refine, args.geometries, args.window, args.top, args.parallel,
+                      args.prefix, args.energy)
+    try:
+        funnel_file, jobs = create_funnel(spec, args.out_dir)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    pipeline_file = funnel_file.with_name(funnel_file.name[:-len(FUNNEL_SUFFIX)] + ".json")
+    pipeline.save_pipeline(pipeline_file, [{'inp': inp, 'display_name': name, **options}
+                                           for inp, out, name, options in jobs])
+    print(f"{len(jobs)} screening inputs, funnel {funnel_file}")
+    print(f"Run: python orca_cli.py {pipeline_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
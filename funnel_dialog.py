@@ -0,0 +1,141 @@
+# funnel_dialog.py
+import os
+from pathlib import Path
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QLineEdit, QPushButton, QComboBox,
+    QListWidget, QAbstractItemView, QFileDialog, QGroupBox, QSpinBox, QDoubleSpinBox
+)
+
+from funnel import DEFAULT_WINDOW_KCAL, FunnelSpec
+from orca_parser import input_metadata
+
+
+class FunnelDialog(QDialog):
+    """Воронка конформеров: дешёвый шаблон для всех, дорогие шаги — для лучших"""
+
+    def __init__(self, templates: list[Path], target_dir: Path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Conformer Funnel")
+        self.resize(520, 600)
+        self.target_dir = Path(target_dir)
+
+        # === Шаблоны ===
+        self.screen_combo = QComboBox()
+        self.refine_list = QListWidget()
+        self.refine_list.setSelectionMode(QAbstractItemView.MultiSelection)
+        self.refine_list.setDragDropMode(QAbstractItemView.InternalMove)
+        for template in templates:
+            self.screen_combo.addItem(template.name, str(template))
+            self.refine_list.addItem(template.name)
+            self.refine_list.item(self.refine_list.count() - 1).setData(Qt.UserRole, str(template))
+        self.screen_combo.currentIndexChanged.connect(self._suggest_parallel)
+        self.prefix_input = QLineEdit()
+        self.prefix_input.setPlaceholderText("funnel")
+
+        # === Правило отбора ===
+        self.window_spin = QDoubleSpinBox()
+        self.window_spin.setRange(0, 100)
+        self.window_spin.setDecimals(1)
+        self.window_spin.setSuffix(" kcal/mol")
+        self.window_spin.setSpecialValueText("No window")
+        self.window_spin.setValue(DEFAULT_WINDOW_KCAL)
+        self.top_spin = QSpinBox()
+        self.top_spin.setRange(0, 10000)
+        self.top_spin.setSpecialValueText("All")
+        self.parallel_spin = QSpinBox()
+        self.parallel_spin.setRange(1, 256)
+        self.parallel_spin.setToolTip("Screening jobs run at once (the queue runs other jobs one by one)")
+
+        form = QFormLayout()
+        form.addRow("Screening template:", self.screen_combo)
+        form.addRow("Name prefix:", self.prefix_input)
+        form.addRow("Energy window:", self.window_spin)
+        form.addRow("Keep lowest:", self.top_spin)
+        form.addRow("Screening jobs at once:", self.parallel_spin)
+
+        refine_group = QGroupBox("Refinement steps for survivors: select templates, drag to order (e.g. opt, then freq)")
+        refine_layout = QVBoxLayout()
+        refine_layout.addWidget(self.refine_list)
+        refine_group.setLayout(refine_layout)
+
+        # === Геометрии ===
+        self.geometry_list = QListWidget()
+        add_geom_btn = QPushButton("Add .xyz...")
+        add_geom_btn.clicked.connect(self._add_geometries)
+        remove_geom_btn = QPushButton("Remove")
+        remove_geom_btn.clicked.connect(self._remove_geometry)
+        geom_buttons = QHBoxLayout()
+        geom_buttons.addWidget(add_geom_btn)
+        geom_buttons.addWidget(remove_geom_btn)
+        geom_buttons.addStretch()
+        geom_group = QGroupBox("Conformers (multi-frame .xyz = one conformer per frame)")
+        geom_layout = QVBoxLayout()
+        geom_layout.addWidget(self.geometry_list)
+        geom_layout.addLayout(geom_buttons)
+        geom_group.setLayout(geom_layout)
+
+        # === Кнопки ===
+        self.summary_label = QLabel()
+        btn_create = QPushButton("Create && Queue")
+        btn_cancel = QPushButton("Cancel")
+        btn_create.clicked.connect(self._on_accept)
+        btn_cancel.clicked.connect(self.reject)
+        btn_layout = QHBoxLayout()
+        btn_layout.addWidget(self.summary_label)
+        btn_layout.addStretch()
+        btn_layout.addWidget(btn_create)
+        btn_layout.addWidget(btn_cancel)
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(f"Output folder: {self.target_dir}"))
+        layout.addLayout(form)
+        layout.addWidget(refine_group)
+        layout.addWidget(geom_group)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+        self._suggest_parallel()
+
+    def _suggest_parallel(self):
+        # Сколько заданий отбора помещается на машину по %pal шаблона
+        template = self.screen_combo.currentData()
+        nprocs = 1
+        if template:
+            try:
+                nprocs = input_metadata(Path(template))["nprocs"] or 1
+            except Exception:
+                pass
+        self.parallel_spin.setValue(max(1, (os.cpu_count() or 1) // nprocs))
+
+    def _add_geometries(self):
+        files, _ = QFileDialog.getOpenFileNames(
+            self, "Select conformers", str(self.target_dir), "XYZ files (*.xyz)"
+        )
+        for file in files:
+            self.geometry_list.addItem(file)
+
+    def _remove_geometry(self):
+        for item in self.geometry_list.selectedItems():
+            self.geometry_list.takeItem(self.geometry_list.row(item))
+
+    def _on_accept(self):
+        if not self.geometry_list.count():
+            self.summary_label.setText("Add conformer geometries")
+            return
+        if not self.refine_list.selectedItems():
+            self.summary_label.setText("Choose refinement templates")
+            return
+        self.accept()
+
+    def get_spec(self) -> FunnelSpec:
+        refine = [Path(self.refine_list.item(i).data(Qt.UserRole)) for i in range(self.refine_list.count())
+                  if self.refine_list.item(i).isSelected()]
+        return FunnelSpec(
+            screen_template=Path(self.screen_combo.currentData() or ""),
+            refine_templates=refine,
+            geometries=[Path(self.geometry_list.item(i).text()) for i in range(self.geometry_list.count())],
+            window_kcal=self.window_spin.value(),
+            top_k=self.top_spin.value(),
+            parallel=self.parallel_spin.value(),
+            prefix=self.prefix_input.text().strip(),
+        )
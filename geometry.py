@@ -0,0 +1,132 @@
+# geometry.py
+import os
+from pathlib import Path
+
+import compressed_io
+from orca_input import Atom, format_atoms, parse_input, with_coordinates
+
+# Заголовок блока координат в .out (печатается на каждом шаге оптимизации)
+_OUT_COORDS_HEADER = b"CARTESIAN COORDINATES (ANGSTROEM)"
+_DONE_MARKER = b"ORCA TERMINATED NORMALLY"
+
+# Хвост читается блоками, каждый следующий вдвое больше
+_FIRST_CHUNK = 256 * 1024
+
+GEOMETRY_MODES = ("inject", "xyzfile")
+
+# После маркера завершения бывают только время счёта и сообщения MPI при выходе
+_DONE_TAIL = 64 * 1024
+
+
+def _parse_atom_line(line: bytes) -> Atom | None:
+    tokens = line.split()
+    if len(tokens) < 4:
+        return None
+    try:
+        return Atom(tokens[0].decode().capitalize(), float(tokens[1]), float(tokens[2]), float(tokens[3]))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _last_out_geometry(data: bytes) -> list[Atom] | None:
+    pos = data.rfind(_OUT_COORDS_HEADER)
+    if pos < 0:
+        return None
+    lines = data[pos:].split(b"\n")[2:]  # заголовок и строка из дефисов
+    atoms = []
+    for line in lines:
+        if not line.strip():
+            break
+        atom = _parse_atom_line(line)
+        if atom is None:
+            break
+        atoms.append(atom)
+    # Блок обрезан концом файла (ORCA ещё пишет) — считаем, что не найден
+    if len(lines) == len(atoms):
+        return None
+    return atoms or None
+
+
+def _last_xyz_frame(data: bytes, whole: bool) -> list[Atom] | None:
+    lines = data.rstrip().split(b"\n")
+    # Первая строка хвоста может быть обрезана посередине
+    first = 0 if whole else 1
+    for k in range(len(lines) - 3, first - 1, -1):
+        token = lines[k].strip()
+        if not token.isdigit() or k + 2 + int(token) != len(lines):
+            continue
+        atoms = [_parse_atom_line(line) for line in lines[k + 2:]]
+        if all(atoms):
+            return atoms
+    return None
+
+
+def terminated_normally(path: Path) -> bool:
+    """Есть ли маркер нормального завершения ORCA в конце .out (читается только хвост)"""
+    try:
+        data, _ = compressed_io.read_tail(path, _DONE_TAIL)
+    except OSError:
+        return False
+    return _DONE_MARKER in data
+
+
+def last_geometry(path: Path, require_finished: bool = True) -> list[Atom]:
+    """
+    Последняя геометрия из .out (блок CARTESIAN COORDINATES) или .xyz/_trj.xyz
+    (последний кадр). Читается только хвост файла, расширяясь до нужного размера;
+    сжатый файл (или его сжатая версия, если исходного уже нет) читается так же.
+    """
+    path = compressed_io.resolve(path)
+    is_out = compressed_io.logical_path(path).suffix != ".xyz"
+    chunk = _FIRST_CHUNK
+    while True:
+        data, whole = compressed_io.read_tail(path, chunk)
+        if is_out and require_finished and chunk == _FIRST_CHUNK and _DONE_MARKER not in data[-4096:]:
+            raise ValueError(f"{path.name} did not terminate normally")
+        atoms = _last_out_geometry(data) if is_out else _last_xyz_frame(data, whole)
+        if atoms:
+            return atoms
+        if whole:
+            raise ValueError(f"No geometry found in {path.name}")
+        chunk *= 2
+
+
+def write_xyz(path: Path, atoms: list[Atom], comment: str = ""):
+    text = f"{len(atoms)}\n{comment}\n" + "\n".join(format_atoms(atoms)) + "\n"
+    _write_atomic(Path(path), text)
+
+
+def _write_atomic(path: Path, text: str):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def handoff_xyz_path(inp_path: Path) -> Path:
+    """Файл стартовой геометрии для режима xyzfile (basename.xyz занят выводом ORCA)"""
+    return inp_path.parent / f"{inp_path.stem}_start.xyz"
+
+
+def apply_geometry(inp_path: Path, source: Path, mode: str = "inject") -> int:
+    """
+    Переносит последнюю геометрию source в вход inp_path: прямо в блок "* xyz"
+    (inject) или в отдельный .xyz со ссылкой "* xyzfile" (xyzfile).
+    Заряд и мультиплетность берутся из входа. Возвращает число атомов.
+    """
+    if mode not in GEOMETRY_MODES:
+        raise ValueError(f"Unknown geometry mode '{mode}'")
+    inp_path = Path(inp_path)
+    atoms = last_geometry(source)
+    inp = parse_input(inp_path)
+    if inp.charge is None or inp.mult is None:
+        raise ValueError(f"{inp_path.name} has no '* xyz charge mult' line")
+
+    if mode == "xyzfile":
+        xyz_path = handoff_xyz_path(inp_path)
+        write_xyz(xyz_path, atoms, f"from {Path(source).name}")
+        inp = with_coordinates(inp, inp.charge, inp.mult, coord_file=xyz_path.name)
+    else:
+        inp = with_coordinates(inp, inp.charge, inp.mult, atoms=atoms)
+    _write_atomic(inp_path, inp.text)
+    return len(atoms)
@@ -0,0 +1,112 @@
+# job_history.py
+"""
+История заданий: по строке JSON на каждый запуск ORCA (job_history.jsonl в папке
+журналов очереди). Пишет OrcaJob после выхода процесса; читает resource_advisor.
+
+Поля: time, inp, calc, method, nprocs, maxcore, atoms, outcome (success / failed /
+terminated), returncode, wall_s, cpu_s, maxrss_mb (пик RSS самого большого процесса,
+т.е. на процесс — как %maxcore), cpu_efficiency = cpu_s / (wall_s × nprocs),
+memory_error — ORCA остановилась из-за нехватки памяти, disk_mb — пик занятого места на
+томе, где шёл счёт (по убыли свободного места, disk_guard).
+"""
+import datetime
+import json
+import os
+import re
+from pathlib import Path
+
+import compressed_io
+from orca_parser import input_metadata
+
+HISTORY_FILE_NAME = "job_history.jsonl"
+
+# Сообщения ORCA и MPI о нехватке памяти (ищутся в конце .out)
+_MEMORY_ERROR_RE = re.compile(
+    rb"not enough memory|increase maxcore|maxcore.{0,40}too small|std::bad_alloc|out of memory|"
+    rb"cannot allocate memory",
+    re.IGNORECASE,
+)
+_TAIL = 64 * 1024
+
+
+def memory_error(out_path: Path) -> bool:
+    try:
+        return bool(_MEMORY_ERROR_RE.search(compressed_io.read_tail(out_path, _TAIL)[0]))
+    except OSError:
+        return False
+
+
+def make_record(inp_path: Path, out_path: Path, outcome: str, returncode: int, wall_s: float,
+                cpu_s: float | None, maxrss_mb: float | None, disk_mb: float | None = None) -> dict:
+    try:
+        meta = input_metadata(inp_path)
+    except Exception as e:
+        print(f"[WARN] Cannot read input metadata from {inp_path.name}: {e}")
+        meta = {"nprocs": 1, "maxcore": None, "method": "", "atoms": None}
+    nprocs = meta["nprocs"] or 1
+    return {
+        "time": datetime.datetime.now().isoformat(timespec='seconds'),
+        "inp": str(Path(inp_path).resolve()),
+        "calc": Path(out_path).parent.parent.name,
+        **meta,
+        "outcome": outcome,
+        "returncode": returncode,
+        "wall_s": round(wall_s, 3),
+        "cpu_s": round(cpu_s, 3) if cpu_s is not None else None,
+        "maxrss_mb": round(maxrss_mb, 1) if maxrss_mb is not None else None,
+        "cpu_efficiency": round(cpu_s / (wall_s * nprocs), 3) if cpu_s is not None and wall_s > 0 else None,
+        "memory_error": outcome != "success" and memory_error(out_path),
+        "disk_mb": round(disk_mb, 1) if disk_mb is not None else None,
+    }
+
+
+def append(history_file: Path, record: dict):
+    """Одна запись одним write с O_APPEND: очередь, CLI и демон могут писать одновременно"""
+    history_file.parent.mkdir(parents=True, exist_ok=True)
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+    fd = os.open(history_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def load(history_file: Path) -> list[dict]:
+    records = []
+    try:
+        with open(history_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # недописанная строка
+    except OSError:
+        pass
+    return records
+
+
+class HistoryReader:
+    """Читает историю по мере дописывания: при каждом вызове разбираются только новые строки"""
+
+    def __init__(self, history_file: Path):
+        self.history_file = Path(history_file)
+        self._records: list[dict] = []
+        self._offset = 0
+
+    def records(self) -> list[dict]:
+        try:
+            with open(self.history_file, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < self._offset:
+                    self._records, self._offset = [], 0  # файл заменили
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return self._records
+        end = data.rfind(b"\n") + 1  # недописанная строка подождёт следующего раза
+        for line in data[:end].splitlines():
+            try:
+                self._records.append(json.loads(line))
+            except ValueError:
+                continue
+        self._offset += end
+        return self._records
@@ -0,0 +1,203 @@
+# job_trace.py
+"""
+Хронология заданий очереди: от постановки в очередь до обновления окна. Отметки
+ставят очередь (главный поток) и OrcaJob (поток задания); фаза длится от своей
+отметки до следующей.
+
+Экспорт: Chrome trace JSON (chrome://tracing, https://ui.perfetto.dev) и текстовый
+файл Prometheus (node_exporter --collector.textfile.directory).
+"""
+import collections
+import datetime
+import json
+import os
+import time
+from pathlib import Path
+
+QUEUED = "queued"              # ожидание своей очереди после start/resume
+PREPARE = "prepare"            # перенос геометрии, поток задания, scratch, ядра, окружение
+SPAWN = "spawn"                # Popen
+WAIT_OUTPUT = "wait_output"    # запуск ORCA до первого байта вывода
+RUN = "orca"                   # счёт: от первого байта до закрытия вывода
+CHECK = "check"                # выход процесса и проверка нормального завершения
+COLLECT = "collect"            # копирование результатов из scratch
+HANDOFF = "handoff"            # сигнал из потока задания в главный
+FINISH = "finish"              # статус и журнал очереди
+PARSE = "parse"                # OrcaParser.parse
+NOTIFY = "notify"              # обработчики job_finished (обновление окна, клиенты демона)
+END = "end"
+
+PHASES = (QUEUED, PREPARE, SPAWN, WAIT_OUTPUT, RUN, CHECK, COLLECT, HANDOFF, FINISH, PARSE, NOTIFY)
+# Время самого ORCA; всё остальное после постановки в очередь — накладные расходы менеджера
+ORCA_PHASES = (WAIT_OUTPUT, RUN)
+
+# Квантили Prometheus считаются по последним заданиям
+_QUANTILE_WINDOW = 256
+_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class JobTrace:
+    """Отметки одного задания"""
+
+    def __init__(self, job_id: int, name: str):
+        self.job_id = job_id
+        self.name = name
+        self.outcome = None
+        self.marks: list[tuple[str, float]] = []
+
+    def mark(self, phase: str):
+        self.marks.append((phase, time.perf_counter()))
+
+    def spans(self) -> list[tuple[str, float, float]]:
+        marks = list(self.marks)
+        return [(phase, start, end) for (phase, start), (_, end) in zip(marks, marks[1:])]
+
+    def durations(self) -> dict[str, float]:
+        totals = {}
+        for phase, start, end in self.spans():
+            totals[phase] = totals.get(phase, 0.0) + end - start
+        return totals
+
+    def overhead(self) -> float:
+        """Секунды, которые добавил к заданию менеджер (без ожидания в очереди и счёта ORCA)"""
+        return sum(seconds for phase, seconds in self.durations().items()
+                   if phase != QUEUED and phase not in ORCA_PHASES)
+
+
+class QueueTrace:
+    """Хронологии заданий текущего запуска очереди и накопленные метрики процесса"""
+
+    def __init__(self):
+        self._jobs: dict[int, JobTrace] = {}
+        self._epoch = time.perf_counter()
+        self._epoch_wall = time.time()
+        # Суммы копятся с запуска процесса: счётчики Prometheus не должны убывать
+        self._sums = collections.defaultdict(float)
+        self._counts = collections.Counter()
+        self._recent = collections.defaultdict(lambda: collections.deque(maxlen=_QUANTILE_WINDOW))
+        self._outcomes = collections.Counter()
+        self._last_finished = 0.0
+
+    def reset(self):
+        """Новый запуск очереди (start/resume): прежние хронологии больше не нужны"""
+        self._jobs.clear()
+        self._epoch = time.perf_counter()
+        self._epoch_wall = time.time()
+
+    def job(self, job_id: int, name: str) -> JobTrace:
+        trace = self._jobs[job_id] = JobTrace(job_id, name)
+        return trace
+
+    def get(self, job_id: int) -> JobTrace | None:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list[JobTrace]:
+        return list(self._jobs.values())
+
+    def finish(self, job_id: int, outcome: str):
+        trace = self._jobs.get(job_id)
+        if trace is None or trace.outcome is not None:
+            return
+        trace.mark(END)
+        trace.outcome = outcome
+        for phase, seconds in trace.durations().items():
+            self._add(phase, seconds)
+        self._add("overhead", trace.overhead())
+        self._outcomes[outcome] += 1
+        self._last_finished = time.time()
+
+    def _add(self, key: str, seconds: float):
+        self._sums[key] += seconds
+        self._counts[key] += 1
+        self._recent[key].append(seconds)
+
+    # === Chrome trace ===
+    def chrome_trace(self) -> dict:
+        """
+        Задание — полоса с вложенными фазами. Задания раскладываются по дорожкам так,
+        чтобы одновременные не перекрывались; ожидание в очереди — в args
+        """
+        events = [{"name": "process_name", "ph": "M", "pid": 1, "args": {"name": "OrcaUI queue"}}]
+        lane_ends = []
+        traces = [(trace, [span for span in trace.spans() if span[0] != QUEUED]) for trace in self.jobs()]
+        traces = sorted((item for item in traces if item[1]), key=lambda item: item[1][0][1])
+        for trace, spans in traces:
+            start, end = spans[0][1], spans[-1][2]
+            lane = next((i for i, lane_end in enumerate(lane_ends) if lane_end <= start), len(lane_ends))
+            if lane == len(lane_ends):
+                lane_ends.append(end)
+                events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": lane + 1,
+                               "args": {"name": f"jobs {lane + 1}"}})
+            else:
+                lane_ends[lane] = end
+            durations = trace.durations()
+            events.append(self._event(trace.name, "job", start, end, lane, {
+                "job_id": trace.job_id,
+                "outcome": trace.outcome or "running",
+                "queued_ms": round(durations.get(QUEUED, 0.0) * 1000, 3),
+                "overhead_ms": round(trace.overhead() * 1000, 3),
+            }))
+            for phase, span_start, span_end in spans:
+                events.append(self._event(phase, "phase", span_start, span_end, lane))
+        started = datetime.datetime.fromtimestamp(self._epoch_wall).isoformat(timespec='seconds')
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"started": started}}
+
+    def _event(self, name: str, category: str, start: float, end: float, lane: int, args: dict = None) -> dict:
+        event = {"name": name, "cat": category, "ph": "X", "pid": 1, "tid": lane + 1,
+                 "ts": round((start - self._epoch) * 1e6, 1), "dur": round((end - start) * 1e6, 1)}
+        if args:
+            event["args"] = args
+        return event
+
+    def write_chrome(self, path: Path):
+        _write_atomic(Path(path), json.dumps(self.chrome_trace()))
+
+    # === Prometheus ===
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP orcaui_job_phase_seconds Time jobs spend in each lifecycle phase.",
+            "# TYPE orcaui_job_phase_seconds summary",
+        ]
+        for phase in PHASES:
+            if self._counts[phase]:
+                lines += self._summary("orcaui_job_phase_seconds", phase, f'phase="{phase}"')
+        lines += [
+            "# HELP orcaui_job_overhead_seconds Wall time the queue adds to a job on top of ORCA itself.",
+            "# TYPE orcaui_job_overhead_seconds summary",
+        ]
+        lines += self._summary("orcaui_job_overhead_seconds", "overhead", "")
+        lines += [
+            "# HELP orcaui_jobs_total Jobs finished, by outcome.",
+            "# TYPE orcaui_jobs_total counter",
+        ]
+        lines += [f'orcaui_jobs_total{{outcome="{outcome}"}} {count}'
+                  for outcome, count in sorted(self._outcomes.items())]
+        lines += [
+            "# HELP orcaui_last_job_finished_timestamp_seconds Unix time the last job finished.",
+            "# TYPE orcaui_last_job_finished_timestamp_seconds gauge",
+            f"orcaui_last_job_finished_timestamp_seconds {self._last_finished:.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def _summary(self, metric: str, key: str, labels: str) -> list[str]:
+        recent = sorted(self._recent[key])
+        separator = "," if labels else ""
+        lines = []
+        for q in _QUANTILES:
+            value = recent[min(len(recent) - 1, int(q * len(recent)))] if recent else float("nan")
+            lines.append(f'{metric}{{{labels}{separator}quantile="{q}"}} {value:.9g}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{metric}_sum{suffix} {self._sums[key]:.9g}")
+        lines.append(f"{metric}_count{suffix} {self._counts[key]}")
+        return lines
+
+    def write_prometheus(self, path: Path):
+        _write_atomic(Path(path), self.prometheus_text())
+
+
+def _write_atomic(path: Path, text: str):
+    """Читатель (node_exporter, просмотрщик) не должен увидеть недописанный файл"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
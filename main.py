@@ -5,21 +5,28 @@ import json
 from pathlib import Path
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QSplitter, QTreeView,
-    QFileSystemModel, QPlainTextEdit, QWidget, QVBoxLayout,
-    QPushButton, QListWidget, QListWidgetItem, QHBoxLayout,
-    QMessageBox, QAbstractItemView, QLabel, QLineEdit, QDialog
+    QPlainTextEdit, QWidget, QVBoxLayout,
+    QPushButton, QHBoxLayout,
+    QMessageBox, QLabel, QLineEdit, QDialog,
+    QTreeWidget, QTreeWidgetItem, QProgressDialog,
+    QCheckBox, QFormLayout, QDialogButtonBox
 ) 
 from PySide6.QtWidgets import QFileDialog, QMenuBar, QMenu, QHeaderView, QInputDialog
-from PySide6.QtGui import QFont, QKeySequence, QShortcut, QIcon
-from PySide6.QtCore import Qt, QModelIndex, QMimeData, QUrl
-from PySide6.QtGui import QDragEnterEvent, QDropEvent
-
-import settings
+from PySide6.QtGui import QFont, QKeySequence, QShortcut, QIcon, QTextCursor
+from PySide6.QtCore import Qt, QModelIndex, QMimeData, QUrl, QTimer
+
+# Диалоги, send2trash и numpy (таблица результатов) импортируются при первом
+# использовании — окно должно появиться как можно раньше
+import compressed_io
+import disk_guard
+import funnel
 import orca_queue
-import find_dialog
-import shutil 
-from send2trash import send2trash
-from create_file_dialog import CreateFileDialog
+import pipeline
+from queue_model import QueueListModel, QueueListView
+import output_index
+from file_loader import FileLoader
+from project_model import ProjectTreeModel
+from project_watcher import ProjectWatcher
 
 class CreateTemplateDialog(QDialog):
     def __init__(self, original_name: str, parent=None):
@@ -49,33 +56,6 @@ class CreateTemplateDialog(QDialog):
     def get_template_name(self) -> str:
         return self.name_input.text().strip()
 
-class QueueListWidget(QListWidget):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setAcceptDrops(True)
-        self.setDragDropMode(QAbstractItemView.DropOnly)
-        self.setDefaultDropAction(Qt.CopyAction)
-        self.setSelectionMode(QAbstractItemView.SingleSelection)
-
-    def dragEnterEvent(self, event: QDragEnterEvent):
-        mime = event.mimeData()
-        if mime.hasUrls():
-            # Проверяем, что все файлы — .inp
-            urls = mime.urls()
-            if all(url.isLocalFile() and url.toLocalFile().endswith('.inp') for url in urls):
-                event.acceptProposedAction()
-        super().dragEnterEvent(event)
-
-    def dropEvent(self, event: QDropEvent):
-        mime = event.mimeData()
-        if mime.hasUrls():
-            for url in mime.urls():
-                path = Path(url.toLocalFile())
-                if path.suffix == '.inp':
-                    self.parent().add_inp_to_queue(path)
-            event.acceptProposedAction()
-        super().dropEvent(event)
-
 class PipelineDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -127,11 +107,32 @@ class OrcaGUI(QMainWindow):
         self.chemcraft_linux_exe = Path(default_chemcraft_linux)
         self.chemcraft_windows_exe = Path(default_chemcraft_windows)
         self.orca_locale = default_locale
+        # Scratch выключен, пока не задана папка
+        self.scratch_dir = None
+        self.scratch_patterns = []
+        self.scratch_by_default = False
+        self.pin_cpus = False
+        # Сторож очереди, минуты (0 — без ограничения)
+        self.wall_time_limit = 0
+        self.stall_limit = 0
+        # Сжатие выводов после задания: "" / "gzip" / "zstd"
+        self.compress_outputs = ""
+        # Временные файлы успешных заданий и запас свободного места, МБ (0 — не проверять)
+        self.artifact_retention = disk_guard.KEEP
+        self.disk_reserve_mb = disk_guard.DEFAULT_RESERVE_MB
 
         # ЗАТЕМ загружаем настройки
         self.load_settings()
 
-        self.queue = orca_queue.OrcaQueue(self.orca_exe, log_dir=app_dir / "logs", locale=self.orca_locale)
+        self.queue = orca_queue.OrcaQueue(self.orca_exe, log_dir=app_dir / "logs", locale=self.orca_locale,
+                                          disable_gpu=self.disable_gpu)
+        self._apply_queue_settings(self.queue)
+        # Отбор конформеров воронок, которые считает окно (в демоне — его собственный)
+        self._funnels = funnel.FunnelController(self.queue, self)
+        self._funnels.funnel_selected.connect(self.on_funnel_selected)
+        # Собственная очередь окна; при подключении к демону self.queue — RemoteQueue
+        self._local_queue = self.queue
+        self._deferred_attach = None
         self._manually_stopped = False
         self.current_root = None
         self.current_file = None
@@ -155,21 +156,39 @@ class OrcaGUI(QMainWindow):
         save_action.setShortcut("Ctrl+S")
         save_action.triggered.connect(self.save_current_file)
 
-        # === File system model ===
-        self.model = QFileSystemModel()
-        self.model.setRootPath("")
-        self.model.setNameFilters(["*.inp", "*.out", "*_MEP_trj.xyz", "*.json", "*_MEP_ALL_trj.xyz"])
-        self.model.setNameFilterDisables(False)
+        queue_menu = menubar.addMenu("Queue")
+        self.attach_daemon_action = queue_menu.addAction("Attach to Queue Daemon")
+        self.attach_daemon_action.triggered.connect(self.attach_daemon)
+        self.detach_daemon_action = queue_menu.addAction("Detach from Queue Daemon")
+        self.detach_daemon_action.triggered.connect(self.detach_daemon)
+        self.stop_daemon_action = queue_menu.addAction("Stop Queue Daemon")
+        self.stop_daemon_action.triggered.connect(self.stop_daemon)
+        self.detach_daemon_action.setEnabled(False)
+        self.stop_daemon_action.setEnabled(False)
+
+        view_menu = menubar.addMenu("View")
+        results_action = view_menu.addAction("Results Table...")
+        results_action.setShortcut("Ctrl+T")
+        results_action.triggered.connect(self.show_results_dialog)
+        timing_action = view_menu.addAction("Timing Report...")
+        timing_action.triggered.connect(self.show_timing_dialog)
+
+        # === Project tree model (только открытый проект, каталоги читаются лениво) ===
+        self.model = ProjectTreeModel()
+        output_masks = ["*.out", "*_MEP_trj.xyz", "*_MEP_ALL_trj.xyz"]
+        compressed_masks = [mask + suffix for mask in output_masks for suffix in compressed_io.COMPRESSED_SUFFIXES]
+        self.model.setNameFilters(["*.inp", "*.json"] + output_masks + compressed_masks)
 
         # === File tree (left panel) ===
         self.tree = QTreeView()
         self.tree.setModel(self.model)
-        self.tree.setRootIndex(self.model.index(""))
         self.tree.setAnimated(False)
         self.tree.setIndentation(20)
         self.tree.setSortingEnabled(True)
         self.tree.sortByColumn(0, Qt.AscendingOrder)
         self.tree.doubleClicked.connect(self.on_file_double_clicked)
+        # При раскрытии проверяем, не изменился ли каталог (один stat)
+        self.tree.expanded.connect(lambda index: self.model.refresh(self.model.filePath(index)))
         self.tree.setColumnWidth(0, 250)
         self.tree.setHeaderHidden(True)
         self.tree.setRootIsDecorated(True)
@@ -179,6 +198,25 @@ class OrcaGUI(QMainWindow):
         self.tree.header().setSectionResizeMode(0, QHeaderView.ResizeToContents)
         self._clipboard_path = None
         self._clipboard_is_cut = False
+        self._file_ops = None  # создаётся при первой файловой операции
+        self._file_op_dialogs = {}
+
+        # === Наблюдатель проекта: внешние .out разбираются в фоне ===
+        self.watcher = ProjectWatcher(is_owned=self._queue_owns_output, parent=self)
+        self.watcher.directory_changed.connect(self.model.refresh)
+        self.watcher.output_parsed.connect(self.on_output_parsed)
+        self.watcher.error_occurred.connect(lambda path, err: print(f"[WARN] Watcher: {path}: {err}"))
+
+        # === Outline: разделы открытого .out ===
+        self.outline = QTreeWidget()
+        self.outline.setHeaderHidden(True)
+        self.outline.itemActivated.connect(self.on_outline_item_activated)
+        self._outline_indexer = None
+
+        left_splitter = QSplitter(Qt.Vertical)
+        left_splitter.addWidget(self.tree)
+        left_splitter.addWidget(self.outline)
+        left_splitter.setSizes([600, 300])
 
         # === Text editor components ===
         self.editor = QPlainTextEdit()
@@ -197,7 +235,9 @@ class OrcaGUI(QMainWindow):
         editor_container.setLayout(editor_layout)
 
         # === Queue list (right panel) ===
-        self.queue_list = QueueListWidget(self)
+        self.queue_model = QueueListModel(self.queue, self)
+        self.queue_list = QueueListView(self)
+        self.queue_list.setModel(self.queue_model)
         self.queue_list.setFixedWidth(300)
         self.queue_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.queue_list.customContextMenuRequested.connect(self.on_queue_context_menu)
@@ -253,17 +293,14 @@ class OrcaGUI(QMainWindow):
 
         # === Main layout: file tree + center ===
         main_splitter = QSplitter(Qt.Horizontal)
-        main_splitter.addWidget(self.tree)
+        main_splitter.addWidget(left_splitter)
         main_splitter.addWidget(center_splitter)
         main_splitter.setSizes([300, 1100])
 
         self.setCentralWidget(main_splitter)
 
         # === Connect queue signals ===
-        self.queue.job_started.connect(self.on_job_started)
-        self.queue.job_finished.connect(self.on_job_finished)
-        self.queue.error_occurred.connect(self.on_job_error)
-        self.queue.queue_finished.connect(self.on_queue_finished)
+        self._connect_queue(self.queue)
 
         self.reload_shortcut = QShortcut(QKeySequence("Ctrl+R"), self)
         self.reload_shortcut.activated.connect(self.reload_current_file)
@@ -272,9 +309,15 @@ class OrcaGUI(QMainWindow):
         self.find_shortcut.activated.connect(self.show_find_dialog)
 
         self.find_dialog = None  # кэш диалога
+        self.results_dialog = None
+        self.timing_dialog = None
+        self._file_loader = None
+        self._deferred_file = None
 
         # === Open initial folder ===
+        # Быстрая часть состояния — сразу, тяжёлая (файл, наблюдатель) — после показа окна
         self.load_state()
+        QTimer.singleShot(0, self.restore_deferred)
         
 
     def save_state(self):
@@ -285,16 +328,9 @@ class OrcaGUI(QMainWindow):
             "queue": []
         }
         
-        # Сохраняем очередь
-        for i in range(self.queue_list.count()):
-            item = self.queue_list.item(i)
-            job_data = self.queue.get_job_data(i)  # ← нужно реализовать этот метод
-            if job_data:
-                state["queue"].append({
-                    "inp": str(job_data["inp"]),
-                    "out": str(job_data["out"]),
-                    "display_name": job_data["display_name"]
-                })
+        # Сохраняем очередь (при работе через демон — его зеркало, на случай если демона не станет)
+        state["queue"] = pipeline.entries_from_jobs(self.queue.jobs)
+        state["queue_daemon"] = self.queue is not self._local_queue
         
         try:
             with open(self.state_file, 'w', encoding='utf-8') as f:
@@ -311,58 +347,136 @@ class OrcaGUI(QMainWindow):
             with open(self.state_file, 'r', encoding='utf-8') as f:
                 state = json.load(f)
 
-            # Восстанавливаем очередь
-            if "queue" in state:
-                for item in state["queue"]:
-                    inp_path = Path(item["inp"])
-                    if inp_path.is_file():
-                        out_path = inp_path.parent / ".." / "Results" / (inp_path.stem + ".out")
-                        out_path = out_path.resolve()
-                        # Воссоздаём job вручную (без display_name пересчёта)
-                        self.queue._jobs.append({
-                            'inp': inp_path,
-                            'out': out_path,
-                            'display_name': item.get('display_name', inp_path.name),
-                            'status': '⏹️ Pending'
-                        })
-                        # Обновляем UI
-                        display_name = item.get('display_name', inp_path.name)
-                        list_item = QListWidgetItem(f"⏹️ {display_name}")
-                        list_item.setData(Qt.UserRole, str(inp_path))
-                        list_item.setData(Qt.UserRole + 1, display_name)
-                        self.queue_list.addItem(list_item)
-
-            # Восстанавливаем открытый файл
-            if state.get("current_file") and Path(state["current_file"]).is_file():
-                self.current_file = state["current_file"]
-                try:
-                    with open(self.current_file, 'r', encoding='utf-8', errors='replace') as f:
-                        self.editor.setPlainText(f.read())
-                    self.file_path_label.setText(self.current_file)
-                except:
-                    pass
+            # Восстанавливаем очередь (одним пакетом, без пересчёта display_name)
+            if state.get("queue_daemon"):
+                # Очередь живёт в демоне — подключимся после показа окна
+                self._deferred_attach = state.get("queue", [])
+            elif "queue" in state:
+                self.queue.add_jobs(pipeline.jobs_from_entries(state["queue"]))
+
+            # Открытый файл (часто огромный .out) читается позже, в фоне
+            if state.get("current_file"):
+                # Вывод могли сжать после прошлого сеанса
+                self._deferred_file = compressed_io.resolve(Path(state["current_file"]))
 
             # Восстанавливаем корневую папку
             root_path = state.get("root_path")
             if root_path and Path(root_path).is_dir():
                 self.current_root = Path(root_path)  # ← важно: сохраняем в self.current_root
                 self.model.setRootPath(root_path)
-                self.tree.setRootIndex(self.model.index(root_path))
                 self.setWindowTitle(f"ORCA Project Manager - {Path(root_path).name}")
 
         except Exception as e:
             print(f"[WARN] Failed to load state: {e}")
 
+    def restore_deferred(self):
+        """Вторая фаза запуска: демон очереди, наблюдатель проекта и последний открытый файл"""
+        if self._deferred_attach is not None:
+            entries, self._deferred_attach = self._deferred_attach, None
+            if not self.attach_daemon(spawn=False, quiet=True):
+                # Демона больше нет — восстанавливаем сохранённый список локально
+                self.queue.add_jobs(pipeline.jobs_from_entries(entries))
+        if self.current_root:
+            self.watcher.set_root(self.current_root)
+        if self._deferred_file and self._deferred_file.is_file() and self.current_file is None:
+            self._open_file(self._deferred_file, quiet=True)
+        self._deferred_file = None
+
     def on_queue_context_menu(self, position):
-        item = self.queue_list.itemAt(position)
-        if not item:
+        index = self.queue_list.indexAt(position)
+        if not index.isValid():
             return
+        job_id = self.queue_model.job_id(index)
 
         menu = QMenu(self)
         action = menu.addAction("🗑️ Remove from Queue")
-        action.triggered.connect(lambda: self.remove_queue_item(item))
+        action.triggered.connect(lambda: self.remove_queue_item(job_id))
+
+        # Перенос геометрии из предыдущего шага / произвольного вывода
+        job = self.queue.jobs[self.queue.job_index(job_id)]
+        geometry_menu = menu.addMenu("🔗 Starting Geometry")
+        current = (job.get('geometry_from'), job.get('geometry_mode'))
+        for label, source, mode in (
+            ("From previous step → * xyz", pipeline.GEOMETRY_PREVIOUS, "inject"),
+            ("From previous step → * xyzfile", pipeline.GEOMETRY_PREVIOUS, "xyzfile"),
+        ):
+            item = geometry_menu.addAction(label)
+            item.setCheckable(True)
+            item.setChecked(current == (source, mode))
+            item.triggered.connect(lambda _=False, s=source, m=mode: self.queue.set_geometry_source(job_id, s, m))
+        from_file = geometry_menu.addAction("From file...")
+        from_file.setCheckable(True)
+        from_file.setChecked(bool(current[0]) and current[0] != pipeline.GEOMETRY_PREVIOUS)
+        from_file.triggered.connect(lambda: self._choose_geometry_source(job_id))
+        geometry_menu.addSeparator()
+        geometry_menu.addAction("Keep input geometry",
+                                lambda: self.queue.set_geometry_source(job_id, None))
+
+        # Scratch: явная опция задания перекрывает настройку по умолчанию
+        scratch_action = menu.addAction("⚡ Run in Scratch")
+        scratch_action.setCheckable(True)
+        scratch_action.setChecked(job.get('scratch', self.scratch_by_default))
+        scratch_action.setEnabled(self.scratch_dir is not None)
+        if self.scratch_dir is None:
+            scratch_action.setToolTip("Set a scratch directory in Settings first")
+        scratch_action.toggled.connect(lambda checked: self.queue.set_scratch(job_id, checked))
+        menu.addAction("⏱️ Time Limits...", lambda: self._edit_job_limits(job_id))
         menu.exec(self.queue_list.viewport().mapToGlobal(position))
 
+    def _edit_job_limits(self, job_id: int):
+        """Ограничения сторожа для одного задания (или значения по умолчанию из Settings)"""
+        from settings import limit_spin
+        index = self.queue.job_index(job_id)
+        if index < 0:
+            return
+        job = self.queue.jobs[index]
+        custom = job.get('wall_time_limit') is not None or job.get('stall_limit') is not None
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"Time Limits — {job['display_name']}")
+        use_defaults = QCheckBox(f"Use defaults from Settings "
+                                 f"({self._limit_text(self.wall_time_limit)} / {self._limit_text(self.stall_limit)})")
+        use_defaults.setChecked(not custom)
+        wall_time = limit_spin(job.get('wall_time_limit', self.wall_time_limit))
+        stall = limit_spin(job.get('stall_limit', self.stall_limit))
+        form = QFormLayout()
+        form.addRow(use_defaults)
+        form.addRow("Wall-time limit:", wall_time)
+        form.addRow("Stall limit (no output):", stall)
+        for spin in (wall_time, stall):
+            spin.setEnabled(custom)
+            use_defaults.toggled.connect(lambda checked, s=spin: s.setEnabled(not checked))
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        form.addRow(buttons)
+        dialog.setLayout(form)
+        if dialog.exec() != QDialog.Accepted:
+            return
+        try:
+            if use_defaults.isChecked():
+                self.queue.set_limits(job_id, None, None)
+            else:
+                self.queue.set_limits(job_id, wall_time.value(), stall.value())
+        except RuntimeError as e:
+            QMessageBox.warning(self, "Queue", str(e))
+
+    @staticmethod
+    def _limit_text(minutes: float) -> str:
+        return f"{minutes:g} min" if minutes else "no limit"
+
+    def _choose_geometry_source(self, job_id: int):
+        index = self.queue.job_index(job_id)
+        if index < 0:
+            return
+        start_dir = self.queue.jobs[index]['inp'].parent
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Take geometry from", str(start_dir),
+            "ORCA output or XYZ (*.out *.xyz *.out.gz *.out.zst *.xyz.gz *.xyz.zst)"
+        )
+        if path:
+            self.queue.set_geometry_source(job_id, Path(path), "inject")
+
     def on_tree_context_menu(self, position):
         index = self.tree.indexAt(position)
         if not index.isValid():
@@ -376,6 +490,7 @@ class OrcaGUI(QMainWindow):
         # Для .inp — добавление в очередь
         if p.is_file() and p.suffix == '.inp':
             menu.addAction("➕ Add to Queue", lambda: self.add_inp_to_queue(p))
+            menu.addAction("🎛️ Suggest Resources...", lambda: self.suggest_resources(p))
 
         # Для .json — загрузка pipeline
         elif p.is_file() and p.suffix == '.json':
@@ -397,10 +512,15 @@ class OrcaGUI(QMainWindow):
         if self._clipboard_path and self._clipboard_path.exists():
             target_dir = p if p.is_dir() else p.parent
             menu.addAction("📋 Paste", lambda: self._paste_to(target_dir))
+            if self._clipboard_path.is_dir() and not self._clipboard_is_cut:
+                menu.addAction("📋 Paste without scratch files",
+                               lambda: self._paste_to(target_dir, skip_scratch=True))
 
         # Создать текстовый файл (только в папке)
         if p.is_dir():
             menu.addAction("📄 New File...", lambda: self._create_text_file(p))
+            menu.addAction("🧪 Parameter Sweep...", lambda: self.open_sweep_dialog(p))
+            menu.addAction("🔻 Conformer Funnel...", lambda: self.open_funnel_dialog(p))
 
         # Открытие в Chemcraft и создание шаблона (только для файлов)
         if p.is_file():
@@ -415,18 +535,11 @@ class OrcaGUI(QMainWindow):
         if not menu.isEmpty():
             menu.exec(self.tree.mapToGlobal(position))
 
-    def remove_queue_item(self, item):
-        row = self.queue_list.row(item)
-        self.queue_list.takeItem(row)
-        self.queue.remove_job(row)  # ← требует обновления OrcaQueue
-
-    # В orca_queue.py
-    def remove_job(self, index: int):
-        if self._current_index >= 0:
-            raise RuntimeError("Cannot modify queue after it has started")
-        if 0 <= index < len(self._jobs):
-            del self._jobs[index]
-
+    def remove_queue_item(self, job_id: int):
+        try:
+            self.queue.remove_job_by_id(job_id)
+        except RuntimeError as e:
+            QMessageBox.warning(self, "Running", str(e))
 
     def open_folder(self):
         folder = QFileDialog.getExistingDirectory(
@@ -435,22 +548,81 @@ class OrcaGUI(QMainWindow):
         if folder:
             folder_path = Path(folder)
             self.model.setRootPath(str(folder_path))
-            self.tree.setRootIndex(self.model.index(str(folder_path)))
+            self.watcher.set_root(folder_path)
             self.setWindowTitle(f"ORCA Project Manager - {folder_path.name}")
             self.current_root = folder_path  # ← добавлено
             self.save_state()
 
     def on_file_double_clicked(self, index: QModelIndex):
         path = self.model.filePath(index)
-        if Path(path).is_file() and path.endswith(('.inp', '.out', '.txt', '.log', '.json', '.xyz')):
-            try:
-                with open(path, 'r', encoding='utf-8', errors='replace') as f:
-                    content = f.read()
-                self.editor.setPlainText(content)
-                self.current_file = Path(path)
-                self.file_path_label.setText(path)  # ← обновляем метку
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to open file:\n{e}")
+        # Сжатые выводы открываются как обычные (x.out.zst — по суффиксу x.out)
+        if Path(path).is_file() and \
+                compressed_io.logical_path(Path(path)).suffix in ('.inp', '.out', '.txt', '.log', '.json', '.xyz'):
+            self._open_file(Path(path))
+
+    def _open_file(self, path: Path, quiet: bool = False):
+        """Открывает файл в редакторе; чтение идёт в фоновом потоке"""
+        path = compressed_io.resolve(path)  # вывод мог быть сжат после задания
+        loader = FileLoader(path)
+        loader.loaded.connect(self._on_file_loaded)
+        if quiet:
+            loader.error_occurred.connect(lambda p, err: print(f"[WARN] Failed to open {p}: {err}"))
+        else:
+            loader.error_occurred.connect(
+                lambda p, err: QMessageBox.critical(self, "Error", f"Failed to open file:\n{err}"))
+        self._file_loader = loader  # последний запрошенный файл побеждает
+        self.file_path_label.setText(f"Loading: {path}")
+        loader.start_async()
+
+    def _on_file_loaded(self, path: str, content: str):
+        if self._file_loader is None or str(self._file_loader.path) != path:
+            return  # пока читали, пользователь открыл другой файл
+        self._file_loader = None
+        self.editor.setPlainText(content)
+        self.current_file = Path(path)
+        self.file_path_label.setText(path)  # ← обновляем метку
+        self._refresh_outline()
+
+    def _queue_owns_output(self, out_path: Path) -> bool:
+        # Очередь (своя или демон) разбирает выводы своих заданий сама
+        return any(Path(job['out']) == out_path for job in self.queue.jobs)
+
+    def on_output_parsed(self, out_path: str):
+        self.statusBar().showMessage(f"Parsed: {out_path}", 5000)
+        self._refresh_results_dialog()
+
+    def show_results_dialog(self):
+        import results_dialog
+        if not self.current_root:
+            QMessageBox.information(self, "No project", "Open a project folder first.")
+            return
+        if self.results_dialog is None:
+            self.results_dialog = results_dialog.ResultsDialog(self)
+        if self.results_dialog.project_root != self.current_root:
+            self.results_dialog.set_project(self.current_root)
+        else:
+            self.results_dialog.reload()
+        self.results_dialog.show()
+        self.results_dialog.raise_()
+        self.results_dialog.activateWindow()
+
+    def show_timing_dialog(self):
+        import timing_dialog
+        if not self.current_root:
+            QMessageBox.information(self, "No project", "Open a project folder first.")
+            return
+        if self.timing_dialog is None:
+            self.timing_dialog = timing_dialog.TimingReportDialog(self)
+        self.timing_dialog.set_project(self.current_root)
+        self.timing_dialog.show()
+        self.timing_dialog.raise_()
+        self.timing_dialog.activateWindow()
+
+    def _refresh_results_dialog(self):
+        if self.results_dialog is not None and self.results_dialog.isVisible():
+            self.results_dialog.reload()
+        if self.timing_dialog is not None and self.timing_dialog.isVisible():
+            self.timing_dialog.reload()
 
     def get_selected_inp_path(self) -> Path | None:
         indexes = self.tree.selectedIndexes()
@@ -469,17 +641,231 @@ class OrcaGUI(QMainWindow):
         else:
             QMessageBox.warning(self, "No .inp selected", "Please select a .inp file in the file manager.")
 
+    @staticmethod
+    def _out_path_for(inp_path: Path) -> Path:
+        return pipeline.out_path_for(inp_path)
+
     def add_inp_to_queue(self, inp_path: Path):
-        out_path = inp_path.parent / ".." / "Results" / (inp_path.stem + ".out")
-        out_path = out_path.resolve()
-        self.queue.add_job(inp_path, out_path)
+        self.add_inps_to_queue([inp_path])
 
-        display_name = self.queue.get_display_name(len(self.queue._jobs) - 1)
-        item = QListWidgetItem(f"⏹️ {display_name}")
-        item.setData(Qt.UserRole, str(inp_path))
-        item.setData(Qt.UserRole + 1, display_name)
-        item.setToolTip(str(inp_path))
-        self.queue_list.addItem(item)
+    def add_inps_to_queue(self, inp_paths: list[Path]):
+        jobs = self._preflight([(p, self._out_path_for(p)) for p in inp_paths])
+        if not jobs:
+            return
+        try:
+            self.queue.add_jobs(jobs)
+        except RuntimeError as e:
+            QMessageBox.warning(self, "Running", str(e))
+
+    def suggest_resources(self, inp_path: Path):
+        """%pal/%maxcore по истории заданий очереди (resource_advisor) с возможностью переписать вход"""
+        import job_history
+        import resource_advisor
+        history = job_history.load(self.get_app_dir() / "logs" / job_history.HISTORY_FILE_NAME)
+        try:
+            inp, advice = resource_advisor.advise_file(inp_path, history)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Suggest Resources", str(e))
+            return
+        text = advice.summary() + "".join(f"\n• {reason}" for reason in advice.reasons)
+        if not advice.changed:
+            QMessageBox.information(self, f"Resources — {inp_path.name}", text)
+            return
+        reply = QMessageBox.question(self, f"Resources — {inp_path.name}", f"{text}\n\nRewrite the input?")
+        if reply != QMessageBox.Yes:
+            return
+        try:
+            inp_path.write_text(resource_advisor.apply_advice(inp, advice).text, encoding='utf-8')
+        except OSError as e:
+            QMessageBox.warning(self, "Suggest Resources", str(e))
+            return
+        if self.current_file == inp_path:
+            self.reload_current_file()
+
+    def _preflight(self, jobs: list[tuple]) -> list[tuple]:
+        """
+        Проверяет входы перед постановкой в очередь. Возвращает задания,
+        которые нужно добавить (пустой список — пользователь отменил).
+        """
+        from orca_input import validate_queue
+        earlier = [job['inp'] for job in self.queue.jobs]
+        problems = validate_queue([job[0] for job in jobs], earlier=earlier)
+        if not problems:
+            return jobs
+
+        invalid = {path for path, issues in problems.items()
+                   if any(issue.level == 'error' for issue in issues)}
+        lines = []
+        for path, issues in list(problems.items())[:10]:
+            lines.append(path.name)
+            lines.extend(f"    {issue}" for issue in issues)
+        if len(problems) > 10:
+            lines.append(f"... and {len(problems) - 10} more files")
+
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Warning if invalid else QMessageBox.Information)
+        box.setWindowTitle("Input check")
+        box.setText(f"{len(problems)} of {len(jobs)} input(s) have problems "
+                    f"({len(invalid)} with errors).")
+        box.setDetailedText("\n".join(lines))
+        add_all = box.addButton("Add anyway", QMessageBox.AcceptRole)
+        skip = box.addButton("Skip invalid", QMessageBox.AcceptRole) if invalid else None
+        box.addButton(QMessageBox.Cancel)
+        box.setDefaultButton(skip or add_all)
+        box.exec()
+
+        clicked = box.clickedButton()
+        if clicked is add_all:
+            return jobs
+        if skip is not None and clicked is skip:
+            return [job for job in jobs if Path(job[0]) not in invalid]
+        return []
+
+    # === Очередь: локальная или в демоне ===
+    def _connect_queue(self, queue):
+        queue.job_started.connect(self.on_job_started)
+        queue.job_finished.connect(self.on_job_finished)
+        queue.error_occurred.connect(self.on_job_error)
+        queue.job_timed_out.connect(self.on_job_timed_out)
+        queue.queue_finished.connect(self.on_queue_finished)
+        queue.disk_low.connect(self.on_disk_low)
+
+    def _disconnect_queue(self, queue):
+        queue.job_started.disconnect(self.on_job_started)
+        queue.job_finished.disconnect(self.on_job_finished)
+        queue.error_occurred.disconnect(self.on_job_error)
+        queue.job_timed_out.disconnect(self.on_job_timed_out)
+        queue.queue_finished.disconnect(self.on_queue_finished)
+        queue.disk_low.disconnect(self.on_disk_low)
+
+    def _switch_queue(self, queue):
+        self._disconnect_queue(self.queue)
+        self.queue = queue
+        self._connect_queue(queue)
+        self.queue_model.set_queue(queue)
+        attached = queue is not self._local_queue
+        self.attach_daemon_action.setEnabled(not attached)
+        self.detach_daemon_action.setEnabled(attached)
+        self.stop_daemon_action.setEnabled(attached)
+        self._sync_queue_buttons(queue.is_running())
+
+    def _sync_queue_buttons(self, running: bool):
+        self.start_queue_btn.setEnabled(not running)
+        self.stop_queue_btn.setEnabled(running)
+        self.clear_queue_btn.setEnabled(not running)
+        self.resume_queue_btn.setEnabled(not running and self.queue.current_index < len(self.queue.jobs))
+
+    def _daemon_socket_path(self) -> Path:
+        from queue_daemon import default_socket_path
+        return default_socket_path()
+
+    def attach_daemon(self, spawn: bool = True, quiet: bool = False) -> bool:
+        """
+        Подключает окно к очереди в фоновом демоне (запуская его при необходимости).
+        Незапущенные задания локальной очереди переходят в демон, законченные отбрасываются.
+        """
+        from remote_queue import attach, DaemonError
+        if self.queue is not self._local_queue:
+            return True
+        if self._local_queue.is_running():
+            QMessageBox.warning(self, "Running", "Stop the local queue before attaching to the daemon.")
+            return False
+        try:
+            remote = attach(self._daemon_socket_path(), self.get_app_dir() / "logs" / "queue_daemon.log",
+                            spawn=spawn, parent=self)
+            remote.configure(self.orca_exe, self.orca_locale, self.disable_gpu,
+                             self.scratch_dir, self.scratch_patterns, self.scratch_by_default,
+                             self.pin_cpus, self.wall_time_limit, self.stall_limit, self.compress_outputs,
+                             self.artifact_retention, self.disk_reserve_mb)
+            # Законченные задания в демон не переходят (иначе он посчитал бы их заново) —
+            # их строки уходят вместе с очисткой локальной очереди
+            local_jobs = [(job['inp'], job['out'], job['display_name'], orca_queue.job_options(job))
+                          for job in self._local_queue.jobs if job['status'] not in orca_queue.FINISHED_STATUSES]
+            if local_jobs:
+                remote.add_jobs(local_jobs)
+        except (DaemonError, RuntimeError) as e:
+            if not quiet:
+                QMessageBox.critical(self, "Queue daemon", f"Cannot attach to the queue daemon:\n{e}")
+            else:
+                print(f"[WARN] Queue daemon: {e}")
+            return False
+        self._local_queue.clear()
+        remote.running_changed.connect(self._sync_queue_buttons)
+        remote.disconnected.connect(self._on_daemon_lost)
+        self._switch_queue(remote)
+        self.statusBar().showMessage(f"Attached to queue daemon (pid {remote.daemon_pid})", 5000)
+        return True
+
+    def detach_daemon(self):
+        """Окно отключается, очередь в демоне продолжает работу"""
+        remote = self.queue
+        if remote is self._local_queue:
+            return
+        remote.detach()
+        self._switch_queue(self._local_queue)
+        remote.deleteLater()
+        self.statusBar().showMessage("Detached; the queue keeps running in the daemon", 5000)
+
+    def _on_daemon_lost(self):
+        remote = self.queue
+        if remote is self._local_queue:
+            return
+        self._switch_queue(self._local_queue)
+        remote.deleteLater()
+        self.statusBar().showMessage("Connection to the queue daemon lost", 10000)
+
+    def stop_daemon(self):
+        remote = self.queue
+        if remote is self._local_queue:
+            return
+        force = False
+        if remote.is_running():
+            reply = QMessageBox.question(
+                self, "Queue running",
+                "The daemon is running a calculation. Stop it and shut the daemon down?"
+            )
+            if reply != QMessageBox.Yes:
+                return
+            force = True
+        # Несделанные задания остаются в окне; законченные уходят вместе с демоном
+        jobs = [(job['inp'], job['out'], job['display_name'], orca_queue.job_options(job))
+                for job in remote.jobs if job['status'] not in orca_queue.FINISHED_STATUSES]
+        try:
+            remote.shutdown(force=force)
+        except RuntimeError as e:
+            QMessageBox.warning(self, "Queue daemon", str(e))
+            return
+        remote.detach()
+        self._switch_queue(self._local_queue)
+        remote.deleteLater()
+        self._local_queue.add_jobs(jobs)
+
+    def _configure_queue(self):
+        """Применяет настройки запуска ORCA к текущей очереди"""
+        if self.queue is self._local_queue:
+            self.queue.orca_exe = self.orca_exe
+            self.queue.orca_locale = self.orca_locale
+            self.queue.disable_gpu = self.disable_gpu
+            self._apply_queue_settings(self.queue)
+        else:
+            try:
+                self.queue.configure(self.orca_exe, self.orca_locale, self.disable_gpu,
+                                     self.scratch_dir, self.scratch_patterns, self.scratch_by_default,
+                                     self.pin_cpus, self.wall_time_limit, self.stall_limit, self.compress_outputs,
+                                     self.artifact_retention, self.disk_reserve_mb)
+            except RuntimeError as e:
+                print(f"[WARN] Failed to configure queue daemon: {e}")
+
+    def _apply_queue_settings(self, queue):
+        queue.scratch_dir = self.scratch_dir
+        queue.scratch_patterns = self.scratch_patterns or None
+        queue.scratch_by_default = self.scratch_by_default
+        queue.pin_cpus = self.pin_cpus
+        queue.wall_time_limit = self.wall_time_limit
+        queue.stall_limit = self.stall_limit
+        queue.compress_outputs = self.compress_outputs
+        queue.artifact_retention = self.artifact_retention
+        queue.disk_reserve_mb = self.disk_reserve_mb
 
     def start_queue(self):
         if self.queue.is_empty():
@@ -490,28 +876,25 @@ class OrcaGUI(QMainWindow):
         self.clear_queue_btn.setEnabled(False)
         self.queue.start()
 
-    # === Обновление статусов в очереди ===
-    def _update_queue_item_status(self, display_name: str, status_emoji: str):
-        found = False
-        for i in range(self.queue_list.count()):
-            item = self.queue_list.item(i)
-            stored_name = item.data(Qt.UserRole + 1)
-            if stored_name == display_name:
-                item.setText(f"{status_emoji} {display_name}")
-                break
-
+    # === События очереди (статусы строк обновляет QueueListModel) ===
     def on_job_started(self, inp_name: str):
-        idx = self.queue._current_index
-        if 0 <= idx < len(self.queue._jobs):
-            display_name = self.queue._jobs[idx]['display_name']
-            self._update_queue_item_status(display_name, "▶️")
+        self.statusBar().showMessage(f"Running: {inp_name}")
 
     def on_job_finished(self, inp_name: str, success: bool, out_path: str, display_name: str):
-        emoji = "✅" if success else "❌"
-        self._update_queue_item_status(display_name, emoji)
+        if success:
+            self._refresh_results_dialog()
 
     def on_job_error(self, inp_name: str, error: str, display_name: str):
-        self._update_queue_item_status(display_name, "⚠️")
+        self.statusBar().showMessage(f"Error in {display_name}: {error}", 10000)
+
+    def on_job_timed_out(self, inp_name: str, reason: str, display_name: str):
+        self.statusBar().showMessage(f"Terminated {display_name}: {reason}", 10000)
+
+    def on_disk_low(self, inp_name: str, message: str, display_name: str):
+        self.statusBar().showMessage(f"Low disk space ({display_name}): {message}", 10000)
+
+    def on_funnel_selected(self, name: str, kept: int, total: int):
+        self.statusBar().showMessage(f"Funnel {name}: {kept} of {total} conformers selected for refinement", 10000)
 
     def on_queue_finished(self):
         if not self._manually_stopped:
@@ -533,33 +916,38 @@ class OrcaGUI(QMainWindow):
         self.resume_queue_btn.setEnabled(True)
 
     def clear_queue(self):
-        if self.queue._is_running:
+        if self.queue.is_running():
             QMessageBox.warning(self, "Running", "Stop queue before clearing.")
             return
-        self.queue_list.clear()
         self.queue.clear()
 
     def save_current_file(self):
         if not self.current_file:
             return
+        if compressed_io.compression_of(self.current_file):
+            QMessageBox.warning(self, "Read-only", "Compressed outputs are opened read-only.")
+            return
         try:
             content = self.editor.toPlainText()
             with open(self.current_file, 'w', encoding='utf-8') as f:
                 f.write(content)
         except Exception as e:
             QMessageBox.critical(self, "Save Error", f"Failed to save file:\n{e}")
+            return
+        # Правка analysis.json сразу пересчитывает реакции в окне результатов
+        self._refresh_results_dialog()
 
     def closeEvent(self, event):
         self.save_state()
         event.accept()
 
     def create_pipeline(self):
-        if not self.queue._jobs:
+        if self.queue.is_empty():
             QMessageBox.warning(self, "Empty Queue", "Queue is empty. Nothing to save.")
             return
 
         # Определяем папку: родитель последнего .inp
-        last_inp = self.queue._jobs[-1]['inp']
+        last_inp = self.queue.jobs[-1]['inp']
         pipeline_dir = last_inp.parent
 
         dialog = PipelineDialog(self)
@@ -572,46 +960,20 @@ class OrcaGUI(QMainWindow):
             # Формируем имя файла: name.json
             pipeline_path = pipeline_dir / f"{name}.json"
 
-            # Сохраняем данные
-            pipeline_data = []
-            for job in self.queue._jobs:
-                pipeline_data.append({
-                    "inp": str(job['inp']),
-                    "display_name": job['display_name']
-                })
-
+            # Сохраняем данные (вместе с переносом геометрии между шагами)
             try:
-                with open(pipeline_path, 'w', encoding='utf-8') as f:
-                    json.dump(pipeline_data, f, indent=2, ensure_ascii=False)
+                pipeline.save_pipeline(pipeline_path, self.queue.jobs)
                 QMessageBox.information(self, "Success", f"Pipeline saved to:\n{pipeline_path}")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to save pipeline:\n{e}")
 
     def load_pipeline(self, json_path: Path):
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                pipeline_data = json.load(f)
-
-            if not isinstance(pipeline_data, list):
-                raise ValueError("Invalid pipeline format")
-
-            added = 0
-            for item in pipeline_data:
-                inp_path = Path(item.get("inp", ""))
-                if not inp_path.is_file():
-                    continue
-
-                out_path = inp_path.parent / ".." / "Results" / (inp_path.stem + ".out")
-                out_path = out_path.resolve()
-
-                # Добавляем в очередь
-                self.queue.add_job(inp_path, out_path)
-                display_name = item.get("display_name", inp_path.name)
-                list_item = QListWidgetItem(f"⏹️ {display_name}")
-                list_item.setData(Qt.UserRole, str(inp_path))
-                list_item.setData(Qt.UserRole + 1, display_name)
-                self.queue_list.addItem(list_item)
-                added += 1
+            jobs = pipeline.load_pipeline(json_path)
+
+            # Проверяем и добавляем в очередь одним пакетом
+            jobs = self._preflight(jobs)
+            added = len(self.queue.add_jobs(jobs)) if jobs else 0
 
             QMessageBox.information(self, "Pipeline Loaded", f"Added {added} jobs to queue.")
 
@@ -620,12 +982,15 @@ class OrcaGUI(QMainWindow):
 
     def open_in_chemcraft_linux(self, file_path: Path):
         try:
+            # Chemcraft не читает сжатые файлы — ему достаётся временная распакованная копия
+            file_path = compressed_io.decompressed_copy(file_path)
             subprocess.Popen([str(self.chemcraft_linux_exe), str(file_path)])
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to open in Chemcraft (Linux):\n{e}")
 
     def open_in_chemcraft_windows(self, file_path: Path):
         try:
+            file_path = compressed_io.decompressed_copy(file_path)
             wine_prefix = Path.home() / ".wine-chemcraft"
             subprocess.Popen([
                 "env",
@@ -644,7 +1009,16 @@ class OrcaGUI(QMainWindow):
             "chemcraft_linux": str(self.chemcraft_linux_exe),
             "chemcraft_windows": str(self.chemcraft_windows_exe),
             "orca_locale": self.orca_locale,
-            "disable_gpu": self.disable_gpu 
+            "disable_gpu": self.disable_gpu,
+            "scratch_dir": str(self.scratch_dir) if self.scratch_dir else "",
+            "scratch_patterns": self.scratch_patterns,
+            "scratch_by_default": self.scratch_by_default,
+            "pin_cpus": self.pin_cpus,
+            "wall_time_limit": self.wall_time_limit,
+            "stall_limit": self.stall_limit,
+            "compress_outputs": self.compress_outputs,
+            "artifact_retention": self.artifact_retention,
+            "disk_reserve_mb": self.disk_reserve_mb
         }
         try:
             with open(self.settings_file, 'w', encoding='utf-8') as f:
@@ -670,17 +1044,45 @@ class OrcaGUI(QMainWindow):
                 self.orca_locale = settings["orca_locale"]
             if "disable_gpu" in settings:
                 self.disable_gpu = settings["disable_gpu"]
+            if settings.get("scratch_dir"):
+                self.scratch_dir = Path(settings["scratch_dir"])
+            if "scratch_patterns" in settings:
+                self.scratch_patterns = settings["scratch_patterns"]
+            if "scratch_by_default" in settings:
+                self.scratch_by_default = settings["scratch_by_default"]
+            if "pin_cpus" in settings:
+                self.pin_cpus = settings["pin_cpus"]
+            if "wall_time_limit" in settings:
+                self.wall_time_limit = settings["wall_time_limit"]
+            if "stall_limit" in settings:
+                self.stall_limit = settings["stall_limit"]
+            if "compress_outputs" in settings:
+                self.compress_outputs = settings["compress_outputs"] or ""
+            if settings.get("artifact_retention") in disk_guard.RETENTION_POLICIES:
+                self.artifact_retention = settings["artifact_retention"]
+            if "disk_reserve_mb" in settings:
+                self.disk_reserve_mb = settings["disk_reserve_mb"]
                 
         except Exception as e:
             print(f"[WARN] Failed to load settings: {e}")
 
     def open_settings(self):
+        import settings
         dialog = settings.SettingsDialog(
             str(self.orca_exe),
             str(self.chemcraft_linux_exe),
             str(self.chemcraft_windows_exe),
             self.orca_locale,  # ← передаём текущую локаль
             self.disable_gpu,
+            str(self.scratch_dir or ""),
+            self.scratch_patterns,
+            self.scratch_by_default,
+            self.pin_cpus,
+            self.wall_time_limit,
+            self.stall_limit,
+            self.compress_outputs,
+            self.artifact_retention,
+            self.disk_reserve_mb,
             self
         )
         if dialog.exec() == QDialog.Accepted:
@@ -689,10 +1091,22 @@ class OrcaGUI(QMainWindow):
             self.chemcraft_windows_exe = Path(dialog.get_chemcraft_windows_path())
             self.orca_locale = dialog.get_locale()  # ← сохраняем выбранную локаль
             self.disable_gpu = dialog.get_disable_gpu()
+            scratch_dir = dialog.get_scratch_dir()
+            self.scratch_dir = Path(scratch_dir) if scratch_dir else None
+            self.scratch_patterns = dialog.get_scratch_patterns()
+            self.scratch_by_default = dialog.get_scratch_by_default()
+            self.pin_cpus = dialog.get_pin_cpus()
+            self.wall_time_limit = dialog.get_wall_time_limit()
+            self.stall_limit = dialog.get_stall_limit()
+            self.compress_outputs = dialog.get_compress_outputs()
+            self.artifact_retention = dialog.get_artifact_retention()
+            self.disk_reserve_mb = dialog.get_disk_reserve_mb()
             self.save_settings()
+            self._configure_queue()
             QMessageBox.information(self, "Success", "Settings saved.")
 
     def show_find_dialog(self):
+        import find_dialog
         if self.find_dialog is None:
             self.find_dialog = find_dialog.FindDialog(self.editor, self)
         self.find_dialog.search_input.setText(self.editor.textCursor().selectedText())
@@ -727,54 +1141,72 @@ class OrcaGUI(QMainWindow):
         self._clipboard_path = path
         self._clipboard_is_cut = True
 
-    def _paste_to(self, target_dir: Path):
+    def _paste_to(self, target_dir: Path, skip_scratch: bool = False):
         if not self._clipboard_path or not self._clipboard_path.exists():
             return
             
-        try:
-            base_name = self._clipboard_path.name
-            stem = self._clipboard_path.stem
-            suffix = self._clipboard_path.suffix
-            new_path = target_dir / base_name
-            counter = 1
-
-            # Генерируем уникальное имя: file.txt → file_copy1.txt → file_copy2.txt ...
-            while new_path.exists():
-                new_name = f"{stem}_copy{counter}{suffix}" if suffix else f"{stem}_copy{counter}"
-                new_path = target_dir / new_name
-                counter += 1
-
-            if self._clipboard_is_cut:
-                import shutil
-                if self._clipboard_path.is_dir():
-                    shutil.move(str(self._clipboard_path), str(new_path))
-                else:
-                    self._clipboard_path.rename(new_path)
-                self._clipboard_path = None
-                self._clipboard_is_cut = False
-            else:
-                import shutil
-                if self._clipboard_path.is_dir():
-                    shutil.copytree(str(self._clipboard_path), str(new_path))
-                else:
-                    shutil.copy2(str(self._clipboard_path), str(new_path))
-                    
-            # Обновляем модель
-            self.model.setRootPath(self.model.rootPath())
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to paste:\n{e}")
+        # Свободное имя (file_copy1.txt ...) очередь выберет, когда операция начнётся
+        new_path = target_dir / self._clipboard_path.name
+
+        # Копирование/перенос идёт в фоне; дерево обновится по завершении
+        if self._clipboard_is_cut:
+            self.get_file_ops().move(self._clipboard_path, new_path, unique=True)
+            self._clipboard_path = None
+            self._clipboard_is_cut = False
+        else:
+            self.get_file_ops().copy(self._clipboard_path, new_path, skip_scratch=skip_scratch, unique=True)
 
     def _delete_path(self, path: Path):
         if not path.exists():
             return
-        try:
-            send2trash(str(path))  # ← перемещает в корзину
-            self.model.setRootPath(self.model.rootPath())
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to move to trash:\n{e}")
+        self.get_file_ops().delete(path)  # ← перемещает в корзину
+
+    # === Фоновые файловые операции ===
+    def get_file_ops(self):
+        if self._file_ops is None:
+            from file_ops import FileOperationQueue
+            self._file_ops = FileOperationQueue(self)
+            self._file_ops.operation_started.connect(self._on_file_op_started)
+            self._file_ops.progress.connect(self._on_file_op_progress)
+            self._file_ops.operation_finished.connect(self._on_file_op_finished)
+        return self._file_ops
+
+    def _on_file_op_started(self, op_id: int, description: str):
+        dialog = QProgressDialog(description, "Cancel", 0, 1000, self)
+        dialog.setWindowTitle("File operation")
+        dialog.setWindowModality(Qt.NonModal)
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        dialog.setMinimumDuration(500)  # быстрые операции не мелькают окном
+        dialog.canceled.connect(lambda: self._file_ops.cancel(op_id))
+        dialog.setValue(0)
+        self._file_op_dialogs[op_id] = dialog
+
+    def _on_file_op_progress(self, op_id: int, done: int, total: int, current: str):
+        dialog = self._file_op_dialogs.get(op_id)
+        if dialog is None:
+            return
+        # Шкала в промилле: байты многогигабайтных .gbw не помещаются в int
+        dialog.setValue(int(done * 1000 / total) if total else 0)
+        if current:
+            dialog.setLabelText(f"{current}\n{done / 2**20:.0f} / {total / 2**20:.0f} MB")
+
+    def _on_file_op_finished(self, op_id: int, success: bool, message: str):
+        dialog = self._file_op_dialogs.pop(op_id, None)
+        if dialog is not None:
+            dialog.canceled.disconnect()
+            dialog.close()
+            dialog.deleteLater()
+        op = self._file_ops.operation(op_id)
+        if op is not None:
+            self.model.refresh(op['src'].parent)
+            if op['dst'] is not None:
+                self.model.refresh(op['dst'].parent)
+        if not success and message != "Cancelled":
+            QMessageBox.critical(self, "Error", f"File operation failed:\n{message}")
 
     def _create_text_file(self, target_dir: Path):
+        from create_file_dialog import CreateFileDialog
         # Получаем папку шаблонов
         app_dir = self.get_app_dir()
         templates_dir = app_dir / "Templates"
@@ -830,11 +1262,78 @@ class OrcaGUI(QMainWindow):
                     new_path.write_text('', encoding='utf-8')
                 
                 # Обновляем модель
-                self.model.setRootPath(self.model.rootPath())
+                self.model.refresh(target_dir)
                 
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to create file:\n{e}")
 
+    def open_sweep_dialog(self, target_dir: Path):
+        from sweep_dialog import SweepDialog
+        from sweep import expand_sweep, write_sweep
+
+        templates_dir = self.get_app_dir() / "Templates"
+        templates = sorted(t for t in templates_dir.glob("*.inp") if t.is_file())
+        if not templates:
+            QMessageBox.warning(self, "No templates", f"No .inp templates in {templates_dir}")
+            return
+
+        dialog = SweepDialog(templates, target_dir, self)
+        if dialog.exec() != QDialog.Accepted:
+            return
+
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            points = expand_sweep(dialog.get_spec())
+            jobs = write_sweep(points, target_dir)
+        except (OSError, ValueError) as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, "Sweep failed", str(e))
+            return
+        QApplication.restoreOverrideCursor()
+
+        self.model.refresh(target_dir)
+        jobs = self._preflight(jobs)
+        if not jobs:
+            return
+        try:
+            self.queue.add_jobs(jobs)
+            self.statusBar().showMessage(f"Created and queued {len(jobs)} inputs", 5000)
+        except RuntimeError as e:
+            QMessageBox.warning(self, "Running", f"{len(points)} inputs created but not queued:\n{e}")
+
+    def open_funnel_dialog(self, target_dir: Path):
+        from funnel_dialog import FunnelDialog
+
+        templates_dir = self.get_app_dir() / "Templates"
+        templates = sorted(t for t in templates_dir.glob("*.inp") if t.is_file())
+        if not templates:
+            QMessageBox.warning(self, "No templates", f"No .inp templates in {templates_dir}")
+            return
+
+        dialog = FunnelDialog(templates, target_dir, self)
+        if dialog.exec() != QDialog.Accepted:
+            return
+
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            funnel_file, jobs = funnel.create_funnel(dialog.get_spec(), target_dir)
+        except (OSError, ValueError) as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, "Funnel failed", str(e))
+            return
+        QApplication.restoreOverrideCursor()
+
+        self.model.refresh(target_dir)
+        jobs = self._preflight(jobs)
+        if not jobs:
+            return
+        try:
+            self.queue.add_jobs(jobs)
+            self.statusBar().showMessage(
+                f"Queued {len(jobs)} screening inputs; survivors are refined when they finish", 5000)
+        except RuntimeError as e:
+            QMessageBox.warning(self, "Running", f"{funnel_file.name} created but not queued:\n{e}")
+
     def _create_template_from_file(self, file_path: Path):
         if not file_path.is_file():
             return
@@ -870,24 +1369,71 @@ class OrcaGUI(QMainWindow):
             shutil.copy2(file_path, template_path)
             
             # Обновляем модель
-            self.model.setRootPath(self.model.rootPath())
+            self.model.refresh(templates_dir)
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to create template:\n{e}")
 
     def reload_current_file(self):
         """Перезагружает текущий файл из диска"""
-        if not self.current_file or not self.current_file.is_file():
+        if not self.current_file:
             return
+        if not self.current_file.is_file():
+            # Открытый .out сжали после задания — дальше читаем сжатую версию
+            self.current_file = compressed_io.resolve(self.current_file)
+            if not self.current_file.is_file():
+                return
         
         try:
-            with open(self.current_file, 'r', encoding='utf-8') as f:
+            with compressed_io.open_text(self.current_file) as f:
                 content = f.read()
             self.editor.setPlainText(content)
             self.file_path_label.setText(f"Opened: {self.current_file}")
+            self._refresh_outline()
         except Exception as e:
             QMessageBox.warning(self, "Reload Error", f"Failed to reload file:\n{e}")
 
+    # === Outline ===
+    def _refresh_outline(self):
+        """Запускает фоновую индексацию разделов для открытого .out"""
+        self.outline.clear()
+        if not self.current_file or compressed_io.logical_path(self.current_file).suffix != '.out':
+            return
+        indexer = output_index.OutputIndexer(self.current_file)
+        indexer.finished.connect(self._on_outline_ready)
+        indexer.error_occurred.connect(lambda path, err: print(f"[WARN] Failed to index {path}: {err}"))
+        self._outline_indexer = indexer  # держим ссылку, пока поток работает
+        indexer.start_async()
+
+    def _on_outline_ready(self, out_path: str, entries: list):
+        if not self.current_file or str(self.current_file) != out_path:
+            return  # пока индексировали, открыли другой файл
+        self.outline.clear()
+        parent = None
+        for entry in entries:
+            item = QTreeWidgetItem([entry["title"]])
+            item.setData(0, Qt.UserRole, entry["line"])
+            # Шаги оптимизации — верхний уровень, SCF и энергии вкладываются в текущий шаг
+            if entry["kind"] in ("geom_cycle", "final_eval"):
+                self.outline.addTopLevelItem(item)
+                parent = item
+            elif parent is not None and entry["kind"] in ("scf", "energy"):
+                parent.addChild(item)
+            else:
+                self.outline.addTopLevelItem(item)
+
+    def on_outline_item_activated(self, item: QTreeWidgetItem, column: int = 0):
+        line = item.data(0, Qt.UserRole)
+        if line is None:
+            return
+        block = self.editor.document().findBlockByNumber(line)
+        if not block.isValid():
+            return
+        cursor = QTextCursor(block)
+        self.editor.setTextCursor(cursor)
+        self.editor.centerCursor()
+        self.editor.setFocus()
+
     def rename_file(self, old_path: Path):
         """Переименовывает файл или папку"""
         old_name = old_path.name
@@ -908,6 +1454,7 @@ class OrcaGUI(QMainWindow):
             
         try:
             old_path.rename(new_path)
+            self.model.refresh(old_path.parent)
             # Обновляем текущий открытый файл, если он был переименован
             if self.current_file and self.current_file == old_path:
                 self.current_file = new_path
@@ -917,6 +1464,10 @@ class OrcaGUI(QMainWindow):
     
 
 def main():
+    if "--queue-daemon" in sys.argv:
+        # Собранное приложение запускает демон очереди самим собой
+        import queue_daemon
+        sys.exit(queue_daemon.main([a for a in sys.argv[1:] if a != "--queue-daemon"]))
     app = QApplication(sys.argv)
     window = OrcaGUI()
     window.show()
@@ -0,0 +1,347 @@
+# orca_cli.py
+"""
+Запуск очереди ORCA без графического интерфейса (nohup, systemd, вычислительные узлы).
+
+    python orca_cli.py calc/Inputs/opt.inp other_project/ chain.json
+    python orca_cli.py --dry-run project/
+
+Коды выхода: 0 — все задания успешны, 1 — есть неуспешные, 2 — ошибка аргументов
+или входов, 130 — прервано сигналом.
+"""
+import argparse
+import datetime
+import json
+import signal
+import sys
+import time
+from pathlib import Path
+
+from PySide6.QtCore import QCoreApplication, QThread, QTimer
+
+import compressed_io
+import disk_guard
+import funnel
+import orca_queue
+import pipeline
+import job_history
+import resource_advisor
+from orca_input import validate_queue
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+# Как часто интерпретатор получает управление, чтобы обработать SIGINT/SIGTERM
+_SIGNAL_POLL_MS = 200
+
+
+def get_app_dir() -> Path:
+    if getattr(sys, 'frozen', False):
+        return Path(sys.executable).parent
+    return Path(__file__).parent
+
+
+def load_settings(settings_file: Path) -> dict:
+    """settings.json графического интерфейса (те же ключи)"""
+    if not settings_file.is_file():
+        return {}
+    try:
+        with open(settings_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[WARN] Failed to load settings: {e}", file=sys.stderr)
+        return {}
+
+
+def apply_queue_settings(queue, settings: dict):
+    """
+    Ключи scratch_*, pin_cpus, ограничения сторожа, metrics_file, compress_outputs,
+    artifact_retention и disk_reserve_mb из settings.json → очередь
+    """
+    if settings.get("scratch_dir"):
+        queue.scratch_dir = Path(settings["scratch_dir"])
+    queue.scratch_patterns = settings.get("scratch_patterns") or None
+    queue.scratch_by_default = bool(settings.get("scratch_by_default", False))
+    queue.pin_cpus = bool(settings.get("pin_cpus", False))
+    queue.wall_time_limit = settings.get("wall_time_limit", 0)
+    queue.stall_limit = settings.get("stall_limit", 0)
+    queue.metrics_file = Path(settings["metrics_file"]) if settings.get("metrics_file") else None
+    queue.compress_outputs = settings.get("compress_outputs") or ""
+    queue.artifact_retention = settings.get("artifact_retention") or disk_guard.KEEP
+    queue.disk_reserve_mb = settings.get("disk_reserve_mb", disk_guard.DEFAULT_RESERVE_MB)
+
+
+def tune_resources(inp_paths: list[Path], history_file: Path, min_confidence: float, apply: bool = True):
+    """Рекомендации resource_advisor для входов; уверенные — записываются во входы"""
+    history = job_history.load(history_file)
+    for inp_path in inp_paths:
+        try:
+            inp, advice = resource_advisor.advise_file(inp_path, history)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] {inp_path.name}: cannot advise resources: {e}", file=sys.stderr)
+            continue
+        if not advice.changed:
+            continue
+        confident = advice.confidence >= min_confidence
+        if apply and confident:
+            inp_path.write_text(resource_advisor.apply_advice(inp, advice).text, encoding='utf-8')
+        action = "applied" if apply and confident else "suggested"
+        print(f"{inp_path.name}: {action} {advice.summary()}", file=sys.stderr)
+
+
+def collect_jobs(paths: list[Path]) -> list[tuple]:
+    """Задания из .inp, папок (все .inp рекурсивно, по имени) и pipeline .json"""
+    jobs = []
+    for path in paths:
+        if path.is_dir():
+            inps = sorted(p for p in path.rglob("*.inp")
+                          if not any(part.startswith('.') for part in p.relative_to(path).parts))
+            jobs.extend((p, pipeline.out_path_for(p)) for p in inps)
+        elif path.suffix == ".json":
+            jobs.extend(pipeline.load_pipeline(path))
+        elif path.suffix == ".inp" and path.is_file():
+            jobs.append((path.resolve(), pipeline.out_path_for(path)))
+        else:
+            raise ValueError(f"Not an .inp, directory or pipeline .json: {path}")
+    return jobs
+
+
+class StatusPrinter:
+    """Строки статуса в stdout: человекочитаемые или JSON Lines"""
+
+    def __init__(self, queue, as_json: bool):
+        self.queue = queue
+        self.as_json = as_json
+        self.total = len(queue.jobs)
+        self.done = 0
+        self.failed = 0
+        self.started = 0
+        # Время старта — по id задания: в параллельной группе или в разных проектах
+        # одновременно могут считаться входы с одинаковым именем
+        self._started_at = {}
+        self._elapsed = 0.0
+        queue.job_status_changed.connect(self.on_status_changed)
+        queue.job_started.connect(self.on_started)
+        queue.job_finished.connect(self.on_finished)
+        queue.error_occurred.connect(self.on_error)
+        queue.job_timed_out.connect(self.on_timed_out)
+        queue.disk_low.connect(self.on_disk_low)
+        queue.jobs_inserted.connect(self.on_jobs_inserted)
+
+    def emit(self, event: str, name: str, **fields):
+        now = datetime.datetime.now()
+        if self.as_json:
+            record = {"time": now.isoformat(timespec='seconds'), "event": event, "job": name, **fields}
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+            return
+        extra = " ".join(f"{k}={v}" for k, v in fields.items())
+        print(f"[{now:%Y-%m-%d %H:%M:%S}] {event:<7} {name} {extra}".rstrip(), flush=True)
+
+    def _progress(self) -> str:
+        return f"{self.done}/{self.total}"
+
+    def on_status_changed(self, job_id: int, status: str):
+        # Статус меняется синхронно перед job_finished / error_occurred / job_timed_out
+        if status == orca_queue.RUNNING:
+            self._started_at[job_id] = time.monotonic()
+        elif status in orca_queue.FINISHED_STATUSES:
+            started = self._started_at.pop(job_id, None)
+            self._elapsed = time.monotonic() - started if started is not None else 0.0
+
+    def on_started(self, inp_name: str):
+        self.started += 1
+        self.emit("START", inp_name, progress=f"{self.started}/{self.total}")
+
+    def on_finished(self, inp_name: str, success: bool, out_path: str, display_name: str):
+        self.done += 1
+        if not success:
+            self.failed += 1
+        self.emit("DONE" if success else "FAILED", display_name,
+                  elapsed=f"{self._elapsed:.1f}s", out=out_path, progress=self._progress())
+
+    def on_error(self, inp_name: str, error: str, display_name: str):
+        self.done += 1
+        self.failed += 1
+        self.emit("ERROR", display_name, error=error, progress=self._progress())
+
+    def on_timed_out(self, inp_name: str, reason: str, display_name: str):
+        self.done += 1
+        self.failed += 1
+        self.emit("TIMEOUT", display_name, elapsed=f"{self._elapsed:.1f}s", reason=f'"{reason}"',
+                  progress=self._progress())
+
+    def on_disk_low(self, inp_name: str, message: str, display_name: str):
+        self.emit("DISK", display_name, reason=f'"{message}"')
+
+    def on_jobs_inserted(self, first: int, last: int):
+        self.total = len(self.queue.jobs)
+
+    def on_funnel_selected(self, name: str, kept: int, total: int):
+        self.emit("FUNNEL", name, kept=f"{kept}/{total}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="orca_cli", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("paths", nargs="+", type=Path, help=".inp files, directories or pipeline .json")
+    parser.add_argument("--orca", type=Path, help="ORCA executable (default: settings.json)")
+    parser.add_argument("--locale", help="LC_ALL for ORCA (default: settings.json or C.UTF-8)")
+    gpu = parser.add_mutually_exclusive_group()
+    gpu.add_argument("--disable-gpu", dest="disable_gpu", action="store_true", default=None)
+    gpu.add_argument("--enable-gpu", dest="disable_gpu", action="store_false")
+    parser.add_argument("--log-dir", type=Path, help="queue log directory (default: <app>/logs)")
+    parser.add_argument("--scratch", type=Path,
+                        help="run every job in a local scratch directory and copy results back")
+    parser.add_argument("--wall-time", type=float, metavar="MIN",
+                        help="terminate a job after MIN minutes and go on (0: no limit)")
+    parser.add_argument("--stall-timeout", type=float, metavar="MIN",
+                        help="terminate a job whose output has not grown for MIN minutes (0: no limit)")
+    pinning = parser.add_mutually_exclusive_group()
+    pinning.add_argument("--pin-cpus", dest="pin_cpus", action="store_true", default=None,
+                         help="give each job its own cores (NUMA-aware)")
+    pinning.add_argument("--no-pin-cpus", dest="pin_cpus", action="store_false")
+    parser.add_argument("--trace", type=Path, metavar="FILE",
+                        help="write the job timeline as Chrome trace JSON (chrome://tracing, Perfetto)")
+    parser.add_argument("--metrics-file", type=Path, metavar="FILE",
+                        help="keep job timing metrics in a Prometheus textfile (node_exporter)")
+    parser.add_argument("--compress", choices=tuple(compressed_io.SUFFIXES),
+                        help="compress finished outputs and trajectories (read transparently by OrcaUI)")
+    parser.add_argument("--artifacts", choices=disk_guard.RETENTION_POLICIES,
+                        help="temporary ORCA files (.tmp, .densities, ...) of successful jobs: keep, delete "
+                             "or archive into <name>_artifacts.tar.gz")
+    parser.add_argument("--disk-reserve", type=float, metavar="MB",
+                        help="wait before a job while less than MB plus its expected disk use is free "
+                             f"(default {disk_guard.DEFAULT_RESERVE_MB}; 0: do not check)")
+    parser.add_argument("--tune-resources", type=float, nargs="?", const=0.4, metavar="MIN_CONFIDENCE",
+                        help="rewrite %%pal/%%maxcore from job history before queuing "
+                             "(advice at least this confident, default 0.4)")
+    parser.add_argument("--settings", type=Path, help="settings.json to read defaults from")
+    parser.add_argument("--no-check", action="store_true", help="skip input validation")
+    parser.add_argument("--skip-invalid", action="store_true",
+                        help="drop inputs with validation errors instead of refusing to start")
+    parser.add_argument("--dry-run", action="store_true", help="validate and list jobs, do not run")
+    parser.add_argument("--json", action="store_true", help="print status as JSON Lines")
+    return parser
+
+
+def main(argv: list[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    app_dir = get_app_dir()
+    settings = load_settings(args.settings or app_dir / "settings.json")
+
+    orca_exe = args.orca or (Path(settings["orca_exe"]) if settings.get("orca_exe") else None)
+    if orca_exe is not None:
+        # ORCA запускается из папки расчёта — относительный путь там уже не найдётся
+        orca_exe = orca_exe.expanduser().resolve()
+    if not args.dry_run and (orca_exe is None or not orca_exe.is_file()):
+        print(f"ORCA executable not found: {orca_exe} (use --orca)", file=sys.stderr)
+        return EXIT_USAGE
+    locale = args.locale or settings.get("orca_locale", "C.UTF-8")
+    disable_gpu = args.disable_gpu if args.disable_gpu is not None else settings.get("disable_gpu", True)
+
+    try:
+        jobs = collect_jobs(args.paths)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    if not jobs:
+        print("No jobs to run.", file=sys.stderr)
+        return EXIT_USAGE
+
+    if args.compress and args.compress not in compressed_io.available_methods():
+        print(f"{args.compress} compression is not available (pip install zstandard)", file=sys.stderr)
+        return EXIT_USAGE
+
+    log_dir = args.log_dir or app_dir / "logs"
+    if args.tune_resources is not None:
+        tune_resources([Path(job[0]) for job in jobs], log_dir / job_history.HISTORY_FILE_NAME,
+                       args.tune_resources, apply=not args.dry_run)
+
+    if not args.no_check:
+        problems = validate_queue([job[0] for job in jobs])
+        invalid = set()
+        for path, issues in problems.items():
+            for issue in issues:
+                print(f"{path}: {issue}", file=sys.stderr)
+                if issue.level == 'error':
+                    invalid.add(path)
+        if invalid:
+            if not args.skip_invalid:
+                print(f"{len(invalid)} input(s) have errors; fix them, or use --skip-invalid / --no-check",
+                      file=sys.stderr)
+                return EXIT_USAGE
+            jobs = [job for job in jobs if Path(job[0]) not in invalid]
+
+    if args.dry_run:
+        for job in jobs:
+            print(f"{job[0]} -> {job[1]}")
+        return EXIT_OK
+
+    app = QCoreApplication(sys.argv[:1])
+    queue = orca_queue.OrcaQueue(orca_exe, locale=locale, log_dir=log_dir, disable_gpu=disable_gpu)
+    apply_queue_settings(queue, settings)
+    if args.pin_cpus is not None:
+        queue.pin_cpus = args.pin_cpus
+    if args.wall_time is not None:
+        queue.wall_time_limit = args.wall_time
+    if args.stall_timeout is not None:
+        queue.stall_limit = args.stall_timeout
+    if args.scratch:
+        queue.scratch_dir = args.scratch
+        queue.scratch_by_default = True
+    if args.metrics_file:
+        queue.metrics_file = args.metrics_file
+    if args.compress:
+        queue.compress_outputs = args.compress
+    if args.artifacts:
+        queue.artifact_retention = args.artifacts
+    if args.disk_reserve is not None:
+        queue.disk_reserve_mb = args.disk_reserve
+    queue.add_jobs(jobs)
+    status = StatusPrinter(queue, args.json)
+    funnels = funnel.FunnelController(queue)
+    funnels.funnel_selected.connect(status.on_funnel_selected)
+
+    interrupted = []
+
+    def on_signal(signum, frame):
+        if interrupted:
+            # Повторный сигнал — не ждём корректной остановки
+            sys.exit(EXIT_INTERRUPTED)
+        interrupted.append(signum)
+        status.emit("STOP", "queue", signal=signal.Signals(signum).name)
+        queue.terminate_current_job()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+    poll = QTimer()
+    poll.timeout.connect(lambda: None)
+    poll.start(_SIGNAL_POLL_MS)
+
+    queue.queue_finished.connect(app.quit)
+    QTimer.singleShot(0, queue.start)
+    app.exec()
+    # quit из completed последнего задания стоит в уже остановленном цикле событий:
+    # просим потоки завершиться напрямую и дожидаемся их
+    for thread in app.findChildren(QThread):
+        thread.quit()
+        thread.wait()
+
+    if args.trace:
+        try:
+            queue.trace.write_chrome(args.trace)
+        except OSError as e:
+            print(f"[WARN] Cannot write trace: {e}", file=sys.stderr)
+
+    succeeded = status.done - status.failed
+    status.emit("END", "queue", succeeded=succeeded, failed=status.failed,
+                skipped=status.total - status.done)
+    if interrupted:
+        return EXIT_INTERRUPTED
+    return EXIT_FAILED if status.failed else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
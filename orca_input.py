@@ -0,0 +1,592 @@
+# orca_input.py
+import os
+import re
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+ELEMENTS = (
+    "H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co Ni Cu Zn "
+    "Ga Ge As Se Br Kr Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe Cs Ba La Ce "
+    "Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm Yb Lu Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po At Rn "
+    "Fr Ra Ac Th Pa U Np Pu Am Cm Bk Cf Es Fm Md No Lr Rf Db Sg Bh Hs Mt Ds Rg Cn Nh Fl "
+    "Mc Lv Ts Og"
+).split()
+ATOMIC_NUMBERS = {symbol.lower(): z for z, symbol in enumerate(ELEMENTS, start=1)}
+
+# Блоки без завершающего end
+SINGLE_LINE_BLOCKS = {"maxcore", "moinp", "base", "id"}
+# Подблоки внутри %-блоков, которые закрываются своим end
+SUBBLOCK_OPENERS = {
+    "constraints", "scan", "modify_internal", "hess_internal", "coords",
+    "fragments", "constrainfragments", "fixfragments", "hessmode",
+}
+COORD_TYPES = {"xyz", "int", "internal", "gzmt", "xyzfile", "gzmtfile", "pdbfile"}
+
+_SYMBOL_RE = re.compile(r"([A-Za-z]{1,2})")
+_PAL_KEYWORD_RE = re.compile(r"^pal(\d+)$", re.IGNORECASE)
+
+
+@dataclass
+class Atom:
+    symbol: str
+    x: float
+    y: float
+    z: float
+
+
+@dataclass
+class Issue:
+    level: str    # 'error' | 'warning'
+    message: str
+
+    def __str__(self) -> str:
+        return f"[{self.level}] {self.message}"
+
+
+@dataclass
+class OrcaInput:
+    """Разобранный .inp: ключевые слова, %-блоки и блок координат"""
+    path: Path | None = None
+    lines: list[str] = field(default_factory=list)
+    keywords: list[str] = field(default_factory=list)
+    blocks: dict[str, dict[str, str]] = field(default_factory=dict)
+    charge: int | None = None
+    mult: int | None = None
+    coord_type: str | None = None
+    atoms: list[Atom] = field(default_factory=list)
+    coord_file: str | None = None
+    # Номера строк заголовка "* xyz ..." и закрывающей "*" (для последующей перезаписи)
+    coord_start: int | None = None
+    coord_end: int | None = None
+    # Строки начала и конца каждого %-блока
+    block_spans: dict[str, tuple[int, int]] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+    @property
+    def keywords_lower(self) -> set[str]:
+        return {k.lower() for k in self.keywords}
+
+    @property
+    def nprocs(self) -> int | None:
+        value = self.blocks.get("pal", {}).get("nprocs")
+        if value is not None:
+            try:
+                return int(value.split()[0])
+            except (ValueError, IndexError):
+                return None
+        for keyword in self.keywords:
+            match = _PAL_KEYWORD_RE.match(keyword)
+            if match:
+                return int(match.group(1))
+        return None
+
+    @property
+    def maxcore(self) -> int | None:
+        """%maxcore в МБ на процесс"""
+        value = self.blocks.get("maxcore", {}).get("")
+        try:
+            return int(float(value.split()[0])) if value else None
+        except (ValueError, IndexError):
+            return None
+
+    @property
+    def moinp(self) -> str | None:
+        value = self.blocks.get("moinp", {}).get("")
+        return value.strip().strip('"\'') if value else None
+
+    @property
+    def method(self) -> str:
+        """Краткая подпись метода: ключевые слова через пробел, в нижнем регистре (без PALn)"""
+        return " ".join(k.lower() for k in self.keywords if not is_pal_keyword(k))
+
+    def atom_count(self) -> int | None:
+        """Число атомов: из блока координат или первой строки файла xyzfile"""
+        if self.atoms:
+            return len(self.atoms)
+        if self.coord_file:
+            try:
+                with open(self.resolve(self.coord_file), 'r', encoding='utf-8', errors='replace') as f:
+                    return int(f.readline().split()[0])
+            except (OSError, ValueError, IndexError):
+                pass
+        return None
+
+    def referenced_files(self) -> list[Path]:
+        """Файлы, которые вход читает: %moinp, * xyzfile, InHessName"""
+        names = [self.moinp, self.coord_file, self.blocks.get("geom", {}).get("inhessname")]
+        return [self.resolve(name.strip('"\'')) for name in names if name]
+
+    def electron_count(self) -> int | None:
+        if self.charge is None or not self.atoms:
+            return None
+        return electrons_of(self.atoms, self.charge)
+
+    def resolve(self, name: str) -> Path:
+        """Путь к файлу, на который ссылается вход (относительно папки .inp — там работает ORCA)"""
+        path = Path(name)
+        if path.is_absolute() or self.path is None:
+            return path
+        return self.path.parent / path
+
+
+def _strip_comment(line: str) -> str:
+    index = line.find('#')
+    return line if index < 0 else line[:index]
+
+
+def _parse_atom(tokens: list[str]) -> Atom | None:
+    if len(tokens) < 4:
+        return None
+    match = _SYMBOL_RE.match(tokens[0])
+    if not match:
+        return None
+    try:
+        x, y, z = (float(t) for t in tokens[1:4])
+    except ValueError:
+        return None
+    symbol = match.group(1)
+    return Atom(symbol[0].upper() + symbol[1:].lower(), x, y, z)
+
+
+def parse_input_text(text: str, path: Path = None) -> OrcaInput:
+    inp = OrcaInput(path=Path(path) if path else None, lines=text.splitlines())
+    lines = inp.lines
+    i = 0
+    while i < len(lines):
+        line = _strip_comment(lines[i]).strip()
+        if not line:
+            i += 1
+            continue
+
+        if line.startswith('!'):
+            inp.keywords.extend(line[1:].split())
+            i += 1
+
+        elif line.startswith('%'):
+            tokens = line[1:].split()
+            if not tokens:
+                i += 1
+                continue
+            name = tokens[0].lower()
+            rest = tokens[1:]
+            block = inp.blocks.setdefault(name, {})
+            if name in SINGLE_LINE_BLOCKS:
+                block[""] = " ".join(rest)
+                inp.block_spans[name] = (i, i)
+                i += 1
+                continue
+            start = i
+            i = _parse_block(inp, name, block, rest, lines, i)
+            inp.block_spans[name] = (start, i - 1)
+
+        elif line.startswith('*'):
+            i = _parse_coords(inp, line, lines, i)
+
+        else:
+            i += 1
+    return inp
+
+
+def _parse_block(inp: OrcaInput, name: str, block: dict, rest: list[str], lines: list[str], i: int) -> int:
+    """Читает %-блок до его end (с учётом вложенных подблоков). Возвращает следующую строку"""
+    depth = 0
+    pending = [rest] if rest else []
+    j = i + 1
+    while True:
+        for tokens in pending:
+            if not tokens:
+                continue
+            key = tokens[0].lower()
+            if key == "end":
+                if depth == 0:
+                    return j
+                depth -= 1
+                continue
+            if key in SUBBLOCK_OPENERS:
+                if name == "coords" and key == "coords":
+                    j = _parse_coords_subblock(inp, lines, j)
+                    continue
+                depth += 1
+                continue
+            if depth == 0:
+                # end в той же строке: "%pal nprocs 16 end"
+                if tokens[-1].lower() == "end" and len(tokens) > 1:
+                    block[key] = " ".join(tokens[1:-1])
+                    return j
+                block[key] = " ".join(tokens[1:])
+                if name == "coords":
+                    _apply_coords_setting(inp, key, tokens[1:])
+        if j >= len(lines):
+            inp.errors.append(f"Block %{name} is not closed with 'end'")
+            return j
+        pending = [_strip_comment(lines[j]).split()]
+        j += 1
+
+
+def _apply_coords_setting(inp: OrcaInput, key: str, values: list[str]):
+    if not values:
+        return
+    try:
+        if key == "charge":
+            inp.charge = int(values[0])
+        elif key == "mult":
+            inp.mult = int(values[0])
+        elif key == "ctyp":
+            inp.coord_type = values[0].lower()
+    except ValueError:
+        inp.errors.append(f"Invalid %coords {key}: {' '.join(values)}")
+
+
+def _parse_coords_subblock(inp: OrcaInput, lines: list[str], j: int) -> int:
+    """Подблок Coords внутри %coords: атомы до end"""
+    while j < len(lines):
+        tokens = _strip_comment(lines[j]).split()
+        j += 1
+        if tokens and tokens[0].lower() == "end":
+            return j
+        atom = _parse_atom(tokens)
+        if atom is not None:
+            inp.atoms.append(atom)
+    return j
+
+
+def _parse_coords(inp: OrcaInput, line: str, lines: list[str], i: int) -> int:
+    """Блок "* xyz charge mult" ... "*" или однострочный "* xyzfile charge mult file" """
+    tokens = line[1:].split()
+    if not tokens:
+        return i + 1
+    coord_type = tokens[0].lower()
+    if coord_type not in COORD_TYPES:
+        inp.errors.append(f"Unknown coordinate type '{tokens[0]}'")
+        return i + 1
+    inp.coord_type = coord_type
+    inp.coord_start = i
+    try:
+        inp.charge = int(tokens[1])
+        inp.mult = int(tokens[2])
+    except (IndexError, ValueError):
+        inp.errors.append(f"Coordinate line must be '* {coord_type} charge multiplicity': {line}")
+
+    if coord_type.endswith("file"):
+        inp.coord_file = tokens[3].strip('"\'') if len(tokens) > 3 else None
+        if inp.coord_file is None:
+            inp.errors.append(f"'* {coord_type}' needs a file name")
+        inp.coord_end = i
+        return i + 1
+
+    j = i + 1
+    while j < len(lines):
+        stripped = _strip_comment(lines[j]).strip()
+        if stripped == '*':
+            inp.coord_end = j
+            return j + 1
+        if coord_type == "xyz":
+            atom = _parse_atom(stripped.split())
+            if atom is not None:
+                inp.atoms.append(atom)
+            elif stripped:
+                inp.errors.append(f"Cannot parse coordinate line {j + 1}: {stripped}")
+        elif stripped:
+            # Внутренние координаты: достаточно символа элемента для подсчёта электронов
+            match = _SYMBOL_RE.match(stripped)
+            if match:
+                inp.atoms.append(Atom(match.group(1).capitalize(), 0.0, 0.0, 0.0))
+        j += 1
+    inp.errors.append("Coordinate block is not closed with '*'")
+    return j
+
+
+def parse_input(path: Path) -> OrcaInput:
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return parse_input_text(f.read(), path)
+
+
+# === Изменение входа (шаблоны, перебор параметров) ===
+
+# Ключевые слова, которые задают метод (функционал / ab initio)
+_METHOD_RE = re.compile(
+    r"^(u|r|ro)?(hf|hf-3c|b97-3c|pbeh-3c|r2scan-3c|wb97x-3c|b3lyp|b3lyp-3c|pbe0?|revpbe0?|bp86|blyp|"
+    r"tpssh?|r2scanh?|r2scan0|r2scan50|scan|m06(-2x|-l|2x)?|b97m?-[dv][34]?|wb97(x|m)?(-d3|-d3bj|-d4|-v)?|"
+    r"cam-b3lyp|pw6b95|b2plyp|revdsd-\S+|dsd-\S+|(dlpno-|ri-|lpno-)?(ccsd(\(t\)|\(t1\))?|mp2|mp3|nevpt2)(-f12)?)$",
+    re.IGNORECASE,
+)
+# Ключевые слова орбитального базиса (вспомогательные def2/J, .../C — не трогаем)
+_BASIS_RE = re.compile(
+    r"^(def2-|ma-def2-|def-|dkh-def2-|zora-def2-|x2c-|(aug-|jun-|may-|apr-)?cc-p|6-31|6-311|3-21|sto-|"
+    r"pc-|pcseg-|pcsseg-|aug-pc|sarc|ano-|saug-|lanl)",
+    re.IGNORECASE,
+)
+
+
+def is_method_keyword(keyword: str) -> bool:
+    return bool(_METHOD_RE.match(keyword))
+
+
+def is_pal_keyword(keyword: str) -> bool:
+    return bool(_PAL_KEYWORD_RE.match(keyword))
+
+
+def is_basis_keyword(keyword: str) -> bool:
+    return '/' not in keyword and bool(_BASIS_RE.match(keyword))
+
+
+def format_atoms(atoms: list[Atom]) -> list[str]:
+    return [f"{a.symbol:<4}{a.x:16.9f}{a.y:16.9f}{a.z:16.9f}" for a in atoms]
+
+
+def with_keywords(inp: OrcaInput, keywords: list[str]) -> OrcaInput:
+    """Заменяет все строки '!' одной строкой с заданными ключевыми словами"""
+    lines = list(inp.lines)
+    bang = [n for n, line in enumerate(lines) if line.lstrip().startswith('!')]
+    new_line = "! " + " ".join(keywords)
+    if not bang:
+        lines.insert(0, new_line)
+    else:
+        lines[bang[0]] = new_line
+        for n in reversed(bang[1:]):
+            del lines[n]
+    return parse_input_text("\n".join(lines) + "\n", inp.path)
+
+
+def with_block_value(inp: OrcaInput, block: str, key: str, value) -> OrcaInput:
+    """
+    Задаёт "key value" в %-блоке (для %maxcore и т.п. key игнорируется).
+    Блок создаётся перед координатами, если его нет.
+    """
+    lines = list(inp.lines)
+    name = block.lower()
+    key_lower = key.lower()
+    value = str(value)
+    span = inp.block_spans.get(name)
+
+    if span is None:
+        new = [f"%{name} {value}"] if name in SINGLE_LINE_BLOCKS else [f"%{name}", f"  {key} {value}", "end"]
+        at = inp.coord_start if inp.coord_start is not None else len(lines)
+        lines[at:at] = new
+        return parse_input_text("\n".join(lines) + "\n", inp.path)
+
+    start, end = span
+    if name in SINGLE_LINE_BLOCKS:
+        lines[start] = f"%{name} {value}"
+        return parse_input_text("\n".join(lines) + "\n", inp.path)
+
+    for n in range(start, end + 1):
+        code = _strip_comment(lines[n])
+        tokens = code.split()
+        pos = 1 if n == start else 0
+        if len(tokens) > pos and tokens[pos].lower() == key_lower:
+            indent = code[:len(code) - len(code.lstrip())]
+            closing = " end" if tokens[-1].lower() == "end" and len(tokens) > pos + 1 else ""
+            comment = lines[n][len(code):]
+            lines[n] = f"{indent}{' '.join(tokens[:pos + 1])} {value}{closing}{comment}"
+            break
+    else:
+        if start == end:
+            # Однострочный блок "%pal nprocs 16 end"
+            tokens = _strip_comment(lines[start]).split()
+            if tokens and tokens[-1].lower() == "end":
+                tokens.pop()
+            lines[start] = " ".join(tokens + [key, value, "end"])
+        else:
+            lines.insert(end, f"  {key} {value}")
+    return parse_input_text("\n".join(lines) + "\n", inp.path)
+
+
+def with_coordinates(inp: OrcaInput, charge: int, mult: int, atoms: list[Atom] = None,
+                     coord_file: str = None) -> OrcaInput:
+    """
+    Заменяет блок координат: атомы ("* xyz"), файл ("* xyzfile") или только заряд и
+    мультиплетность. Без повторного разбора — вызывается тысячи раз при переборе.
+    """
+    if inp.coord_start is None and inp.atoms:
+        raise ValueError("Coordinates given in a %coords block cannot be replaced")
+    lines = list(inp.lines)
+    start = inp.coord_start if inp.coord_start is not None else len(lines)
+    end = inp.coord_end if inp.coord_end is not None else start - 1
+
+    if coord_file is not None:
+        coord_type = "xyzfile"
+        new = [f"* xyzfile {charge} {mult} {coord_file}"]
+        atoms = []
+    elif atoms is not None:
+        coord_type = "xyz"
+        new = [f"* xyz {charge} {mult}", *format_atoms(atoms), "*"]
+    else:
+        coord_type = inp.coord_type or "xyz"
+        atoms = inp.atoms
+        coord_file = inp.coord_file
+        header = f"* {coord_type} {charge} {mult}" + (f" {coord_file}" if coord_file else "")
+        new = [header] + lines[start + 1:end + 1]
+    lines[start:end + 1] = new
+
+    shift = len(new) - (end + 1 - start)
+    spans = {name: (a + shift if a > end else a, b + shift if b > end else b)
+             for name, (a, b) in inp.block_spans.items()}
+    return replace(
+        inp, lines=lines, charge=charge, mult=mult, coord_type=coord_type, atoms=list(atoms),
+        coord_file=coord_file, coord_start=start, coord_end=start + len(new) - 1,
+        block_spans=spans, errors=list(inp.errors),
+    )
+
+
+def electrons_of(atoms: list[Atom], charge: int) -> int | None:
+    total = 0
+    for atom in atoms:
+        z = ATOMIC_NUMBERS.get(atom.symbol.lower())
+        if z is None:
+            return None
+        total += z
+    return total - charge
+
+
+def compatible_mult(electrons: int | None, mult: int) -> int:
+    """Ближайшая к mult мультиплетность, допустимая для числа электронов (сначала вниз)"""
+    if electrons is None or (electrons + mult) % 2 == 1:
+        return mult
+    return mult - 1 if mult > 1 else mult + 1
+
+
+# === Проверка перед постановкой в очередь ===
+
+# Атомы ближе этого расстояния (Å) почти наверняка задвоены
+MIN_ATOM_DISTANCE = 0.4
+# Доля RAM, которую разумно отдавать ORCA (она превышает %maxcore)
+RAM_WARNING_FRACTION = 0.75
+
+
+def machine_ram_mb() -> int | None:
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _close_atom_pairs(atoms: list[Atom], cutoff: float) -> list[tuple[int, int]]:
+    """Пары атомов ближе cutoff; пространственная сетка вместо O(N²)"""
+    cells: dict[tuple[int, int, int], list[int]] = {}
+    pairs = []
+    cutoff2 = cutoff * cutoff
+    for index, atom in enumerate(atoms):
+        key = (int(atom.x // cutoff), int(atom.y // cutoff), int(atom.z // cutoff))
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    for other in cells.get((key[0] + dx, key[1] + dy, key[2] + dz), ()):
+                        b = atoms[other]
+                        if (atom.x - b.x) ** 2 + (atom.y - b.y) ** 2 + (atom.z - b.z) ** 2 < cutoff2:
+                            pairs.append((other, index))
+        cells.setdefault(key, []).append(index)
+    return pairs
+
+
+def expected_outputs(inp_path: Path) -> set[Path]:
+    """Файлы, которые ORCA оставит рядом с входом: basename.gbw и финальная геометрия"""
+    # with_suffix обрезал бы точку в имени: opt.v2.inp → opt.gbw вместо opt.v2.gbw
+    stem = inp_path.stem
+    return {inp_path.with_name(stem + ".gbw"), inp_path.with_name(stem + ".xyz")}
+
+
+def validate_input(inp: OrcaInput, ram_mb: int | None = None, cpu_count: int | None = None,
+                   known_outputs: set[Path] = frozenset()) -> list[Issue]:
+    """
+    Быстрые проверки, которые иначе всплывут через часы, когда ORCA упадёт.
+    known_outputs — файлы, которые создадут задания, стоящие в очереди раньше.
+    """
+    issues = [Issue('error', message) for message in inp.errors]
+    keywords = inp.keywords_lower
+
+    if not inp.keywords:
+        issues.append(Issue('warning', "No '!' keyword line"))
+
+    # === Геометрия, заряд, мультиплетность ===
+    if inp.coord_type is None:
+        issues.append(Issue('error', "No coordinate block ('* xyz charge mult')"))
+    if inp.coord_type and inp.coord_type.endswith("file") and inp.coord_file:
+        coord_path = inp.resolve(inp.coord_file)
+        if not coord_path.is_file() and coord_path not in known_outputs:
+            issues.append(Issue('error', f"Coordinate file not found: {inp.coord_file}"))
+    if inp.coord_type in ("xyz", "int", "internal", "gzmt") and not inp.atoms:
+        issues.append(Issue('error', "Coordinate block contains no atoms"))
+
+    unknown = sorted({a.symbol for a in inp.atoms if a.symbol.lower() not in ATOMIC_NUMBERS})
+    if unknown:
+        issues.append(Issue('error', f"Unknown element symbols: {', '.join(unknown)}"))
+
+    if inp.mult is not None and inp.mult < 1:
+        issues.append(Issue('error', f"Multiplicity must be >= 1, got {inp.mult}"))
+    electrons = inp.electron_count()
+    if electrons is not None and inp.mult is not None and inp.mult >= 1:
+        if electrons < 0:
+            issues.append(Issue('error', f"Charge {inp.charge} leaves {electrons} electrons"))
+        elif (electrons + inp.mult) % 2 == 0:
+            issues.append(Issue(
+                'error',
+                f"{electrons} electrons (charge {inp.charge}) are incompatible with multiplicity {inp.mult}"
+            ))
+        elif inp.mult - 1 > electrons:
+            issues.append(Issue('error', f"Multiplicity {inp.mult} needs more than {electrons} electrons"))
+
+    if inp.coord_type == "xyz" and len(inp.atoms) > 1:
+        pairs = _close_atom_pairs(inp.atoms, MIN_ATOM_DISTANCE)
+        if pairs:
+            a, b = pairs[0]
+            issues.append(Issue(
+                'error',
+                f"{len(pairs)} atom pair(s) closer than {MIN_ATOM_DISTANCE} Å "
+                f"(e.g. atoms {a + 1} {inp.atoms[a].symbol} and {b + 1} {inp.atoms[b].symbol})"
+            ))
+
+    # === Ресурсы ===
+    nprocs = inp.nprocs or 1
+    if cpu_count and nprocs > cpu_count:
+        issues.append(Issue('warning', f"%pal nprocs {nprocs} exceeds {cpu_count} CPUs"))
+    if inp.maxcore and ram_mb:
+        total = inp.maxcore * nprocs
+        if total > ram_mb:
+            issues.append(Issue('error', f"%maxcore {inp.maxcore} × {nprocs} procs = {total} MB exceeds RAM ({ram_mb} MB)"))
+        elif total > ram_mb * RAM_WARNING_FRACTION:
+            issues.append(Issue('warning', f"%maxcore {inp.maxcore} × {nprocs} procs = {total} MB is close to RAM ({ram_mb} MB)"))
+
+    # === MORead ===
+    if "moread" in keywords:
+        if not inp.moinp:
+            issues.append(Issue('error', "MORead without %moinp"))
+        else:
+            moinp_path = inp.resolve(inp.moinp)
+            if inp.path is not None and moinp_path.resolve() == (inp.path.parent / (inp.path.stem + ".gbw")).resolve():
+                issues.append(Issue('error', f"%moinp {inp.moinp} is the job's own .gbw; ORCA will overwrite it"))
+            elif not moinp_path.is_file() and moinp_path not in known_outputs:
+                issues.append(Issue('error', f"%moinp file not found: {inp.moinp}"))
+    elif inp.moinp:
+        issues.append(Issue('warning', "%moinp is given but MORead keyword is missing"))
+
+    return issues
+
+
+def validate_queue(inp_paths: list[Path], earlier: list[Path] = ()) -> dict[Path, list[Issue]]:
+    """
+    Проверяет пакет входов в порядке очереди. Файлы, которые создадут задания,
+    стоящие раньше (earlier и предыдущие в пакете), считаются существующими.
+    """
+    ram_mb = machine_ram_mb()
+    cpu_count = os.cpu_count()
+    known: set[Path] = set()
+    for path in earlier:
+        known |= expected_outputs(Path(path))
+    result = {}
+    for path in inp_paths:
+        path = Path(path)
+        try:
+            inp = parse_input(path)
+            issues = validate_input(inp, ram_mb=ram_mb, cpu_count=cpu_count, known_outputs=known)
+        except OSError as e:
+            issues = [Issue('error', f"Cannot read input: {e}")]
+        if issues:
+            result[path] = issues
+        known |= expected_outputs(path)
+    return result
@@ -1,7 +1,23 @@
 import os
+import signal
+import threading
+import time
 from pathlib import Path
-from PySide6.QtCore import QObject, QThread, Signal
+from PySide6.QtCore import QCoreApplication, QObject, QThread, Signal
 import subprocess
+import compressed_io
+import cpu_topology
+import disk_guard
+import job_history
+import job_trace
+import scratch
+from geometry import terminated_normally
+from orca_input import parse_input
+
+# Вывод ORCA копируется блоками по мере поступления (os.read не ждёт заполнения блока)
+_COPY_CHUNK = 1024 * 1024
+# Сколько ждать выхода ORCA после SIGTERM до SIGKILL, секунды
+TERMINATE_GRACE = 5.0
 
 
 class OrcaJob(QObject):
@@ -10,7 +26,8 @@ class OrcaJob(QObject):
     error_occurred = Signal(str, str)
     completed = Signal()
 
-    def __init__(self, orca_exe: Path, inp_path: Path, out_path: Path, locale: str = "C.UTF-8", disable_gpu: bool = True):
+    def __init__(self, orca_exe: Path, inp_path: Path, out_path: Path, locale: str = "C.UTF-8", disable_gpu: bool = True,
+                 scratch_dir: Path = None, scratch_patterns: list[str] = None, pin_cpus: bool = False):
         super().__init__()
         
         # Проверка на None
@@ -27,6 +44,22 @@ class OrcaJob(QObject):
         self._temp_bat = None
         self.orca_locale = locale
         self.disable_gpu = disable_gpu
+        # Быстрый локальный диск для временных файлов ORCA (None — считать в папке входа)
+        self.scratch_dir = Path(scratch_dir) if scratch_dir else None
+        self.scratch_patterns = scratch_patterns or scratch.DEFAULT_PATTERNS
+        self._workdir = None
+        self._staged = set()
+        # Привязка к свободным ядрам (число — %pal nprocs входа)
+        self.pin_cpus = pin_cpus and cpu_topology.PINNING_SUPPORTED
+        self._cpu_allocation = None
+        # Задаются сторожем очереди перед terminate(): статус задания и строка в конец .out
+        self.termination_status = None
+        self.termination_reason = None
+        self._terminating = False
+        # Хронология задания (job_trace.JobTrace), если её ведёт очередь
+        self.trace = None
+        # Куда дописать запись о запуске (job_history); None — не записывать
+        self.history_file = None
 
     def run(self):
         try:
@@ -40,6 +73,12 @@ class OrcaJob(QObject):
 
             calc_dir = str(self.inp_path.parent)
             self.out_path.parent.mkdir(parents=True, exist_ok=True)
+            # Сжатый вывод прошлого запуска иначе остался бы рядом с новым .out
+            for stale in compressed_io.compressed_variants(self.out_path):
+                stale.unlink(missing_ok=True)
+            if self.scratch_dir is not None:
+                self._workdir, self._staged = scratch.stage_job(self.inp_path, self.scratch_dir)
+                calc_dir = str(self._workdir)
 
             # === Чистое окружение (опционально) ===
             env = os.environ.copy()
@@ -53,53 +92,136 @@ class OrcaJob(QObject):
                 env['UCX_TLS'] = 'tcp'
                 env['OMPI_MCA_cuda_support'] = '0'
 
+            cpus = self._allocate_cpus() if self.pin_cpus else None
+            if cpus:
+                env.update(cpu_topology.pinning_environment(cpus))
+
             # === Запускаем ORCA напрямую (без mpiexec!) ===
             cmd = [str(self.orca_exe), inp_name]
 
             # Запускаем .bat
+            self._mark(job_trace.SPAWN)
+            # Пик занятого места (для оценки disk_guard) — по убыли свободного места тома
+            disk = disk_guard.DiskSampler(calc_dir)
+            spawned = time.monotonic()
             self._proc = subprocess.Popen(
                 cmd,
                 cwd=calc_dir,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
                 env=env,
                 close_fds=True,
                 start_new_session=True
             )
+            if cpus:
+                # Сразу после запуска: ранги MPI ORCA стартуют позже и наследуют маску
+                cpu_topology.pin_process(self._proc.pid, cpus)
+            if self._terminating:
+                # Stop пришёл, пока задание готовилось (scratch, привязка ядер): процесса ещё не было
+                self.terminate()
+            self._mark(job_trace.WAIT_OUTPUT)
 
             # === Потоковая запись вывода ===
-            with open(self.out_path, 'w', encoding='utf-8') as f_out:
+            # Байты копируются как есть: без построчного декодирования и перекодирования
+            fd = self._proc.stdout.fileno()
+            waiting = True
+            with open(self.out_path, 'wb') as f_out:
                 while True:
-                    line = self._proc.stdout.readline()
-                    if not line and self._proc.poll() is not None:
+                    chunk = os.read(fd, _COPY_CHUNK)
+                    if not chunk:
                         break
-                    if line:
-                        f_out.write(line)
-                        f_out.flush()
+                    if waiting:
+                        self._mark(job_trace.RUN)
+                        waiting = False
+                    f_out.write(chunk)
+                    f_out.flush()
+                    disk.sample()
+                if self.termination_reason:
+                    f_out.write(f"\n[OrcaUI] Job terminated: {self.termination_reason}\n".encode())
+            self._proc.stdout.close()
+            disk.sample(force=True)
+            self._mark(job_trace.CHECK)
 
-            returncode = self._proc.wait()
+            returncode, usage = self._wait_with_usage()
+            wall_s = time.monotonic() - spawned
 
-            # Анализируем результат
-            success = False
-            output = ""
-            if self.out_path.is_file():
-                with open(self.out_path, 'r', encoding='utf-8', errors='replace') as f:
-                    output = f.read()
-                success = (returncode == 0) and ("ORCA TERMINATED NORMALLY" in output)
+            # Анализируем результат: маркер завершения ищется только в хвосте файла
+            success = (returncode == 0) and terminated_normally(self.out_path)
+            self._record_history(success, returncode, wall_s, usage, disk.used_mb)
 
+            # Результаты должны оказаться рядом со входом до того, как очередь запустит следующий шаг
+            self._collect_scratch()
+            self._mark(job_trace.HANDOFF)
             self.finished.emit(inp_name, success, str(self.out_path))
 
         except Exception as e:
             err_msg = str(e)
+            try:
+                self._collect_scratch()
+            except OSError as copy_error:
+                err_msg += f"\n(copying results back from scratch failed: {copy_error})"
+            self._mark(job_trace.HANDOFF)
             self.error_occurred.emit(self.inp_path.name, err_msg)
             self._save_output(f"[FAILED]\n{err_msg}\n")
         finally:
             self._cleanup()
+            if self._workdir is not None:
+                scratch.cleanup(self._workdir)
+                self._workdir = None
+            if self._cpu_allocation is not None:
+                cpu_topology.shared_allocator().release(self._cpu_allocation)
+                self._cpu_allocation = None
             self.completed.emit()
 
+    def _allocate_cpus(self) -> list[int] | None:
+        nprocs = 1
+        try:
+            nprocs = parse_input(self.inp_path).nprocs or 1
+        except Exception as e:
+            print(f"[WARN] Cannot read nprocs from {self.inp_path.name}: {e}")
+        allocation = cpu_topology.shared_allocator().allocate(nprocs)
+        if allocation is None:
+            print(f"[WARN] No {nprocs} free cores for {self.inp_path.name}; running unpinned")
+            return None
+        self._cpu_allocation, cpus = allocation
+        return cpus
+
+    def _wait_with_usage(self):
+        """Код выхода и rusage процесса ORCA (с дочерними MPI-процессами, которых он дождался)"""
+        try:
+            _, status, usage = os.wait4(self._proc.pid, 0)
+        except ChildProcessError:
+            # Процесс уже подобран в другом месте (Popen.wait)
+            return self._proc.wait(), None
+        returncode = os.waitstatus_to_exitcode(status)
+        self._proc.returncode = returncode
+        return returncode, usage
+
+    def _record_history(self, success: bool, returncode: int, wall_s: float, usage, disk_mb: float = None):
+        if self.history_file is None:
+            return
+        if success:
+            outcome = "success"
+        else:
+            outcome = "terminated" if self.termination_reason else "failed"
+        try:
+            record = job_history.make_record(
+                self.inp_path, self.out_path, outcome, returncode, wall_s,
+                usage.ru_utime + usage.ru_stime if usage else None,
+                usage.ru_maxrss / 1024 if usage else None, disk_mb)
+            job_history.append(self.history_file, record)
+        except OSError as e:
+            print(f"[WARN] Cannot write job history: {e}")
+
+    def _mark(self, phase: str):
+        if self.trace is not None:
+            self.trace.mark(phase)
+
+    def _collect_scratch(self):
+        if self._workdir is not None and self._workdir.is_dir():
+            self._mark(job_trace.COLLECT)
+            scratch.collect_results(self._workdir, self.inp_path.parent, self.scratch_patterns, self._staged)
+
     def _save_output(self, output: str):
         self.out_path.parent.mkdir(parents=True, exist_ok=True)
         with open(self.out_path, 'w', encoding='utf-8') as f:
@@ -114,31 +236,31 @@ class OrcaJob(QObject):
                 pass
 
     def terminate(self):
-        if self._proc and self._proc.poll() is None:
-            # Убиваем всю группу процессов по PGID
-            try:
-                import os
-                os.killpg(os.getpgid(self._proc.pid), 15)  # SIGTERM
-                self._proc.wait(timeout=5)
-            except (ProcessLookupError, TimeoutError, OSError):
-                try:
-                    os.killpg(os.getpgid(self._proc.pid), 9)  # SIGKILL
-                    self._proc.wait(timeout=2)
-                except:
-                    pass
-            except Exception:
-                # fallback на обычный terminate/kill
-                self._proc.terminate()
-                try:
-                    self._proc.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    self._proc.kill()
-                    self._proc.wait()
-        self._cleanup()
-        self.completed.emit()
+        """
+        Прерывает задание, не дожидаясь процесса (вызывается из потока GUI): SIGTERM всей
+        группе процессов ORCA, через TERMINATE_GRACE секунд — SIGKILL, если она ещё жива.
+        Процесс подбирает поток задания (run), он же сообщает finished и completed.
+        """
+        self._terminating = True
+        self._signal_group(signal.SIGTERM)
+        timer = threading.Timer(TERMINATE_GRACE, self._signal_group, (signal.SIGKILL,))
+        timer.daemon = True
+        timer.start()
+
+    def _signal_group(self, sig: int):
+        proc = self._proc
+        # returncode задаётся, когда run подобрал процесс: его PGID уже может быть чужим
+        if proc is None or proc.returncode is not None:
+            return
+        try:
+            os.killpg(proc.pid, sig)  # start_new_session: PGID = PID
+        except (ProcessLookupError, PermissionError):
+            pass
 
     def start_async(self):
-        self._thread = QThread()
+        # Поток принадлежит приложению: очередь отпускает задание сразу после
+        # completed, а сам QThread удалится через deleteLater, когда действительно завершится
+        self._thread = QThread(QCoreApplication.instance())
         self.moveToThread(self._thread)
         self._thread.started.connect(self.run)
         self._thread.finished.connect(self._thread.deleteLater)
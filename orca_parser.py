@@ -1,53 +1,164 @@
 # orca_parser.py
 import re
+import os
 import json
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Callable, List, Tuple
 
+import compressed_io
+from orca_input import parse_input
+from pipeline import input_path_for
+
+try:
+    import fcntl
+except ImportError:  # не POSIX — блокировка между процессами недоступна
+    fcntl = None
+
 def write_to_parsed(label: str, value: str, out_path: Path):
     """Записывает найденное значение в parsed.txt рядом с .out"""
     parsed_file = out_path.parent / "parsed.txt"
     with open(parsed_file, 'a', encoding='utf-8') as f:
         f.write(f"{label}: {value}\n")
 
+@contextmanager
+def locked_parse_file(parse_file: Path):
+    """Блокирует parse.json: его дописывают очередь, наблюдатель проекта и CLI"""
+    lock_path = parse_file.with_name(parse_file.name + ".lock")
+    with open(lock_path, 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+# Таблица «Timings for individual modules» и TOTAL RUN TIME — в самом конце вывода
+_TIMINGS_HEADER = b"Timings for individual modules:"
+_MODULE_TIME_RE = re.compile(rb"^(\S.*?)\s+\.\.\.\s+(\d+\.\d+) sec", re.MULTILINE)
+_RUN_TIME_RE = re.compile(
+    rb"TOTAL RUN TIME:\s*(\d+) days\s+(\d+) hours\s+(\d+) minutes\s+(\d+) seconds\s+(\d+) msec")
+_SUM_OF_TIMES = "Sum of individual times"
+_TIMINGS_TAIL = 64 * 1024
+
+
+def parse_timings(out_path: Path) -> dict:
+    """
+    Время модулей ORCA (секунды) и общее время счёта из конца .out:
+    {"modules": {...}, "sum": ..., "total": ...}; пустой словарь, если таблицы нет
+    """
+    tail, _ = compressed_io.read_tail(out_path, _TIMINGS_TAIL)
+    timings = {}
+    start = tail.rfind(_TIMINGS_HEADER)
+    if start >= 0:
+        modules = {}
+        for match in _MODULE_TIME_RE.finditer(tail, start + len(_TIMINGS_HEADER)):
+            name = match.group(1).decode('utf-8', errors='replace').strip()
+            if name == _SUM_OF_TIMES:
+                timings["sum"] = float(match.group(2))
+            else:
+                modules[name] = modules.get(name, 0.0) + float(match.group(2))
+        if modules:
+            timings["modules"] = modules
+    match = _RUN_TIME_RE.search(tail)
+    if match:
+        days, hours, minutes, seconds, msec = (int(g) for g in match.groups())
+        timings["total"] = ((days * 24 + hours) * 60 + minutes) * 60 + seconds + msec / 1000
+    return timings
+
+
+def input_metadata(inp_path: Path) -> dict:
+    """nprocs, maxcore, метод и число атомов из входа"""
+    inp = parse_input(inp_path)
+    return {
+        "nprocs": inp.nprocs or 1,
+        "maxcore": inp.maxcore,
+        "method": inp.method,
+        "atoms": inp.atom_count(),
+    }
+
+
 class OrcaParser:
     def __init__(self):
         self.rules: List[Tuple[re.Pattern, str]] = []
-        # Регистрируем правила: (паттерн, метка)
+        self._combined = None
+        # Регистрируем правила: (паттерн, метка). В каждом паттерне одна группа — значение
         self.add_rule(r"FINAL SINGLE POINT ENERGY\s+(-?\d+\.\d+)", "Energy")
         self.add_rule(r"Non-thermal \(ZPE\) correction\s+(-?\d+\.\d+)", "ZPE")
+        # Термохимия (блок THERMOCHEMISTRY после частот), Хартри; берётся последний блок
+        self.add_rule(r"Temperature\s+\.\.\.\s+(\d+\.\d+) K", "Temperature")
+        self.add_rule(r"Electronic energy\s+\.\.\.\s+(-?\d+\.\d+)", "Electronic energy")
+        self.add_rule(r"Total thermal correction\s+(-?\d+\.\d+)", "Thermal correction")
+        self.add_rule(r"Total [Ee]nthalpy\s+\.\.\.\s+(-?\d+\.\d+)", "Enthalpy")
+        self.add_rule(r"Final entropy term\s+\.\.\.\s+(-?\d+\.\d+)", "Entropy term")
+        self.add_rule(r"Final Gibbs free energy\s+\.\.\.\s+(-?\d+\.\d+)", "Gibbs")
+        self.add_rule(r"G-E\(el\)\s+\.\.\.\s+(-?\d+\.\d+)", "G-E(el)")
 
     def add_rule(self, pattern: str, label: str):
         self.rules.append((re.compile(pattern), label))
+        self._combined = None
+
+    def _combined_rules(self) -> Tuple[re.Pattern, dict]:
+        """
+        Все правила одним регулярным выражением: строка проверяется один раз, а не
+        по разу на правило. Номер сработавшей группы указывает на метку.
+        """
+        if self._combined is None:
+            parts, labels, group = [], {}, 0
+            for regex, label in self.rules:
+                parts.append(f"(?:{regex.pattern})")
+                group += 1
+                labels[group] = label
+                group += regex.groups - 1
+            self._combined = (re.compile("|".join(parts)), labels)
+        return self._combined
 
-    def parse(self, out_path: Path, project_root: Path):
+    def parse(self, out_path: Path, project_root: Path, inp_path: Path = None):
+        # Вывод мог быть уже сжат (x.out → x.out.zst) — читается прозрачно
+        out_path = compressed_io.resolve(out_path)
         if not out_path.is_file():
             return
 
         # Имя вычисления = имя папки, содержащей Results/
         calculation_name = out_path.parent.parent.name
 
-        parse_file = project_root / "parse.json"
-        data = {}
-        if parse_file.is_file():
+        # Парсинг (до блокировки — чтение .out может быть долгим)
+        values = {}
+        combined, labels = self._combined_rules()
+        with compressed_io.open_text(out_path, errors='ignore') as f:
+            for line in f:
+                match = combined.search(line)
+                if match:
+                    group = match.lastindex
+                    values[labels[group]] = float(match.group(group))
+
+        # Вложенные словари: в числовые столбцы таблицы результатов они не попадают
+        timings = parse_timings(out_path)
+        if timings:
+            values["Timings"] = timings
+        inp_path = inp_path or input_path_for(out_path)
+        if inp_path is not None and inp_path.is_file():
             try:
-                with open(parse_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-            except json.JSONDecodeError:
-                pass  # Игнорируем повреждённый JSON
+                values["Input"] = input_metadata(inp_path)
+            except Exception as e:
+                print(f"[WARN] Cannot read input metadata from {inp_path.name}: {e}")
+
+        parse_file = project_root / "parse.json"
+        with locked_parse_file(parse_file):
+            data = {}
+            if parse_file.is_file():
+                try:
+                    with open(parse_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except json.JSONDecodeError:
+                    pass  # Игнорируем повреждённый JSON
 
-        if calculation_name not in data:
-            data[calculation_name] = {}
+            data.setdefault(calculation_name, {}).update(values)
 
-        # Парсинг
-        with open(out_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                for regex, label in self.rules:
-                    match = regex.search(line)
-                    if match:
-                        value = float(match.group(1))
-                        data[calculation_name][label] = value
-
-        # Сохраняем ВЕСЬ файл заново (атомарно для одного расчёта)
-        with open(parse_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
\ No newline at end of file
+            # Сохраняем ВЕСЬ файл заново через временный файл — читатели не видят половину JSON
+            tmp_file = parse_file.with_name(parse_file.name + ".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_file, parse_file)
\ No newline at end of file
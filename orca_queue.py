@@ -1,66 +1,307 @@
 # orca_queue.py
+import collections
 import datetime
+import functools
+import itertools
+import time
 from pathlib import Path
-from PySide6.QtCore import QObject, Signal
+from PySide6.QtCore import QCoreApplication, QObject, QThread, QTimer, Signal
+import compressed_io
+import disk_guard
+import job_history
+import job_trace
 import orca_job
 from orca_parser import OrcaParser
+from pipeline import GEOMETRY_PREVIOUS
+from scratch import cleanup_stale
+
+PENDING = '⏹️ Pending'
+RUNNING = '▶️ Running'
+SUCCESS = '✅ Success'
+FAILED = '❌ Failed'
+ERROR = '⚠️ Error'
+TIMED_OUT = '⏱️ Timed out'
+STALLED = '💤 Stalled'
+DISK_WAIT = '💾 Waiting for disk'
+
+# Исход задания в метриках (job_trace, Prometheus)
+_OUTCOMES = {SUCCESS: "success", FAILED: "failed", ERROR: "error", TIMED_OUT: "timed_out", STALLED: "stalled"}
+# Статусы законченных заданий (остальные ещё предстоит посчитать)
+FINISHED_STATUSES = frozenset(_OUTCOMES)
+
+# Как часто сторож проверяет время и рост .out выполняющихся заданий
+WATCHDOG_INTERVAL_MS = 10000
+# Как часто очередь, ждущая места на диске, проверяет его снова
+DISK_RECHECK_MS = 60000
+
+# Траектории ORCA рядом со входом, которые сжимаются вместе с .out (compress_outputs)
+_TRAJECTORY_SUFFIXES = ("_trj.xyz", "_MEP_trj.xyz", "_MEP_ALL_trj.xyz")
+
+# Идентификаторы заданий уникальны в пределах процесса и не меняются при удалении соседей
+_job_ids = itertools.count(1)
+
+
+# Поля, которые есть у каждого задания; остальные — дополнительные опции (add_jobs)
+JOB_BASE_KEYS = ('id', 'inp', 'out', 'display_name', 'status')
+
+
+def job_options(job: dict) -> dict:
+    """Дополнительные опции задания (например, перенос геометрии) для повторного add_jobs"""
+    return {key: value for key, value in job.items() if key not in JOB_BASE_KEYS}
+
+
+def make_display_name(inp_path: Path) -> str:
+    try:
+        parent2 = inp_path.parent.parent.name
+        if not parent2:
+            parent2 = inp_path.parent.name
+    except Exception:
+        parent2 = "root"
+    return f"{parent2} : {inp_path.name}"
+
+
+def _compress_outputs(paths: list[Path], method: str):
+    for path in paths:
+        try:
+            compressed_io.compress_file(path, method)
+        except Exception as e:
+            print(f"[WARN] Cannot compress {path.name}: {e}")
+
+
+def _apply_retention(inp_path: Path, policy: str, keep: set[Path]):
+    try:
+        freed = disk_guard.apply_retention(inp_path, policy, keep)
+    except Exception as e:
+        print(f"[WARN] Cannot clean up temporary files of {inp_path.name}: {e}")
+        return
+    if freed > 0:
+        print(f"[WARN] Freed {freed / 2 ** 20:.1f} MB of temporary files of {inp_path.name} ({policy})")
+
+
+class _PostJobWorker(QObject):
+    """Уборка и сжатие файлов закончившегося задания в фоновом потоке"""
+    completed = Signal()
+
+    def __init__(self, tasks: list):
+        super().__init__()
+        self.tasks = tasks
+
+    def run(self):
+        try:
+            for task in self.tasks:
+                task()
+        finally:
+            self.completed.emit()
+
+    def start_async(self):
+        self._thread = QThread(QCoreApplication.instance())
+        self.moveToThread(self._thread)
+        self._thread.started.connect(self.run)
+        self._thread.finished.connect(self._thread.deleteLater)
+        self.completed.connect(self._thread.quit)
+        self._thread.start()
+
 
 class OrcaQueue(QObject):
     job_started = Signal(str)
     job_finished = Signal(str, bool, str, str)  # inp_name, success, out_path, display_name
     error_occurred = Signal(str, str, str)      # inp_name, error, display_name
     queue_finished = Signal()
+    job_status_changed = Signal(int, str)       # job_id, status
+    jobs_inserted = Signal(int, int)            # first, last (индексы в очереди)
+    jobs_removed = Signal(int, int)             # first, last
+    jobs_reset = Signal()
+    job_timed_out = Signal(str, str, str)       # inp_name, причина, display_name
+    disk_low = Signal(str, str, str)            # inp_name, сообщение, display_name
+    group_finished = Signal(str)                # группа: все её задания закончились
 
     def __init__(self, orca_exe: Path, locale: str = "C.UTF-8", log_dir: Path = None, disable_gpu: bool = True):
         super().__init__()
         self.orca_exe = orca_exe
         self.orca_locale = locale
         self._jobs = []
+        self._index_by_id: dict[int, int] = {}
         self._is_running = False
         self._current_index = 0
         self._active_jobs = []
+        # Задания подряд с одной опцией 'group' считаются одновременно, не больше 'parallel'
+        # сразу; остальные — по одному. _next_index — следующее к запуску, _current_index —
+        # первое незаконченное (с него продолжит resume)
+        self._next_index = 0
+        self._running: dict[int, int] = {}  # id задания → индекс
+        self._batch_group = None
         self._log_dir = log_dir or Path(__file__).parent.parent / "logs"
         self._log_dir.mkdir(exist_ok=True)
         self._log_file = None
         self._stopped = False
         self.disable_gpu = disable_gpu
-        self._job_was_terminated = False
         self._parser = OrcaParser()
+        # Scratch: задания считаются на быстром локальном диске, если включено для задания
+        # (опция 'scratch') или по умолчанию для всех
+        self.scratch_dir = None
+        self.scratch_patterns = None
+        self.scratch_by_default = False
+        # Каждому заданию — свой набор ядер (cpu_topology)
+        self.pin_cpus = False
+        # Ограничения по умолчанию, минуты (0 — без ограничения); опции задания
+        # 'wall_time_limit' / 'stall_limit' их перекрывают
+        self.wall_time_limit = 0
+        self.stall_limit = 0
+        # id задания → (время старта, размер .out, время последнего роста)
+        self._watched: dict[int, list] = {}
+        self._watchdog = QTimer(self)
+        self._watchdog.timeout.connect(self._check_limits)
+        # Хронология заданий: Chrome trace рядом с журналом запуска, метрики Prometheus
+        # в metrics_file (текстовый файл для node_exporter) после каждого задания
+        self.trace = job_trace.QueueTrace()
+        self.metrics_file = None
+        # Ресурсы каждого запуска ORCA — для подбора %pal/%maxcore (resource_advisor)
+        self.history_file = self._log_dir / job_history.HISTORY_FILE_NAME
+        # Сжатие выводов закончившихся заданий: "" (нет), "gzip" или "zstd" (compressed_io)
+        self.compress_outputs = ""
+        # Временные файлы ORCA успешных заданий: keep / delete / archive (disk_guard)
+        self.artifact_retention = disk_guard.KEEP
+        # Уборка и сжатие идут по одному заданию в фоне; queue_finished — когда всё сделано
+        self._post_job_backlog = collections.deque()
+        self._post_job_worker = None
+        self._finish_after_post_job = False
+        # Свободное место, которое должно остаться на томе задания, МБ (0 — не проверять).
+        # Не хватает — очередь ждёт (DISK_WAIT) и проверяет снова
+        self.disk_reserve_mb = disk_guard.DEFAULT_RESERVE_MB
+        self._history = job_history.HistoryReader(self.history_file)
+        self._disk_timer = QTimer(self)
+        self._disk_timer.setSingleShot(True)
+        self._disk_timer.timeout.connect(self._run_next_job)
+        self._disk_warned: set[int] = set()
 
-    def add_job(self, inp_path: Path, out_path: Path):
-        if self._is_running:
-            raise RuntimeError("Cannot add job while queue is running")
-        try:
-            parent2 = inp_path.parent.parent.name
-            if not parent2:
-                parent2 = inp_path.parent.name
-        except Exception:
-            parent2 = "root"
-        display_name = f"{parent2} : {inp_path.name}"
-        self._jobs.append({
-            'inp': inp_path,
-            'out': out_path,
-            'display_name': display_name,
-            'status': '⏹️ Pending'
-        })
+    def add_job(self, inp_path: Path, out_path: Path, display_name: str = None) -> int:
+        return self.add_jobs([(inp_path, out_path, display_name)])[0]
+
+    def add_jobs(self, jobs: list[tuple]) -> list[int]:
+        """
+        Пакетное добавление: (inp, out[, display_name[, options]]). Один сигнал на пакет.
+        options — дополнительные поля задания, например geometry_from/geometry_mode.
+        Во время счёта задания дописываются в конец и будут запущены этой же очередью.
+        """
+        if not jobs:
+            return []
+        first = len(self._jobs)
+        ids = []
+        for job in jobs:
+            inp_path, out_path = job[0], job[1]
+            display_name = job[2] if len(job) > 2 and job[2] else make_display_name(inp_path)
+            job_id = next(_job_ids)
+            self._index_by_id[job_id] = len(self._jobs)
+            self._jobs.append({
+                'id': job_id,
+                'inp': inp_path,
+                'out': out_path,
+                'display_name': display_name,
+                'status': PENDING,
+                **(job[3] if len(job) > 3 and job[3] else {})
+            })
+            ids.append(job_id)
+        self.jobs_inserted.emit(first, len(self._jobs) - 1)
+        return ids
 
     def remove_job(self, index: int):
         if self._is_running:
             raise RuntimeError("Cannot modify queue while running")
         if 0 <= index < len(self._jobs):
             del self._jobs[index]
+            self._reindex()
+            self.jobs_removed.emit(index, index)
+
+    def remove_job_by_id(self, job_id: int):
+        index = self.job_index(job_id)
+        if index >= 0:
+            self.remove_job(index)
 
     def clear(self):
         """Очистка возможна ВСЕГДА, кроме активного выполнения"""
         if self._is_running:
             raise RuntimeError("Cannot clear while queue is running")
         self._jobs.clear()
+        self._index_by_id.clear()
         self._current_index = 0  # сброс индекса при очистке
+        self._next_index = 0
+        self.jobs_reset.emit()
 
     def is_empty(self) -> bool:
         return len(self._jobs) == 0
 
+    def is_running(self) -> bool:
+        return self._is_running
+
+    @property
+    def jobs(self) -> list[dict]:
+        """Задания очереди (только для чтения)"""
+        return self._jobs
+
+    @property
+    def current_index(self) -> int:
+        """Задание, с которого продолжит resume"""
+        return self._current_index
+
+    def job_index(self, job_id: int) -> int:
+        return self._index_by_id.get(job_id, -1)
+
+    def set_geometry_source(self, job_id: int, source, mode: str = "inject"):
+        """Геометрия задания из другого вывода перед запуском (None — отключить)"""
+        index = self.job_index(job_id)
+        if index < 0:
+            return
+        job = self._jobs[index]
+        if source:
+            job['geometry_from'] = source
+            job['geometry_mode'] = mode
+        else:
+            job.pop('geometry_from', None)
+            job.pop('geometry_mode', None)
+        # Представление перерисует строку
+        self.job_status_changed.emit(job_id, job['status'])
+
+    def set_scratch(self, job_id: int, enabled):
+        """Считать задание в scratch (True/False; None — как по умолчанию)"""
+        index = self.job_index(job_id)
+        if index < 0:
+            return
+        job = self._jobs[index]
+        if enabled is None:
+            job.pop('scratch', None)
+        else:
+            job['scratch'] = bool(enabled)
+        self.job_status_changed.emit(job_id, job['status'])
+
+    def uses_scratch(self, job: dict) -> bool:
+        return self.scratch_dir is not None and job.get('scratch', self.scratch_by_default)
+
+    def set_limits(self, job_id: int, wall_time_limit=None, stall_limit=None):
+        """Ограничения задания в минутах: None — как по умолчанию, 0 — без ограничения"""
+        index = self.job_index(job_id)
+        if index < 0:
+            return
+        job = self._jobs[index]
+        for key, value in (('wall_time_limit', wall_time_limit), ('stall_limit', stall_limit)):
+            if value is None:
+                job.pop(key, None)
+            else:
+                job[key] = value
+        self.job_status_changed.emit(job_id, job['status'])
+
+    def job_limits(self, job: dict) -> tuple[float, float]:
+        return (job.get('wall_time_limit', self.wall_time_limit),
+                job.get('stall_limit', self.stall_limit))
+
+    def _reindex(self):
+        self._index_by_id = {job['id']: i for i, job in enumerate(self._jobs)}
+
+    def _set_status(self, job: dict, status: str):
+        job['status'] = status
+        self.job_status_changed.emit(job['id'], status)
+
     def _write_log(self):
+        """Снимок всей очереди — при старте и завершении"""
         if not self._log_file:
             return
         now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -71,6 +312,14 @@ class OrcaQueue(QObject):
                 f.write(f"{marker}{job['display_name']} → {job['status']}\n")
             f.write("\n")
 
+    def _log_transition(self, job: dict):
+        """Одна строка на смену статуса: снимок на каждое событие делал журнал O(n²) по числу заданий"""
+        if not self._log_file:
+            return
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with open(self._log_file, 'a', encoding='utf-8') as f:
+            f.write(f"[{now}] {job['display_name']} → {job['status']}\n")
+
     def start(self):
         """Полный перезапуск очереди с начала"""
         if self._is_running:
@@ -81,19 +330,31 @@ class OrcaQueue(QObject):
             return
             
         self._stopped = False
-        self._current_index = 0
+        self._current_index = self._next_index = 0
+        self._running.clear()
+        self._batch_group = None
         self._is_running = True
+        self._finish_after_post_job = False
         
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         self._log_file = self._log_dir / f"{timestamp}.log"
         
         for job in self._jobs:
-            job['status'] = '⏹️ Pending'
+            self._set_status(job, PENDING)
+        self._begin_trace(0)
             
         self._write_log()
         self._active_jobs.clear()
+        self._cleanup_stale_scratch()
         self._run_next_job()
 
+    def _cleanup_stale_scratch(self):
+        if self.scratch_dir is None:
+            return
+        removed = cleanup_stale(self.scratch_dir)
+        if removed:
+            print(f"[WARN] Removed {removed} stale scratch folder(s) from {self.scratch_dir}")
+
     def resume(self):
         """Продолжение с текущего индекса (включая пересчёт прерванного)"""
         if self._is_running:
@@ -108,37 +369,124 @@ class OrcaQueue(QObject):
             return
             
         self._stopped = False
-        self._job_was_terminated = False 
+        self._next_index = self._current_index
+        self._running.clear()
+        self._batch_group = None
         self._is_running = True
+        self._finish_after_post_job = False
         
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         self._log_file = self._log_dir / f"{timestamp}_resume.log"
         
-        for i in range(self._current_index, len(self._jobs)):
-            self._jobs[i]['status'] = '⏹️ Pending'
+        for job in self._jobs[self._current_index:]:
+            # Посчитанные задания прерванной группы не повторяются
+            if not (job.get('group') and job['status'] == SUCCESS):
+                self._set_status(job, PENDING)
+        self._begin_trace(self._current_index)
             
         self._write_log()
         self._active_jobs.clear()
+        self._cleanup_stale_scratch()
         self._run_next_job()
 
+    def _begin_trace(self, first: int):
+        self.trace.reset()
+        for job in self._jobs[first:]:
+            self.trace.job(job['id'], job['display_name']).mark(job_trace.QUEUED)
+
+    def _end_trace(self, job: dict):
+        self.trace.finish(job['id'], _OUTCOMES.get(job['status'], "unknown"))
+        if self.metrics_file:
+            try:
+                self.trace.write_prometheus(self.metrics_file)
+            except OSError as e:
+                print(f"[WARN] Cannot write metrics to {self.metrics_file}: {e}")
+
+    def _mark(self, job: dict, phase: str):
+        trace = self.trace.get(job['id'])
+        if trace is not None:
+            trace.mark(phase)
+
     def _run_next_job(self):
-        if self._stopped or self._current_index >= len(self._jobs):
+        """Запускает следующее задание или, в группе, столько, сколько она позволяет"""
+        while not self._stopped:
+            if not self._running and self._batch_group is not None and not self._continues_batch():
+                group, self._batch_group = self._batch_group, None
+                # Обработчик может дописать задания (например, воронка конформеров)
+                self.group_finished.emit(group)
+                continue
+            if self._next_index >= len(self._jobs):
+                break
+            job_info = self._jobs[self._next_index]
+            if self._running and not self._joins_batch(job_info):
+                break
+            if job_info.get('group') and job_info['status'] == SUCCESS:
+                # resume: задание группы уже посчитано
+                self._batch_group = job_info['group']
+                self._next_index += 1
+                continue
+            shortage = self._disk_shortage(job_info)
+            if shortage:
+                if not self._running:
+                    self._wait_for_disk(job_info, shortage)
+                    self._current_index = self._next_index
+                # При работающих заданиях место проверится снова, когда одно из них закончится
+                return
+            index = self._next_index
+            self._next_index += 1
+            self._batch_group = job_info.get('group')
+            if self._launch(index, job_info) and self._batch_group is None:
+                break
+        if not self._stopped:
+            self._current_index = min(self._running.values(), default=self._next_index)
+        if not self._running:
             self._finalize_queue()
-            return
 
-        job_info = self._jobs[self._current_index]
-        job_info['status'] = '▶️ Running'
-        self._write_log()
+    def _continues_batch(self) -> bool:
+        return (self._next_index < len(self._jobs)
+                and self._jobs[self._next_index].get('group') == self._batch_group)
+
+    def _joins_batch(self, job_info: dict) -> bool:
+        """Можно ли запустить задание рядом с выполняющимися"""
+        group = job_info.get('group')
+        return (group is not None and group == self._batch_group
+                and len(self._running) < max(1, int(job_info.get('parallel', 1))))
+
+    def _launch(self, index: int, job_info: dict) -> bool:
+        self._mark(job_info, job_trace.PREPARE)
+        self._set_status(job_info, RUNNING)
+        self._log_transition(job_info)
+
+        if job_info.get('geometry_from'):
+            try:
+                self._apply_geometry(index, job_info)
+            except Exception as e:
+                self._mark(job_info, job_trace.FINISH)
+                self._set_status(job_info, ERROR)
+                self._log_transition(job_info)
+                self._mark(job_info, job_trace.NOTIFY)
+                self.error_occurred.emit(job_info['inp'].name, f"Geometry hand-off failed: {e}",
+                                         job_info['display_name'])
+                self._end_trace(job_info)
+                return False
 
         job = orca_job.OrcaJob(
             self.orca_exe,
             job_info['inp'],
             job_info['out'],
             locale=self.orca_locale,
-            disable_gpu=self.disable_gpu
+            disable_gpu=self.disable_gpu,
+            scratch_dir=self.scratch_dir if self.uses_scratch(job_info) else None,
+            scratch_patterns=self.scratch_patterns,
+            pin_cpus=self.pin_cpus
         )
+        job.job_id = job_info['id']
+        job.trace = self.trace.get(job_info['id'])
+        job.history_file = self.history_file
 
         self._active_jobs.append(job)
+        self._running[job_info['id']] = index
+        self._watch(job_info)
 
         job.started.connect(self.job_started)
         job.finished.connect(self._on_job_finished)
@@ -146,69 +494,237 @@ class OrcaQueue(QObject):
         job.completed.connect(lambda: self._cleanup_job(job))
 
         job.start_async()
+        return True
+
+    # === Сторож: время счёта и зависания ===
+    def _watch(self, job_info: dict):
+        now = time.monotonic()
+        self._watched[job_info['id']] = [now, self._out_size(job_info['out']), now]
+        if not self._watchdog.isActive():
+            self._watchdog.start(WATCHDOG_INTERVAL_MS)
+
+    @staticmethod
+    def _out_size(out_path: Path) -> int:
+        try:
+            return out_path.stat().st_size
+        except OSError:
+            return 0
+
+    def _check_limits(self):
+        now = time.monotonic()
+        for job in list(self._active_jobs):
+            index = self.job_index(getattr(job, 'job_id', -1))
+            watched = self._watched.get(getattr(job, 'job_id', -1))
+            if index < 0 or watched is None or job.termination_status:
+                continue
+            job_info = self._jobs[index]
+            self._check_disk(job, job_info)
+            started, size, grown = watched
+            new_size = self._out_size(job_info['out'])
+            if new_size != size:
+                watched[1], watched[2] = new_size, now
+            wall_time_limit, stall_limit = self.job_limits(job_info)
+            if wall_time_limit and now - started > wall_time_limit * 60:
+                self._kill_job(job, TIMED_OUT, f"wall-time limit of {wall_time_limit:g} min exceeded")
+            elif stall_limit and now - watched[2] > stall_limit * 60:
+                self._kill_job(job, STALLED, f"no output for {stall_limit:g} min")
+
+    def _kill_job(self, job, status: str, reason: str):
+        """Останавливает зависшее задание; очередь переходит к следующему (не как при Stop)"""
+        print(f"[WARN] Terminating {job.inp_path.name}: {reason}")
+        job.termination_status = status
+        job.termination_reason = reason
+        job.terminate()
+
+    def _apply_geometry(self, index: int, job_info: dict):
+        """Подставляет последнюю геометрию предыдущего шага во вход перед запуском"""
+        from geometry import apply_geometry
+        source = job_info['geometry_from']
+        if source == GEOMETRY_PREVIOUS:
+            if index == 0:
+                raise ValueError("first job has no previous step")
+            source = self._jobs[index - 1]['out']
+        apply_geometry(job_info['inp'], Path(source), job_info.get('geometry_mode', "inject"))
+
+    def _advance(self, job: dict = None):
+        """Задание закончилось: запуск следующих (прерванное Stop остаётся текущим для resume)"""
+        if job is not None:
+            self._running.pop(job['id'], None)
+        if self._stopped:
+            if not self._running:
+                self._finalize_queue()
+            return
+        self._run_next_job()
 
     def _finalize_queue(self):
         """Централизованный сброс состояния при завершении"""
+        self._watchdog.stop()
+        self._watched.clear()
+        self._disk_warned.clear()
+        self._batch_group = None
         self._is_running = False
+        self._write_log()
+        if self._log_file:
+            try:
+                self.trace.write_chrome(self._log_file.with_suffix(".trace.json"))
+            except OSError as e:
+                print(f"[WARN] Cannot write job trace: {e}")
         self._log_file = None
+        if self._post_job_worker is not None or self._post_job_backlog:
+            self._finish_after_post_job = True
+            return
         self.queue_finished.emit()
 
+    # === Место на диске ===
+    def _disk_shortage(self, job_info: dict) -> str | None:
+        if not self.disk_reserve_mb:
+            return None
+        if self._history.history_file != self.history_file:
+            self._history = job_history.HistoryReader(self.history_file)
+        need_mb, _ = disk_guard.estimate_need_mb(job_info['inp'], self._history.records())
+        return disk_guard.check_space(self._work_dir(job_info), need_mb, self.disk_reserve_mb)
+
+    def _work_dir(self, job_info: dict) -> Path:
+        return self.scratch_dir if self.uses_scratch(job_info) else job_info['inp'].parent
+
+    def _wait_for_disk(self, job_info: dict, message: str):
+        """Задание не запускается, пока не освободится место; Stop прекращает ожидание"""
+        if job_info['status'] != DISK_WAIT:
+            self._set_status(job_info, DISK_WAIT)
+            self._log_transition(job_info)
+            print(f"[WARN] Waiting for disk space before {job_info['display_name']}: {message}")
+            self.disk_low.emit(job_info['inp'].name, message, job_info['display_name'])
+        self._disk_timer.start(DISK_RECHECK_MS)
+
+    def _check_disk(self, job, job_info: dict):
+        """Во время счёта: предупреждение (одно на задание), если на томе задания остаётся меньше резерва"""
+        if not self.disk_reserve_mb or job_info['id'] in self._disk_warned:
+            return
+        try:
+            free = disk_guard.free_mb(self._work_dir(job_info))
+        except OSError:
+            return
+        if free < self.disk_reserve_mb:
+            self._disk_warned.add(job_info['id'])
+            message = f"only {free:.0f} MB left in {self._work_dir(job_info)}"
+            print(f"[WARN] {job_info['display_name']}: {message}")
+            self.disk_low.emit(job.inp_path.name, message, job_info['display_name'])
+
+    # === После задания: уборка временных файлов и сжатие ===
+    def _queue_post_job(self, job: dict):
+        """Задачи для файлов задания (запускаются в фоне после перехода к следующему)"""
+        tasks = []
+        if self.artifact_retention != disk_guard.KEEP and job['status'] == SUCCESS:
+            # Файлы, которые прочитают следующие задания (%moinp и т.п.), остаются
+            index = self.job_index(job['id'])
+            keep = disk_guard.referenced_files([later['inp'] for later in self._jobs[index + 1:]])
+            tasks.append(functools.partial(_apply_retention, job['inp'], self.artifact_retention, keep))
+        if self.compress_outputs:
+            stem = job['inp'].stem
+            candidates = [job['out']] + [job['inp'].parent / f"{stem}{suffix}" for suffix in _TRAJECTORY_SUFFIXES]
+            paths = [path for path in candidates if path.is_file()]
+            if paths:
+                tasks.append(functools.partial(_compress_outputs, paths, self.compress_outputs))
+        if tasks:
+            self._post_job_backlog.append(tasks)
+
+    def _start_post_job(self):
+        if self._post_job_worker is not None or not self._post_job_backlog:
+            return
+        worker = _PostJobWorker(self._post_job_backlog.popleft())
+        worker.completed.connect(self._on_post_job_done)
+        self._post_job_worker = worker
+        worker.start_async()
+
+    def _on_post_job_done(self):
+        self._post_job_worker = None
+        if self._post_job_backlog:
+            self._start_post_job()
+        elif self._finish_after_post_job:
+            self._finish_after_post_job = False
+            self.queue_finished.emit()
+
     def _cleanup_job(self, job):
         if job in self._active_jobs:
             self._active_jobs.remove(job)
 
+    def _sender_job(self) -> dict | None:
+        """Задание, к которому относится сигнал OrcaJob (по id, а не по имени)"""
+        sender = self.sender()
+        index = self.job_index(getattr(sender, 'job_id', -1))
+        if index < 0:
+            index = self._current_index
+        if 0 <= index < len(self._jobs):
+            return self._jobs[index]
+        return None
+
     def _on_job_finished(self, inp_name: str, success: bool, out_path: str):
+        job = None
         try:
-            if 0 <= self._current_index < len(self._jobs):
-                status = '✅ Success' if success else '❌ Failed'
-                job = self._jobs[self._current_index]
-                job['status'] = status
+            job = self._sender_job()
+            if job is not None:
+                self._mark(job, job_trace.FINISH)
+                self._watched.pop(job['id'], None)
+                termination_status = getattr(self.sender(), 'termination_status', None)
+                if termination_status and not success:
+                    self._set_status(job, termination_status)
+                    self._log_transition(job)
+                    self._mark(job, job_trace.NOTIFY)
+                    self.job_timed_out.emit(inp_name, self.sender().termination_reason, job['display_name'])
+                    return
+                self._set_status(job, SUCCESS if success else FAILED)
                 display_name = job['display_name']
-                self._write_log()
+                self._log_transition(job)
                 if success:
                     out_path_obj = Path(out_path)
                     project_root = out_path_obj.parent.parent.parent
-                    self._parser.parse(out_path_obj, project_root)
+                    self._mark(job, job_trace.PARSE)
+                    self._parser.parse(out_path_obj, project_root, job['inp'])
+                self._mark(job, job_trace.NOTIFY)
                 self.job_finished.emit(inp_name, success, out_path, display_name)
         finally:
-            # ← Условное увеличение индекса
-            if not self._job_was_terminated:
-                self._current_index += 1
-            else:
-                self._job_was_terminated = False  # сброс флага
-
-            if self._current_index >= len(self._jobs) or self._stopped:
-                self._finalize_queue()
-            else:
-                self._run_next_job()
+            if job is not None:
+                self._end_trace(job)
+                self._queue_post_job(job)
+            # Фоновые задачи стартуют после перехода: следующий шаг успевает взять геометрию из .out
+            self._advance(job)
+            self._start_post_job()
 
     def _on_job_error(self, inp_name: str, error: str):
+        job = None
         try:
-            if 0 <= self._current_index < len(self._jobs):
-                job = self._jobs[self._current_index]
-                job['status'] = '⚠️ Error'
+            job = self._sender_job()
+            if job is not None:
+                self._mark(job, job_trace.FINISH)
+                self._watched.pop(job['id'], None)
+                self._set_status(job, ERROR)
                 display_name = job['display_name']
-                self._write_log()
+                self._log_transition(job)
+                self._mark(job, job_trace.NOTIFY)
                 self.error_occurred.emit(inp_name, error, display_name)
         finally:
-            if not self._job_was_terminated:
-                self._current_index += 1
-            else:
-                self._job_was_terminated = False
-
-            if self._current_index >= len(self._jobs) or self._stopped:
-                self._finalize_queue()
-            else:
-                self._run_next_job()
+            if job is not None:
+                self._end_trace(job)
+            self._advance(job)
 
     def terminate_current_job(self):
+        """Stop: выполняющиеся задания прерываются, resume начнёт с первого незаконченного"""
         if not self._is_running:
             return
         self._stopped = True
-        self._job_was_terminated = True  
+        self._current_index = min(self._running.values(), default=self._next_index)
         if self._active_jobs:
-            job = self._active_jobs[0]
-            job.terminate()
+            # terminate() только посылает сигнал группе процессов: параллельная группа получает
+            # SIGTERM сразу целиком, процессы подбирают потоки заданий, не поток GUI
+            for job in list(self._active_jobs):
+                job.terminate()
+        elif self._disk_timer.isActive():
+            # Ждали места на диске: задание не запускалось, resume начнёт с него
+            self._disk_timer.stop()
+            job_info = self._jobs[self._current_index]
+            self._set_status(job_info, PENDING)
+            self._log_transition(job_info)
+            self._finalize_queue()
 
     def get_display_name(self, index: int) -> str:
         if 0 <= index < len(self._jobs):
@@ -219,8 +735,16 @@ class OrcaQueue(QObject):
         if 0 <= index < len(self._jobs):
             job = self._jobs[index]
             return {
+                'id': job['id'],
                 'inp': job['inp'],
                 'out': job['out'],
-                'display_name': job['display_name']
+                'display_name': job['display_name'],
+                'geometry_from': job.get('geometry_from'),
+                'geometry_mode': job.get('geometry_mode'),
+                'scratch': job.get('scratch'),
+                'wall_time_limit': job.get('wall_time_limit'),
+                'stall_limit': job.get('stall_limit'),
+                'group': job.get('group'),
+                'parallel': job.get('parallel')
             }
         return None
\ No newline at end of file
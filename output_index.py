@@ -0,0 +1,217 @@
+# output_index.py
+import re
+import json
+import mmap
+import os
+from pathlib import Path
+from PySide6.QtCore import QCoreApplication, QObject, QThread, Signal
+
+import compressed_io
+
+# Версия формата кэша: при изменении правил старые индексы пересоздаются
+INDEX_VERSION = 1
+
+# (тип раздела, паттерн). Один общий regex по mmap — намного быстрее построчного цикла
+SECTION_PATTERNS = [
+    ("geom_cycle", rb"GEOMETRY OPTIMIZATION CYCLE\s+(\d+)"),
+    ("scf", rb"^[ \t]*SCF ITERATIONS[ \t]*\r?$"),
+    ("energy", rb"FINAL SINGLE POINT ENERGY\s+(-?\d+\.\d+)"),
+    ("final_eval", rb"FINAL ENERGY EVALUATION AT THE STATIONARY POINT"),
+    ("orbitals", rb"^[ \t]*ORBITAL ENERGIES[ \t]*\r?$"),
+    ("frequencies", rb"^[ \t]*VIBRATIONAL FREQUENCIES[ \t]*\r?$"),
+    ("thermo", rb"THERMOCHEMISTRY AT\s+([\d.]+)\s*K"),
+]
+
+SECTION_TITLES = {
+    "geom_cycle": "Geometry cycle {0}",
+    "scf": "SCF iterations",
+    "energy": "Final energy {0}",
+    "final_eval": "Final evaluation at stationary point",
+    "orbitals": "Orbital energies",
+    "frequencies": "Vibrational frequencies",
+    "thermo": "Thermochemistry at {0} K",
+}
+
+_SECTION_RE = re.compile(
+    b"|".join(b"(?P<%s>%s)" % (kind.encode(), pattern) for kind, pattern in SECTION_PATTERNS),
+    re.MULTILINE,
+)
+
+# Размер «отпечатка» начала файла: позволяет заметить, что файл перезаписан, а не дописан
+_HEAD_SIZE = 4096
+# Сжатый вывод сканируется по распакованным блокам такого размера
+_STREAM_CHUNK = 4 * 1024 * 1024
+
+
+def index_path_for(out_path: Path) -> Path:
+    """Путь к кэшу индекса: скрытый файл рядом с .out"""
+    return out_path.parent / f".{out_path.name}.idx"
+
+
+def _head_signature(path: Path, size: int = _HEAD_SIZE) -> str:
+    with compressed_io.open_binary(path) as f:
+        return f.read(size).hex()
+
+
+def _match_entry(match: re.Match) -> tuple[str, str]:
+    kind = match.lastgroup
+    # Группа захвата внутри именованной идёт сразу за ней; у альтернатив без
+    # захвата следующая группа принадлежит другому разделу и равна None
+    group_index = _SECTION_RE.groupindex[kind]
+    value = ""
+    if group_index < _SECTION_RE.groups:
+        captured = match.group(group_index + 1)
+        if captured is not None:
+            value = captured.decode('ascii', errors='replace')
+    return kind, SECTION_TITLES[kind].format(value).strip()
+
+
+def load_cached_index(out_path: Path) -> dict | None:
+    """Читает кэш индекса, если он относится к этому файлу"""
+    cache_path = index_path_for(out_path)
+    if not cache_path.is_file():
+        return None
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if cached.get("version") != INDEX_VERSION:
+        return None
+    return cached
+
+
+def build_index(out_path: Path) -> list[dict]:
+    """
+    Возвращает список разделов .out: {kind, title, offset, line}.
+    offset — байтовое смещение начала строки, line — номер строки (с нуля).
+    Если файл только дописывался, сканируется лишь новый хвост. Сжатый файл
+    (compressed_io) уже не меняется и сканируется целиком, смещения — в распакованном тексте.
+    """
+    out_path = Path(out_path)
+    stat = out_path.stat()
+    head = _head_signature(out_path)
+    if compressed_io.compression_of(out_path):
+        cached = load_cached_index(out_path)
+        if cached and cached.get("size") == stat.st_size and cached.get("mtime_ns") == stat.st_mtime_ns:
+            return cached["entries"]
+        entries, scanned, lines = _scan_stream(out_path)
+        _save_index(out_path, {
+            "version": INDEX_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "head": head,
+            "scanned": scanned,
+            "lines": lines,
+            "entries": entries,
+        })
+        return entries
+
+    entries: list[dict] = []
+    start = 0
+    lines = 0
+
+    cached = load_cached_index(out_path)
+    # Сравниваем начало файла той же длины, что была при прошлой индексации
+    cached_head = cached.get("head", "") if cached else ""
+    if cached and head[:len(cached_head)] == cached_head:
+        if cached.get("size") == stat.st_size and cached.get("mtime_ns") == stat.st_mtime_ns:
+            return cached["entries"]
+        if cached.get("scanned", 0) <= stat.st_size:
+            entries = cached["entries"]
+            start = cached["scanned"]
+            lines = cached["lines"]
+
+    scanned = start
+    if stat.st_size > start:
+        with open(out_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Сканируем только завершённые строки — хвост растущего файла дочитаем позже
+            end = mm.rfind(b"\n", start) + 1
+            if end > start:
+                pos = start
+                for match in _SECTION_RE.finditer(mm, start, end):
+                    line_start = mm.rfind(b"\n", 0, match.start()) + 1
+                    lines += mm[pos:line_start].count(b"\n")
+                    pos = line_start
+                    kind, title = _match_entry(match)
+                    entries.append({"kind": kind, "title": title, "offset": line_start, "line": lines})
+                lines += mm[pos:end].count(b"\n")
+                scanned = end
+
+    _save_index(out_path, {
+        "version": INDEX_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "head": head,
+        "scanned": scanned,
+        "lines": lines,
+        "entries": entries,
+    })
+    return entries
+
+
+def _scan_stream(out_path: Path) -> tuple[list[dict], int, int]:
+    """Разделы сжатого вывода: поиск по распакованным блокам, каждый обрезан по концу строки"""
+    entries: list[dict] = []
+    offset = lines = 0  # смещение и номер строки начала buffer
+    buffer = b""
+    with compressed_io.open_binary(out_path) as f:
+        while True:
+            chunk = f.read(_STREAM_CHUNK)
+            buffer += chunk
+            end = len(buffer) if not chunk else buffer.rfind(b"\n") + 1
+            if end > 0:
+                pos = 0
+                for match in _SECTION_RE.finditer(buffer, 0, end):
+                    line_start = buffer.rfind(b"\n", 0, match.start()) + 1
+                    lines += buffer.count(b"\n", pos, line_start)
+                    pos = line_start
+                    kind, title = _match_entry(match)
+                    entries.append({"kind": kind, "title": title, "offset": offset + line_start, "line": lines})
+                lines += buffer.count(b"\n", pos, end)
+                offset += end
+                buffer = buffer[end:]
+            if not chunk:
+                return entries, offset, lines
+
+
+def _save_index(out_path: Path, data: dict):
+    cache_path = index_path_for(out_path)
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Папка только для чтения — индекс просто не кэшируется
+        pass
+
+
+class OutputIndexer(QObject):
+    """Строит индекс разделов .out в фоновом потоке"""
+    finished = Signal(str, list)     # out_path, entries
+    error_occurred = Signal(str, str)
+    completed = Signal()
+
+    def __init__(self, out_path: Path):
+        super().__init__()
+        self.out_path = Path(out_path)
+
+    def run(self):
+        try:
+            entries = build_index(self.out_path)
+            self.finished.emit(str(self.out_path), entries)
+        except Exception as e:
+            self.error_occurred.emit(str(self.out_path), str(e))
+        finally:
+            self.completed.emit()
+
+    def start_async(self):
+        # Поток принадлежит приложению: владелец может отпустить воркера сразу после
+        # completed, а сам QThread удалится через deleteLater, когда действительно завершится
+        self._thread = QThread(QCoreApplication.instance())
+        self.moveToThread(self._thread)
+        self._thread.started.connect(self.run)
+        self._thread.finished.connect(self._thread.deleteLater)
+        self.completed.connect(self._thread.quit)
+        self._thread.start()
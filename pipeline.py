@@ -0,0 +1,103 @@
+# pipeline.py
+import json
+from pathlib import Path
+
+from compressed_io import logical_path
+
+# "geometry_from": "previous" — геометрия берётся из .out предыдущего шага
+GEOMETRY_PREVIOUS = "previous"
+# Ограничения сторожа очереди, минуты (0 — без ограничения)
+JOB_LIMIT_KEYS = ("wall_time_limit", "stall_limit")
+# Задания подряд с одной группой считаются одновременно, не больше "parallel" сразу
+PARALLEL_GROUP_KEY = "group"
+
+
+def out_path_for(inp_path: Path) -> Path:
+    """calc/<папка входов>/x.inp → calc/Results/x.out"""
+    out_path = Path(inp_path).parent / ".." / "Results" / (Path(inp_path).stem + ".out")
+    return out_path.resolve()
+
+
+def input_path_for(out_path: Path) -> Path | None:
+    """Обратное out_path_for: calc/Results/x.out (или x.out.zst) → calc/<папка входов>/x.inp, если вход есть"""
+    out_path = logical_path(out_path)
+    calc_dir = out_path.parent.parent
+    preferred = calc_dir / "Inputs" / f"{out_path.stem}.inp"
+    if preferred.is_file():
+        return preferred
+    for candidate in sorted(calc_dir.glob(f"*/{out_path.stem}.inp")):
+        if candidate.parent != out_path.parent:
+            return candidate
+    return None
+
+
+def job_options(entry: dict, base_dir: Path = None) -> dict:
+    """Дополнительные поля задания из записи pipeline/state"""
+    options = {}
+    source = entry.get("geometry_from")
+    if source:
+        if source != GEOMETRY_PREVIOUS:
+            source = Path(source)
+            if base_dir is not None and not source.is_absolute():
+                source = base_dir / source
+        options["geometry_from"] = source
+        options["geometry_mode"] = entry.get("geometry_mode", "inject")
+    if entry.get("scratch") is not None:
+        options["scratch"] = bool(entry["scratch"])
+    for key in JOB_LIMIT_KEYS:
+        if entry.get(key) is not None:
+            options[key] = float(entry[key])
+    if entry.get(PARALLEL_GROUP_KEY):
+        options[PARALLEL_GROUP_KEY] = str(entry[PARALLEL_GROUP_KEY])
+        options["parallel"] = int(entry.get("parallel", 1))
+    return options
+
+
+def jobs_from_entries(entries: list, base_dir: Path = None) -> list[tuple]:
+    """Записи [{inp, display_name, ...}] → задания (inp, out, display_name, options) для add_jobs"""
+    if not isinstance(entries, list):
+        raise ValueError("Invalid pipeline format")
+    jobs = []
+    for item in entries:
+        inp_path = Path(item.get("inp", ""))
+        if base_dir is not None and not inp_path.is_absolute():
+            inp_path = base_dir / inp_path
+        if not inp_path.is_file():
+            continue
+        jobs.append((inp_path, out_path_for(inp_path),
+                     item.get("display_name", inp_path.name), job_options(item, base_dir)))
+    return jobs
+
+
+def entries_from_jobs(jobs: list[dict]) -> list[dict]:
+    entries = []
+    for job in jobs:
+        entry = {
+            "inp": str(job['inp']),
+            "display_name": job['display_name']
+        }
+        if job.get('geometry_from'):
+            entry["geometry_from"] = str(job['geometry_from'])
+            entry["geometry_mode"] = job.get('geometry_mode', "inject")
+        if job.get('scratch') is not None:
+            entry["scratch"] = job['scratch']
+        for key in JOB_LIMIT_KEYS:
+            if job.get(key) is not None:
+                entry[key] = job[key]
+        if job.get(PARALLEL_GROUP_KEY):
+            entry[PARALLEL_GROUP_KEY] = job[PARALLEL_GROUP_KEY]
+            entry["parallel"] = job.get('parallel', 1)
+        entries.append(entry)
+    return entries
+
+
+def load_pipeline(json_path: Path) -> list[tuple]:
+    json_path = Path(json_path)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    return jobs_from_entries(entries, json_path.parent)
+
+
+def save_pipeline(json_path: Path, jobs: list[dict]):
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(entries_from_jobs(jobs), f, indent=2, ensure_ascii=False)
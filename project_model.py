@@ -0,0 +1,297 @@
+# project_model.py
+import os
+import re
+import fnmatch
+from pathlib import Path
+from PySide6.QtCore import Qt, QAbstractItemModel, QModelIndex
+from PySide6.QtGui import QFont
+from PySide6.QtWidgets import QFileIconProvider
+
+RESULTS_DIR_NAME = "Results"
+
+
+class _Node:
+    __slots__ = ("path", "name", "is_dir", "parent", "children", "mtime_ns", "is_calc", "row")
+
+    def __init__(self, path: str, name: str, is_dir: bool, parent: "_Node | None"):
+        self.path = path
+        self.name = name
+        self.is_dir = is_dir
+        self.parent = parent
+        self.children: list[_Node] | None = None  # None — каталог ещё не прочитан
+        self.mtime_ns = None
+        self.is_calc = None  # вычисляется лениво при первом отображении
+        self.row = 0  # позиция в parent.children, поддерживается моделью
+
+
+def _renumber(children: list[_Node]):
+    for row, child in enumerate(children):
+        child.row = row
+
+
+class ProjectTreeModel(QAbstractItemModel):
+    """
+    Дерево проекта без наблюдения за всей ФС: каталоги читаются через os.scandir
+    только при раскрытии, листинги кэшируются по mtime каталога, а refresh()
+    перечитывает лишь те каталоги, которые действительно изменились.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._root: _Node | None = None
+        self._filter_re = None
+        self._sort_order = Qt.AscendingOrder
+        icons = QFileIconProvider()
+        self._dir_icon = icons.icon(QFileIconProvider.Folder)
+        self._file_icon = icons.icon(QFileIconProvider.File)
+        self._calc_font = QFont()
+        self._calc_font.setBold(True)
+
+    # === Настройка ===
+    def setNameFilters(self, filters: list[str]):
+        """Файлы показываются только по маскам; каталоги — всегда"""
+        if filters:
+            self._filter_re = re.compile("|".join(fnmatch.translate(f) for f in filters))
+        else:
+            self._filter_re = None
+        if self._root is not None:
+            self.setRootPath(self._root.path)
+
+    def setRootPath(self, path: str):
+        self.beginResetModel()
+        path = str(path)
+        self._root = _Node(path, Path(path).name, True, None) if path else None
+        self.endResetModel()
+
+    def rootPath(self) -> str:
+        return self._root.path if self._root else ""
+
+    # === Чтение каталогов ===
+    def _scan(self, node: _Node) -> list[_Node]:
+        try:
+            node.mtime_ns = os.stat(node.path).st_mtime_ns
+            with os.scandir(node.path) as it:
+                entries = []
+                for entry in it:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    if not is_dir and self._filter_re and not self._filter_re.match(entry.name):
+                        continue
+                    entries.append(_Node(entry.path, entry.name, is_dir, node))
+        except OSError:
+            return []
+        entries.sort(key=self._sort_key, reverse=self._sort_order == Qt.DescendingOrder)
+        _renumber(entries)
+        return entries
+
+    @staticmethod
+    def _sort_key(node: _Node):
+        # Каталоги всегда выше файлов, как в QFileSystemModel
+        return (not node.is_dir, node.name.lower())
+
+    def _node(self, index: QModelIndex) -> _Node | None:
+        if index.isValid():
+            return index.internalPointer()
+        return self._root
+
+    def _index_of(self, node: _Node) -> QModelIndex:
+        if node is None or node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def _is_calc(self, node: _Node) -> bool:
+        """Папка расчёта — та, в которой есть подпапка Results"""
+        if node.is_calc is None:
+            node.is_calc = node.is_dir and os.path.isdir(os.path.join(node.path, RESULTS_DIR_NAME))
+        return node.is_calc
+
+    # === QAbstractItemModel ===
+    def index(self, row: int, column: int = 0, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        node = self._node(parent)
+        if node is None or node.children is None or not (0 <= row < len(node.children)) or column != 0:
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer()
+        return self._index_of(node.parent)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        node = self._node(parent)
+        if node is None or node.children is None:
+            return 0
+        return len(node.children)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 1
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        node = self._node(parent)
+        if node is None or not node.is_dir:
+            return False
+        return node.children is None or len(node.children) > 0
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        node = self._node(parent)
+        return node is not None and node.is_dir and node.children is None
+
+    def fetchMore(self, parent: QModelIndex):
+        node = self._node(parent)
+        if node is None or node.children is not None:
+            return
+        children = self._scan(node)
+        if not children:
+            node.children = []
+            return
+        self.beginInsertRows(parent, 0, len(children) - 1)
+        node.children = children
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            return node.name
+        if role == Qt.DecorationRole:
+            return self._dir_icon if node.is_dir else self._file_icon
+        if role == Qt.ToolTipRole:
+            return node.path
+        if role == Qt.FontRole and node.is_dir and self._is_calc(node):
+            return self._calc_font
+        return None
+
+    def flags(self, index: QModelIndex):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder):
+        if self._root is None or order == self._sort_order:
+            self._sort_order = order
+            return
+        self._sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        old = self.persistentIndexList()
+        nodes = [i.internalPointer() for i in old]
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.children:
+                node.children.sort(key=self._sort_key, reverse=order == Qt.DescendingOrder)
+                _renumber(node.children)
+                stack.extend(c for c in node.children if c.is_dir)
+        self.changePersistentIndexList(old, [self._index_of(n) for n in nodes])
+        self.layoutChanged.emit()
+
+    # === Совместимость с QFileSystemModel ===
+    def filePath(self, index: QModelIndex) -> str:
+        node = self._node(index)
+        return node.path if node else ""
+
+    def path_index(self, path) -> QModelIndex:
+        """Индекс по пути; недостающие каталоги по дороге читаются"""
+        if self._root is None:
+            return QModelIndex()
+        try:
+            rel = Path(path).relative_to(self._root.path)
+        except ValueError:
+            return QModelIndex()
+        node = self._root
+        index = QModelIndex()
+        for part in rel.parts:
+            if node.children is None:
+                self.fetchMore(index)
+            match = next((c for c in node.children or [] if c.name == part), None)
+            if match is None:
+                return QModelIndex()
+            node = match
+            index = self._index_of(node)
+        return index
+
+    # === Обновление ===
+    def _find_loaded(self, path) -> _Node | None:
+        if self._root is None:
+            return None
+        try:
+            rel = Path(path).relative_to(self._root.path)
+        except ValueError:
+            return None
+        node = self._root
+        for part in rel.parts:
+            if node.children is None:
+                return None
+            node = next((c for c in node.children if c.name == part), None)
+            if node is None:
+                return None
+        return node
+
+    def refresh(self, path):
+        """Перечитывает каталог, только если его mtime изменился"""
+        node = self._find_loaded(path)
+        if node is None or not node.is_dir or node.children is None:
+            return
+        try:
+            mtime_ns = os.stat(node.path).st_mtime_ns
+        except OSError:
+            # Каталог исчез — обновляем родителя
+            if node.parent is not None:
+                node.parent.mtime_ns = None
+                self.refresh(node.parent.path)
+            return
+        if mtime_ns == node.mtime_ns:
+            return
+        self._merge(node, self._scan(node))
+
+    def refresh_loaded(self):
+        """Проверяет все уже прочитанные каталоги (один stat на каталог)"""
+        if self._root is None:
+            return
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.children is None:
+                continue
+            self.refresh(node.path)
+            stack.extend(c for c in node.children if c.is_dir)
+
+    def _merge(self, node: _Node, fresh: list[_Node]):
+        """Применяет новый листинг, сохраняя уже раскрытые поддеревья"""
+        parent_index = self._index_of(node)
+        fresh_names = {(c.name, c.is_dir) for c in fresh}
+        # Удаляем исчезнувшие (с конца, чтобы номера строк не сдвигались)
+        for row in range(len(node.children) - 1, -1, -1):
+            child = node.children[row]
+            if (child.name, child.is_dir) not in fresh_names:
+                self.beginRemoveRows(parent_index, row, row)
+                del node.children[row]
+                _renumber(node.children)
+                self.endRemoveRows()
+        # Вставляем новые на отсортированные позиции
+        existing = {(c.name, c.is_dir) for c in node.children}
+        reverse = self._sort_order == Qt.DescendingOrder
+        for child in fresh:
+            if (child.name, child.is_dir) in existing:
+                continue
+            key = self._sort_key(child)
+            row = 0
+            while row < len(node.children) and \
+                    ((self._sort_key(node.children[row]) < key) != reverse):
+                row += 1
+            self.beginInsertRows(parent_index, row, row)
+            node.children.insert(row, child)
+            _renumber(node.children)
+            self.endInsertRows()
+        # Новая папка Results могла превратить каталог в папку расчёта
+        for child in node.children:
+            if child.is_dir:
+                child.is_calc = None
+        if node.children:
+            self.dataChanged.emit(self.index(0, 0, parent_index),
+                                  self.index(len(node.children) - 1, 0, parent_index))
@@ -0,0 +1,339 @@
+# project_watcher.py
+import os
+import json
+import struct
+import itertools
+import ctypes
+import ctypes.util
+from pathlib import Path
+from typing import Callable
+from PySide6.QtCore import QCoreApplication, QObject, QThread, QTimer, Signal, QSocketNotifier, QFileSystemWatcher
+import compressed_io
+from orca_parser import OrcaParser
+from project_model import RESULTS_DIR_NAME
+
+# === inotify через libc (Linux) ===
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    _libc.inotify_init1.argtypes = [ctypes.c_int]
+    _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    _libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    HAS_INOTIFY = True
+except (OSError, AttributeError):
+    _libc = None
+    HAS_INOTIFY = False
+
+# Глубина: корень / [группа /] расчёт / Results
+MAX_DEPTH = 3
+# Пауза после последнего события, прежде чем запускать парсер
+DEBOUNCE_MS = 1500
+# Сколько байт с конца .out читать в поисках признака нормального завершения
+_TAIL_SIZE = 4096
+_DONE_MARKER = b"ORCA TERMINATED NORMALLY"
+# Выводы, сжатые после задания (compressed_io), разбираются так же
+_OUTPUT_SUFFIXES = ('.out',) + tuple('.out' + suffix for suffix in compressed_io.COMPRESSED_SUFFIXES)
+
+
+def is_output_name(name: str) -> bool:
+    return name.endswith(_OUTPUT_SUFFIXES)
+
+
+def is_finished_output(out_path: Path) -> bool:
+    """ORCA дописала вывод до конца (смотрим только хвост файла)"""
+    try:
+        return _DONE_MARKER in compressed_io.read_tail(out_path, _TAIL_SIZE)[0]
+    except OSError:
+        return False
+
+
+def _is_parsed(out_path: Path, stat: os.stat_result, cache: dict) -> bool:
+    """В parse.json проекта уже есть расчёт, и файл записан после вывода"""
+    parse_file = out_path.parent.parent.parent / "parse.json"
+    if parse_file not in cache:
+        try:
+            mtime = parse_file.stat().st_mtime_ns
+            with open(parse_file, 'r', encoding='utf-8') as f:
+                cache[parse_file] = (mtime, set(json.load(f)))
+        except (OSError, ValueError):
+            cache[parse_file] = (0, set())
+    mtime, names = cache[parse_file]
+    return mtime >= stat.st_mtime_ns and out_path.parent.parent.name in names
+
+
+class _ParseWorker(QObject):
+    parsed = Signal(str)  # out_path
+    error_occurred = Signal(str, str)
+    completed = Signal()
+
+    def __init__(self, parser: OrcaParser, paths: list[Path]):
+        super().__init__()
+        self.parser = parser
+        self.paths = paths
+
+    def run(self):
+        try:
+            for out_path in self.paths:
+                try:
+                    # Проект = родитель папки расчёта, как и в OrcaQueue
+                    self.parser.parse(out_path, out_path.parent.parent.parent)
+                    self.parsed.emit(str(out_path))
+                except Exception as e:
+                    self.error_occurred.emit(str(out_path), str(e))
+        finally:
+            self.completed.emit()
+
+    def start_async(self):
+        # Поток принадлежит приложению: владелец может отпустить воркера сразу после
+        # completed, а сам QThread удалится через deleteLater, когда действительно завершится
+        self._thread = QThread(QCoreApplication.instance())
+        self.moveToThread(self._thread)
+        self._thread.started.connect(self.run)
+        self._thread.finished.connect(self._thread.deleteLater)
+        self.completed.connect(self._thread.quit)
+        self._thread.start()
+
+
+class ProjectWatcher(QObject):
+    """
+    Следит за папками проекта и разбирает новые/завершённые Results/*.out,
+    появившиеся в обход очереди (ручной запуск, копирование с кластера).
+    На Linux — inotify, иначе QFileSystemWatcher по тем же каталогам.
+    Выводы заданий очереди (is_owned) и уже разобранные в parse.json пропускаются.
+    """
+    directory_changed = Signal(str)   # для точечного обновления дерева
+    output_parsed = Signal(str)       # out_path
+    error_occurred = Signal(str, str)
+
+    def __init__(self, parser: OrcaParser = None, is_owned: Callable[[Path], bool] = None, parent=None):
+        super().__init__(parent)
+        self._parser = parser or OrcaParser()
+        # Задания очереди она разбирает сама, сразу после завершения
+        self._is_owned = is_owned or (lambda out_path: False)
+        self._root: Path | None = None
+        self._fd = -1
+        self._notifier = None
+        self._fallback = None
+        self._fallback_ids = itertools.count(-1, -1)
+        self._wd_to_dir: dict[int, tuple[Path, int]] = {}
+        self._dir_to_wd: dict[Path, int] = {}
+        self._pending: set[Path] = set()
+        self._seen: dict[Path, tuple[int, int]] = {}
+        self._worker = None
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(DEBOUNCE_MS)
+        self._debounce.timeout.connect(self._flush)
+
+    # === Управление ===
+    def set_root(self, root: Path):
+        self.stop()
+        self._root = Path(root)
+        if HAS_INOTIFY:
+            self._fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd >= 0:
+            self._notifier = QSocketNotifier(self._fd, QSocketNotifier.Read, self)
+            self._notifier.activated.connect(self._read_events)
+        else:
+            self._fallback = QFileSystemWatcher(self)
+            self._fallback.directoryChanged.connect(self._on_fallback_changed)
+            self._fallback.fileChanged.connect(lambda path: self._queue_output(Path(path)))
+        self._watch_tree(self._root, 0)
+
+    def stop(self):
+        self._debounce.stop()
+        self._pending.clear()
+        self._seen.clear()
+        if self._notifier is not None:
+            self._notifier.setEnabled(False)
+            self._notifier.deleteLater()
+            self._notifier = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        if self._fallback is not None:
+            self._fallback.deleteLater()
+            self._fallback = None
+        self._fallback_ids = itertools.count(-1, -1)
+        self._wd_to_dir.clear()
+        self._dir_to_wd.clear()
+
+    # === Подписка на каталоги ===
+    def _watch_tree(self, directory: Path, depth: int):
+        if not self._add_watch(directory, depth):
+            return
+        if directory.name == RESULTS_DIR_NAME:
+            # Файлы могли появиться до подписки (cp -r) — подхватываем их сразу
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if is_output_name(entry.name) and entry.is_file():
+                            self._queue_output(Path(entry.path))
+            except OSError:
+                pass
+            return
+        if depth >= MAX_DEPTH:
+            return
+        try:
+            with os.scandir(directory) as it:
+                subdirs = [Path(e.path) for e in it if e.is_dir(follow_symlinks=False) and not e.name.startswith('.')]
+        except OSError:
+            return
+        for subdir in subdirs:
+            self._watch_tree(subdir, depth + 1)
+
+    def _add_watch(self, directory: Path, depth: int) -> bool:
+        if directory in self._dir_to_wd:
+            return True
+        if self._fd >= 0:
+            wd = _libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                self.error_occurred.emit(str(directory), f"inotify_add_watch failed: {os.strerror(err)}")
+                return False
+        elif self._fallback is not None:
+            if not self._fallback.addPath(str(directory)):
+                return False
+            wd = next(self._fallback_ids)
+        else:
+            return False
+        self._wd_to_dir[wd] = (directory, depth)
+        self._dir_to_wd[directory] = wd
+        return True
+
+    def _forget(self, wd: int):
+        directory, _ = self._wd_to_dir.pop(wd, (None, 0))
+        if directory is not None:
+            self._dir_to_wd.pop(directory, None)
+
+    # === События ===
+    def _read_events(self):
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self.error_occurred.emit(str(self._root), str(e))
+            return
+        changed_dirs = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buf):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(buf[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_IGNORED:
+                self._forget(wd)
+                continue
+            if wd not in self._wd_to_dir:
+                continue
+            directory, depth = self._wd_to_dir[wd]
+            if mask & IN_DELETE_SELF:
+                self._forget_seen(directory)
+                continue
+            if mask & (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO):
+                changed_dirs.add(directory)
+            path = directory / name
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                self._forget_seen(path)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and directory.name != RESULTS_DIR_NAME \
+                        and depth < MAX_DEPTH and not name.startswith('.'):
+                    self._watch_tree(path, depth + 1)
+                continue
+            if directory.name == RESULTS_DIR_NAME and is_output_name(name) \
+                    and mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self._queue_output(path)
+
+        for directory in changed_dirs:
+            self.directory_changed.emit(str(directory))
+
+    def _on_fallback_changed(self, directory: str):
+        path = Path(directory)
+        wd = self._dir_to_wd.get(path)
+        if wd is None:
+            return
+        self.directory_changed.emit(directory)
+        self._forget_seen(path, missing_only=True)
+        _, depth = self._wd_to_dir[wd]
+        # Без inotify не знаем, что именно изменилось: дочитываем один каталог
+        self._watch_tree(path, depth)
+        if path.name != RESULTS_DIR_NAME and depth < MAX_DEPTH and path.is_dir():
+            for sub in path.iterdir():
+                if sub.is_dir() and not sub.name.startswith('.'):
+                    self._watch_tree(sub, depth + 1)
+        elif path.name == RESULTS_DIR_NAME and path.is_dir():
+            for out in path.iterdir():
+                if is_output_name(out.name):
+                    self._queue_output(out)
+
+    def _forget_seen(self, path: Path, missing_only: bool = False):
+        """Убирает из _seen удалённый вывод или всё внутри удалённой папки"""
+        if self._seen.pop(path, None) is not None or not self._seen:
+            return
+        stale = [out for out in self._seen if path in out.parents and not (missing_only and out.exists())]
+        for out in stale:
+            del self._seen[out]
+
+    # === Пакетный разбор ===
+    def _queue_output(self, out_path: Path):
+        self._pending.add(out_path)
+        self._debounce.start()  # перезапуск таймера — всплеск событий схлопывается
+
+    def _flush(self):
+        if self._worker is not None:
+            return  # дождёмся текущего пакета, затем повторим
+        batch = []
+        parsed = {}
+        for out_path in sorted(self._pending):
+            try:
+                stat = out_path.stat()
+            except OSError:
+                self._seen.pop(out_path, None)
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self._seen.get(out_path) == signature:
+                continue
+            if self._is_owned(compressed_io.logical_path(out_path)) or _is_parsed(out_path, stat, parsed):
+                self._seen[out_path] = signature
+                continue
+            if not is_finished_output(out_path):
+                # ORCA ещё пишет или завершилась с ошибкой. Без inotify дописывание
+                # в файл не видно по каталогу — следим за самим файлом
+                if self._fallback is not None:
+                    self._fallback.addPath(str(out_path))
+                continue
+            if self._fallback is not None:
+                self._fallback.removePath(str(out_path))
+            self._seen[out_path] = signature
+            batch.append(out_path)
+        self._pending.clear()
+        if not batch:
+            return
+
+        worker = _ParseWorker(self._parser, batch)
+        worker.parsed.connect(self.output_parsed)
+        worker.error_occurred.connect(self.error_occurred)
+        worker.completed.connect(self._on_batch_done)
+        self._worker = worker
+        worker.start_async()
+
+    def _on_batch_done(self):
+        self._worker = None
+        if self._pending:
+            self._debounce.start()
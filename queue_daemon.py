@@ -0,0 +1,307 @@
+# queue_daemon.py
+"""
+Очередь ORCA в отдельном фоновом процессе. Графический интерфейс подключается
+к ней через Unix-сокет, может отключиться и подключиться снова; несколько окон
+могут наблюдать одну очередь.
+
+    python queue_daemon.py [--socket PATH] [--orca PATH]
+
+Протокол — JSON по строке на сообщение.
+Клиент → демон: {"req": n, "cmd": "...", "args": {...}}
+Демон → клиент: {"reply": n, "ok": true, "result": ...} или {"reply": n, "ok": false, "error": "..."}
+                 {"event": "...", "args": [...]} — рассылается всем клиентам.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import tempfile
+from pathlib import Path
+
+from PySide6.QtCore import QCoreApplication, QObject, QThread, QTimer
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+import orca_queue
+from funnel import FunnelController
+from orca_cli import apply_queue_settings, get_app_dir, load_settings
+from pipeline import GEOMETRY_PREVIOUS
+
+SOCKET_NAME = "orcaui-queue.sock"
+
+
+def default_socket_path() -> Path:
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and Path(runtime_dir).is_dir():
+        return Path(runtime_dir) / SOCKET_NAME
+    return Path(tempfile.gettempdir()) / f"orcaui-queue-{os.getuid()}.sock"
+
+
+# === Сериализация заданий ===
+def job_to_json(job: dict) -> dict:
+    return {key: str(value) if isinstance(value, Path) else value for key, value in job.items()}
+
+
+def job_from_json(data: dict) -> dict:
+    job = dict(data)
+    job['inp'] = Path(job['inp'])
+    job['out'] = Path(job['out'])
+    if job.get('geometry_from') and job['geometry_from'] != GEOMETRY_PREVIOUS:
+        job['geometry_from'] = Path(job['geometry_from'])
+    return job
+
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message, ensure_ascii=False).encode('utf-8') + b"\n"
+
+
+def is_daemon_running(socket_path: Path, timeout_ms: int = 200) -> bool:
+    socket = QLocalSocket()
+    socket.connectToServer(str(socket_path))
+    connected = socket.waitForConnected(timeout_ms)
+    socket.abort()
+    return connected
+
+
+class QueueServer(QObject):
+    """Принимает клиентов на локальном сокете и транслирует им события очереди"""
+
+    def __init__(self, queue: orca_queue.OrcaQueue, socket_path: Path, parent=None):
+        super().__init__(parent)
+        self.queue = queue
+        self.socket_path = Path(socket_path)
+        self._server = QLocalServer(self)
+        # Сокет доступен только владельцу: через него можно запускать процессы
+        self._server.setSocketOptions(QLocalServer.UserAccessOption)
+        self._server.newConnection.connect(self._on_new_connection)
+        self._buffers: dict[QLocalSocket, bytearray] = {}
+
+        queue.job_started.connect(lambda name: self._broadcast("job_started", name))
+        queue.job_finished.connect(lambda *a: self._broadcast("job_finished", *a))
+        queue.error_occurred.connect(lambda *a: self._broadcast("error_occurred", *a))
+        queue.queue_finished.connect(self._on_queue_finished)
+        queue.job_status_changed.connect(lambda job_id, status: self._broadcast("job_status_changed", job_id, status))
+        queue.jobs_inserted.connect(self._on_jobs_inserted)
+        queue.jobs_removed.connect(lambda first, last: self._broadcast("jobs_removed", first, last))
+        queue.jobs_reset.connect(lambda: self._broadcast("jobs_reset", self._jobs_json()))
+        queue.job_timed_out.connect(lambda *a: self._broadcast("job_timed_out", *a))
+        queue.disk_low.connect(lambda *a: self._broadcast("disk_low", *a))
+        queue.group_finished.connect(lambda group: self._broadcast("group_finished", group))
+
+    def listen(self) -> bool:
+        # Сокет от упавшего демона мешает listen — удаляем, только если никто не отвечает
+        if is_daemon_running(self.socket_path):
+            return False
+        QLocalServer.removeServer(str(self.socket_path))
+        return self._server.listen(str(self.socket_path))
+
+    def close(self):
+        self._server.close()
+        for socket in list(self._buffers):
+            socket.disconnectFromServer()
+
+    # === События очереди ===
+    def _jobs_json(self) -> list[dict]:
+        return [job_to_json(job) for job in self.queue.jobs]
+
+    def _state(self) -> dict:
+        return {"running": self.queue.is_running(), "current_index": self.queue.current_index}
+
+    def _on_jobs_inserted(self, first: int, last: int):
+        jobs = [job_to_json(job) for job in self.queue.jobs[first:last + 1]]
+        self._broadcast("jobs_inserted", first, last, jobs)
+
+    def _on_queue_finished(self):
+        self._broadcast("state", self._state())
+        self._broadcast("queue_finished")
+
+    def _broadcast(self, event: str, *args):
+        data = encode({"event": event, "args": list(args)})
+        for socket in self._buffers:
+            socket.write(data)
+
+    # === Клиенты ===
+    def _on_new_connection(self):
+        while self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            self._buffers[socket] = bytearray()
+            socket.readyRead.connect(lambda s=socket: self._on_ready_read(s))
+            socket.disconnected.connect(lambda s=socket: self._on_disconnected(s))
+
+    def _on_disconnected(self, socket: QLocalSocket):
+        self._buffers.pop(socket, None)
+        socket.deleteLater()
+
+    def _on_ready_read(self, socket: QLocalSocket):
+        buffer = self._buffers.get(socket)
+        if buffer is None:
+            return
+        buffer.extend(socket.readAll().data())
+        while True:
+            end = buffer.find(b"\n")
+            if end < 0:
+                break
+            line = bytes(buffer[:end])
+            del buffer[:end + 1]
+            if line.strip():
+                self._handle(socket, line)
+
+    def _handle(self, socket: QLocalSocket, line: bytes):
+        request_id = None
+        try:
+            message = json.loads(line)
+            request_id = message.get("req")
+            handler = getattr(self, f"_cmd_{message.get('cmd')}", None)
+            if handler is None:
+                raise ValueError(f"Unknown command: {message.get('cmd')}")
+            result = handler(**message.get("args", {}))
+            reply = {"reply": request_id, "ok": True, "result": result}
+        except Exception as e:
+            reply = {"reply": request_id, "ok": False, "error": str(e)}
+        socket.write(encode(reply))
+
+    # === Команды ===
+    def _cmd_hello(self):
+        return {"pid": os.getpid(), "jobs": self._jobs_json(), **self._state()}
+
+    def _cmd_configure(self, orca_exe: str = None, locale: str = None, disable_gpu: bool = None,
+                       scratch_dir: str = None, scratch_patterns: list = None, scratch_by_default: bool = None,
+                       pin_cpus: bool = None, wall_time_limit: float = None, stall_limit: float = None,
+                       compress_outputs: str = None, artifact_retention: str = None,
+                       disk_reserve_mb: float = None):
+        if orca_exe:
+            self.queue.orca_exe = Path(orca_exe)
+        if locale:
+            self.queue.orca_locale = locale
+        if disable_gpu is not None:
+            self.queue.disable_gpu = disable_gpu
+        if scratch_dir is not None:
+            self.queue.scratch_dir = Path(scratch_dir) if scratch_dir else None
+        if scratch_patterns is not None:
+            self.queue.scratch_patterns = scratch_patterns or None
+        if scratch_by_default is not None:
+            self.queue.scratch_by_default = scratch_by_default
+        if pin_cpus is not None:
+            self.queue.pin_cpus = pin_cpus
+        if wall_time_limit is not None:
+            self.queue.wall_time_limit = wall_time_limit
+        if stall_limit is not None:
+            self.queue.stall_limit = stall_limit
+        if compress_outputs is not None:
+            self.queue.compress_outputs = compress_outputs
+        if artifact_retention is not None:
+            self.queue.artifact_retention = artifact_retention
+        if disk_reserve_mb is not None:
+            self.queue.disk_reserve_mb = disk_reserve_mb
+
+    def _cmd_add_jobs(self, jobs: list):
+        parsed = []
+        for inp, out, display_name, options in jobs:
+            options = dict(options or {})
+            if options.get('geometry_from') and options['geometry_from'] != GEOMETRY_PREVIOUS:
+                options['geometry_from'] = Path(options['geometry_from'])
+            parsed.append((Path(inp), Path(out), display_name, options))
+        return self.queue.add_jobs(parsed)
+
+    def _cmd_remove_job(self, job_id: int):
+        self.queue.remove_job_by_id(job_id)
+
+    def _cmd_clear(self):
+        self.queue.clear()
+
+    def _cmd_set_geometry_source(self, job_id: int, source: str = None, mode: str = "inject"):
+        if source and source != GEOMETRY_PREVIOUS:
+            source = Path(source)
+        self.queue.set_geometry_source(job_id, source, mode)
+
+    def _cmd_set_scratch(self, job_id: int, enabled: bool = None):
+        self.queue.set_scratch(job_id, enabled)
+
+    def _cmd_set_limits(self, job_id: int, wall_time_limit: float = None, stall_limit: float = None):
+        self.queue.set_limits(job_id, wall_time_limit, stall_limit)
+
+    def _cmd_start(self):
+        self.queue.start()
+        self._broadcast("state", self._state())
+
+    def _cmd_resume(self):
+        self.queue.resume()
+        self._broadcast("state", self._state())
+
+    def _cmd_stop(self):
+        self.queue.terminate_current_job()
+
+    def _cmd_shutdown(self, force: bool = False):
+        if self.queue.is_running() and not force:
+            raise RuntimeError("Queue is running; stop it first")
+        if self.queue.is_running():
+            self.queue.terminate_current_job()
+        QTimer.singleShot(0, QCoreApplication.instance().quit)
+
+
+def daemon_command(socket_path: Path) -> list[str]:
+    """Команда запуска демона (из исходников или из собранного приложения)"""
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, "--queue-daemon", "--socket", str(socket_path)]
+    return [sys.executable, str(Path(__file__).resolve()), "--socket", str(socket_path)]
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="queue_daemon", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", type=Path, default=None, help="Unix socket path")
+    parser.add_argument("--orca", type=Path, help="ORCA executable (default: settings.json)")
+    parser.add_argument("--locale", help="LC_ALL for ORCA")
+    parser.add_argument("--log-dir", type=Path, help="queue log directory (default: <app>/logs)")
+    parser.add_argument("--settings", type=Path, help="settings.json to read defaults from")
+    args = parser.parse_args(argv)
+
+    app_dir = get_app_dir()
+    settings = load_settings(args.settings or app_dir / "settings.json")
+    socket_path = args.socket or default_socket_path()
+    orca_exe = args.orca or Path(settings.get("orca_exe", "orca"))
+
+    app = QCoreApplication(sys.argv[:1])
+    queue = orca_queue.OrcaQueue(
+        orca_exe,
+        locale=args.locale or settings.get("orca_locale", "C.UTF-8"),
+        log_dir=args.log_dir or app_dir / "logs",
+        disable_gpu=settings.get("disable_gpu", True),
+    )
+    apply_queue_settings(queue, settings)
+    # Воронки конформеров отбирает очередь, которая их считает
+    funnels = FunnelController(queue)
+    funnels.funnel_selected.connect(lambda name, kept, total: print(
+        f"Funnel {name}: {kept} of {total} conformers selected", flush=True))
+    server = QueueServer(queue, socket_path)
+    if not server.listen():
+        if is_daemon_running(socket_path):
+            print(f"Queue daemon already running on {socket_path}", flush=True)
+            return 0
+        print(f"Cannot listen on {socket_path}", file=sys.stderr)
+        return 1
+    print(f"Queue daemon {os.getpid()} listening on {socket_path}", flush=True)
+
+    def on_signal(signum, frame):
+        if queue.is_running():
+            queue.terminate_current_job()
+        app.quit()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+    # Интерпретатор должен периодически получать управление для обработки сигналов
+    poll = QTimer()
+    poll.timeout.connect(lambda: None)
+    poll.start(200)
+
+    app.exec()
+    server.close()
+    QLocalServer.removeServer(str(socket_path))
+    for thread in app.findChildren(QThread):
+        thread.quit()
+        thread.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
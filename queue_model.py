@@ -0,0 +1,178 @@
+# queue_model.py
+from pathlib import Path
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer
+from PySide6.QtWidgets import QListView, QAbstractItemView
+from PySide6.QtGui import QDragEnterEvent, QDropEvent
+
+JOB_ID_ROLE = Qt.UserRole
+INP_PATH_ROLE = Qt.UserRole + 1
+
+# Изменения статусов копятся и отдаются представлению не чаще раза за кадр
+FLUSH_INTERVAL_MS = 16
+
+
+class QueueListModel(QAbstractListModel):
+    """
+    Представление очереди OrcaQueue. Строки адресуются стабильным id задания
+    через словарь id→строка, поэтому смена статуса — O(1), а все смены
+    за кадр сливаются в один dataChanged.
+    """
+
+    def __init__(self, queue, parent=None):
+        super().__init__(parent)
+        self._queue = None
+        self._ids: list[int] = []
+        self._jobs: dict[int, dict] = {}
+        self._row_by_id: dict[int, int] = {}
+        self._dirty: set[int] = set()
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self._flush)
+
+        self.set_queue(queue)
+
+    def set_queue(self, queue):
+        """Переподключает модель к другой очереди (например, удалённой)"""
+        if self._queue is not None:
+            self._queue.jobs_inserted.disconnect(self._on_jobs_inserted)
+            self._queue.jobs_removed.disconnect(self._on_jobs_removed)
+            self._queue.jobs_reset.disconnect(self._on_jobs_reset)
+            self._queue.job_status_changed.disconnect(self._on_status_changed)
+        self._queue = queue
+        queue.jobs_inserted.connect(self._on_jobs_inserted)
+        queue.jobs_removed.connect(self._on_jobs_removed)
+        queue.jobs_reset.connect(self._on_jobs_reset)
+        queue.job_status_changed.connect(self._on_status_changed)
+        self._on_jobs_reset()
+
+    # === Синхронизация с очередью ===
+    def _on_jobs_inserted(self, first: int, last: int):
+        jobs = self._queue.jobs[first:last + 1]
+        self.beginInsertRows(QModelIndex(), first, last)
+        self._ids[first:first] = [job['id'] for job in jobs]
+        for job in jobs:
+            self._jobs[job['id']] = job
+        if first == len(self._ids) - len(jobs):
+            # Добавление в конец — дописываем индекс без пересчёта
+            for row in range(first, last + 1):
+                self._row_by_id[self._ids[row]] = row
+        else:
+            self._reindex()
+        self.endInsertRows()
+
+    def _on_jobs_removed(self, first: int, last: int):
+        self.beginRemoveRows(QModelIndex(), first, last)
+        for job_id in self._ids[first:last + 1]:
+            self._jobs.pop(job_id, None)
+            self._dirty.discard(job_id)
+        del self._ids[first:last + 1]
+        self._reindex()
+        self.endRemoveRows()
+
+    def _on_jobs_reset(self):
+        self.beginResetModel()
+        jobs = list(self._queue.jobs)
+        self._ids = [job['id'] for job in jobs]
+        self._jobs = {job['id']: job for job in jobs}
+        self._dirty.clear()
+        self._reindex()
+        self.endResetModel()
+
+    def _on_status_changed(self, job_id: int, status: str):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job['status'] = status
+        self._dirty.add(job_id)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush(self):
+        rows = [self._row_by_id[i] for i in self._dirty if i in self._row_by_id]
+        self._dirty.clear()
+        if rows:
+            self.dataChanged.emit(self.index(min(rows)), self.index(max(rows)), [Qt.DisplayRole])
+
+    def _reindex(self):
+        self._row_by_id = {job_id: row for row, job_id in enumerate(self._ids)}
+
+    # === Доступ ===
+    def job_id(self, index: QModelIndex) -> int:
+        if not index.isValid():
+            return -1
+        return self._ids[index.row()]
+
+    def row_of(self, job_id: int) -> int:
+        return self._row_by_id.get(job_id, -1)
+
+    # === QAbstractListModel ===
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._ids)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        job = self._jobs[self._ids[index.row()]]
+        if role == Qt.DisplayRole:
+            emoji = job['status'].split(' ', 1)[0]
+            link = "🔗 " if job.get('geometry_from') else ""
+            return f"{emoji} {link}{job['display_name']}"
+        if role == Qt.ToolTipRole:
+            tip = f"{job['inp']}\n{job['status']}"
+            if job.get('geometry_from'):
+                tip += f"\nGeometry: {job['geometry_from']} ({job.get('geometry_mode', 'inject')})"
+            limits = [f"{label} {job[key]:g} min" if job[key] else f"no {label}"
+                      for key, label in (('wall_time_limit', "wall time"), ('stall_limit', "stall limit"))
+                      if job.get(key) is not None]
+            if limits:
+                tip += "\nLimits: " + ", ".join(limits)
+            if job.get('group'):
+                tip += f"\nParallel group: {job['group']} (up to {job.get('parallel', 1)} at once)"
+            return tip
+        if role == JOB_ID_ROLE:
+            return job['id']
+        if role == INP_PATH_ROLE:
+            return str(job['inp'])
+        return None
+
+
+class QueueListView(QListView):
+    """Список очереди; принимает перетаскивание .inp файлов"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAcceptDrops(True)
+        self.setDragDropMode(QAbstractItemView.DropOnly)
+        self.setDefaultDropAction(Qt.CopyAction)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        # Одинаковая высота строк: представление не измеряет каждую из 10 000+ строк
+        self.setUniformItemSizes(True)
+
+    def dragEnterEvent(self, event: QDragEnterEvent):
+        mime = event.mimeData()
+        if mime.hasUrls():
+            # Проверяем, что все файлы — .inp
+            urls = mime.urls()
+            if all(url.isLocalFile() and url.toLocalFile().endswith('.inp') for url in urls):
+                event.acceptProposedAction()
+                return
+        super().dragEnterEvent(event)
+
+    def dragMoveEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+            return
+        super().dragMoveEvent(event)
+
+    def dropEvent(self, event: QDropEvent):
+        mime = event.mimeData()
+        if mime.hasUrls():
+            paths = [Path(url.toLocalFile()) for url in mime.urls()]
+            paths = [p for p in paths if p.suffix == '.inp']
+            if paths:
+                self.window().add_inps_to_queue(paths)
+            event.acceptProposedAction()
+            return
+        super().dropEvent(event)
@@ -0,0 +1,275 @@
+# remote_queue.py
+import json
+import subprocess
+import time
+from pathlib import Path
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtNetwork import QLocalSocket
+
+from queue_daemon import daemon_command, encode, job_from_json, job_to_json
+
+# Ответ демона на команду (локальный сокет — обычно доли миллисекунды)
+REQUEST_TIMEOUT_MS = 10000
+# Сколько ждать, пока только что запущенный демон начнёт слушать
+SPAWN_TIMEOUT = 10.0
+
+
+class DaemonError(RuntimeError):
+    pass
+
+
+class RemoteQueue(QObject):
+    """
+    Очередь в процессе queue_daemon с интерфейсом и сигналами OrcaQueue.
+    Держит зеркало списка заданий, которое обновляется событиями демона.
+    """
+    job_started = Signal(str)
+    job_finished = Signal(str, bool, str, str)
+    error_occurred = Signal(str, str, str)
+    queue_finished = Signal()
+    job_status_changed = Signal(int, str)
+    jobs_inserted = Signal(int, int)
+    jobs_removed = Signal(int, int)
+    jobs_reset = Signal()
+    job_timed_out = Signal(str, str, str)
+    disk_low = Signal(str, str, str)
+    group_finished = Signal(str)
+    running_changed = Signal(bool)
+    disconnected = Signal()
+
+    def __init__(self, socket_path: Path, parent=None):
+        super().__init__(parent)
+        self.socket_path = Path(socket_path)
+        self.daemon_pid = None
+        self._jobs: list[dict] = []
+        self._index_by_id: dict[int, int] = {}
+        self._is_running = False
+        self._current_index = 0
+        self._buffer = bytearray()
+        self._replies: dict[int, dict] = {}
+        self._next_request = 1
+        self._socket = QLocalSocket(self)
+        self._socket.readyRead.connect(self._on_ready_read)
+        self._socket.disconnected.connect(self._on_disconnected)
+
+    # === Подключение ===
+    def connect_to_daemon(self, timeout_ms: int = 1000) -> bool:
+        self._socket.connectToServer(str(self.socket_path))
+        if not self._socket.waitForConnected(timeout_ms):
+            return False
+        snapshot = self._request("hello")
+        self.daemon_pid = snapshot["pid"]
+        self._current_index = snapshot["current_index"]
+        self._set_running(snapshot["running"])
+        self._reset_jobs(snapshot["jobs"])
+        return True
+
+    def detach(self):
+        """Отключиться; очередь в демоне продолжает работу"""
+        self._socket.disconnected.disconnect(self._on_disconnected)
+        self._socket.disconnectFromServer()
+
+    def is_connected(self) -> bool:
+        return self._socket.state() == QLocalSocket.ConnectedState
+
+    def _on_disconnected(self):
+        self._set_running(False)
+        self.disconnected.emit()
+
+    # === Обмен сообщениями ===
+    def _send(self, cmd: str, args: dict) -> int:
+        if not self.is_connected():
+            raise DaemonError("Not connected to the queue daemon")
+        request_id = self._next_request
+        self._next_request += 1
+        self._socket.write(encode({"req": request_id, "cmd": cmd, "args": args}))
+        self._socket.flush()
+        return request_id
+
+    def _request(self, cmd: str, **args):
+        """Синхронная команда: события, пришедшие до ответа, обрабатываются по порядку"""
+        request_id = self._send(cmd, args)
+        deadline = time.monotonic() + REQUEST_TIMEOUT_MS / 1000
+        while request_id not in self._replies:
+            remaining = int((deadline - time.monotonic()) * 1000)
+            if remaining <= 0 or not self.is_connected():
+                raise DaemonError(f"No reply from the queue daemon to '{cmd}'")
+            self._socket.waitForReadyRead(min(remaining, 200))
+            self._on_ready_read()
+        reply = self._replies.pop(request_id)
+        if not reply.get("ok"):
+            # Как у OrcaQueue: недопустимая операция — RuntimeError
+            raise RuntimeError(reply.get("error", "Daemon error"))
+        return reply.get("result")
+
+    def _on_ready_read(self):
+        self._buffer.extend(self._socket.readAll().data())
+        while True:
+            end = self._buffer.find(b"\n")
+            if end < 0:
+                break
+            line = bytes(self._buffer[:end])
+            del self._buffer[:end + 1]
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"[WARN] Bad message from queue daemon: {e}")
+                continue
+            if "reply" in message:
+                self._replies[message["reply"]] = message
+            else:
+                self._on_event(message.get("event"), message.get("args", []))
+
+    # === События демона → зеркало и сигналы ===
+    def _on_event(self, event: str, args: list):
+        if event == "jobs_inserted":
+            first, last, jobs = args
+            self._jobs[first:first] = [job_from_json(job) for job in jobs]
+            self._reindex()
+            self.jobs_inserted.emit(first, last)
+        elif event == "jobs_removed":
+            first, last = args
+            del self._jobs[first:last + 1]
+            self._reindex()
+            self.jobs_removed.emit(first, last)
+        elif event == "jobs_reset":
+            self._reset_jobs(args[0])
+        elif event == "job_status_changed":
+            job_id, status = args
+            index = self._index_by_id.get(job_id, -1)
+            if index >= 0:
+                self._jobs[index]['status'] = status
+            self.job_status_changed.emit(job_id, status)
+        elif event == "state":
+            self._current_index = args[0]["current_index"]
+            self._set_running(args[0]["running"])
+        elif event == "job_started":
+            self._set_running(True)
+            self.job_started.emit(*args)
+        elif event == "job_finished":
+            self.job_finished.emit(*args)
+        elif event == "error_occurred":
+            self.error_occurred.emit(*args)
+        elif event == "job_timed_out":
+            self.job_timed_out.emit(*args)
+        elif event == "disk_low":
+            self.disk_low.emit(*args)
+        elif event == "group_finished":
+            self.group_finished.emit(*args)
+        elif event == "queue_finished":
+            self._set_running(False)
+            self.queue_finished.emit()
+
+    def _reset_jobs(self, jobs: list[dict]):
+        self._jobs = [job_from_json(job) for job in jobs]
+        self._reindex()
+        self.jobs_reset.emit()
+
+    def _reindex(self):
+        self._index_by_id = {job['id']: i for i, job in enumerate(self._jobs)}
+
+    def _set_running(self, running: bool):
+        if running != self._is_running:
+            self._is_running = running
+            self.running_changed.emit(running)
+
+    # === Интерфейс OrcaQueue ===
+    @property
+    def jobs(self) -> list[dict]:
+        return self._jobs
+
+    @property
+    def current_index(self) -> int:
+        return self._current_index
+
+    def job_index(self, job_id: int) -> int:
+        return self._index_by_id.get(job_id, -1)
+
+    def is_empty(self) -> bool:
+        return not self._jobs
+
+    def is_running(self) -> bool:
+        return self._is_running
+
+    def configure(self, orca_exe: Path, locale: str, disable_gpu: bool, scratch_dir: Path = None,
+                  scratch_patterns: list[str] = None, scratch_by_default: bool = False, pin_cpus: bool = False,
+                  wall_time_limit: float = 0, stall_limit: float = 0, compress_outputs: str = "",
+                  artifact_retention: str = None, disk_reserve_mb: float = None):
+        self._request("configure", orca_exe=str(orca_exe), locale=locale, disable_gpu=disable_gpu,
+                      scratch_dir=str(scratch_dir) if scratch_dir else "",
+                      scratch_patterns=scratch_patterns or [], scratch_by_default=scratch_by_default,
+                      pin_cpus=pin_cpus, wall_time_limit=wall_time_limit, stall_limit=stall_limit,
+                      compress_outputs=compress_outputs or "", artifact_retention=artifact_retention,
+                      disk_reserve_mb=disk_reserve_mb)
+
+    def add_job(self, inp_path: Path, out_path: Path, display_name: str = None) -> int:
+        return self.add_jobs([(inp_path, out_path, display_name)])[0]
+
+    def add_jobs(self, jobs: list[tuple]) -> list[int]:
+        if not jobs:
+            return []
+        payload = []
+        for job in jobs:
+            options = job_to_json(job[3]) if len(job) > 3 and job[3] else {}
+            payload.append([str(job[0]), str(job[1]), job[2] if len(job) > 2 else None, options])
+        return self._request("add_jobs", jobs=payload)
+
+    def remove_job_by_id(self, job_id: int):
+        self._request("remove_job", job_id=job_id)
+
+    def clear(self):
+        self._request("clear")
+
+    def set_geometry_source(self, job_id: int, source, mode: str = "inject"):
+        self._request("set_geometry_source", job_id=job_id,
+                      source=str(source) if source else None, mode=mode)
+
+    def set_scratch(self, job_id: int, enabled):
+        self._request("set_scratch", job_id=job_id, enabled=enabled)
+
+    def set_limits(self, job_id: int, wall_time_limit=None, stall_limit=None):
+        self._request("set_limits", job_id=job_id, wall_time_limit=wall_time_limit, stall_limit=stall_limit)
+
+    def start(self):
+        self._request("start")
+
+    def resume(self):
+        self._request("resume")
+
+    def terminate_current_job(self):
+        self._request("stop")
+
+    def shutdown(self, force: bool = False):
+        self._request("shutdown", force=force)
+
+
+def spawn_daemon(socket_path: Path, log_file: Path):
+    """Запускает демон в отдельной сессии: он переживёт закрытие окна и Ctrl+C в терминале"""
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_file, 'a', encoding='utf-8') as log:
+        subprocess.Popen(
+            daemon_command(socket_path),
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            close_fds=True, start_new_session=True,
+        )
+
+
+def attach(socket_path: Path, log_file: Path, spawn: bool = True, parent=None) -> RemoteQueue:
+    """Подключается к демону; если его нет и spawn — запускает и ждёт готовности"""
+    queue = RemoteQueue(socket_path, parent)
+    if queue.connect_to_daemon():
+        return queue
+    if not spawn:
+        queue.deleteLater()
+        raise DaemonError(f"No queue daemon on {socket_path}")
+    spawn_daemon(socket_path, log_file)
+    deadline = time.monotonic() + SPAWN_TIMEOUT
+    while time.monotonic() < deadline:
+        if queue.connect_to_daemon(200):
+            return queue
+        queue._socket.abort()
+        time.sleep(0.1)
+    queue.deleteLater()
+    raise DaemonError(f"Queue daemon did not start; see {log_file}")
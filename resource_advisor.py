@@ -0,0 +1,220 @@
+# resource_advisor.py
+"""
+Подбор %pal nprocs и %maxcore для входа по истории заданий (job_history.jsonl).
+
+    python resource_advisor.py calc/Inputs/opt.inp [--apply]
+
+Похожие задания — тот же метод (ключевые слова без PALn); вес записи убывает с
+различием числа атомов (в 2 раза больше/меньше — вес 0.5, дальше 4 раз — не учитывается).
+
+Ядра: наибольший %pal, при котором похожие задания держали ядра занятыми хотя бы
+на TARGET_EFFICIENCY (процессорное время / (время × nprocs)); если все ниже — %pal
+уменьшается пропорционально. Память: пик RSS на процесс, пересчитанный на размер
+системы, с запасом; не меньше, чем у заданий, упавших из-за нехватки памяти;
+не больше доли RAM на процесс (иначе уменьшается %pal).
+Уверенность растёт с суммарным весом похожих записей.
+"""
+import argparse
+import math
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import job_history
+from orca_input import (OrcaInput, RAM_WARNING_FRACTION, is_pal_keyword, machine_ram_mb, parse_input,
+                        with_block_value, with_keywords)
+
+# Ниже этой занятости ядра в основном простаивают
+TARGET_EFFICIENCY = 0.7
+# Запас к наблюдаемому пику памяти на процесс
+MEMORY_HEADROOM = 1.3
+# Во сколько раз поднять %maxcore задания, упавшего из-за нехватки памяти
+MEMORY_ERROR_STEP = 1.5
+# Память растёт примерно как квадрат размера системы (матрицы по базису)
+MEMORY_SCALING = 2.0
+MIN_MAXCORE = 500
+# Записи с весом меньше (размер отличается больше чем в 4 раза) не учитываются
+_MIN_WEIGHT = 0.25
+
+
+@dataclass
+class Advice:
+    current_nprocs: int
+    current_maxcore: int | None
+    nprocs: int
+    maxcore: int | None
+    confidence: float
+    samples: int
+    reasons: list[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return self.nprocs != self.current_nprocs or self.maxcore != self.current_maxcore
+
+    @property
+    def confidence_label(self) -> str:
+        if self.samples == 0:
+            return "none"
+        if self.confidence >= 0.7:
+            return "high"
+        return "medium" if self.confidence >= 0.4 else "low"
+
+    def summary(self) -> str:
+        return (f"%pal nprocs {self.current_nprocs} → {self.nprocs}, "
+                f"%maxcore {_mb(self.current_maxcore)} → {_mb(self.maxcore)} "
+                f"(confidence {self.confidence_label}, {self.confidence:.0%}, {self.samples} similar jobs)")
+
+
+def _mb(value: int | None) -> str:
+    return f"{value} MB" if value else "default"
+
+
+def _weight(atoms: int | None, reference: int | None) -> float:
+    """1 — тот же размер, 0.5 — вдвое больше или меньше; размер неизвестен — минимальный вес"""
+    if not atoms or not reference:
+        return _MIN_WEIGHT
+    return 2.0 ** -abs(math.log2(atoms / reference))
+
+
+def similar_records(inp: OrcaInput, history: list[dict]) -> list[tuple[dict, float]]:
+    atoms = inp.atom_count()
+    similar = []
+    for record in history:
+        if record.get("method") != inp.method or not record.get("wall_s"):
+            continue
+        weight = _weight(record.get("atoms"), atoms)
+        if weight >= _MIN_WEIGHT:
+            similar.append((record, weight))
+    return similar
+
+
+def _weighted_mean(pairs: list[tuple[float, float]]) -> float:
+    total = sum(weight for _, weight in pairs)
+    return sum(value * weight for value, weight in pairs) / total
+
+
+def _advise_nprocs(current: int, successes: list[tuple[dict, float]], reasons: list[str]) -> int:
+    by_nprocs: dict[int, list[tuple[float, float]]] = {}
+    for record, weight in successes:
+        if record.get("cpu_efficiency") is not None:
+            by_nprocs.setdefault(record["nprocs"] or 1, []).append((record["cpu_efficiency"], weight))
+    if not by_nprocs:
+        return current
+    efficiency = {nprocs: _weighted_mean(pairs) for nprocs, pairs in by_nprocs.items()}
+    good = [nprocs for nprocs, value in efficiency.items() if value >= TARGET_EFFICIENCY]
+    if good:
+        best = max(good)
+        if best != current:
+            reasons.append(f"{best} cores were {efficiency[best]:.0%} busy in similar jobs")
+        for nprocs in sorted(efficiency):
+            if nprocs > best:
+                reasons.append(f"{nprocs} cores were only {efficiency[nprocs]:.0%} busy")
+        return best
+    # Все наблюдавшиеся %pal недогружены: уменьшаем ближайший к текущему пропорционально
+    nearest = min(efficiency, key=lambda nprocs: abs(nprocs - current))
+    scaled = max(1, round(nearest * efficiency[nearest] / TARGET_EFFICIENCY))
+    reasons.append(f"{nearest} cores were only {efficiency[nearest]:.0%} busy in similar jobs")
+    return scaled
+
+
+def _advise_memory(inp: OrcaInput, similar: list[tuple[dict, float]], reasons: list[str]) -> float | None:
+    atoms = inp.atom_count()
+    need = None
+    peaks = []
+    for record, weight in similar:
+        if record.get("outcome") == "success" and record.get("maxrss_mb"):
+            scale = (atoms / record["atoms"]) ** MEMORY_SCALING if atoms and record.get("atoms") else 1.0
+            peaks.append((record["maxrss_mb"] * scale, weight))
+    if peaks:
+        need = _weighted_mean(peaks) * MEMORY_HEADROOM
+        reasons.append(f"expected peak {need / MEMORY_HEADROOM:.0f} MB per process")
+    failed = [record["maxcore"] for record, _ in similar if record.get("memory_error") and record.get("maxcore")]
+    if failed:
+        floor = max(failed) * MEMORY_ERROR_STEP
+        reasons.append(f"similar jobs ran out of memory at %maxcore {max(failed)} MB")
+        need = max(need or 0, floor)
+    return need
+
+
+def advise(inp: OrcaInput, history: list[dict], cpu_count: int = None, ram_mb: int = None) -> Advice:
+    current_nprocs = inp.nprocs or 1
+    similar = similar_records(inp, history)
+    successes = [(record, weight) for record, weight in similar if record.get("outcome") == "success"]
+    reasons = []
+    if not similar:
+        reasons.append("no similar jobs in history; keeping current settings")
+
+    nprocs = _advise_nprocs(current_nprocs, successes, reasons)
+    if cpu_count and nprocs > cpu_count:
+        nprocs = cpu_count
+        reasons.append(f"limited to {cpu_count} CPUs")
+
+    maxcore = inp.maxcore
+    need = _advise_memory(inp, similar, reasons)
+    if need is not None and (maxcore is None or maxcore < need):
+        maxcore = max(MIN_MAXCORE, int(math.ceil(need / 100.0)) * 100)
+    if maxcore and ram_mb:
+        budget = ram_mb * RAM_WARNING_FRACTION
+        if need is not None and need * nprocs > budget:
+            # Памяти на все процессы не хватит — меньше процессов, но без нехватки
+            fitted = max(1, int(budget // need))
+            if fitted < nprocs:
+                reasons.append(f"{nprocs} × {need:.0f} MB exceeds {RAM_WARNING_FRACTION:.0%} of RAM; "
+                               f"using {fitted} processes")
+                nprocs = fitted
+        if maxcore * nprocs > budget:
+            maxcore = max(MIN_MAXCORE, int(budget / nprocs) // 100 * 100)
+            reasons.append(f"%maxcore limited to {maxcore} MB by RAM")
+
+    weight = sum(weight for _, weight in similar)
+    return Advice(current_nprocs, inp.maxcore, nprocs, maxcore, weight / (weight + 3), len(similar), reasons)
+
+
+def apply_advice(inp: OrcaInput, advice: Advice) -> OrcaInput:
+    """Переписывает %pal и %maxcore входа (ключевое слово PALn убирается — иначе два источника)"""
+    if any(is_pal_keyword(keyword) for keyword in inp.keywords):
+        inp = with_keywords(inp, [k for k in inp.keywords if not is_pal_keyword(k)])
+    inp = with_block_value(inp, "pal", "nprocs", advice.nprocs)
+    if advice.maxcore:
+        inp = with_block_value(inp, "maxcore", "", advice.maxcore)
+    return inp
+
+
+def advise_file(inp_path: Path, history: list[dict]) -> tuple[OrcaInput, Advice]:
+    inp = parse_input(inp_path)
+    return inp, advise(inp, history, os.cpu_count(), machine_ram_mb())
+
+
+def default_history_file() -> Path:
+    from orca_cli import get_app_dir
+    return get_app_dir() / "logs" / job_history.HISTORY_FILE_NAME
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="resource_advisor", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", type=Path, help=".inp files")
+    parser.add_argument("--history", type=Path, help="job_history.jsonl (default: <app>/logs)")
+    parser.add_argument("--apply", action="store_true", help="rewrite %%pal/%%maxcore in the inputs")
+    parser.add_argument("--min-confidence", type=float, default=0.4,
+                        help="apply only advice at least this confident (0..1)")
+    args = parser.parse_args(argv)
+    history = job_history.load(args.history or default_history_file())
+    for inp_path in args.inputs:
+        try:
+            inp, advice = advise_file(inp_path, history)
+        except (OSError, ValueError) as e:
+            print(f"{inp_path}: {e}", file=sys.stderr)
+            continue
+        print(f"{inp_path}: {advice.summary()}")
+        for reason in advice.reasons:
+            print(f"    {reason}")
+        if args.apply and advice.changed and advice.confidence >= args.min_confidence:
+            inp_path.write_text(apply_advice(inp, advice).text, encoding='utf-8')
+            print("    applied")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# results_dialog.py
+from pathlib import Path
+import numpy as np
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
+    QTableView, QHeaderView, QAbstractItemView, QTabWidget
+)
+from results_store import ResultsTable, DERIVED_COLUMNS, PARSE_FILE_NAME
+import thermo_analysis
+
+NAME_COLUMN = "Calculation"
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """
+    Таблица результатов проекта. Данные хранятся по столбцам в NumPy,
+    сортировка и фильтр работают над массивом индексов видимых строк,
+    поэтому прокрутка не зависит от числа расчётов.
+    """
+
+    def __init__(self, parent=None, name_header: str = NAME_COLUMN, derived: bool = True):
+        super().__init__(parent)
+        self._table = ResultsTable([], {})
+        self._name_header = name_header
+        self._derived = derived
+        self._headers: list[str] = [name_header]
+        self._arrays: list[np.ndarray] = []
+        self._rows = np.arange(0)
+        self._filter = ""
+        self._sort_column = 0
+        self._sort_order = Qt.AscendingOrder
+
+    def set_table(self, table: ResultsTable):
+        self.beginResetModel()
+        # Сортировка — по названию столбца: в новой таблице его номер может быть другим
+        sort_label = self._headers[self._sort_column] if self._sort_column < len(self._headers) else None
+        self._table = table
+        self._headers = [self._name_header] + table.labels
+        self._arrays = [table.column(label) for label in table.labels]
+        for title, func in DERIVED_COLUMNS if self._derived else ():
+            values = func(table)
+            if not np.all(np.isnan(values)):
+                self._headers.append(title)
+                self._arrays.append(values)
+        self._sort_column = self._headers.index(sort_label) if sort_label in self._headers else 0
+        self._rows = self._visible_rows()
+        self.endResetModel()
+
+    def set_filter(self, text: str):
+        self.beginResetModel()
+        self._filter = text.strip().lower()
+        self._rows = self._visible_rows()
+        self.endResetModel()
+
+    def _visible_rows(self) -> np.ndarray:
+        names = self._table.names
+        if self._filter and len(names):
+            rows = np.nonzero(np.char.find(np.char.lower(names), self._filter) >= 0)[0]
+        else:
+            rows = np.arange(len(names))
+        return self._sorted(rows)
+
+    def _sorted(self, rows: np.ndarray) -> np.ndarray:
+        if self._sort_column == 0:
+            keys = self._table.names[rows]
+            order = np.argsort(keys, kind='stable')
+            if self._sort_order == Qt.DescendingOrder:
+                order = order[::-1]
+            return rows[order]
+        values = self._arrays[self._sort_column - 1][rows]
+        if self._sort_order == Qt.DescendingOrder:
+            values = -values
+        # NaN всегда внизу — argsort ставит их в конец
+        return rows[np.argsort(values, kind='stable')]
+
+    # === QAbstractTableModel ===
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return str(self._table.names[row])
+            value = self._arrays[column - 1][row]
+            if np.isnan(value):
+                return ""
+            # Относительные величины в ккал/моль и проценты, абсолютные — в Хартри
+            header = self._headers[column]
+            return f"{value:.2f}" if "kcal" in header or "%" in header else f"{value:.6f}"
+        if role == Qt.TextAlignmentRole and column > 0:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._headers[section] if section < len(self._headers) else None
+        return section + 1
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder):
+        if column >= len(self._headers):
+            return
+        self.layoutAboutToBeChanged.emit()
+        self._sort_column = column
+        self._sort_order = order
+        self._rows = self._sorted(self._rows)
+        self.layoutChanged.emit()
+
+
+class ResultsDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Results")
+        self.resize(900, 600)
+        self.project_root: Path | None = None
+        self._loaded_mtime = None
+        self._analysis: thermo_analysis.ThermoAnalysis | None = None
+
+        self.model = ResultsTableModel(self)
+        # Реакции и ансамбли конформеров из analysis.json проекта
+        self.reactions_model = ResultsTableModel(self, "Reaction", derived=False)
+        self.ensembles_model = ResultsTableModel(self, "Ensemble", derived=False)
+        self.populations_model = ResultsTableModel(self, "Conformer", derived=False)
+
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter by name")
+        for model in (self.model, self.reactions_model, self.ensembles_model, self.populations_model):
+            self.filter_input.textChanged.connect(model.set_filter)
+
+        reload_btn = QPushButton("Reload")
+        reload_btn.clicked.connect(lambda: self.reload(force=True))
+
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(QLabel("Filter:"))
+        top_layout.addWidget(self.filter_input)
+        top_layout.addWidget(reload_btn)
+
+        self.table = self._make_view(self.model)
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.table, "Calculations")
+        self.tabs.addTab(self._make_view(self.reactions_model), "Reactions")
+        self.tabs.addTab(self._make_view(self.ensembles_model), "Ensembles")
+        self.tabs.addTab(self._make_view(self.populations_model), "Populations")
+
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("font-size: 9pt; color: #666;")
+
+        layout = QVBoxLayout()
+        layout.addLayout(top_layout)
+        layout.addWidget(self.tabs)
+        layout.addWidget(self.status_label)
+        self.setLayout(layout)
+
+    def _make_view(self, model: ResultsTableModel) -> QTableView:
+        view = QTableView()
+        view.setModel(model)
+        view.setSortingEnabled(True)
+        view.sortByColumn(0, Qt.AscendingOrder)
+        view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        view.setWordWrap(False)
+        # Фиксированная высота строк: представлению не нужно измерять каждую строку
+        view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        view.verticalHeader().setDefaultSectionSize(22)
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        view.horizontalHeader().setStretchLastSection(True)
+        return view
+
+    def set_project(self, project_root: Path):
+        self.project_root = Path(project_root)
+        self.setWindowTitle(f"Results - {self.project_root.name}")
+        self._analysis = None
+        self.reload(force=True)
+
+    def reload(self, force: bool = False):
+        """Перечитывает parse.json и analysis.json, если они изменились"""
+        if self.project_root is None:
+            return
+        mtime = (self._mtime(PARSE_FILE_NAME), self._mtime(thermo_analysis.ANALYSIS_FILE_NAME))
+        if not force and mtime == self._loaded_mtime:
+            return
+        if force or self._loaded_mtime is None or mtime[1] != self._loaded_mtime[1]:
+            self._analysis = None  # определения изменились — скомпилировать заново
+        self._loaded_mtime = mtime
+        table = ResultsTable.load(self.project_root)
+        self.model.set_table(table)
+        self.table.resizeColumnToContents(0)
+        status = f"{len(table)} calculations"
+        try:
+            if self._analysis is None:
+                self._analysis = thermo_analysis.ThermoAnalysis(thermo_analysis.load_definition(self.project_root))
+            result = self._analysis.compute(table)
+        except (OSError, ValueError) as e:
+            self._analysis = None
+            empty = ResultsTable([], {})
+            result = thermo_analysis.AnalysisResult(empty, empty, empty, [str(e)])
+        self.reactions_model.set_table(result.reactions)
+        self.ensembles_model.set_table(result.ensembles)
+        self.populations_model.set_table(result.populations)
+        if len(result.reactions) or len(result.ensembles):
+            status += f", {len(result.reactions)} reactions, {len(result.ensembles)} ensembles"
+        if result.warnings:
+            status += f" — {len(result.warnings)} warnings: " + "; ".join(result.warnings[:3])
+        self.status_label.setText(status)
+        self.status_label.setToolTip("\n".join(result.warnings))
+
+    def _mtime(self, file_name: str):
+        try:
+            return (self.project_root / file_name).stat().st_mtime_ns
+        except OSError:
+            return None
@@ -0,0 +1,446 @@
+# results_query.py
+"""
+Запросы к результатам многих проектов без Qt и без чтения всех parse.json.
+
+    python results_query.py index ~/calc/projA ~/calc/projB     # добавить проекты
+    python results_query.py index --scan ~/calc                  # найти все parse.json
+    python results_query.py query --name "funnel_*" --label Energy --label G \
+        --since 2026-01-01 -o energies.csv                       # .csv, .parquet, .feather, .npz
+
+    from results_query import ResultsIndex
+    with ResultsIndex() as index:
+        result = index.query(name="ts*", labels=["Energy"], since="2026-06-01")
+        result.export("ts.parquet")
+
+Индекс — SQLite (results_index.sqlite в папке приложения): проекты, расчёты и числовые
+значения parse.json в длинном формате (расчёт, метка, значение). При каждом запросе
+update() сверяет только время изменения и размер parse.json зарегистрированных проектов
+и перечитывает изменившиеся, так что запрос не открывает файлы проектов. Дата расчёта —
+время изменения его .out (в т.ч. сжатого), иначе — parse.json.
+
+В результат попадают числовые значения верхнего уровня, как в ResultsTable (вложенные
+Timings и Input — нет). Колоночный экспорт: Parquet/Feather через pyarrow (необязательная
+зависимость, pip install pyarrow), без него — .npz NumPy с теми же столбцами.
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import sqlite3
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+import compressed_io
+from results_store import PARSE_FILE_NAME
+from sweep import INPUTS_DIR_NAME, RESULTS_DIR_NAME
+
+try:
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+INDEX_FILE_NAME = "results_index.sqlite"
+SCHEMA_VERSION = 1
+# Имена проектов, расчётов и даты в результате и в экспортированных файлах
+KEY_COLUMNS = ("project", "calculation", "date")
+COLUMNAR_SUFFIXES = (".parquet", ".feather", ".arrow", ".npz")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER,
+    size INTEGER
+);
+CREATE TABLE IF NOT EXISTS calculations (
+    id INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    date REAL NOT NULL,
+    UNIQUE (project_id, name)
+);
+CREATE INDEX IF NOT EXISTS calculations_name ON calculations(name);
+CREATE INDEX IF NOT EXISTS calculations_date ON calculations(date);
+CREATE TABLE IF NOT EXISTS labels (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS vals (
+    calc_id INTEGER NOT NULL REFERENCES calculations(id) ON DELETE CASCADE,
+    label_id INTEGER NOT NULL REFERENCES labels(id),
+    value REAL NOT NULL,
+    PRIMARY KEY (calc_id, label_id)
+) WITHOUT ROWID;
+-- Покрывающий: выборка по меткам не обращается к самой таблице
+CREATE INDEX IF NOT EXISTS vals_label ON vals(label_id, calc_id, value);
+"""
+
+
+def default_index_path() -> Path:
+    # Папка приложения, как get_app_dir в orca_cli (без импорта Qt)
+    if getattr(sys, 'frozen', False):
+        return Path(sys.executable).parent / INDEX_FILE_NAME
+    return Path(__file__).parent / INDEX_FILE_NAME
+
+
+def _timestamp(value) -> float | None:
+    """datetime, date, ISO-строка или число (Unix-время) → Unix-время"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    return value.timestamp()
+
+
+def _glob(pattern: str) -> str:
+    # fnmatch → SQLite GLOB: отличается только отрицание в скобках
+    return pattern.replace("[!", "[^")
+
+
+def _calc_date(project_root: str, name: str, default: float) -> float:
+    # Строки вместо Path: на десятках тысяч расчётов pathlib заметно дороже самих stat
+    out_path = os.path.join(project_root, name, RESULTS_DIR_NAME, f"{name}.out")
+    for candidate in (out_path, *(out_path + suffix for suffix in compressed_io.COMPRESSED_SUFFIXES)):
+        try:
+            return os.stat(candidate).st_mtime
+        except OSError:
+            continue
+    return default
+
+
+def _numeric(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+@dataclass
+class QueryResult:
+    """Результат запроса в колоночном виде: строки — расчёты, столбцы — метки (NaN — нет значения)"""
+    projects: np.ndarray
+    names: np.ndarray
+    dates: np.ndarray                     # Unix-время
+    columns: dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def labels(self) -> list[str]:
+        return list(self.columns)
+
+    def column(self, label: str) -> np.ndarray:
+        column = self.columns.get(label)
+        if column is None:
+            return np.full(len(self.names), np.nan)
+        return column
+
+    def _key_arrays(self) -> dict[str, np.ndarray]:
+        return {"project": self.projects, "calculation": self.names, "date": self.dates}
+
+    def write_csv(self, f):
+        """Один расчёт — одна строка; дата — ISO, пропуски — пустые ячейки"""
+        writer = csv.writer(f)
+        writer.writerow([*KEY_COLUMNS, *self.columns])
+        values = np.column_stack(list(self.columns.values())) if self.columns else None
+        for i in range(len(self.names)):
+            date = datetime.datetime.fromtimestamp(self.dates[i]).isoformat(timespec='seconds')
+            row = [self.projects[i], self.names[i], date]
+            if values is not None:
+                row += ["" if np.isnan(v) else repr(float(v)) for v in values[i]]
+            writer.writerow(row)
+
+    def to_csv(self, path: Path):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            self.write_csv(f)
+
+    def to_arrow(self):
+        if pyarrow is None:
+            raise RuntimeError("pyarrow is not installed (pip install pyarrow)")
+        arrays = {"project": pyarrow.array(self.projects.tolist(), pyarrow.string()),
+                  "calculation": pyarrow.array(self.names.tolist(), pyarrow.string()),
+                  "date": pyarrow.array((self.dates * 1e6).astype('int64'), pyarrow.timestamp('us'))}
+        for label, column in self.columns.items():
+            arrays[label] = pyarrow.array(column, from_pandas=True)   # NaN → null
+        return pyarrow.table(arrays)
+
+    def to_npz(self, path: Path):
+        # Метки — ключи архива; столбцы "project", "calculation", "date" — первыми
+        np.savez(path, **self._key_arrays(), **self.columns)
+
+    def export(self, path: Path) -> Path:
+        """Запись по расширению (.csv, .parquet, .feather/.arrow, .npz); возвращает записанный файл"""
+        path = Path(path)
+        suffix = path.suffix.lower()
+        if suffix == ".csv":
+            self.to_csv(path)
+        elif suffix in (".parquet", ".feather", ".arrow"):
+            if pyarrow is None:
+                path = path.with_suffix(".npz")
+                print(f"[WARN] pyarrow is not installed, writing {path.name} instead")
+                self.to_npz(path)
+            elif suffix == ".parquet":
+                pyarrow.parquet.write_table(self.to_arrow(), path)
+            else:
+                pyarrow.feather.write_feather(self.to_arrow(), path)
+        elif suffix == ".npz":
+            self.to_npz(path)
+        else:
+            raise ValueError(f"Unknown export format: {path.name} (use .csv or {', '.join(COLUMNAR_SUFFIXES)})")
+        return path
+
+
+class ResultsIndex:
+    """Индекс parse.json многих проектов в SQLite"""
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path) if path is not None else default_index_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        # WAL: запросы из блокнота не мешают обновлению индекса из другого процесса
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f"{self.path.name}: unsupported index version {version}")
+        with self._db:
+            self._db.executescript(_SCHEMA)
+            self._db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # === Проекты ===
+    def projects(self) -> list[Path]:
+        return [Path(root) for root, in self._db.execute("SELECT root FROM projects ORDER BY root")]
+
+    def add_project(self, project_root: Path):
+        """Регистрирует проект (папку с parse.json); значения читаются при update()"""
+        with self._db:
+            self._db.execute("INSERT OR IGNORE INTO projects (root) VALUES (?)",
+                             (str(Path(project_root).resolve()),))
+
+    def remove_project(self, project_root: Path):
+        with self._db:
+            self._db.execute("DELETE FROM projects WHERE root = ?", (str(Path(project_root).resolve()),))
+
+    def scan(self, folder: Path) -> int:
+        """Регистрирует все папки с parse.json под folder; возвращает число найденных"""
+        found = 0
+        for dirpath, dirnames, filenames in os.walk(folder):
+            # В папках расчётов (Inputs/, Results/) проектов не бывает
+            dirnames[:] = [d for d in dirnames if d not in (INPUTS_DIR_NAME, RESULTS_DIR_NAME) and not d.startswith(".")]
+            if PARSE_FILE_NAME in filenames:
+                self.add_project(Path(dirpath))
+                found += 1
+        return found
+
+    def update(self) -> int:
+        """Перечитывает изменившиеся parse.json; возвращает число обновлённых проектов"""
+        updated = 0
+        rows = self._db.execute("SELECT id, root, mtime_ns, size FROM projects").fetchall()
+        for project_id, root, mtime_ns, size in rows:
+            parse_file = Path(root) / PARSE_FILE_NAME
+            try:
+                stat = parse_file.stat()
+            except OSError:
+                stat = None
+            if stat is None:
+                if mtime_ns is not None:
+                    # parse.json исчез — проект остаётся зарегистрированным, но пустым
+                    with self._db:
+                        self._db.execute("DELETE FROM calculations WHERE project_id = ?", (project_id,))
+                        self._db.execute("UPDATE projects SET mtime_ns = NULL, size = NULL WHERE id = ?",
+                                         (project_id,))
+                    updated += 1
+                continue
+            if (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size):
+                continue
+            try:
+                with open(parse_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[WARN] Cannot read {parse_file}: {e}")
+                continue
+            updated += self._load_project(project_id, Path(root), data if isinstance(data, dict) else {}, stat)
+        return updated
+
+    def _label_ids(self, labels: list[str]) -> dict[str, int]:
+        self._db.executemany("INSERT OR IGNORE INTO labels (label) VALUES (?)", ((label,) for label in labels))
+        return dict(self._db.execute("SELECT label, id FROM labels"))
+
+    def _load_project(self, project_id: int, root: Path, data: dict, stat: os.stat_result) -> bool:
+        calcs = [(name, values) for name, values in data.items() if isinstance(values, dict)]
+        dates = [_calc_date(str(root), name, stat.st_mtime) for name, _ in calcs]
+        with self._db:
+            # Индекс обновляют и окно, и демон, и CLI: блокировка записи берётся сразу,
+            # а не при первой вставке, когда снимок чтения другого процесса уже устарел
+            self._db.execute("BEGIN IMMEDIATE")
+            current = self._db.execute("SELECT mtime_ns, size FROM projects WHERE id = ?", (project_id,)).fetchone()
+            if current == (stat.st_mtime_ns, stat.st_size):
+                return False  # другой процесс уже перечитал этот parse.json
+            self._db.execute("DELETE FROM calculations WHERE project_id = ?", (project_id,))
+            # Метки — в порядке первого появления (не обход set): от их id зависит порядок
+            # столбцов query() и экспорта, он должен быть одинаковым от запуска к запуску
+            labels = list(dict.fromkeys(label for _, values in calcs for label, value in values.items()
+                                        if _numeric(value)))
+            label_ids = self._label_ids(labels)
+            self._db.executemany(
+                "INSERT INTO calculations (project_id, name, date) VALUES (?, ?, ?)",
+                ((project_id, name, date) for (name, _), date in zip(calcs, dates)),
+            )
+            calc_ids = dict(self._db.execute("SELECT name, id FROM calculations WHERE project_id = ?",
+                                             (project_id,)))
+            self._db.executemany(
+                "INSERT INTO vals (calc_id, label_id, value) VALUES (?, ?, ?)",
+                ((calc_ids[name], label_ids[label], float(value)) for name, values in calcs
+                 for label, value in values.items() if _numeric(value)),
+            )
+            self._db.execute("UPDATE projects SET mtime_ns = ?, size = ? WHERE id = ?",
+                             (stat.st_mtime_ns, stat.st_size, project_id))
+        return True
+
+    # === Запросы ===
+    def labels(self) -> list[str]:
+        return [label for label, in self._db.execute(
+            "SELECT label FROM labels WHERE id IN (SELECT DISTINCT label_id FROM vals) ORDER BY id")]
+
+    def query(self, projects: list[Path] = None, name: str = None, labels: list[str] = None,
+              since=None, until=None, update: bool = True) -> QueryResult:
+        """
+        Расчёты по проектам, шаблону имени (fnmatch, с учётом регистра), меткам и дате
+        (since ≤ дата < until). labels=None — все метки; строки упорядочены по проекту и имени.
+        """
+        if update:
+            self.update()
+        where, params = [], []
+        if projects is not None:
+            roots = [str(Path(p).resolve()) for p in projects]
+            where.append(f"p.root IN ({', '.join('?' * len(roots))})")
+            params += roots
+        if name:
+            where.append("c.name GLOB ?")
+            params.append(_glob(name))
+        if since is not None:
+            where.append("c.date >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            where.append("c.date < ?")
+            params.append(_timestamp(until))
+        condition = " AND ".join(where) or "1"
+
+        calcs = self._db.execute(
+            f"SELECT c.id, p.root, c.name, c.date FROM calculations c JOIN projects p ON p.id = c.project_id "
+            f"WHERE {condition} ORDER BY p.root, c.name", params).fetchall()
+        label_ids = dict(self._db.execute("SELECT label, id FROM labels ORDER BY id"))
+        order = list(dict.fromkeys(labels)) if labels is not None else list(label_ids)
+        value_where, value_params = list(where), list(params)
+        if labels is not None:
+            selected = [label_ids[label] for label in order if label in label_ids]
+            value_where.append(f"v.label_id IN ({', '.join('?' * len(selected))})" if selected else "0")
+            value_params += selected
+        # Без фильтров по проекту, имени и дате соединения не нужны
+        joins = "JOIN calculations c ON c.id = v.calc_id JOIN projects p ON p.id = c.project_id " if where else ""
+        values = np.array(self._db.execute(
+            f"SELECT v.calc_id, v.label_id, v.value FROM vals v {joins}WHERE {' AND '.join(value_where) or '1'}",
+            value_params).fetchall(), dtype=np.float64).reshape(-1, 3)
+
+        ids = np.array([row[0] for row in calcs], dtype=np.int64)
+        result = QueryResult(
+            projects=np.array([row[1] for row in calcs], dtype=str),
+            names=np.array([row[2] for row in calcs], dtype=str),
+            dates=np.array([row[3] for row in calcs], dtype=np.float64),
+        )
+        matrix = np.full((len(order), len(ids)), np.nan)
+        if len(values):
+            # Строка расчёта по id — бинарным поиском в отсортированных id, столбец — по id метки
+            sorter = np.argsort(ids)
+            rows = sorter[np.searchsorted(ids, values[:, 0].astype(np.int64), sorter=sorter)]
+            column_of = np.full(max(label_ids.values()) + 1, -1)
+            for i, label in enumerate(order):
+                if label in label_ids:
+                    column_of[label_ids[label]] = i
+            matrix[column_of[values[:, 1].astype(np.int64)], rows] = values[:, 2]
+        if labels is None:
+            # Все метки — только те, что есть у найденных расчётов
+            present = ~np.all(np.isnan(matrix), axis=1)
+            order = [label for label, keep in zip(order, present) if keep]
+            matrix = matrix[present]
+        result.columns = {label: matrix[i] for i, label in enumerate(order)}
+        return result
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="results_query", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", type=Path, default=None, help=f"index file (default: app folder/{INDEX_FILE_NAME})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index_cmd = commands.add_parser("index", help="register projects and update the index")
+    index_cmd.add_argument("projects", nargs="*", type=Path, help="project folders with parse.json")
+    index_cmd.add_argument("--scan", type=Path, action="append", default=[], metavar="DIR",
+                           help="register every folder with parse.json under DIR")
+    index_cmd.add_argument("--remove", type=Path, action="append", default=[], metavar="PROJECT",
+                           help="forget a project")
+
+    query_cmd = commands.add_parser("query", help="query the index and print or export the results")
+    query_cmd.add_argument("--project", type=Path, action="append", help="limit to this project (repeatable)")
+    query_cmd.add_argument("--name", help="calculation name pattern, e.g. 'ts*'")
+    query_cmd.add_argument("--label", action="append", help="value label, e.g. Energy (repeatable; default: all)")
+    query_cmd.add_argument("--since", help="ISO date/time, inclusive")
+    query_cmd.add_argument("--until", help="ISO date/time, exclusive")
+    query_cmd.add_argument("-o", "--output", type=Path,
+                           help=f"export to .csv or {', '.join(COLUMNAR_SUFFIXES)} instead of printing")
+    args = parser.parse_args(argv)
+
+    try:
+        index = ResultsIndex(args.index)
+    except (OSError, sqlite3.Error, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    with index:
+        if args.command == "index":
+            for project in args.projects:
+                if not (project / PARSE_FILE_NAME).is_file():
+                    print(f"[WARN] No {PARSE_FILE_NAME} in {project} yet")
+                index.add_project(project)
+            for folder in args.scan:
+                print(f"{index.scan(folder)} project(s) found under {folder}")
+            for project in args.remove:
+                index.remove_project(project)
+            updated = index.update()
+            print(f"{len(index.projects())} project(s) indexed, {updated} updated")
+            return 0
+
+        try:
+            result = index.query(args.project, args.name, args.label, args.since, args.until)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        if args.output:
+            try:
+                written = result.export(args.output)
+            except (OSError, ValueError, RuntimeError) as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return 2
+            print(f"{len(result)} calculation(s), {len(result.labels)} label(s) → {written}")
+            return 0
+        result.write_csv(sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# results_store.py
+import json
+from pathlib import Path
+import numpy as np
+
+HARTREE_TO_KCAL = 627.509474
+
+PARSE_FILE_NAME = "parse.json"
+
+
+class ResultsTable:
+    """
+    Колоночное представление parse.json: строки — расчёты, столбцы — метки
+    (Energy, ZPE, ...). Каждый столбец — массив float64, пропуски — NaN.
+    """
+
+    def __init__(self, names: list[str], columns: dict[str, np.ndarray]):
+        self.names = np.array(names, dtype=str)
+        self.columns = columns
+
+    @property
+    def labels(self) -> list[str]:
+        return list(self.columns)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ResultsTable":
+        names = sorted(data)
+        labels = []
+        seen = set()
+        for name in names:
+            for label, value in data[name].items():
+                # В таблицу попадают только числовые значения
+                if label not in seen and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    seen.add(label)
+                    labels.append(label)
+        columns = {label: np.full(len(names), np.nan) for label in labels}
+        for row, name in enumerate(names):
+            for label, value in data[name].items():
+                column = columns.get(label)
+                if column is not None and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    column[row] = value
+        return cls(names, columns)
+
+    @classmethod
+    def load(cls, project_root: Path) -> "ResultsTable":
+        parse_file = Path(project_root) / PARSE_FILE_NAME
+        data = {}
+        if parse_file.is_file():
+            try:
+                with open(parse_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                data = {}
+        return cls.from_dict(data if isinstance(data, dict) else {})
+
+    def column(self, label: str) -> np.ndarray:
+        column = self.columns.get(label)
+        if column is None:
+            return np.full(len(self.names), np.nan)
+        return column
+
+
+def relative_kcal(values: np.ndarray) -> np.ndarray:
+    """Относительные энергии в ккал/моль от минимума по столбцу"""
+    if values.size == 0 or np.all(np.isnan(values)):
+        return np.full(values.shape, np.nan)
+    return (values - np.nanmin(values)) * HARTREE_TO_KCAL
+
+
+# Производные столбцы: (название, функция над таблицей). Считаются векторно, целиком
+DERIVED_COLUMNS = [
+    ("ΔE, kcal/mol", lambda t: relative_kcal(t.column("Energy"))),
+    ("E+ZPE", lambda t: t.column("Energy") + t.column("ZPE")),
+    ("Δ(E+ZPE), kcal/mol", lambda t: relative_kcal(t.column("Energy") + t.column("ZPE"))),
+]
@@ -0,0 +1,114 @@
+# scratch.py
+import fnmatch
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from orca_input import parse_input, with_block_value, with_coordinates
+
+# Что возвращается из scratch в папку входа (остальное — временные файлы ORCA)
+DEFAULT_PATTERNS = [
+    "*.gbw", "*.xyz", "*.hess", "*.engrad", "*.opt", "*.property.txt", "*.interp",
+    "*.allxyz", "*.molden*", "*.cube", "*.nbo", "*.loc", "*.uno", "*.qro",
+]
+
+_DIR_PREFIX = "orcaui_"
+_PID_FILE = ".orcaui_pid"
+
+
+def pid_alive(pid: int) -> bool:
+    """Процесс существует (в том числе чужой — тогда kill даёт PermissionError)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def cleanup_stale(scratch_root: Path) -> int:
+    """Удаляет папки заданий, владелец которых (процесс OrcaUI) уже не существует"""
+    removed = 0
+    try:
+        entries = list(os.scandir(scratch_root))
+    except OSError:
+        return 0
+    for entry in entries:
+        if not (entry.name.startswith(_DIR_PREFIX) and entry.is_dir(follow_symlinks=False)):
+            continue
+        try:
+            pid = int((Path(entry.path) / _PID_FILE).read_text().strip())
+        except (OSError, ValueError):
+            continue
+        if not pid_alive(pid):
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def _stage_file(reference: str, inp_dir: Path, workdir: Path, staged: set[str]) -> str:
+    """Копирует файл, на который ссылается вход, в workdir; возвращает новое (локальное) имя"""
+    source = Path(reference)
+    if not source.is_absolute():
+        source = inp_dir / source
+    if not source.is_file():
+        # Пусть ORCA сама сообщит об ошибке — оставляем абсолютный путь
+        return str(source.resolve())
+    name = source.name
+    shutil.copy2(source, workdir / name)
+    staged.add(name)
+    return name
+
+
+def stage_job(inp_path: Path, scratch_root: Path) -> tuple[Path, set[str]]:
+    """
+    Готовит папку задания в scratch: копия входа и файлов, которые он читает
+    (%moinp, * xyzfile, InHessName). Ссылки в копии входа заменяются на локальные имена.
+    Возвращает папку и имена размещённых файлов (их не нужно копировать обратно).
+    """
+    inp_path = Path(inp_path)
+    scratch_root = Path(scratch_root)
+    scratch_root.mkdir(parents=True, exist_ok=True)
+    workdir = Path(tempfile.mkdtemp(prefix=f"{_DIR_PREFIX}{inp_path.stem}_", dir=scratch_root))
+    try:
+        (workdir / _PID_FILE).write_text(str(os.getpid()))
+        staged = {inp_path.name, _PID_FILE}
+        inp = parse_input(inp_path)
+        inp_dir = inp_path.parent
+
+        if inp.moinp:
+            name = _stage_file(inp.moinp, inp_dir, workdir, staged)
+            inp = with_block_value(inp, "moinp", "", f'"{name}"')
+        if inp.coord_file and inp.coord_start is not None:
+            name = _stage_file(inp.coord_file, inp_dir, workdir, staged)
+            inp = with_coordinates(inp, inp.charge, inp.mult, coord_file=name)
+        hess = inp.blocks.get("geom", {}).get("inhessname")
+        if hess:
+            name = _stage_file(hess.strip('"\''), inp_dir, workdir, staged)
+            inp = with_block_value(inp, "geom", "InHessName", f'"{name}"')
+
+        with open(workdir / inp_path.name, 'w', encoding='utf-8') as f:
+            f.write(inp.text)
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+    return workdir, staged
+
+
+def collect_results(workdir: Path, dest_dir: Path, patterns: list[str], staged: set[str]) -> list[Path]:
+    """Переносит результаты по маскам из scratch в папку входа"""
+    collected = []
+    for entry in os.scandir(workdir):
+        if entry.name in staged or not entry.is_file():
+            continue
+        if any(fnmatch.fnmatch(entry.name, pattern) for pattern in patterns):
+            target = Path(dest_dir) / entry.name
+            shutil.move(entry.path, target)
+            collected.append(target)
+    return collected
+
+
+def cleanup(workdir: Path):
+    shutil.rmtree(workdir, ignore_errors=True)
@@ -1,11 +1,32 @@
 # settings.py
 from PySide6.QtWidgets import (
     QDialog, QLabel, QLineEdit, QPushButton, QComboBox,
-    QVBoxLayout, QHBoxLayout, QFileDialog, QCheckBox
+    QVBoxLayout, QHBoxLayout, QFileDialog, QCheckBox, QSpinBox, QDoubleSpinBox
 )
+import compressed_io
+import cpu_topology
+import disk_guard
+import scratch
+
+
+def limit_spin(minutes: float) -> QDoubleSpinBox:
+    """Поле ограничения сторожа в минутах; 0 — «No limit»"""
+    # Дробные минуты (--stall-limit 0.5 в orca_cli, settings.json) не обнуляются при сохранении
+    spin = QDoubleSpinBox()
+    spin.setRange(0, 60 * 24 * 90)
+    spin.setDecimals(2)
+    spin.setSuffix(" min")
+    spin.setSpecialValueText("No limit")
+    spin.setValue(float(minutes or 0))
+    return spin
+
 
 class SettingsDialog(QDialog):
-    def __init__(self, orca_path: str, chemcraft_linux: str, chemcraft_windows: str, locale: str,  disable_gpu: bool, parent=None):
+    def __init__(self, orca_path: str, chemcraft_linux: str, chemcraft_windows: str, locale: str,  disable_gpu: bool,
+                 scratch_dir: str = "", scratch_patterns: list[str] = None, scratch_by_default: bool = False,
+                 pin_cpus: bool = False, wall_time_limit: float = 0, stall_limit: float = 0,
+                 compress_outputs: str = "", artifact_retention: str = disk_guard.KEEP,
+                 disk_reserve_mb: float = disk_guard.DEFAULT_RESERVE_MB, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Settings")
         self.resize(600, 220)
@@ -61,6 +82,83 @@ class SettingsDialog(QDialog):
         self.disable_gpu_checkbox = QCheckBox("Disable GPU for ORCA (prevents crashes)")
         self.disable_gpu_checkbox.setChecked(disable_gpu)
 
+        self.pin_cpus_checkbox = QCheckBox("Pin each job to its own CPU cores (NUMA-aware, Linux)")
+        self.pin_cpus_checkbox.setChecked(pin_cpus)
+        self.pin_cpus_checkbox.setEnabled(cpu_topology.PINNING_SUPPORTED)
+
+        # Сторож очереди: задание прерывается, очередь идёт дальше
+        self.wall_time_spin = limit_spin(wall_time_limit)
+        self.stall_spin = limit_spin(stall_limit)
+
+        limits_layout = QHBoxLayout()
+        limits_layout.addWidget(QLabel("Wall-time limit:"))
+        limits_layout.addWidget(self.wall_time_spin)
+        limits_layout.addWidget(QLabel("Stall limit (no output):"))
+        limits_layout.addWidget(self.stall_spin)
+        limits_layout.addStretch()
+
+        # Scratch: быстрый локальный диск (tmpfs/NVMe) для временных файлов ORCA
+        self.scratch_input = QLineEdit(scratch_dir)
+        self.scratch_input.setPlaceholderText("e.g. /dev/shm or /scratch (empty: run next to the input)")
+        scratch_browse = QPushButton("Browse...")
+        scratch_browse.clicked.connect(self._browse_scratch_dir)
+
+        scratch_layout = QHBoxLayout()
+        scratch_layout.addWidget(QLabel("Scratch directory:"))
+        scratch_layout.addWidget(self.scratch_input)
+        scratch_layout.addWidget(scratch_browse)
+
+        self.scratch_patterns_input = QLineEdit(" ".join(scratch_patterns or []))
+        self.scratch_patterns_input.setPlaceholderText(" ".join(scratch.DEFAULT_PATTERNS))
+        self.scratch_patterns_input.setToolTip("Files copied back from scratch (space-separated masks)")
+
+        scratch_patterns_layout = QHBoxLayout()
+        scratch_patterns_layout.addWidget(QLabel("Copy back:"))
+        scratch_patterns_layout.addWidget(self.scratch_patterns_input)
+
+        self.scratch_default_checkbox = QCheckBox("Run all jobs in scratch by default")
+        self.scratch_default_checkbox.setChecked(scratch_by_default)
+
+        # Сжатие .out и траекторий после задания; окно читает их прозрачно
+        self.compress_combo = QComboBox()
+        self.compress_combo.addItem("Off", "")
+        for method in compressed_io.SUFFIXES:
+            self.compress_combo.addItem(method, method)
+            if method not in compressed_io.available_methods():
+                # Нет модуля zstandard — пункт виден, но недоступен
+                self.compress_combo.model().item(self.compress_combo.count() - 1).setEnabled(False)
+        self.compress_combo.setCurrentIndex(max(0, self.compress_combo.findData(compress_outputs or "")))
+
+        compress_layout = QHBoxLayout()
+        compress_layout.addWidget(QLabel("Compress finished outputs:"))
+        compress_layout.addWidget(self.compress_combo)
+        compress_layout.addStretch()
+
+        # Временные файлы ORCA успешных заданий и запас места на диске
+        self.retention_combo = QComboBox()
+        for label, policy in (("Keep", disk_guard.KEEP), ("Delete", disk_guard.DELETE),
+                              ("Archive (.tar.gz)", disk_guard.ARCHIVE)):
+            self.retention_combo.addItem(label, policy)
+        self.retention_combo.setCurrentIndex(max(0, self.retention_combo.findData(artifact_retention)))
+        self.retention_combo.setToolTip("Temporary files (.tmp, .densities, .cis) of successful jobs; "
+                                        "files later jobs read are kept")
+
+        self.disk_reserve_spin = QSpinBox()
+        self.disk_reserve_spin.setRange(0, 1024 * 1024)
+        self.disk_reserve_spin.setSingleStep(1024)
+        self.disk_reserve_spin.setSuffix(" MB")
+        self.disk_reserve_spin.setSpecialValueText("Off")
+        self.disk_reserve_spin.setValue(int(disk_reserve_mb or 0))
+        self.disk_reserve_spin.setToolTip("The queue waits before a job while less than this plus the space "
+                                          "similar jobs used is free")
+
+        disk_layout = QHBoxLayout()
+        disk_layout.addWidget(QLabel("Temporary files:"))
+        disk_layout.addWidget(self.retention_combo)
+        disk_layout.addWidget(QLabel("Keep free on disk:"))
+        disk_layout.addWidget(self.disk_reserve_spin)
+        disk_layout.addStretch()
+
         # Кнопки
         btn_ok = QPushButton("Apply")
         btn_cancel = QPushButton("Cancel")
@@ -77,15 +175,27 @@ class SettingsDialog(QDialog):
         layout.addLayout(chemcraft_linux_layout)
         layout.addLayout(chemcraft_windows_layout)
         layout.addLayout(locale_layout)
+        layout.addWidget(self.disable_gpu_checkbox)
+        layout.addWidget(self.pin_cpus_checkbox)
+        layout.addLayout(limits_layout)
+        layout.addLayout(scratch_layout)
+        layout.addLayout(scratch_patterns_layout)
+        layout.addWidget(self.scratch_default_checkbox)
+        layout.addLayout(compress_layout)
+        layout.addLayout(disk_layout)
         layout.addLayout(btn_layout)
         self.setLayout(layout)
-        layout.addWidget(self.disable_gpu_checkbox)
 
     def _browse_file(self, line_edit: QLineEdit, title: str):
         path, _ = QFileDialog.getOpenFileName(self, title, "", "Executable (*)")
         if path:
             line_edit.setText(path)
 
+    def _browse_scratch_dir(self):
+        path = QFileDialog.getExistingDirectory(self, "Select scratch directory", self.scratch_input.text())
+        if path:
+            self.scratch_input.setText(path)
+
     def get_orca_path(self) -> str:
         return self.orca_input.text()
 
@@ -99,4 +209,31 @@ class SettingsDialog(QDialog):
         return self.locale_combo.currentText()
     
     def get_disable_gpu(self) -> bool:
-        return self.disable_gpu_checkbox.isChecked()
\ No newline at end of file
+        return self.disable_gpu_checkbox.isChecked()
+
+    def get_scratch_dir(self) -> str:
+        return self.scratch_input.text().strip()
+
+    def get_scratch_patterns(self) -> list[str]:
+        return self.scratch_patterns_input.text().split()
+
+    def get_scratch_by_default(self) -> bool:
+        return self.scratch_default_checkbox.isChecked()
+
+    def get_pin_cpus(self) -> bool:
+        return self.pin_cpus_checkbox.isChecked()
+
+    def get_wall_time_limit(self) -> float:
+        return self.wall_time_spin.value()
+
+    def get_stall_limit(self) -> float:
+        return self.stall_spin.value()
+
+    def get_compress_outputs(self) -> str:
+        return self.compress_combo.currentData() or ""
+
+    def get_artifact_retention(self) -> str:
+        return self.retention_combo.currentData()
+
+    def get_disk_reserve_mb(self) -> int:
+        return self.disk_reserve_spin.value()
@@ -0,0 +1,183 @@
+# sweep.py
+import itertools
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from orca_input import (
+    Atom, OrcaInput, parse_input, with_keywords, with_block_value, with_coordinates,
+    is_method_keyword, is_basis_keyword, electrons_of, compatible_mult,
+)
+
+INPUTS_DIR_NAME = "Inputs"
+RESULTS_DIR_NAME = "Results"
+
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9.+-]+")
+
+
+@dataclass
+class SweepSpec:
+    """Шаблон и списки значений; пустой список — параметр берётся из шаблона"""
+    template: Path
+    geometries: list[Path] = field(default_factory=list)   # .xyz, в т.ч. многокадровые (ансамбли конформеров)
+    functionals: list[str] = field(default_factory=list)
+    basis_sets: list[str] = field(default_factory=list)
+    charges: list[int] = field(default_factory=list)
+    multiplicities: list[int] = field(default_factory=list)
+    temperatures: list[float] = field(default_factory=list)
+    prefix: str = ""
+
+
+@dataclass
+class SweepPoint:
+    name: str
+    params: dict
+    inp: OrcaInput
+
+
+def safe_name(text: str) -> str:
+    return _UNSAFE_RE.sub("_", str(text)).strip("_")
+
+
+def read_xyz_frames(path: Path) -> list[tuple[str, list[Atom]]]:
+    """Кадры .xyz: (имя, атомы). Многокадровый файл даёт имена stem_001, stem_002, ..."""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        lines = f.read().splitlines()
+    frames = []
+    i = 0
+    while i < len(lines):
+        if not lines[i].strip():
+            i += 1
+            continue
+        try:
+            count = int(lines[i].split()[0])
+        except (ValueError, IndexError):
+            raise ValueError(f"{path.name}: expected atom count at line {i + 1}")
+        atoms = []
+        for line in lines[i + 2:i + 2 + count]:
+            tokens = line.split()
+            try:
+                atoms.append(Atom(tokens[0].capitalize(), float(tokens[1]), float(tokens[2]), float(tokens[3])))
+            except (ValueError, IndexError):
+                raise ValueError(f"{path.name}: bad coordinate line '{line.strip()}'")
+        if len(atoms) != count:
+            raise ValueError(f"{path.name}: frame at line {i + 1} is truncated")
+        frames.append(atoms)
+        i += 2 + count
+    if len(frames) == 1:
+        return [(path.stem, frames[0])]
+    return [(f"{path.stem}_{n:03d}", atoms) for n, atoms in enumerate(frames, start=1)]
+
+
+def _replace_keyword(keywords: list[str], predicate, value: str) -> list[str]:
+    """Меняет первое подходящее ключевое слово; если нет — добавляет"""
+    result = list(keywords)
+    for n, keyword in enumerate(result):
+        if predicate(keyword):
+            result[n] = value
+            return result
+    if predicate is is_method_keyword:
+        return [value] + result
+    return result + [value]
+
+
+def expand_sweep(spec: SweepSpec) -> list[SweepPoint]:
+    """
+    Декартово произведение параметров. Шаблон правится и разбирается один раз на
+    сочетание метод × базис × температура; геометрии и заряды — быстрая подстановка.
+    """
+    template = parse_input(spec.template)
+    if template.errors:
+        raise ValueError(f"{spec.template.name}: {template.errors[0]}")
+
+    geometries = []
+    for path in spec.geometries:
+        geometries.extend(read_xyz_frames(path))
+    # Без геометрий — координаты шаблона
+    geometry_axis = geometries or [(None, None)]
+
+    prefix = safe_name(spec.prefix or Path(spec.template).stem)
+    functionals = spec.functionals or [None]
+    basis_sets = spec.basis_sets or [None]
+    temperatures = spec.temperatures or [None]
+    charges = spec.charges or [None]
+    mults = spec.multiplicities or [None]
+
+    points = []
+    for functional, basis, temperature in itertools.product(functionals, basis_sets, temperatures):
+        base = template
+        keywords = list(template.keywords)
+        if functional:
+            keywords = _replace_keyword(keywords, is_method_keyword, functional)
+        if basis:
+            keywords = _replace_keyword(keywords, is_basis_keyword, basis)
+        if keywords != template.keywords:
+            base = with_keywords(base, keywords)
+        if temperature is not None:
+            base = with_block_value(base, "freq", "Temp", f"{temperature:g}")
+
+        for (geom_name, atoms), charge, mult in itertools.product(geometry_axis, charges, mults):
+            q = template.charge if charge is None else charge
+            if q is None:
+                raise ValueError(f"{spec.template.name}: template has no charge/multiplicity")
+            if mult is None:
+                # Мультиплетность шаблона, исправленная по чётности электронов
+                m = compatible_mult(electrons_of(atoms if atoms is not None else template.atoms, q),
+                                    template.mult or 1)
+            else:
+                m = mult
+            inp = with_coordinates(base, q, m, atoms=atoms)
+
+            params = {}
+            parts = [prefix]
+            if geom_name is not None:
+                params["geometry"] = geom_name
+                parts.append(geom_name)
+            if functional:
+                params["functional"] = functional
+                parts.append(functional)
+            if basis:
+                params["basis"] = basis
+                parts.append(basis)
+            if charge is not None:
+                params["charge"] = q
+                parts.append(f"q{q}")
+            if charge is not None or mult is not None:
+                params["mult"] = m
+                parts.append(f"m{m}")
+            if temperature is not None:
+                params["temperature"] = temperature
+                parts.append(f"T{temperature:g}")
+            points.append(SweepPoint(safe_name("_".join(parts)), params, inp))
+
+    names = [p.name for p in points]
+    if len(set(names)) != len(names):
+        raise ValueError("Sweep produces duplicate calculation names (repeated geometry names?)")
+    return points
+
+
+def write_sweep(points: list[SweepPoint], out_dir: Path, overwrite: bool = False) -> list[tuple]:
+    """
+    Раскладывает входы по папкам расчётов: out_dir/<name>/Inputs/<name>.inp и
+    out_dir/<name>/Results/. Возвращает задания (inp, out, display_name) для очереди.
+    """
+    out_dir = Path(out_dir)
+    if not overwrite:
+        existing = [p.name for p in points if (out_dir / p.name).exists()]
+        if existing:
+            raise FileExistsError(
+                f"{len(existing)} calculation folder(s) already exist, e.g. {out_dir / existing[0]}"
+            )
+    jobs = []
+    for point in points:
+        calc_dir = out_dir / point.name
+        inputs_dir = calc_dir / INPUTS_DIR_NAME
+        results_dir = calc_dir / RESULTS_DIR_NAME
+        inputs_dir.mkdir(parents=True, exist_ok=True)
+        results_dir.mkdir(exist_ok=True)
+        inp_path = inputs_dir / f"{point.name}.inp"
+        with open(inp_path, 'w', encoding='utf-8') as f:
+            f.write(point.inp.text)
+        jobs.append((inp_path, results_dir / f"{point.name}.out", point.name))
+    return jobs
@@ -0,0 +1,138 @@
+# sweep_dialog.py
+import re
+from pathlib import Path
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QLineEdit,
+    QPushButton, QComboBox, QListWidget, QFileDialog, QGroupBox
+)
+
+from sweep import SweepSpec
+
+
+def _split(text: str) -> list[str]:
+    return [t for t in re.split(r"[,;\s]+", text.strip()) if t]
+
+
+class SweepDialog(QDialog):
+    """Перебор параметров: шаблон × геометрии × методы × базисы × заряды × температуры"""
+
+    def __init__(self, templates: list[Path], target_dir: Path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Parameter Sweep")
+        self.resize(520, 520)
+        self.target_dir = Path(target_dir)
+
+        # === Шаблон ===
+        self.template_combo = QComboBox()
+        for template in templates:
+            self.template_combo.addItem(template.name, str(template))
+        self.prefix_input = QLineEdit()
+        self.prefix_input.setPlaceholderText("template name")
+
+        # === Геометрии ===
+        self.geometry_list = QListWidget()
+        add_geom_btn = QPushButton("Add .xyz...")
+        add_geom_btn.clicked.connect(self._add_geometries)
+        remove_geom_btn = QPushButton("Remove")
+        remove_geom_btn.clicked.connect(self._remove_geometry)
+        geom_buttons = QHBoxLayout()
+        geom_buttons.addWidget(add_geom_btn)
+        geom_buttons.addWidget(remove_geom_btn)
+        geom_buttons.addStretch()
+        geom_group = QGroupBox("Geometries (multi-frame .xyz = one input per frame; empty = template)")
+        geom_layout = QVBoxLayout()
+        geom_layout.addWidget(self.geometry_list)
+        geom_layout.addLayout(geom_buttons)
+        geom_group.setLayout(geom_layout)
+
+        # === Параметры ===
+        self.functionals_input = QLineEdit()
+        self.functionals_input.setPlaceholderText("e.g. B3LYP PBE0 r2SCAN-3c")
+        self.basis_input = QLineEdit()
+        self.basis_input.setPlaceholderText("e.g. def2-SVP def2-TZVP")
+        self.charges_input = QLineEdit()
+        self.charges_input.setPlaceholderText("e.g. 0 1 -1")
+        self.mults_input = QLineEdit()
+        self.mults_input.setPlaceholderText("empty = template, fixed by electron parity")
+        self.temps_input = QLineEdit()
+        self.temps_input.setPlaceholderText("e.g. 298.15 323")
+
+        form = QFormLayout()
+        form.addRow("Template:", self.template_combo)
+        form.addRow("Name prefix:", self.prefix_input)
+        form.addRow("Functionals:", self.functionals_input)
+        form.addRow("Basis sets:", self.basis_input)
+        form.addRow("Charges:", self.charges_input)
+        form.addRow("Multiplicities:", self.mults_input)
+        form.addRow("Temperatures (K):", self.temps_input)
+
+        self.summary_label = QLabel()
+        for edit in (self.functionals_input, self.basis_input, self.charges_input,
+                     self.mults_input, self.temps_input):
+            edit.textChanged.connect(self._update_summary)
+
+        # === Кнопки ===
+        btn_create = QPushButton("Create && Queue")
+        btn_cancel = QPushButton("Cancel")
+        btn_create.clicked.connect(self._on_accept)
+        btn_cancel.clicked.connect(self.reject)
+        btn_layout = QHBoxLayout()
+        btn_layout.addWidget(self.summary_label)
+        btn_layout.addStretch()
+        btn_layout.addWidget(btn_create)
+        btn_layout.addWidget(btn_cancel)
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(f"Output folder: {self.target_dir}"))
+        layout.addLayout(form)
+        layout.addWidget(geom_group)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+        self._update_summary()
+
+    def _add_geometries(self):
+        files, _ = QFileDialog.getOpenFileNames(
+            self, "Select geometries", str(self.target_dir), "XYZ files (*.xyz)"
+        )
+        for file in files:
+            self.geometry_list.addItem(file)
+        self._update_summary()
+
+    def _remove_geometry(self):
+        for item in self.geometry_list.selectedItems():
+            self.geometry_list.takeItem(self.geometry_list.row(item))
+        self._update_summary()
+
+    def _update_summary(self):
+        try:
+            spec = self.get_spec()
+        except ValueError:
+            self.summary_label.setText("Invalid values")
+            return
+        count = 1
+        for values in (spec.functionals, spec.basis_sets, spec.charges,
+                       spec.multiplicities, spec.temperatures):
+            count *= max(len(values), 1)
+        geometries = len(spec.geometries)
+        suffix = f" × frames of {geometries} file(s)" if geometries else ""
+        self.summary_label.setText(f"{count} input(s){suffix}")
+
+    def _on_accept(self):
+        try:
+            self.get_spec()
+        except ValueError:
+            self.summary_label.setText("Charges, multiplicities and temperatures must be numbers")
+            return
+        self.accept()
+
+    def get_spec(self) -> SweepSpec:
+        return SweepSpec(
+            template=Path(self.template_combo.currentData() or ""),
+            geometries=[Path(self.geometry_list.item(i).text()) for i in range(self.geometry_list.count())],
+            functionals=_split(self.functionals_input.text()),
+            basis_sets=_split(self.basis_input.text()),
+            charges=[int(v) for v in _split(self.charges_input.text())],
+            multiplicities=[int(v) for v in _split(self.mults_input.text())],
+            temperatures=[float(v) for v in _split(self.temps_input.text())],
+            prefix=self.prefix_input.text().strip(),
+        )
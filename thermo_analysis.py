@@ -0,0 +1,387 @@
+# thermo_analysis.py
+"""
+Энергии реакций, барьеры и больцмановские ансамбли конформеров по parse.json проекта.
+
+    python thermo_analysis.py project/
+
+Реакции и группы конформеров задаются в project/analysis.json по именам расчётов:
+
+    {
+      "temperature": 298.15,
+      "corrections": {"ts1_sp": "ts1_freq"},
+      "ensembles": {"A": ["A_c1", "A_c2"], "B": "B_conf*"},
+      "reactions": {
+        "step1": {"reactants": {"A": 1, "B": 1}, "products": {"C": 1}, "ts": "ts1_sp"}
+      }
+    }
+
+corrections — из какого расчёта брать термические поправки (ZPE, H-E(el), G-E(el))
+для расчёта с одной электронной энергией (одноточечный расчёт на уровне выше).
+Ансамбль — список имён или шаблон (fnmatch); члены взвешиваются по Больцману по G
+("boltzmann": "E" / "E0" / "H" — по другой величине, для всего файла или ансамбля).
+В реакции ансамбль входит как одно вещество: G ансамбля — -RT·ln Σ exp(-G_i/RT)
+(с конформационной энтропией), E, E0 и H — средние с больцмановскими весами.
+
+Определения компилируются в массивы индексов один раз на набор расчётов, поэтому
+пересчёт после изменения parse.json — несколько векторных операций NumPy.
+"""
+import argparse
+import fnmatch
+import json
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from results_store import HARTREE_TO_KCAL, ResultsTable
+
+ANALYSIS_FILE_NAME = "analysis.json"
+
+# Постоянная Больцмана, Хартри/К
+BOLTZMANN_HARTREE = 3.166811563e-6
+DEFAULT_TEMPERATURE = 298.15
+
+# Величины для реакций: E — электронная энергия, E0 — с ZPE, H — энтальпия, G — свободная энергия
+QUANTITIES = ("E", "E0", "H", "G")
+
+
+@dataclass
+class Reaction:
+    name: str
+    reactants: dict[str, float]
+    products: dict[str, float]
+    ts: str | None = None
+
+
+@dataclass
+class Ensemble:
+    name: str
+    members: list[str] | str
+    boltzmann: str = "G"
+
+
+@dataclass
+class AnalysisDefinition:
+    temperature: float = DEFAULT_TEMPERATURE
+    corrections: dict[str, str] = field(default_factory=dict)
+    ensembles: list[Ensemble] = field(default_factory=list)
+    reactions: list[Reaction] = field(default_factory=list)
+
+
+def _quantity(value, where: str) -> str:
+    if value not in QUANTITIES:
+        raise ValueError(f"{where}: unknown quantity {value!r} (expected one of {', '.join(QUANTITIES)})")
+    return value
+
+
+def _stoichiometry(value, where: str) -> dict[str, float]:
+    if isinstance(value, str):
+        value = [value]
+    if isinstance(value, list):
+        value = {name: 1 for name in value}
+    if not isinstance(value, dict) or not value:
+        raise ValueError(f"{where}: expected a calculation name, a list of names or {{name: coefficient}}")
+    try:
+        return {str(name): float(coefficient) for name, coefficient in value.items()}
+    except (TypeError, ValueError):
+        raise ValueError(f"{where}: coefficients must be numbers") from None
+
+
+def parse_definition(data: dict) -> AnalysisDefinition:
+    """Определение из словаря analysis.json; ValueError — с указанием, что не так"""
+    if not isinstance(data, dict):
+        raise ValueError("analysis.json must contain a JSON object")
+    try:
+        temperature = float(data.get("temperature", DEFAULT_TEMPERATURE))
+    except (TypeError, ValueError):
+        raise ValueError("temperature must be a number") from None
+    if temperature <= 0:
+        raise ValueError("temperature must be positive")
+    default_boltzmann = _quantity(data.get("boltzmann", "G"), "boltzmann")
+
+    corrections = data.get("corrections", {})
+    if not isinstance(corrections, dict):
+        raise ValueError("corrections must map calculation names to frequency calculations")
+
+    ensembles = []
+    for name, spec in (data.get("ensembles") or {}).items():
+        boltzmann = default_boltzmann
+        if isinstance(spec, dict):
+            boltzmann = _quantity(spec.get("boltzmann", default_boltzmann), f"ensemble {name}")
+            spec = spec.get("members")
+        if not spec or not isinstance(spec, (str, list)):
+            raise ValueError(f"ensemble {name}: members must be a list of names or a pattern")
+        ensembles.append(Ensemble(name, spec if isinstance(spec, str) else [str(m) for m in spec], boltzmann))
+
+    reactions = []
+    for name, spec in (data.get("reactions") or {}).items():
+        if not isinstance(spec, dict) or "reactants" not in spec:
+            raise ValueError(f"reaction {name}: expected {{\"reactants\": ..., \"products\": ..., \"ts\": ...}}")
+        products = _stoichiometry(spec["products"], f"reaction {name} products") if spec.get("products") else {}
+        ts = spec.get("ts")
+        if not products and not ts:
+            raise ValueError(f"reaction {name}: needs products or a transition state")
+        reactions.append(Reaction(name, _stoichiometry(spec["reactants"], f"reaction {name} reactants"),
+                                  products, str(ts) if ts else None))
+    return AnalysisDefinition(temperature, {str(k): str(v) for k, v in corrections.items()}, ensembles, reactions)
+
+
+def load_definition(project_root: Path) -> AnalysisDefinition:
+    """analysis.json проекта; нет файла — пустое определение"""
+    path = Path(project_root) / ANALYSIS_FILE_NAME
+    if not path.is_file():
+        return AnalysisDefinition()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return parse_definition(data)
+    except ValueError as e:  # в т.ч. JSONDecodeError
+        raise ValueError(f"{ANALYSIS_FILE_NAME}: {e}") from None
+
+
+def species_quantities(table: ResultsTable, source: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    E, E0, H, G каждого расчёта (Хартри). Поправки берутся из расчёта source[i]
+    (частоты), электронная энергия — из самого расчёта; нет поправки — NaN.
+    """
+    energy = table.column("Energy")
+    # E(el) расчёта частот: отдельная строка термохимии, иначе его финальная энергия
+    reference = np.where(np.isnan(table.column("Electronic energy")), energy, table.column("Electronic energy"))
+    g_correction = table.column("G-E(el)")
+    g_correction = np.where(np.isnan(g_correction), table.column("Gibbs") - reference, g_correction)
+    h_correction = table.column("Enthalpy") - reference
+    return {
+        "E": energy,
+        "E0": energy + table.column("ZPE")[source],
+        "H": energy + h_correction[source],
+        "G": energy + g_correction[source],
+    }
+
+
+@dataclass
+class AnalysisResult:
+    reactions: ResultsTable
+    ensembles: ResultsTable
+    populations: ResultsTable
+    warnings: list[str]
+
+
+class ThermoAnalysis:
+    """
+    Определение, скомпилированное под набор расчётов таблицы: индексы членов
+    ансамблей и слагаемых реакций. compute() только выполняет векторные операции;
+    перекомпиляция — при изменении набора имён расчётов.
+    """
+
+    def __init__(self, definition: AnalysisDefinition):
+        self.definition = definition
+        self._names: np.ndarray | None = None
+        self.warnings: list[str] = []
+
+    def _compile(self, names: np.ndarray):
+        definition = self.definition
+        index = {str(name): i for i, name in enumerate(names)}
+        count = len(names)
+        warnings = []
+
+        def lookup(name: str, where: str) -> int | None:
+            i = index.get(name)
+            if i is None:
+                warnings.append(f"{where}: no results for {name}")
+            return i
+
+        # Откуда брать поправки каждого расчёта (по умолчанию — из него самого)
+        self._source = np.arange(count)
+        for target, freq in definition.corrections.items():
+            i, j = index.get(target), lookup(freq, f"corrections for {target}")
+            if i is not None and j is not None:
+                self._source[i] = j
+
+        # Члены ансамблей подряд: members[starts[k]:starts[k + 1]] — ансамбль k
+        members, groups = [], []
+        for k, ensemble in enumerate(definition.ensembles):
+            if isinstance(ensemble.members, str):
+                found = [index[name] for name in fnmatch.filter(index, ensemble.members)]
+            else:
+                found = [i for i in (lookup(m, f"ensemble {ensemble.name}") for m in ensemble.members)
+                         if i is not None]
+            if not found:
+                warnings.append(f"ensemble {ensemble.name}: no conformers found")
+            members += found
+            groups += [k] * len(found)
+        self._members = np.array(members, dtype=np.intp)
+        self._groups = np.array(groups, dtype=np.intp)
+        sizes = np.bincount(self._groups, minlength=len(definition.ensembles))
+        self._nonempty = np.nonzero(sizes)[0]
+        self._starts = np.concatenate(([0], np.cumsum(sizes)))[self._nonempty]
+        # По какой величине взвешивать: номер в QUANTITIES для каждого члена
+        boltzmann = np.array([QUANTITIES.index(e.boltzmann) for e in definition.ensembles], dtype=np.intp)
+        self._member_quantity = boltzmann[self._groups]
+        self._free_energy = boltzmann == QUANTITIES.index("G")
+
+        # Вещества реакций: расчёты, затем ансамбли (ансамбль с тем же именем важнее)
+        species = dict(index)
+        species.update({e.name: count + k for k, e in enumerate(definition.ensembles)})
+        rows, terms, coefficients = [], [], []
+        ts_rows, ts_terms = [], []
+        for r, reaction in enumerate(definition.reactions):
+            stoichiometry = [(name, -c) for name, c in reaction.reactants.items()]
+            stoichiometry += [(name, c) for name, c in reaction.products.items()]
+            missing = [name for name, _ in stoichiometry if name not in species]
+            if reaction.ts and reaction.ts not in species:
+                missing.append(reaction.ts)
+            for name in missing:
+                warnings.append(f"reaction {reaction.name}: no results for {name}")
+            for name, coefficient in stoichiometry:
+                rows.append(r)
+                terms.append(species.get(name, -1))
+                coefficients.append(coefficient)
+            if reaction.ts:
+                # Барьер: TS минус реагенты (без продуктов)
+                ts_rows.append(r)
+                ts_terms.append(species.get(reaction.ts, -1))
+        self._rows = np.array(rows, dtype=np.intp)
+        self._terms = np.array(terms, dtype=np.intp)
+        self._coefficients = np.array(coefficients, dtype=float)
+        self._reactant = self._coefficients < 0
+        self._ts_rows = np.array(ts_rows, dtype=np.intp)
+        self._ts_terms = np.array(ts_terms, dtype=np.intp)
+        self._names = names
+        self.warnings = warnings
+
+    def _average(self, values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Средние по ансамблям с весами членов, у которых значение есть (веса перенормируются)"""
+        result = np.full(len(self.definition.ensembles), np.nan)
+        if len(self._members):
+            present = ~np.isnan(values)
+            w = np.where(present, weights, 0.0)
+            norm = np.add.reduceat(w, self._starts)
+            total = np.add.reduceat(np.where(present, values, 0.0) * w, self._starts)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[self._nonempty] = np.where(norm > 0, total / norm, np.nan)
+        return result
+
+    def _boltzmann_weights(self, quantities: dict[str, np.ndarray]):
+        """Энергии членов, минимум и ln Σ exp(-(E_i - E_min)/RT) по ансамблям, веса (сумма 1)"""
+        n = len(self.definition.ensembles)
+        rt = BOLTZMANN_HARTREE * self.definition.temperature
+        stacked = np.stack([quantities[quantity] for quantity in QUANTITIES])
+        energy = stacked[self._member_quantity, self._members]
+        lowest = np.full(n, np.nan)
+        log_sum = np.full(n, np.nan)
+        weights = np.zeros(len(self._members))
+        if len(self._members):
+            lowest[self._nonempty] = np.fmin.reduceat(energy, self._starts)
+            # logsumexp: экспонента от разности с минимумом не переполняется; нет энергии — вес 0
+            weights = np.exp(-np.nan_to_num((energy - lowest[self._groups]) / rt, nan=np.inf))
+            totals = np.zeros(n)
+            totals[self._nonempty] = np.add.reduceat(weights, self._starts)
+            with np.errstate(divide='ignore'):
+                log_sum = np.where(totals > 0, np.log(np.where(totals > 0, totals, 1.0)), np.nan)
+            weights = weights / np.where(totals > 0, totals, 1.0)[self._groups]
+        return energy, lowest, log_sum, weights
+
+    def compute(self, table: ResultsTable) -> AnalysisResult:
+        if self._names is None or not np.array_equal(self._names, table.names):
+            self._compile(table.names)
+        definition = self.definition
+        quantities = species_quantities(table, self._source)
+        energy, lowest, log_sum, weights = self._boltzmann_weights(quantities)
+        ensemble_values = {quantity: self._average(quantities[quantity][self._members], weights)
+                           for quantity in QUANTITIES}
+        # Свободная энергия ансамбля: -RT ln Σ exp(-G_i/RT) = G_min - RT ln Σ exp(-(G_i - G_min)/RT)
+        rt = BOLTZMANN_HARTREE * definition.temperature
+        ensemble_values["G"] = np.where(self._free_energy, lowest - rt * log_sum, ensemble_values["G"])
+
+        # Реакции: Σ ν·X по слагаемым; отсутствующее вещество (индекс -1) даёт NaN только своей реакции
+        n = len(definition.reactions)
+        reaction_columns = {}
+        for quantity in QUANTITIES:
+            values = np.concatenate((quantities[quantity], ensemble_values[quantity], [np.nan]))
+            delta = np.zeros(n)
+            np.add.at(delta, self._rows, self._coefficients * values[self._terms])
+            barrier = np.full(n, np.nan)
+            if len(self._ts_rows):
+                reactants = np.zeros(n)
+                np.add.at(reactants, self._rows[self._reactant],
+                          self._coefficients[self._reactant] * values[self._terms[self._reactant]])
+                barrier[self._ts_rows] = values[self._ts_terms] + reactants[self._ts_rows]
+            reaction_columns[f"Δ{quantity}, kcal/mol"] = delta * HARTREE_TO_KCAL
+            reaction_columns[f"Δ{quantity}‡, kcal/mol"] = barrier * HARTREE_TO_KCAL
+        # Реакции только с TS: Δ по продуктам не определена
+        no_products = np.array([not reaction.products for reaction in definition.reactions], dtype=bool)
+        for quantity in QUANTITIES:
+            reaction_columns[f"Δ{quantity}, kcal/mol"][no_products] = np.nan
+        reactions = _table([reaction.name for reaction in definition.reactions], reaction_columns)
+
+        # Ансамбли: свободная энергия, средние по всем числовым столбцам таблицы
+        ensemble_columns = {f"{q} (ensemble)": ensemble_values[q] for q in QUANTITIES}
+        for label in table.labels:
+            ensemble_columns[f"⟨{label}⟩"] = self._average(table.column(label)[self._members], weights)
+        ensembles = _table([e.name for e in definition.ensembles], ensemble_columns)
+
+        # Заселённости конформеров
+        names = [f"{definition.ensembles[g].name} / {table.names[i]}" for g, i in zip(self._groups, self._members)]
+        populations = _table(names, {
+            "Population, %": np.where(np.isnan(energy), np.nan, weights * 100.0),
+            "Relative energy, kcal/mol": (energy - lowest[self._groups]) * HARTREE_TO_KCAL,
+        })
+        return AnalysisResult(reactions, ensembles, populations, list(self.warnings))
+
+
+def _table(names: list[str], columns: dict[str, np.ndarray]) -> ResultsTable:
+    """ResultsTable без столбцов, где нет ни одного значения"""
+    return ResultsTable(names, {label: values for label, values in columns.items()
+                                if len(values) and not np.all(np.isnan(values))})
+
+
+def analyze(project_root: Path, table: ResultsTable = None) -> AnalysisResult:
+    analysis = ThermoAnalysis(load_definition(project_root))
+    return analysis.compute(table if table is not None else ResultsTable.load(project_root))
+
+
+def _format_table(title: str, table: ResultsTable) -> list[str]:
+    if not len(table):
+        return []
+    width = max(28, max(len(str(name)) for name in table.names) + 2)
+    widths = [max(12, len(label) + 2) for label in table.labels]
+    lines = [title, "  " + f"{'':{width}}" + "".join(f"{label:>{w}}" for label, w in zip(table.labels, widths))]
+    for row, name in enumerate(table.names):
+        cells = []
+        for label, w in zip(table.labels, widths):
+            value = table.columns[label][row]
+            cells.append(f"{'':>{w}}" if np.isnan(value) else
+                         f"{value:{w}.2f}" if "kcal" in label or "%" in label else f"{value:{w}.6f}")
+        lines.append("  " + f"{str(name):{width}}" + "".join(cells))
+    return lines + [""]
+
+
+def format_report(result: AnalysisResult) -> str:
+    lines = []
+    lines += _format_table("Reactions", result.reactions)
+    lines += _format_table("Conformer ensembles", result.ensembles)
+    lines += _format_table("Boltzmann populations", result.populations)
+    if result.warnings:
+        lines += ["Warnings"] + [f"  {warning}" for warning in result.warnings]
+    if not lines:
+        return f"No reactions or ensembles defined (see {ANALYSIS_FILE_NAME} in thermo_analysis.py)."
+    return "\n".join(lines).rstrip()
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="thermo_analysis", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("project", type=Path, help="project folder with parse.json and analysis.json")
+    args = parser.parse_args(argv)
+    try:
+        result = analyze(args.project)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print(format_report(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+# timing_dialog.py
+from pathlib import Path
+from PySide6.QtGui import QFontDatabase
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton
+
+import timing_report
+
+
+class TimingReportDialog(QDialog):
+    """Отчёт timing_report по открытому проекту"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Timing Report")
+        self.resize(1000, 600)
+        self.project_root: Path | None = None
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.text.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+
+        reload_btn = QPushButton("Reload")
+        reload_btn.clicked.connect(self.reload)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(reload_btn)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.text)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+    def set_project(self, project_root: Path):
+        self.project_root = Path(project_root)
+        self.setWindowTitle(f"Timing Report - {self.project_root.name}")
+        self.reload()
+
+    def reload(self):
+        if self.project_root is None:
+            return
+        self.text.setPlainText(timing_report.format_report(timing_report.load_jobs(self.project_root), top=50))
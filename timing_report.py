@@ -0,0 +1,148 @@
+# timing_report.py
+"""
+Отчёт о времени счёта проекта по parse.json: время модулей ORCA (Timings) и
+nprocs/maxcore/метод/число атомов входа (Input), которые записывает OrcaParser.
+
+    python timing_report.py project/
+
+Стоимость на атом — время (и ядро-секунды) на атом. Эффективность распараллеливания
+сравнивает задания одного метода с разным %pal по медиане времени на атом; это
+оценка: размеры молекул в группе должны быть близки.
+"""
+import argparse
+import json
+import statistics
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from results_store import PARSE_FILE_NAME
+
+
+@dataclass
+class JobTiming:
+    name: str
+    total: float
+    modules: dict[str, float] = field(default_factory=dict)
+    nprocs: int = 1
+    maxcore: int | None = None
+    method: str = ""
+    atoms: int | None = None
+
+    @property
+    def per_atom(self) -> float | None:
+        return self.total / self.atoms if self.atoms else None
+
+    @property
+    def core_seconds(self) -> float:
+        return self.total * self.nprocs
+
+    @property
+    def slowest_module(self) -> str:
+        return max(self.modules, key=self.modules.get) if self.modules else ""
+
+
+@dataclass
+class ScalingRow:
+    method: str
+    nprocs: int
+    jobs: int
+    per_atom: float
+    speedup: float
+    efficiency: float
+
+
+def load_jobs(project_root: Path) -> list[JobTiming]:
+    parse_file = Path(project_root) / PARSE_FILE_NAME
+    try:
+        with open(parse_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return []
+    jobs = []
+    for name, values in sorted(data.items() if isinstance(data, dict) else []):
+        timings = values.get("Timings") or {}
+        total = timings.get("total") or timings.get("sum")
+        if not total:
+            continue
+        meta = values.get("Input") or {}
+        jobs.append(JobTiming(name, total, dict(timings.get("modules", {})), meta.get("nprocs") or 1,
+                              meta.get("maxcore"), meta.get("method", ""), meta.get("atoms")))
+    return jobs
+
+
+def module_totals(jobs: list[JobTiming]) -> list[tuple[str, float, float, int]]:
+    """Модули по убыванию суммарного времени: (модуль, секунды, доля, число заданий)"""
+    totals, counts = {}, {}
+    for job in jobs:
+        for module, seconds in job.modules.items():
+            totals[module] = totals.get(module, 0.0) + seconds
+            counts[module] = counts.get(module, 0) + 1
+    overall = sum(totals.values())
+    return sorted(((module, seconds, seconds / overall if overall else 0.0, counts[module])
+                   for module, seconds in totals.items()), key=lambda row: -row[1])
+
+
+def parallel_scaling(jobs: list[JobTiming]) -> list[ScalingRow]:
+    """Ускорение и эффективность относительно наименьшего %pal в группе одного метода"""
+    groups: dict[str, dict[int, list[float]]] = {}
+    for job in jobs:
+        if job.per_atom is not None:
+            groups.setdefault(job.method, {}).setdefault(job.nprocs, []).append(job.per_atom)
+    rows = []
+    for method, by_nprocs in sorted(groups.items()):
+        if len(by_nprocs) < 2:
+            continue
+        reference = min(by_nprocs)
+        reference_cost = statistics.median(by_nprocs[reference])
+        for nprocs in sorted(by_nprocs):
+            cost = statistics.median(by_nprocs[nprocs])
+            speedup = reference_cost / cost
+            rows.append(ScalingRow(method, nprocs, len(by_nprocs[nprocs]), cost, speedup,
+                                   speedup * reference / nprocs))
+    return rows
+
+
+def format_report(jobs: list[JobTiming], top: int = 10) -> str:
+    if not jobs:
+        return "No ORCA timings in parse.json (they are recorded for outputs parsed from now on)."
+    lines = [f"{len(jobs)} jobs, {sum(j.total for j in jobs) / 3600:.2f} h wall, "
+             f"{sum(j.core_seconds for j in jobs) / 3600:.2f} core-h", ""]
+
+    lines += ["Slowest modules", f"  {'module':36}{'total, s':>12}{'share':>8}{'jobs':>6}"]
+    for module, seconds, share, count in module_totals(jobs)[:top]:
+        lines.append(f"  {module[:35]:36}{seconds:12.1f}{share:8.1%}{count:6d}")
+
+    scaling = parallel_scaling(jobs)
+    if scaling:
+        lines += ["", "Parallel efficiency (median s/atom per %pal, same method)",
+                  f"  {'method':36}{'nprocs':>7}{'jobs':>6}{'s/atom':>10}{'speedup':>9}{'eff.':>7}"]
+        for row in scaling:
+            lines.append(f"  {row.method[:35]:36}{row.nprocs:7d}{row.jobs:6d}{row.per_atom:10.2f}"
+                         f"{row.speedup:9.2f}{row.efficiency:7.0%}")
+
+    lines += ["", "Jobs by wall time",
+              f"  {'calculation':28}{'method':28}{'nprocs':>7}{'maxcore':>8}{'atoms':>6}{'wall, s':>10}"
+              f"{'s/atom':>9}{'core-s/atom':>12}  slowest module"]
+    for job in sorted(jobs, key=lambda j: -j.total)[:top]:
+        per_atom = f"{job.per_atom:9.2f}" if job.per_atom is not None else f"{'':9}"
+        core_per_atom = f"{job.core_seconds / job.atoms:12.1f}" if job.atoms else f"{'':12}"
+        atoms = f"{job.atoms:6d}" if job.atoms else f"{'':6}"
+        maxcore = f"{job.maxcore:8d}" if job.maxcore else f"{'':8}"
+        lines.append(f"  {job.name[:27]:28}{job.method[:27]:28}{job.nprocs:7d}{maxcore}{atoms}{job.total:10.1f}"
+                     f"{per_atom}{core_per_atom}  {job.slowest_module}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="timing_report", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("project", type=Path, help="project folder with parse.json")
+    parser.add_argument("--top", type=int, default=20, help="rows in module and job tables")
+    args = parser.parse_args(argv)
+    print(format_report(load_jobs(args.project), args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())